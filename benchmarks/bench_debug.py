@@ -0,0 +1,53 @@
+"""Benchmark a generated function full of assertions before and after debug stripping.
+
+Run with `python benchmarks/bench_debug.py`.
+"""
+
+from __future__ import annotations
+
+import time
+
+from synt.prelude import *
+
+
+def build_file() -> File:
+    """Build a file of a function checking its inputs and intermediate results."""
+    xs, acc, x = id_("xs"), id_("acc"), id_("x")
+    return File(
+        def_(id_("run"))(arg(xs)).block(
+            assert_(id_("isinstance").expr().call(xs, id_("list"))),
+            acc.expr().assign(litint(0)),
+            for_(x)
+            .in_(xs)
+            .block(
+                assert_(id_("isinstance").expr().call(x, id_("int")), litstr("int")),
+                assert_(x.expr().ge(litint(0))),
+                acc.expr().assign(acc.expr() + x),
+                debug_(assert_(acc.expr().ge(x))),
+            ),
+            return_(acc),
+        )
+    )
+
+
+def bench(name: str, code: str, calls: int) -> None:
+    namespace: dict[str, object] = {}
+    exec(code, namespace)  # noqa: S102
+    run = namespace["run"]
+    xs = list(range(100))
+    start = time.perf_counter()
+    for _ in range(calls):
+        run(xs)  # type:ignore[operator]
+    elapsed = time.perf_counter() - start
+    rate = calls / elapsed
+    print(f"{name:<12} {elapsed:8.3f}s  {rate:12.1f} calls/s")  # noqa: T201
+
+
+def main() -> None:
+    file = build_file()
+    bench("debug", file.into_str(), 20_000)
+    bench("production", file.into_str(debug=False), 20_000)
+
+
+if __name__ == "__main__":
+    main()
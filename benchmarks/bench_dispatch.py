@@ -0,0 +1,67 @@
+"""Benchmark generated `if`/`elif` chains before and after dict dispatch.
+
+Run with `python benchmarks/bench_dispatch.py`.
+"""
+
+from __future__ import annotations
+
+import time
+
+from synt.passes import DictDispatch
+from synt.passes import PassManager
+from synt.prelude import *
+
+
+def build_file(arms: int) -> File:
+    """Build a file of two functions testing a name against `arms` strings.
+
+    `code` returns a number per string, `render` formats its argument per string.
+    """
+    op, x = id_("op"), id_("x")
+    codes = if_(op.expr().eq(litstr("op0"))).block(return_(litint(0)))
+    renders = if_(op.expr().eq(litstr("op0"))).block(
+        return_(fstring("op0(", fnode(x), ")"))
+    )
+    for i in range(1, arms):
+        codes = codes.elif_(op.expr().eq(litstr(f"op{i}"))).block(return_(litint(i)))
+        renders = renders.elif_(op.expr().eq(litstr(f"op{i}"))).block(
+            return_(fstring(f"op{i}(", fnode(x), ")"))
+        )
+    return File(
+        def_(id_("code"))(arg(op)).block(codes.else_(return_(litint(-1)))),
+        def_(id_("render"))(arg(op), arg(x)).block(
+            renders.else_(return_(litstr("?")))
+        ),
+    )
+
+
+def bench(name: str, code: str, arms: int, calls: int) -> None:
+    namespace: dict[str, object] = {}
+    exec(code, namespace)  # noqa: S102
+    ops = [f"op{i}" for i in range(0, arms, 7)]
+    for fn in ("code", "render"):
+        f = namespace[fn]
+        args = (1,) if fn == "render" else ()
+        start = time.perf_counter()
+        for _ in range(calls):
+            for op in ops:
+                f(op, *args)  # type:ignore[operator]
+        elapsed = time.perf_counter() - start
+        rate = calls * len(ops) / elapsed
+        print(f"{name:<12} {fn:<8} {elapsed:8.3f}s  {rate:12.1f} calls/s")  # noqa: T201
+
+
+def main() -> None:
+    arms = 500
+    file = build_file(arms)
+    before = file.into_str()
+
+    report = PassManager(DictDispatch()).run(file)
+    print(report.summary())  # noqa: T201
+
+    bench("chain", before, arms, 200)
+    bench("dispatch", file.into_str(), arms, 200)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark generated calls to small helpers before and after inlining.
+
+Run with `python benchmarks/bench_inline.py`.
+"""
+
+from __future__ import annotations
+
+import time
+
+from synt.passes import FunctionInlining
+from synt.passes import PassManager
+from synt.prelude import *
+
+
+def build_file() -> File:
+    """Build a file of a function summing the squared distances of points to `q`.
+
+    The distance is computed by a small helper called for each point.
+    """
+    a, b, p, q, ps, total = (
+        id_("a"),
+        id_("b"),
+        id_("p"),
+        id_("q"),
+        id_("ps"),
+        id_("total"),
+    )
+    return File(
+        def_(id_("dist"))(arg(a), arg(b)).block(
+            return_(
+                (a.expr()[litint(0)] - b.expr()[litint(0)]).pow(litint(2))
+                + (a.expr()[litint(1)] - b.expr()[litint(1)]).pow(litint(2))
+            )
+        ),
+        def_(id_("run"))(arg(ps), arg(q)).block(
+            total.expr().assign(litint(0)),
+            for_(p)
+            .in_(ps)
+            .block(
+                total.expr().assign(total.expr() + id_("dist").expr().call(p, q)),
+            ),
+            return_(total),
+        ),
+    )
+
+
+def bench(name: str, code: str, calls: int) -> None:
+    namespace: dict[str, object] = {}
+    exec(code, namespace)  # noqa: S102
+    f = namespace["run"]
+    ps = [(i, i + 1) for i in range(1000)]
+    start = time.perf_counter()
+    for _ in range(calls):
+        f(ps, (1, 2))  # type:ignore[operator]
+    elapsed = time.perf_counter() - start
+    rate = calls / elapsed
+    print(f"{name:<12} {elapsed:8.3f}s  {rate:12.1f} calls/s")  # noqa: T201
+
+
+def main() -> None:
+    file = build_file()
+    before = file.into_str()
+
+    report = PassManager(FunctionInlining()).run(file)
+    print(report.summary())  # noqa: T201
+
+    bench("calls", before, 500)
+    bench("inlined", file.into_str(), 500)
+
+
+if __name__ == "__main__":
+    main()
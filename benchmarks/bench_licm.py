@@ -0,0 +1,71 @@
+"""Benchmark generated loops before and after loop-invariant code motion.
+
+Run with `python benchmarks/bench_licm.py`.
+"""
+
+from __future__ import annotations
+
+import time
+
+from types import SimpleNamespace
+
+from synt.passes import LoopInvariantCodeMotion
+from synt.passes import PassManager
+from synt.prelude import *
+
+
+def build_file(functions: int) -> File:
+    """Build a file of `functions` functions, each scaling rows in nested loops."""
+    body = []
+    for i in range(functions):
+        self, out, row, x = id_("self"), id_("out"), id_("row"), id_("x")
+        body.append(
+            def_(id_(f"f{i}"))(arg(self), arg(id_("rows"))).block(
+                out.expr().assign(list_()),
+                for_(row)
+                .in_(id_("rows"))
+                .block(
+                    for_(x)
+                    .in_(row)
+                    .block(
+                        out.expr()
+                        .attr("append")
+                        .call(
+                            x.expr() * self.expr().attr("cfg").expr().attr("scale")
+                            + id_("len").expr().call(self.expr().attr("names"))
+                        )
+                        .stmt(),
+                    ),
+                ),
+                return_(out),
+            )
+        )
+    return File(*body)
+
+
+def bench(name: str, code: str, calls: int) -> None:
+    namespace: dict[str, object] = {}
+    exec(code, namespace)  # noqa: S102
+    fn = namespace["f0"]
+    obj = SimpleNamespace(cfg=SimpleNamespace(scale=3), names=["a", "b"])
+    rows = [list(range(100))] * 100
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn(obj, rows)  # type:ignore[operator]
+    elapsed = time.perf_counter() - start
+    print(f"{name:<24} {elapsed:8.3f}s  {calls / elapsed:8.1f} calls/s")  # noqa: T201
+
+
+def main() -> None:
+    file = build_file(1_000)
+    before = file.into_str()
+
+    report = PassManager(LoopInvariantCodeMotion()).run(file)
+    print(report.summary())  # noqa: T201
+
+    bench("original", before, 200)
+    bench("hoisted", file.into_str(), 200)
+
+
+if __name__ == "__main__":
+    main()
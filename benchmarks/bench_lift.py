@@ -0,0 +1,67 @@
+"""Benchmark generated lambdas in loops before and after lambda lifting.
+
+Run with `python benchmarks/bench_lift.py`.
+"""
+
+from __future__ import annotations
+
+import time
+
+from synt.passes import LambdaLifting
+from synt.passes import PassManager
+from synt.prelude import *
+
+
+def build_file() -> File:
+    """Build a file of a function applying callbacks to the items of a list.
+
+    One callback reads nothing from the function, the other reads its argument.
+    """
+    x, xs, k, total = id_("x"), id_("xs"), id_("k"), id_("total")
+    apply = id_("apply").expr()
+    return File(
+        def_(id_("apply"))(arg(id_("f")), arg(x)).block(
+            return_(id_("f").expr().call(x))
+        ),
+        def_(id_("run"))(arg(xs), arg(k)).block(
+            total.expr().assign(litint(0)),
+            for_(x)
+            .in_(xs)
+            .block(
+                total.expr().assign(
+                    total.expr()
+                    + apply.call(lambda_(id_("v")).ret(id_("v").expr() + litint(1)), x)
+                    + apply.call(lambda_(id_("v")).ret(id_("v").expr() * k), x)
+                ),
+            ),
+            return_(total),
+        ),
+    )
+
+
+def bench(name: str, code: str, calls: int) -> None:
+    namespace: dict[str, object] = {}
+    exec(code, namespace)  # noqa: S102
+    f = namespace["run"]
+    xs = list(range(1000))
+    start = time.perf_counter()
+    for _ in range(calls):
+        f(xs, 3)  # type:ignore[operator]
+    elapsed = time.perf_counter() - start
+    rate = calls / elapsed
+    print(f"{name:<12} {elapsed:8.3f}s  {rate:12.1f} calls/s")  # noqa: T201
+
+
+def main() -> None:
+    file = build_file()
+    before = file.into_str()
+
+    report = PassManager(LambdaLifting()).run(file)
+    print(report.summary())  # noqa: T201
+
+    bench("lambdas", before, 500)
+    bench("lifted", file.into_str(), 500)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Benchmark a generated protocol decoder before and after match lowering.
+
+Run with `python benchmarks/bench_match.py`.
+"""
+
+from __future__ import annotations
+
+import time
+
+from synt.passes import MatchLowering
+from synt.passes import PassManager
+from synt.prelude import *
+
+
+def build_file(cases: int) -> File:
+    """Build a decoder matching a message code against `cases` integer literals."""
+    code, payload = id_("code"), id_("payload")
+    m = match_(code)
+    for i in range(cases):
+        m = m.case_(litint(i)).block(
+            return_(tup(litstr(f"msg{i}"), payload.expr()[litint(i % 4)]))
+        )
+    m = m.case_(UNDERSCORE).block(
+        raise_(id_("ValueError").expr().call(code)),
+    )
+    return File(def_(id_("decode"))(arg(code), arg(payload)).block(m))
+
+
+def bench(name: str, code: str, cases: int, calls: int) -> None:
+    namespace: dict[str, object] = {}
+    exec(code, namespace)  # noqa: S102
+    decode = namespace["decode"]
+    codes = list(range(0, cases, 3))
+    payload = b"abcd"
+    start = time.perf_counter()
+    for _ in range(calls):
+        for c in codes:
+            decode(c, payload)  # type:ignore[operator]
+    elapsed = time.perf_counter() - start
+    rate = calls * len(codes) / elapsed
+    print(f"{name:<12} {elapsed:8.3f}s  {rate:12.1f} calls/s")  # noqa: T201
+
+
+def main() -> None:
+    cases = 300
+    file = build_file(cases)
+    before = file.into_str()
+
+    report = PassManager(MatchLowering()).run(file)
+    print(report.summary())  # noqa: T201
+
+    bench("match", before, cases, 200)
+    bench("lowered", file.into_str(), cases, 200)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark generated predicates before and after peephole rewrites.
+
+Run with `python benchmarks/bench_peephole.py`.
+"""
+
+from __future__ import annotations
+
+import time
+
+from synt.passes import PassManager
+from synt.passes import PeepholeRewrite
+from synt.prelude import *
+
+
+def build_file() -> File:
+    """Build a file of a function testing its typed arguments in a loop."""
+    n, flag, xs, total = id_("n"), id_("flag"), id_("xs"), id_("total")
+    words = list_(*(litstr(f"w{i}") for i in range(16)))
+    return File(
+        def_(id_("score"))(
+            arg(n, id_("int")),
+            arg(flag, id_("bool")),
+            arg(id_("word"), id_("str")),
+            arg(xs, id_("list")),
+        ).block(
+            total.expr().assign(litint(0)),
+            for_(id_("_"))
+            .in_(id_("range").expr().call(litint(100)))
+            .block(
+                if_(
+                    id_("len")
+                    .expr()
+                    .call(xs)
+                    .eq(litint(0))
+                    .bool_and(flag.expr().eq(TRUE))
+                    .bool_and(not_(id_("word").expr().in_(words)))
+                ).block(total.expr().assign(total.expr() + n.expr().pow(litint(2)))),
+            ),
+            return_(total),
+        )
+    )
+
+
+def bench(name: str, code: str, calls: int) -> None:
+    namespace: dict[str, object] = {}
+    exec(code, namespace)  # noqa: S102
+    f = namespace["score"]
+    start = time.perf_counter()
+    for i in range(calls):
+        f(i, True, "w99", [])  # type:ignore[operator]
+    elapsed = time.perf_counter() - start
+    rate = calls / elapsed
+    print(f"{name:<12} {elapsed:8.3f}s  {rate:12.1f} calls/s")  # noqa: T201
+
+
+def main() -> None:
+    file = build_file()
+    before = file.into_str()
+
+    peephole = PeepholeRewrite()
+    report = PassManager(peephole).run(file)
+    print(report.summary())  # noqa: T201
+    print(dict(peephole.counts))  # noqa: T201
+
+    bench("original", before, 20000)
+    bench("peephole", file.into_str(), 20000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Benchmark generated lookups in literal tables before and after constant pooling.
+
+Run with `python benchmarks/bench_pool.py`.
+"""
+
+from __future__ import annotations
+
+import time
+
+from synt.passes import ConstantPooling
+from synt.passes import PassManager
+from synt.prelude import *
+
+
+def build_file() -> File:
+    """Build a file of functions looking keys up in the same configuration map."""
+    k = id_("k")
+    config = dict_(*(kv(litstr(f"key{i}"), litint(i)) for i in range(50)))
+    return File(
+        def_(id_("lookup"))(arg(k)).block(return_(config.attr("get").call(k))),
+        def_(id_("known"))(arg(k)).block(return_(k.expr().in_(config))),
+    )
+
+
+def bench(name: str, code: str, calls: int) -> None:
+    namespace: dict[str, object] = {}
+    exec(code, namespace)  # noqa: S102
+    lookup, known = namespace["lookup"], namespace["known"]
+    start = time.perf_counter()
+    for _ in range(calls):
+        lookup("key7")  # type:ignore[operator]
+        known("key8")  # type:ignore[operator]
+    elapsed = time.perf_counter() - start
+    rate = calls / elapsed
+    print(f"{name:<12} {elapsed:8.3f}s  {rate:12.1f} calls/s")  # noqa: T201
+
+
+def main() -> None:
+    file = build_file()
+    before = file.into_str()
+
+    report = PassManager(ConstantPooling()).run(file)
+    print(report.summary())  # noqa: T201
+
+    bench("literals", before, 100_000)
+    bench("pooled", file.into_str(), 100_000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark importing a generated library module before and after tree shaking.
+
+Run with `python benchmarks/bench_shake.py`.
+"""
+
+from __future__ import annotations
+
+import time
+
+from synt.prelude import *
+
+
+def build_file(size: int) -> File:
+    """Build a file of `size` small functions and classes, of which `main` uses two."""
+    x = id_("x")
+    statements = []
+    for i in range(size):
+        statements.append(
+            def_(id_(f"f{i}"))(arg(x)).block(return_(x.expr() * litint(i)))
+        )
+        statements.append(
+            class_(id_(f"C{i}"))().block(
+                def_(id_("get"))(arg(id_("self"))).block(return_(litint(i)))
+            )
+        )
+    statements.append(
+        def_(id_("main"))(arg(x)).block(
+            return_(
+                id_("f0").expr().call(x) + id_("C1").expr().call().attr("get").call()
+            )
+        )
+    )
+    return File(*statements)
+
+
+def bench(name: str, code: str, imports: int) -> None:
+    compiled = compile(code, "<generated>", "exec")
+    start = time.perf_counter()
+    for _ in range(imports):
+        exec(compiled, {})  # noqa: S102
+    elapsed = time.perf_counter() - start
+    rate = imports / elapsed
+    print(f"{name:<12} {elapsed:8.3f}s  {rate:12.1f} imports/s")  # noqa: T201
+
+
+def main() -> None:
+    file = build_file(1000)
+    before = file.into_str()
+
+    start = time.perf_counter()
+    removed = file.tree_shake(["main"])
+    elapsed = time.perf_counter() - start
+    print(f"removed {removed} definitions in {elapsed * 1000:.2f} ms")  # noqa: T201
+
+    bench("full", before, 20)
+    bench("shaken", file.into_str(), 20)
+
+
+if __name__ == "__main__":
+    main()
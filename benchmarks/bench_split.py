@@ -0,0 +1,58 @@
+"""Benchmark compiling a giant generated function before and after function splitting.
+
+Reports the compile time and the peak memory traced while compiling.
+
+Run with `python benchmarks/bench_split.py`.
+"""
+
+from __future__ import annotations
+
+import time
+import tracemalloc
+
+from synt.passes import FunctionSplitting
+from synt.passes import PassManager
+from synt.prelude import *
+
+
+def build_file(size: int) -> File:
+    """Build a file with a function of `size` chained assignments and branches."""
+    names = [id_(f"v{i % 64}") for i in range(size + 1)]
+    statements = [names[0].expr().assign(id_("n"))]
+    for i in range(1, size + 1):
+        v = names[i].expr()
+        statements.append(v.assign(names[i - 1].expr() * litint(3) + litint(i)))
+        statements.append(
+            if_((v % litint(7)).eq(litint(0))).block(v.assign(v + litint(1)))
+        )
+    statements.append(return_(names[-1]))
+    return File(def_(id_("run"))(arg(id_("n"))).block(*statements))
+
+
+def bench(name: str, code: str) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    compiled = compile(code, "<bench>", "exec")
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    namespace: dict[str, object] = {}
+    exec(compiled, namespace)  # noqa: S102
+    result = namespace["run"](1) % 1000  # type:ignore[operator]
+    print(f"{name:<12} {elapsed:8.3f}s  {peak / 2**20:8.1f} MiB  result {result}")  # noqa: T201
+
+
+def main() -> None:
+    for size in (5_000, 20_000):
+        file = build_file(size)
+        before = file.into_str()
+
+        report = PassManager(FunctionSplitting()).run(file)
+        print(report.summary())  # noqa: T201
+
+        bench(f"giant {size}", before)
+        bench(f"split {size}", file.into_str())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark generated string concatenations before and after string building.
+
+Run with `python benchmarks/bench_strings.py`.
+"""
+
+from __future__ import annotations
+
+import time
+
+from synt.passes import PassManager
+from synt.passes import StringBuilding
+from synt.prelude import *
+
+
+def build_file() -> File:
+    """Build a file of two functions concatenating strings.
+
+    `label` concatenates converted fields, `render` appends one line per item.
+    """
+    x, xs, out = id_("x"), id_("xs"), id_("out")
+    text = id_("str").expr()
+    label = litstr("<item")
+    for i in range(8):
+        label = label + litstr(f" f{i}=") + text.call(x.expr().attr("real") + litint(i))
+    return File(
+        def_(id_("label"))(arg(x)).block(return_(label + litstr(">"))),
+        def_(id_("render"))(arg(xs)).block(
+            out.expr().assign(litstr("")),
+            for_(x)
+            .in_(xs)
+            .block(
+                out.expr().assign(
+                    out.expr() + litstr("- ") + text.call(x) + litstr(";\n")
+                )
+            ),
+            return_(out),
+        ),
+    )
+
+
+def bench(name: str, code: str, calls: int) -> None:
+    namespace: dict[str, object] = {}
+    exec(code, namespace)  # noqa: S102
+    for fn, args in (("label", (12345,)), ("render", (list(range(2000)),))):
+        f = namespace[fn]
+        start = time.perf_counter()
+        for _ in range(calls):
+            f(*args)  # type:ignore[operator]
+        elapsed = time.perf_counter() - start
+        rate = calls / elapsed
+        print(f"{name:<12} {fn:<8} {elapsed:8.3f}s  {rate:12.1f} calls/s")  # noqa: T201
+
+
+def main() -> None:
+    file = build_file()
+    before = file.into_str()
+
+    report = PassManager(StringBuilding()).run(file)
+    print(report.summary())  # noqa: T201
+
+    bench("concat", before, 2000)
+    bench("built", file.into_str(), 2000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark full-tree traversals of a ~1M node file.
+
+Run with `python benchmarks/bench_visit.py`.
+"""
+
+from __future__ import annotations
+
+import time
+
+from synt.prelude import *
+from synt.visit import NodeTransformer
+from synt.visit import NodeVisitor
+from synt.visit import walk
+
+
+def build_file(statements: int) -> File:
+    """Build a file of `statements` assignments and branches, about 30 nodes each."""
+    body = []
+    for i in range(statements):
+        x, y = id_(f"x{i}").expr(), id_("y").expr()
+        body.append(
+            if_(x.gt(litint(i)).bool_and(y.attr("ok"))).block(
+                x.assign(y.attr("f").call(x * litint(2) + litint(1), key=litstr("k"))),
+            )
+        )
+    return File(*body)
+
+
+class CountVisitor(NodeVisitor):
+    def __init__(self) -> None:
+        self.count = 0
+
+    def visit_IntoCode(self, node: object) -> None:
+        self.count += 1
+
+
+class NoopTransformer(NodeTransformer):
+    def leave_Literal(self, node: object) -> object:
+        return node
+
+
+def bench(name: str, fn, nodes: int) -> None:  # type:ignore[no-untyped-def]
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<24} {elapsed:8.3f}s  {nodes / elapsed / 1e6:6.2f}M nodes/s")  # noqa: T201
+
+
+def main() -> None:
+    file = build_file(35_000)
+    nodes = sum(1 for _ in walk(file))
+    print(f"{nodes} nodes")  # noqa: T201
+
+    visitor = CountVisitor()
+    bench("walk()", lambda: sum(1 for _ in walk(file)), nodes)
+    bench("NodeVisitor.visit", lambda: visitor.visit(file), nodes)
+    bench("NodeTransformer.transform", lambda: NoopTransformer().transform(file), nodes)
+    bench("File.into_str", file.into_str, nodes)
+
+
+if __name__ == "__main__":
+    main()
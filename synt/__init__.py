@@ -10,13 +10,36 @@ __all__ = [
     "ty",
     "type_check",
     "file",
+    "quasi",
+    "batch",
+    "cache",
+    "compiler",
+    "passes",
+    "partial_eval",
+    "quote",
+    "specialize",
+    "vectorize",
+    "visit",
+    "Specializer",
 ]
 
+from synt.passes.partial import partial_eval
+from synt.quasi import quote
+from synt.specialize import Specializer
+
+from . import batch
+from . import cache
 from . import code
+from . import compiler
 from . import expr
 from . import file
+from . import passes
 from . import prelude
+from . import quasi
+from . import specialize
 from . import stmt
 from . import tokens
 from . import ty
 from . import type_check
+from . import vectorize
+from . import visit
@@ -0,0 +1,193 @@
+r"""## Batch kernels
+
+Generate functions filtering or projecting whole batches of rows in one loop.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "batch_cache",
+    "batch_kernel",
+]
+
+
+import ast
+import builtins
+
+from collections.abc import Mapping
+from types import CodeType
+from types import FunctionType
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Literal
+
+from synt.cache import LRUCache
+from synt.compiler import lower_expression
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Sequence
+
+    from synt.expr.expr import IntoExpression
+
+
+type _Layout = tuple[tuple[str, int | str], ...]
+
+batch_cache: LRUCache[tuple[str, _Layout, str], CodeType] = LRUCache(maxsize=256)
+"""Compiled batch kernels, keyed by the expression's structure, the row layout and the mode."""
+
+_ROW = "_row"
+_ROWS = "_rows"
+
+
+def batch_kernel(
+    expression: IntoExpression,
+    layout: Sequence[str] | Mapping[str, int | str],
+    *,
+    mode: Literal["filter", "map"] = "filter",
+    globals: Mapping[str, Any] | None = None,
+) -> Callable[[Sequence[Any]], list[Any]]:
+    r"""Compile an expression into a function over a batch of rows.
+
+    Names in the expression that appear in `layout` are fields of the current row,
+    and are rewritten into direct indexing of the row. Other names are looked up in `globals`.
+    The generated function is a single list comprehension:
+
+    ```python
+    # mode="filter"
+    lambda _rows: [_row for _row in _rows if <expression>]
+    # mode="map"
+    lambda _rows: [<expression> for _row in _rows]
+    ```
+
+    Args:
+        expression: A predicate (`"filter"`) or a projection (`"map"`) of a single row.
+        layout: Row layout. A sequence of names describes tuple rows, where each name is
+            the field at that position. A mapping gives each name's index or key,
+            e.g. dictionary keys for rows that are dicts.
+        mode: Whether to keep the rows satisfying the predicate,
+            or to collect the projection of each row.
+        globals: Global namespace of the function. Defaults to builtins only.
+
+    Raises:
+        ValueError: If the mode is unknown, or the expression cannot be compiled.
+
+    Examples:
+        ```python
+        from synt.batch import batch_kernel
+        adults = batch_kernel(
+            id_("age").expr().ge(litint(18)), {"age": "age"}
+        )
+        assert adults([{"age": 3}, {"age": 30}]) == [{"age": 30}]
+        names = batch_kernel(id_("name").expr().attr("upper").call(), ["id", "name"], mode="map")
+        assert names([(1, "a"), (2, "b")]) == ["A", "B"]
+        ```
+    """
+    if mode not in ("filter", "map"):
+        raise ValueError(f"Unknown batch kernel mode: {mode}")
+    lowered = lower_expression(expression)
+    fields: _Layout = tuple(
+        layout.items() if isinstance(layout, Mapping) else _tuple_fields(layout)
+    )
+    code = batch_cache.get_or_create(
+        (ast.dump(lowered), fields, mode),
+        lambda: _compile_kernel(lowered, dict(fields), mode),
+    )
+    namespace = dict(globals) if globals is not None else {}
+    namespace.setdefault("__builtins__", builtins)
+    return FunctionType(code, namespace, f"batch_{mode}")
+
+
+def _tuple_fields(names: Sequence[str]) -> list[tuple[str, int]]:
+    """Describe tuple rows whose fields are `names`, in order."""
+    return [(name, i) for i, name in enumerate(names)]
+
+
+def _compile_kernel(
+    lowered: ast.expr, fields: dict[str, int | str], mode: str
+) -> CodeType:
+    """Generate and compile the kernel's code object from a lowered expression."""
+    body = _FieldRewriter(fields).visit(lowered)
+    row = ast.Name(id=_ROW, ctx=ast.Load())
+    loop = ast.comprehension(
+        target=ast.Name(id=_ROW, ctx=ast.Store()),
+        iter=ast.Name(id=_ROWS, ctx=ast.Load()),
+        ifs=[body] if mode == "filter" else [],
+        is_async=0,
+    )
+    comp = ast.ListComp(elt=row if mode == "filter" else body, generators=[loop])
+    fn = ast.Lambda(
+        args=ast.arguments(
+            posonlyargs=[],
+            args=[ast.arg(arg=_ROWS)],
+            kwonlyargs=[],
+            kw_defaults=[],
+            defaults=[],
+        ),
+        body=comp,
+    )
+    module = compile(
+        ast.fix_missing_locations(ast.Expression(body=fn)), "<synt-batch>", "eval"
+    )
+    return next(c for c in module.co_consts if isinstance(c, CodeType))
+
+
+class _FieldRewriter(ast.NodeTransformer):
+    """Rewrite row fields into subscripts of the current row."""
+
+    fields: dict[str, int | str]
+    shadowed: list[set[str]]
+
+    def __init__(self, fields: dict[str, int | str]):
+        self.fields = fields
+        self.shadowed = []
+
+    def visit_Name(self, node: ast.Name) -> ast.expr:
+        if (
+            node.id not in self.fields
+            or not isinstance(node.ctx, ast.Load)
+            or any(node.id in s for s in self.shadowed)
+        ):
+            return node
+        return ast.Subscript(
+            value=ast.Name(id=_ROW, ctx=ast.Load()),
+            slice=ast.Constant(value=self.fields[node.id]),
+            ctx=ast.Load(),
+        )
+
+    def visit_Lambda(self, node: ast.Lambda) -> ast.expr:
+        # lambda parameters shadow row fields
+        self.shadowed.append({a.arg for a in node.args.args})
+        self.generic_visit(node)
+        self.shadowed.pop()
+        return node
+
+    def _visit_comprehension(self, node: ast.expr) -> ast.expr:
+        # the outermost iterable is evaluated outside the comprehension,
+        # while the targets shadow row fields everywhere else
+        first = node.generators[0]  # type:ignore[attr-defined]
+        first.iter = self.visit(first.iter)
+        targets = {
+            n.id
+            for g in node.generators  # type:ignore[attr-defined]
+            for n in ast.walk(g.target)
+            if isinstance(n, ast.Name)
+        }
+        self.shadowed.append(targets)
+        self.generic_visit(node)
+        self.shadowed.pop()
+        return node
+
+    def visit_ListComp(self, node: ast.ListComp) -> ast.expr:
+        return self._visit_comprehension(node)
+
+    def visit_SetComp(self, node: ast.SetComp) -> ast.expr:
+        return self._visit_comprehension(node)
+
+    def visit_DictComp(self, node: ast.DictComp) -> ast.expr:
+        return self._visit_comprehension(node)
+
+    def visit_GeneratorExp(self, node: ast.GeneratorExp) -> ast.expr:
+        return self._visit_comprehension(node)
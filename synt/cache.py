@@ -0,0 +1,241 @@
+r"""## Caches
+
+Bounded, thread-safe caches shared by Synt's compilers.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "CacheStats",
+    "BoundedCache",
+    "LRUCache",
+    "LFUCache",
+]
+
+
+import threading
+
+from abc import ABCMeta
+from abc import abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Hashable
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    r"""Snapshot of a cache's usage."""
+
+    hits: int
+    """Number of lookups served from the cache."""
+    misses: int
+    """Number of lookups that had to build a new value."""
+    evictions: int
+    """Number of entries dropped to stay within `maxsize`."""
+    size: int
+    """Number of entries currently cached."""
+    maxsize: int
+    """Maximum number of cached entries."""
+
+    @property
+    def hit_rate(self) -> float:
+        """Ratio of hits among all lookups, `0.0` if nothing was looked up yet."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class BoundedCache[K: Hashable, V](metaclass=ABCMeta):
+    r"""Thread-safe cache with a bounded number of entries.
+
+    Values are created on demand by [`get_or_create`][synt.cache.BoundedCache.get_or_create].
+    Concurrent misses on the same key are serialized by a per-key lock,
+    so each value is only built once while other keys stay available.
+
+    Subclasses decide which entry to evict when the cache is full.
+    """
+
+    maxsize: int
+    """Maximum number of cached entries."""
+
+    _data: OrderedDict[K, V]
+    """Cached entries, from the least to the most recently used one."""
+
+    __lock: threading.Lock
+    __pending: dict[K, threading.Lock]
+    __hits: int
+    __misses: int
+    __evictions: int
+
+    def __init__(self, maxsize: int = 1024):
+        """Initialize an empty cache.
+
+        Args:
+            maxsize: Maximum number of cached entries.
+
+        Raises:
+            ValueError: If `maxsize` is not positive.
+        """
+        if maxsize <= 0:
+            raise ValueError(f"Cache size must be positive, got {maxsize}.")
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__pending = {}
+        self.__hits = self.__misses = self.__evictions = 0
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_or_create(self, key: K, factory: Callable[[], V]) -> V:
+        """Get the value cached for `key`, creating and caching it on a miss.
+
+        `factory` runs outside the cache's global lock, so other keys can be looked up
+        while it runs. Callers missing the same key wait for the first one instead of
+        building the value again. If `factory` raises, nothing is cached.
+
+        Args:
+            key: Cache key.
+            factory: Builds the value on a miss.
+        """
+        with self.__lock:
+            if key in self._data:
+                return self.__hit(key)
+            key_lock = self.__pending.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self.__lock:
+                if key in self._data:
+                    # built by another caller while we were waiting
+                    return self.__hit(key)
+                self.__misses += 1
+            try:
+                value = factory()
+            except BaseException:
+                with self.__lock:
+                    self.__pending.pop(key, None)
+                raise
+            with self.__lock:
+                self.__pending.pop(key, None)
+                self._data[key] = value
+                self._on_insert(key)
+                while len(self._data) > self.maxsize:
+                    self._evict()
+                    self.__evictions += 1
+        return value
+
+    def __hit(self, key: K) -> V:
+        """Record a hit on a cached key. Must be called with the lock held."""
+        self.__hits += 1
+        self._data.move_to_end(key)
+        self._on_hit(key)
+        return self._data[key]
+
+    def _on_insert(self, key: K) -> None:  # noqa: B027
+        """Hook called when `key` is inserted. Called with the lock held."""
+
+    def _on_hit(self, key: K) -> None:  # noqa: B027
+        """Hook called when `key` is looked up successfully. Called with the lock held."""
+
+    @abstractmethod
+    def _evict(self) -> None:
+        """Drop one entry from `_data`. Called with the lock held."""
+
+    def clear(self) -> None:
+        """Drop all cached entries and reset the statistics."""
+        with self.__lock:
+            self._data.clear()
+            self._on_clear()
+            self.__hits = self.__misses = self.__evictions = 0
+
+    def _on_clear(self) -> None:  # noqa: B027
+        """Hook called when the cache is cleared. Called with the lock held."""
+
+    def stats(self) -> CacheStats:
+        """Get a snapshot of the cache's usage."""
+        with self.__lock:
+            return CacheStats(
+                hits=self.__hits,
+                misses=self.__misses,
+                evictions=self.__evictions,
+                size=len(self._data),
+                maxsize=self.maxsize,
+            )
+
+
+class LRUCache[K: Hashable, V](BoundedCache[K, V]):
+    r"""Cache evicting the least recently used entry.
+
+    Examples:
+        ```python
+        from synt.cache import LRUCache
+        cache = LRUCache(maxsize=2)
+        assert cache.get_or_create("a", lambda: 1) == 1
+        assert cache.get_or_create("a", lambda: 2) == 1
+        cache.get_or_create("b", lambda: 2)
+        cache.get_or_create("c", lambda: 3) # evicts "a"
+        assert "a" not in cache
+        assert cache.stats().hits == 1
+        ```
+    """
+
+    def _evict(self) -> None:
+        self._data.popitem(last=False)
+
+
+class LFUCache[K: Hashable, V](BoundedCache[K, V]):
+    r"""Cache evicting the least frequently used entry.
+
+    Ties are broken by evicting the least recently used entry among them.
+
+    Examples:
+        ```python
+        from synt.cache import LFUCache
+        cache = LFUCache(maxsize=2)
+        cache.get_or_create("a", lambda: 1)
+        cache.get_or_create("a", lambda: 1)
+        cache.get_or_create("b", lambda: 2)
+        cache.get_or_create("c", lambda: 3) # evicts "b"
+        assert "a" in cache and "b" not in cache
+        ```
+    """
+
+    __counts: dict[K, int]
+
+    def __init__(self, maxsize: int = 1024):
+        """Initialize an empty cache.
+
+        Args:
+            maxsize: Maximum number of cached entries.
+
+        Raises:
+            ValueError: If `maxsize` is not positive.
+        """
+        super().__init__(maxsize)
+        self.__counts = {}
+
+    def _on_insert(self, key: K) -> None:
+        self.__counts[key] = 1
+
+    def _on_hit(self, key: K) -> None:
+        self.__counts[key] += 1
+
+    def _evict(self) -> None:
+        # the newest entry must survive, otherwise it could never gain a count
+        newest = next(reversed(self._data))
+        victim = min(
+            (k for k in self._data if k != newest), key=self.__counts.__getitem__
+        )
+        del self._data[victim]
+        del self.__counts[victim]
+
+    def _on_clear(self) -> None:
+        self.__counts.clear()
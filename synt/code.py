@@ -8,9 +8,17 @@ __all__ = [
 
 from abc import ABCMeta
 from abc import abstractmethod
+from typing import ClassVar
 
 
 class IntoCode(metaclass=ABCMeta):
+    child_fields: ClassVar[tuple[str, ...]] = ()
+    """Names of the attributes holding child nodes, in evaluation order.
+
+    Each attribute holds a node, `None`, or a list of nodes and tuples of nodes.
+    Used by [`synt.visit`][synt.visit] to traverse the tree.
+    """
+
     @abstractmethod
     def into_code(self) -> str:
         """Converts the object into a string of Python code."""
@@ -0,0 +1,437 @@
+r"""## Compiler
+
+Compile Synt expressions into Python callables without going through source text.
+
+Expressions are lowered directly into the standard `ast` module's nodes and compiled
+with the built-in `compile`.
+Compiled code objects are kept in a bounded LRU cache keyed by the expression's structure
+and the argument signature, so building the same rule again reuses the compiled code.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "function_cache",
+    "lower_expression",
+    "compile_function",
+]
+
+
+import ast
+import builtins
+
+from types import CodeType
+from types import FunctionType
+from typing import TYPE_CHECKING
+from typing import Any
+
+from synt.cache import LRUCache
+from synt.expr.alias import Alias
+from synt.expr.attribute import Attribute
+from synt.expr.binary_op import BinaryOp
+from synt.expr.binary_op import BinaryOpType
+from synt.expr.call import Call
+from synt.expr.closure import Closure
+from synt.expr.comprehension import Comprehension
+from synt.expr.comprehension import GeneratorComprehension
+from synt.expr.condition import Condition
+from synt.expr.dict import DictComprehension
+from synt.expr.dict import DictVerbatim
+from synt.expr.empty import Empty
+from synt.expr.expr import ExprPrecedence
+from synt.expr.fstring import FormatString
+from synt.expr.list import ListComprehension
+from synt.expr.list import ListVerbatim
+from synt.expr.named_expr import NamedExpr
+from synt.expr.set import SetComprehension
+from synt.expr.set import SetVerbatim
+from synt.expr.subscript import Slice
+from synt.expr.subscript import Subscript
+from synt.expr.tuple import Tuple
+from synt.expr.unary_op import UnaryOp
+from synt.expr.unary_op import UnaryOpType
+from synt.expr.wrapped import Wrapped
+from synt.tokens.ident import IdentifierExpr
+from synt.tokens.kv_pair import KVPair
+from synt.tokens.lit import Literal
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Mapping
+    from collections.abc import Sequence
+
+    from synt.expr.expr import Expression
+    from synt.expr.expr import IntoExpression
+    from synt.tokens.ident import Identifier
+
+
+function_cache: LRUCache[tuple[str, tuple[str, ...]], CodeType] = LRUCache(
+    maxsize=1024
+)
+"""Compiled function bodies, keyed by the expression's structure and argument names.
+
+Call `function_cache.stats()` to inspect hit rates, or `function_cache.clear()` to reset it.
+"""
+
+
+def compile_function(
+    expression: IntoExpression,
+    args: Sequence[Identifier] = (),
+    *,
+    name: str = "<synt>",
+    globals: Mapping[str, Any] | None = None,
+) -> Callable[..., Any]:
+    r"""Compile an expression into a function returning its value.
+
+    The compiled code is cached in [`function_cache`][synt.compiler.function_cache],
+    so compiling a structurally identical expression with the same arguments skips compilation,
+    and only binds a new function object to `globals`.
+    Expressions are compared by their lowered `ast` tree, as different trees
+    may render the same code, e.g. without the parentheses they need.
+
+    Args:
+        expression: The function's return value.
+        args: Positional argument names.
+        name: The function's `__name__`.
+        globals: Global namespace of the function. Defaults to one containing only builtins.
+
+    Raises:
+        ValueError: If the expression contains nodes that have no standalone value,
+            such as aliases or empty expressions.
+
+    Examples:
+        ```python
+        rule = id_("row").expr()[litstr("age")].ge(litint(18))
+        is_adult = rule.compile_function(args=[id_("row")])
+        assert is_adult({"age": 20})
+        assert not is_adult({"age": 3})
+        ```
+    """
+    body = lower_expression(expression)
+    arg_names = tuple(a.raw for a in args)
+    code = function_cache.get_or_create(
+        (ast.dump(body), arg_names),
+        lambda: _compile_code(body, arg_names),
+    )
+    namespace = dict(globals) if globals is not None else {}
+    namespace.setdefault("__builtins__", builtins)
+    return FunctionType(code, namespace, name)
+
+
+def _compile_code(body: ast.expr, arg_names: tuple[str, ...]) -> CodeType:
+    """Compile the code object of a lambda returning a lowered expression."""
+    fn = ast.Lambda(
+        args=ast.arguments(
+            posonlyargs=[],
+            args=[ast.arg(arg=n) for n in arg_names],
+            kwonlyargs=[],
+            kw_defaults=[],
+            defaults=[],
+        ),
+        body=body,
+    )
+    tree = ast.fix_missing_locations(ast.Expression(body=fn))
+    module = compile(tree, "<synt>", "eval")
+    return next(c for c in module.co_consts if isinstance(c, CodeType))
+
+
+def lower_expression(expression: IntoExpression) -> ast.expr:
+    r"""Lower an expression into an `ast` expression node with the same semantics.
+
+    Operands that are rendered without parentheses are regrouped the same way Python
+    would parse the rendered code, e.g. nested comparisons become a comparison chain.
+
+    Args:
+        expression: The expression to lower.
+
+    Raises:
+        ValueError: If the expression contains nodes that have no standalone value,
+            such as aliases or empty expressions.
+
+    Examples:
+        ```python
+        import ast
+        from synt.compiler import lower_expression
+        node = lower_expression(id_("a").expr().lt(id_("b")).lt(id_("c")))
+        assert ast.unparse(node) == "a < b < c"
+        ```
+    """
+    return _lower(expression.into_expression())
+
+
+_BIN_OPS: dict[BinaryOpType, type[ast.operator]] = {
+    BinaryOpType.Add: ast.Add,
+    BinaryOpType.Sub: ast.Sub,
+    BinaryOpType.Mul: ast.Mult,
+    BinaryOpType.Div: ast.Div,
+    BinaryOpType.FloorDiv: ast.FloorDiv,
+    BinaryOpType.Mod: ast.Mod,
+    BinaryOpType.Pow: ast.Pow,
+    BinaryOpType.At: ast.MatMult,
+    BinaryOpType.LShift: ast.LShift,
+    BinaryOpType.RShift: ast.RShift,
+    BinaryOpType.BitAnd: ast.BitAnd,
+    BinaryOpType.BitOr: ast.BitOr,
+    BinaryOpType.BitXor: ast.BitXor,
+}
+_CMP_OPS: dict[BinaryOpType, type[ast.cmpop]] = {
+    BinaryOpType.In: ast.In,
+    BinaryOpType.NotIn: ast.NotIn,
+    BinaryOpType.Is: ast.Is,
+    BinaryOpType.IsNot: ast.IsNot,
+    BinaryOpType.Less: ast.Lt,
+    BinaryOpType.LessEqual: ast.LtE,
+    BinaryOpType.Greater: ast.Gt,
+    BinaryOpType.GreaterEqual: ast.GtE,
+    BinaryOpType.Equal: ast.Eq,
+    BinaryOpType.NotEqual: ast.NotEq,
+}
+_BOOL_OPS: dict[BinaryOpType, type[ast.boolop]] = {
+    BinaryOpType.BoolAnd: ast.And,
+    BinaryOpType.BoolOr: ast.Or,
+}
+_UNARY_OPS: dict[UnaryOpType, type[ast.unaryop]] = {
+    UnaryOpType.Positive: ast.UAdd,
+    UnaryOpType.Neg: ast.USub,
+    UnaryOpType.BitNot: ast.Invert,
+    UnaryOpType.BoolNot: ast.Not,
+}
+
+
+def _lower(e: Expression) -> ast.expr:
+    """Lower a single expression."""
+    match e:
+        case IdentifierExpr():
+            return ast.Name(id=e.ident.raw, ctx=ast.Load())
+        case Literal():
+            return _literal(e.lit)
+        case Wrapped():
+            return _lower(e.inner)
+        case BinaryOp():
+            return _binary(e)
+        case UnaryOp():
+            return _unary(e)
+        case Attribute():
+            return ast.Attribute(
+                value=_lower(e.target), attr=e.attribute_name, ctx=ast.Load()
+            )
+        case Call():
+            return _call(e)
+        case Subscript():
+            return _subscript(e)
+        case Condition():
+            return ast.IfExp(
+                test=_lower(e.condition),
+                body=_lower(e.true_expr),
+                orelse=_lower(e.false_expr),
+            )
+        case Closure():
+            return ast.Lambda(
+                args=ast.arguments(
+                    posonlyargs=[],
+                    args=[ast.arg(arg=a.raw) for a in e.args],
+                    kwonlyargs=[],
+                    kw_defaults=[],
+                    defaults=[],
+                ),
+                body=_lower(e.body),
+            )
+        case NamedExpr():
+            return ast.NamedExpr(
+                target=ast.Name(id=e.receiver.raw, ctx=ast.Store()), value=_lower(e.value)
+            )
+        case Tuple():
+            return ast.Tuple(elts=[_lower(x) for x in e.items], ctx=ast.Load())
+        case ListVerbatim():
+            return ast.List(elts=[_lower(x) for x in e.items], ctx=ast.Load())
+        case SetVerbatim():
+            return ast.Set(elts=[_lower(x) for x in e.items])
+        case DictVerbatim():
+            return ast.Dict(
+                keys=[_lower(x.key) for x in e.items],
+                values=[_lower(x.value) for x in e.items],
+            )
+        case ListComprehension():
+            return ast.ListComp(
+                elt=_lower(e.comprehension.elt),
+                generators=_generators(e.comprehension),
+            )
+        case SetComprehension():
+            return ast.SetComp(
+                elt=_lower(e.comprehension.elt),
+                generators=_generators(e.comprehension),
+            )
+        case GeneratorComprehension():
+            return ast.GeneratorExp(
+                elt=_lower(e.comprehension.elt),
+                generators=_generators(e.comprehension),
+            )
+        case DictComprehension() if isinstance(e.comprehension.elt, KVPair):
+            return ast.DictComp(
+                key=_lower(e.comprehension.elt.key),
+                value=_lower(e.comprehension.elt.value),
+                generators=_generators(e.comprehension),
+            )
+        case FormatString():
+            return _fstring(e)
+        case Empty() | Alias() | KVPair():
+            raise ValueError(
+                f"Expression has no standalone value: `{e.into_code()}` ({type(e).__name__})"
+            )
+        case _:
+            raise ValueError(f"Unsupported expression: `{e.into_code()}`")
+
+
+def _literal(lit: str) -> ast.expr:
+    """Lower a literal's source text."""
+    try:
+        return ast.Constant(value=ast.literal_eval(lit))
+    except (ValueError, SyntaxError):
+        # not a constant, e.g. `_` in patterns
+        return ast.parse(lit, mode="eval").body
+
+
+def _operands(
+    e: Expression, prec: ExprPrecedence, items: list[Expression | BinaryOpType]
+) -> None:
+    """Flatten unparenthesized operations of the same precedence into `items`.
+
+    The result alternates between operands and operators, which is exactly the token
+    sequence Python sees in the rendered code.
+    """
+    if isinstance(e, BinaryOp) and e.precedence == prec:
+        _operands(e.left, prec, items)
+        items.append(e.op_type)
+        _operands(e.right, prec, items)
+    else:
+        items.append(e)
+
+
+def _binary(e: BinaryOp) -> ast.expr:
+    """Lower a binary operation, regrouping its operands the way the rendered code parses."""
+    items: list[Expression | BinaryOpType] = []
+    _operands(e, e.precedence, items)
+    operands: list[ast.expr] = [_lower(x) for x in items[::2]]  # type:ignore[arg-type]
+    ops: list[BinaryOpType] = items[1::2]  # type:ignore[assignment]
+
+    if e.precedence == ExprPrecedence.Comparative:
+        return ast.Compare(
+            left=operands[0],
+            ops=[_CMP_OPS[op]() for op in ops],
+            comparators=operands[1:],
+        )
+    if e.op_type in _BOOL_OPS:
+        return ast.BoolOp(op=_BOOL_OPS[e.op_type](), values=operands)
+    if e.op_type == BinaryOpType.Pow:
+        # right-associative
+        res = operands[-1]
+        for op, lhs in zip(reversed(ops), reversed(operands[:-1]), strict=True):
+            res = ast.BinOp(left=lhs, op=_BIN_OPS[op](), right=res)
+        return res
+    res = operands[0]
+    for op, rhs in zip(ops, operands[1:], strict=True):
+        res = ast.BinOp(left=res, op=_BIN_OPS[op](), right=rhs)
+    return res
+
+
+def _unary(e: UnaryOp) -> ast.expr:
+    """Lower a unary operation."""
+    match e.op_type:
+        case UnaryOpType.Await:
+            return ast.Await(value=_lower(e.expression))
+        case UnaryOpType.Yield:
+            value = None if isinstance(e.expression, Empty) else _lower(e.expression)
+            return ast.Yield(value=value)
+        case UnaryOpType.YieldFrom:
+            return ast.YieldFrom(value=_lower(e.expression))
+        case UnaryOpType.Starred:
+            return ast.Starred(value=_lower(e.expression), ctx=ast.Load())
+        case UnaryOpType.DoubleStarred:
+            raise ValueError(
+                f"Dict unpacking is only supported in calls: `{e.into_code()}`"
+            )
+        case op:
+            return ast.UnaryOp(op=_UNARY_OPS[op](), operand=_lower(e.expression))
+
+
+def _call(e: Call) -> ast.expr:
+    """Lower a call."""
+    args: list[ast.expr] = []
+    keywords: list[ast.keyword] = []
+    for a in e.args:
+        if isinstance(a, UnaryOp) and a.op_type == UnaryOpType.DoubleStarred:
+            keywords.append(ast.keyword(arg=None, value=_lower(a.expression)))
+        else:
+            args.append(_lower(a))
+    keywords.extend(ast.keyword(arg=k.key.raw, value=_lower(k.value)) for k in e.keywords)
+    return ast.Call(func=_lower(e.target), args=args, keywords=keywords)
+
+
+def _subscript(e: Subscript) -> ast.expr:
+    """Lower a subscript."""
+    items = [_slice(x) for x in e.slices]
+    index = (
+        items[0] if len(items) == 1 else ast.Tuple(elts=items, ctx=ast.Load())
+    )
+    return ast.Subscript(value=_lower(e.target), slice=index, ctx=ast.Load())
+
+
+def _slice(s: Slice | Expression) -> ast.expr:
+    """Lower a subscript item."""
+    if not isinstance(s, Slice):
+        return _lower(s)
+    return ast.Slice(
+        lower=_optional(s.lower), upper=_optional(s.upper), step=_optional(s.step)
+    )
+
+
+def _optional(e: Expression | None) -> ast.expr | None:
+    """Lower an optional slice bound, where empty expressions are omitted."""
+    if e is None or isinstance(e, Empty):
+        return None
+    return _lower(e)
+
+
+def _generators(comp: Comprehension) -> list[ast.comprehension]:
+    """Lower the `for` clauses of a comprehension."""
+    res: list[ast.comprehension] = []
+    for node in comp.comprehensions:
+        names: list[ast.expr] = [ast.Name(id=t.raw, ctx=ast.Store()) for t in node.target]
+        target = names[0] if len(names) == 1 else ast.Tuple(elts=names, ctx=ast.Store())
+        res.append(
+            ast.comprehension(
+                target=target,
+                iter=_lower(node.iterator),
+                ifs=[_lower(x) for x in node.ifs],
+                is_async=int(node.is_async),
+            )
+        )
+    return res
+
+
+def _fstring(e: FormatString) -> ast.expr:
+    """Lower an f-string."""
+    values: list[ast.expr] = []
+    for node in e.nodes:
+        if isinstance(node, str):
+            # string nodes are raw source text inside `f"..."`
+            text = ast.literal_eval(f'"{node}"').replace("{{", "{").replace("}}", "}")
+            values.append(ast.Constant(value=text))
+            continue
+        spec: ast.expr | None = None
+        if node.format_spec:
+            if "{" in node.format_spec:
+                parsed = ast.parse(f'f"{{_:{node.format_spec}}}"', mode="eval").body
+                spec = parsed.values[0].format_spec  # type:ignore[attr-defined]
+            else:
+                spec = ast.JoinedStr(values=[ast.Constant(value=node.format_spec)])
+        values.append(
+            ast.FormattedValue(
+                value=_lower(node.value),
+                conversion=int(node.conversion),
+                format_spec=spec,
+            )
+        )
+    return ast.JoinedStr(values=values)
@@ -32,6 +32,7 @@ class Alias(Expression):
     """The alias name."""
 
     expr_type = ExprType.Atom
+    child_fields = ("names", "asname")
     precedence = ExprPrecedence.Atom
 
     def __init__(self, names: Identifier | ModPath | Expression, asname: Identifier):
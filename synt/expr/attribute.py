@@ -23,6 +23,7 @@ class Attribute(expr.Expression):
 
     precedence = expr.ExprPrecedence.Call
     expr_type = expr.ExprType.Attribute
+    child_fields = ("target",)
 
     def __init__(self, target: expr.IntoExpression, attr: str):
         """Initialize an attribute expression.
@@ -195,6 +195,7 @@ class BinaryOp(expr.Expression):
     """Operator type."""
 
     expr_type = expr.ExprType.BinaryOp
+    child_fields = ("left", "right")
 
     def __init__(
         self, op: BinaryOpType, left: expr.IntoExpression, right: expr.IntoExpression
@@ -32,6 +32,7 @@ class Call(expr.Expression):
 
     precedence = expr.ExprPrecedence.Call
     expr_type = expr.ExprType.Call
+    child_fields = ("target", "args", "keywords")
 
     def __init__(
         self,
@@ -81,6 +82,8 @@ class Keyword(code.IntoCode):
     value: expr.Expression
     """Value for the argument."""
 
+    child_fields = ("key", "value")
+
     def __init__(self, key: Identifier, value: expr.IntoExpression):
         """Initialize a new keyword argument.
 
@@ -38,6 +38,7 @@ class Closure(expr.Expression, code.IntoCode):
 
     precedence = expr.ExprPrecedence.Lambda
     expr_type = expr.ExprType.Closure
+    child_fields = ("args", "body")
 
     def __init__(self, args: list[Identifier], body: expr.IntoExpression):
         """Initialize a closure expression.
@@ -58,6 +58,8 @@ class Comprehension(expr.IntoExpression, code.IntoCode):
 
     precedence = expr.ExprPrecedence.Atom
 
+    child_fields = ("elt", "comprehensions")
+
     def __init__(
         self,
         elt: expr.IntoExpression,
@@ -92,6 +94,8 @@ class ComprehensionNode(code.IntoCode):
 
     precedence = expr.ExprPrecedence.Atom
 
+    child_fields = ("target", "iterator", "ifs")
+
     def __init__(
         self,
         target: list[Identifier],
@@ -135,6 +139,7 @@ class GeneratorComprehension(expr.Expression):
 
     precedence = expr.ExprPrecedence.Atom
     expr_type = expr.ExprType.Comprehension
+    child_fields = ("comprehension",)
 
     def __init__(self, comprehension: Comprehension):
         """Initialize a generator comprehension expression.
@@ -195,23 +200,31 @@ class ComprehensionBuilder(expr.IntoExpression):
             self.__comprehensions.append(res)
             self.__curr_node = None
 
-    def for_(self, iterator: expr.IntoExpression) -> ComprehensionNodeBuilder:
+    def for_(self, *target: Identifier) -> ComprehensionNodeBuilder:
         """Create a new comprehension node.
 
         This will finish the previous [`ComprehensionNodeBuilder`][synt.expr.comprehension.ComprehensionNodeBuilder]
         and start a new one.
+
+        Args:
+            target: The target of the iteration.
         """
         self.__finish_node_builder()
-        return ComprehensionNodeBuilder(self).iterator(iterator)
+        self.__curr_node = ComprehensionNodeBuilder(self).target(*target)
+        return self.__curr_node
 
-    def async_for(self, iterator: expr.IntoExpression) -> ComprehensionNodeBuilder:
+    def async_for(self, *target: Identifier) -> ComprehensionNodeBuilder:
         """Create a new async comprehension node.
 
         This will finish the previous [`ComprehensionNodeBuilder`][synt.expr.comprehension.ComprehensionNodeBuilder]
         and start a new one.
+
+        Args:
+            target: The target of the iteration.
         """
         self.__finish_node_builder()
-        return ComprehensionNodeBuilder(self, True).iterator(iterator)
+        self.__curr_node = ComprehensionNodeBuilder(self, True).target(*target)
+        return self.__curr_node
 
     def build(self) -> Comprehension:
         """Build the comprehension expression.
@@ -311,19 +324,26 @@ class ComprehensionNodeBuilder(expr.IntoExpression):
             self.__is_async,
         )
 
-    def for_(self, iterator: expr.IntoExpression) -> ComprehensionNodeBuilder:
+    def for_(self, *target: Identifier) -> ComprehensionNodeBuilder:
         """Create a new comprehension node.
 
         This will call root's [`for_`][synt.expr.comprehension.ComprehensionBuilder.for_].
+
+        Examples:
+            ```python
+            x, y = id_("x"), id_("y")
+            comp = list_comp(x.expr().for_(x).in_(id_("xs")).for_(y).in_(x).if_(y))
+            assert comp.into_code() == "[x for x in xs for y in x if y]"
+            ```
         """
-        return self.root.for_(iterator)
+        return self.root.for_(*target)
 
-    def async_for(self, iterator: expr.IntoExpression) -> ComprehensionNodeBuilder:
+    def async_for(self, *target: Identifier) -> ComprehensionNodeBuilder:
         """Create a new async comprehension node.
 
         This will call root's [`async_for`][synt.expr.comprehension.ComprehensionBuilder.async_for].
         """
-        return self.root.async_for(iterator)
+        return self.root.async_for(*target)
 
     def build_comp(self) -> Comprehension:
         """Build the comprehension expression.
@@ -27,6 +27,7 @@ class Condition(expr.Expression):
     """expr.Expression to evaluate and return if the condition is false."""
     precedence = expr.ExprPrecedence.Conditional
     expr_type = expr.ExprType.Condition
+    child_fields = ("condition", "true_expr", "false_expr")
 
     def __init__(
         self,
@@ -45,6 +45,8 @@ class DictVerbatim(DictDisplay):
     items: list[KVPair]
     """Dict items."""
 
+    child_fields = ("items",)
+
     def __init__(self, *items: KVPair):
         """Initialize a new verbatim dict expression.
 
@@ -86,6 +88,8 @@ class DictComprehension(DictDisplay):
     comprehension: comp_expr.Comprehension
     """Internal comprehension expression."""
 
+    child_fields = ("comprehension",)
+
     def __init__(
         self,
         comprehension: comp_expr.Comprehension
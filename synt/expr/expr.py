@@ -17,6 +17,11 @@ import synt.code as code
 
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Mapping
+    from collections.abc import Sequence
+    from typing import Any
+
     from synt.expr.alias import Alias
     from synt.stmt.stmt import Statement
     from synt.tokens.ident import Identifier
@@ -1027,6 +1032,36 @@ class Expression(IntoExpression, code.IntoCode, metaclass=ABCMeta):
 
         return stmt(self)
 
+    def compile_function(
+        self,
+        args: Sequence[Identifier] = (),
+        *,
+        name: str = "<synt>",
+        globals: Mapping[str, Any] | None = None,
+    ) -> Callable[..., Any]:
+        """Compile the expression into a function returning its value.
+
+        Alias [`compile_function`][synt.compiler.compile_function].
+
+        Examples:
+            ```python
+            rule = id_("row").expr().attr("score").gt(litint(10))
+            f = rule.compile_function(args=[id_("row")])
+            ```
+        """
+        from synt.compiler import compile_function
+
+        return compile_function(self, args, name=name, globals=globals)
+
+    def to_numpy_kernel(self, columns: Sequence[Identifier]) -> Callable[..., Any]:
+        """Compile the expression into a vectorized function over NumPy column arrays.
+
+        Alias [`to_numpy_kernel`][synt.vectorize.to_numpy_kernel].
+        """
+        from synt.vectorize import to_numpy_kernel
+
+        return to_numpy_kernel(self, columns)
+
     def as_(self, target: Identifier) -> Alias:
         """Convert the expression into an alias.
 
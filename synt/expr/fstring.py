@@ -34,6 +34,7 @@ class FormatString(expr.Expression):
 
     precedence = expr.ExprPrecedence.Atom
     expr_type = expr.ExprType.FormatString
+    child_fields = ("nodes",)
 
     def __init__(self, *nodes: FormatNode | str):
         """Initialize a new format string expression.
@@ -144,6 +145,8 @@ class FormatNode(code.IntoCode):
     conversion: FormatConversionType
     """The conversion of the expression, e.g. `__str__`, `__repr__`, ..."""
 
+    child_fields = ("value",)
+
     def __init__(
         self,
         value: expr.IntoExpression,
@@ -43,6 +43,8 @@ class ListVerbatim(ListDisplay):
     items: list[expr.Expression]
     """list items."""
 
+    child_fields = ("items",)
+
     def __init__(self, *items: expr.IntoExpression):
         """Initialize a new verbatim list expression.
 
@@ -81,6 +83,8 @@ class ListComprehension(ListDisplay):
     comprehension: comp_expr.Comprehension
     """Internal comprehension expression."""
 
+    child_fields = ("comprehension",)
+
     def __init__(
         self,
         comprehension: comp_expr.Comprehension
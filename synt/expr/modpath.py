@@ -41,6 +41,8 @@ class ModPath(IntoCode):
     depth: int
     """Relative depth of the path."""
 
+    child_fields = ("names",)
+
     def __init__(self, *names: Identifier, depth: int = 0):
         """Initialize a new module path.
 
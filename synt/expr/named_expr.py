@@ -27,6 +27,7 @@ class NamedExpr(expr.Expression):
     """The value to be assigned to the receiver."""
     precedence = expr.ExprPrecedence.NamedExpr
     expr_type = expr.ExprType.NamedExpr
+    child_fields = ("receiver", "value")
 
     def __init__(self, receiver: Identifier, value: expr.IntoExpression):
         """Initialize a named expr expression.
@@ -40,6 +40,8 @@ class SetVerbatim(SetDisplay):
     items: list[expr.Expression]
     """Set items."""
 
+    child_fields = ("items",)
+
     def __init__(self, *items: expr.IntoExpression):
         """Initialize a new verbatim set expression.
 
@@ -78,6 +80,8 @@ class SetComprehension(SetDisplay):
     comprehension: comp_expr.Comprehension
     """Internal comprehension expression."""
 
+    child_fields = ("comprehension",)
+
     def __init__(
         self,
         comprehension: comp_expr.Comprehension
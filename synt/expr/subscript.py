@@ -24,6 +24,7 @@ class Subscript(expr.Expression):
     """Slices to index the target."""
 
     expr_type = expr.ExprType.Subscript
+    child_fields = ("target", "slices")
     precedence = expr.ExprPrecedence.Call
 
     def __init__(
@@ -79,6 +80,8 @@ class Slice(code.IntoCode):
     step: expr.Expression | None
     """Step of the slice."""
 
+    child_fields = ("lower", "upper", "step")
+
     def __init__(
         self,
         lower: expr.IntoExpression,
@@ -26,6 +26,7 @@ class Tuple(expr.Expression):
 
     precedence = expr.ExprPrecedence.Atom
     expr_type = expr.ExprType.Tuple
+    child_fields = ("items",)
 
     def __init__(self, *items: expr.IntoExpression):
         """Initialize a tuple expression.
@@ -136,6 +136,7 @@ class UnaryOp(expr.Expression):
     op_type: UnaryOpType
     """Operator type."""
     expr_type = expr.ExprType.UnaryOp
+    child_fields = ("expression",)
 
     def __init__(self, op: UnaryOpType, e: expr.IntoExpression):
         """Initialize a unary operation.
@@ -33,6 +33,7 @@ class Wrapped(expr.Expression):
 
     precedence = expr.ExprPrecedence.Atom
     expr_type = expr.ExprType.Wrapped
+    child_fields = ("inner",)
 
     def __init__(self, inner: expr.IntoExpression):
         """Initialize a wrapped expression.
@@ -6,12 +6,16 @@ __all__ = [
 ]
 
 
+from copy import deepcopy
 from typing import TYPE_CHECKING
+from typing import ClassVar
 
 from synt.stmt.block import Block
 
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from synt.stmt.stmt import Statement
 
 
@@ -37,6 +41,13 @@ class File:
     body: Block
     """Code lines in the file."""
 
+    child_fields: ClassVar[tuple[str, ...]] = ("body",)
+    """Names of the attributes holding child nodes.
+
+    References:
+        [`IntoCode.child_fields`][synt.code.IntoCode.child_fields].
+    """
+
     def __init__(self, *statements: Statement):
         """Initialize a file.
 
@@ -45,11 +56,65 @@ class File:
         """
         self.body = Block(*statements)
 
-    def into_str(self, indent_atom: str = "    ", indent_width: int = 0) -> str:
+    def into_str(
+        self, indent_atom: str = "    ", indent_width: int = 0, *, debug: bool = True
+    ) -> str:
         """Convert the file into a string.
 
         Args:
             indent_width: number of `indent_atom`s per indentation level.
             indent_atom: string to use for indentation. E.g. `\\t`, whitespace, etc.
+            debug: Whether to keep assertions and debug-only statements.
+                If `False`, they are removed from a copy of the file, which is rendered
+                instead, leaving this file unchanged.
+
+        References:
+            [`DebugStripping`][synt.passes.debug.DebugStripping].
         """
+        if not debug:
+            from synt.passes.debug import DebugStripping
+            from synt.passes.manager import AnalysisManager
+
+            file = deepcopy(self)
+            DebugStripping().run(file, AnalysisManager(file))
+            return file.into_str(indent_atom, indent_width)
         return self.body.indented(indent_width, indent_atom)
+
+    def tree_shake(
+        self, entry_points: Iterable[str], pinned: Iterable[str] = ()
+    ) -> int:
+        r"""Remove the top-level definitions and imports the entry points don't use.
+
+        Args:
+            entry_points: Names of the definitions used from outside the module.
+            pinned: Names kept whether they are used or not.
+
+        Returns:
+            Number of removed definitions and imported names.
+
+        Raises:
+            ValueError: If an entry point is not bound at module level.
+
+        Examples:
+            ```python
+            file = File(
+                def_(id_("helper"))().block(return_(litint(1))),
+                def_(id_("unused"))().block(return_(litint(2))),
+                def_(id_("main"))().block(return_(id_("helper").expr().call())),
+            )
+            assert file.tree_shake(["main"]) == 1
+            assert file.into_str() == (
+                "def helper():\n"
+                "    return 1\n"
+                "def main():\n"
+                "    return helper()"
+            )
+            ```
+
+        References:
+            [`TreeShaking`][synt.passes.shake.TreeShaking].
+        """
+        from synt.passes.manager import AnalysisManager
+        from synt.passes.shake import TreeShaking
+
+        return TreeShaking(entry_points, pinned).run(self, AnalysisManager(self))
@@ -0,0 +1,110 @@
+r"""## Passes
+
+Optimization passes rewriting Synt trees before they are rendered.
+
+Passes are scheduled by a [`PassManager`][synt.passes.manager.PassManager],
+which shares [analyses][synt.passes.analysis] between them.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "analysis",
+    "common",
+    "comprehend",
+    "cse",
+    "dce",
+    "debug",
+    "dispatch",
+    "fold",
+    "inline",
+    "licm",
+    "lift",
+    "localize",
+    "manager",
+    "match",
+    "partial",
+    "peephole",
+    "pool",
+    "shake",
+    "split",
+    "strings",
+    "unroll",
+    "Analysis",
+    "AnalysisManager",
+    "CommonSubexpressionElimination",
+    "ComprehensionRewrite",
+    "ConstantPooling",
+    "ConstantFolding",
+    "ControlFlowAnalysis",
+    "DeadCodeElimination",
+    "DebugStripping",
+    "DictDispatch",
+    "FunctionInlining",
+    "FunctionSplitting",
+    "GlobalLocalization",
+    "LambdaLifting",
+    "LoopInvariantCodeMotion",
+    "LoopUnrolling",
+    "MatchLowering",
+    "PartialEvaluation",
+    "Pass",
+    "PassManager",
+    "PassReport",
+    "PeepholeRewrite",
+    "PurityAnalysis",
+    "ScopeAnalysis",
+    "StringBuilding",
+    "TransformerPass",
+    "TreeShaking",
+]
+
+from synt.passes.analysis import Analysis
+from synt.passes.analysis import ControlFlowAnalysis
+from synt.passes.analysis import PurityAnalysis
+from synt.passes.analysis import ScopeAnalysis
+from synt.passes.comprehend import ComprehensionRewrite
+from synt.passes.cse import CommonSubexpressionElimination
+from synt.passes.dce import DeadCodeElimination
+from synt.passes.debug import DebugStripping
+from synt.passes.dispatch import DictDispatch
+from synt.passes.fold import ConstantFolding
+from synt.passes.inline import FunctionInlining
+from synt.passes.licm import LoopInvariantCodeMotion
+from synt.passes.lift import LambdaLifting
+from synt.passes.localize import GlobalLocalization
+from synt.passes.manager import AnalysisManager
+from synt.passes.manager import Pass
+from synt.passes.manager import PassManager
+from synt.passes.manager import PassReport
+from synt.passes.manager import TransformerPass
+from synt.passes.match import MatchLowering
+from synt.passes.partial import PartialEvaluation
+from synt.passes.peephole import PeepholeRewrite
+from synt.passes.pool import ConstantPooling
+from synt.passes.shake import TreeShaking
+from synt.passes.split import FunctionSplitting
+from synt.passes.strings import StringBuilding
+from synt.passes.unroll import LoopUnrolling
+
+from . import analysis
+from . import comprehend
+from . import cse
+from . import dce
+from . import debug
+from . import dispatch
+from . import fold
+from . import inline
+from . import licm
+from . import lift
+from . import localize
+from . import manager
+from . import match
+from . import partial
+from . import peephole
+from . import pool
+from . import shake
+from . import split
+from . import strings
+from . import unroll
@@ -0,0 +1,966 @@
+r"""## Analyses
+
+Whole-file analyses shared by optimization passes.
+
+Analyses are computed on demand by an
+[`AnalysisManager`][synt.passes.manager.AnalysisManager] and cached until a pass
+changes the tree without preserving them.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "Analysis",
+    "Scope",
+    "ScopeAnalysis",
+    "BasicBlock",
+    "ControlFlowGraph",
+    "ControlFlowAnalysis",
+    "PURE_BUILTINS",
+    "PurityAnalysis",
+]
+
+
+from collections import Counter
+from typing import TYPE_CHECKING
+
+from synt.expr.alias import Alias
+from synt.expr.attribute import Attribute
+from synt.expr.binary_op import BinaryOp
+from synt.expr.binary_op import BinaryOpType
+from synt.expr.call import Call
+from synt.expr.call import Keyword
+from synt.expr.closure import Closure
+from synt.expr.comprehension import Comprehension
+from synt.expr.comprehension import ComprehensionNode
+from synt.expr.comprehension import GeneratorComprehension
+from synt.expr.condition import Condition
+from synt.expr.dict import DictComprehension
+from synt.expr.dict import DictVerbatim
+from synt.expr.empty import Empty
+from synt.expr.fstring import FormatNode
+from synt.expr.fstring import FormatString
+from synt.expr.list import ListComprehension
+from synt.expr.list import ListVerbatim
+from synt.expr.modpath import ModPath
+from synt.expr.set import SetComprehension
+from synt.expr.set import SetVerbatim
+from synt.expr.subscript import Slice
+from synt.expr.subscript import Subscript
+from synt.expr.tuple import Tuple
+from synt.expr.unary_op import UnaryOp
+from synt.expr.unary_op import UnaryOpType
+from synt.expr.wrapped import Wrapped
+from synt.file import File
+from synt.stmt.branch import Branch
+from synt.stmt.cls import ClassDef
+from synt.stmt.context import With
+from synt.stmt.expression import ExprStatement
+from synt.stmt.fn import FunctionDef
+from synt.stmt.keyword import KeywordStatement
+from synt.stmt.loop import ForLoop
+from synt.stmt.loop import WhileLoop
+from synt.stmt.match_case import Match
+from synt.stmt.raising import Raise
+from synt.stmt.returns import Return
+from synt.stmt.try_catch import Try
+from synt.tokens.ident import Identifier
+from synt.tokens.ident import IdentifierExpr
+from synt.tokens.kv_pair import KVPair
+from synt.tokens.lit import Literal
+from synt.visit import NodeVisitor
+from synt.visit import walk
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from synt.expr.expr import Expression
+    from synt.expr.named_expr import NamedExpr
+    from synt.passes.manager import AnalysisManager
+    from synt.stmt.assign import Assignment
+    from synt.stmt.context import WithItem
+    from synt.stmt.delete import Delete
+    from synt.stmt.importing import Import
+    from synt.stmt.importing import ImportFrom
+    from synt.stmt.match_case import MatchCase
+    from synt.stmt.namespace import Global
+    from synt.stmt.namespace import Nonlocal
+    from synt.stmt.stmt import Statement
+    from synt.stmt.try_catch import ExceptionHandler
+    from synt.visit import Node
+
+
+class Analysis:
+    r"""Base class of whole-file analyses.
+
+    An analysis is computed when it is constructed, and is only valid
+    as long as the file is not changed.
+    Get analyses through [`AnalysisManager.get`][synt.passes.manager.AnalysisManager.get]
+    instead of constructing them, so they are shared between passes.
+    """
+
+    def __init__(self, file: File, analyses: AnalysisManager):
+        """Analyze a file.
+
+        Args:
+            file: The analyzed file.
+            analyses: Manager providing the other analyses this one depends on.
+        """
+
+
+# Scopes
+
+
+type ScopeNode = File | FunctionDef | ClassDef | Closure | Comprehension
+
+
+class Scope:
+    r"""Names bound and read in a single scope.
+
+    Reads and bindings in nested scopes are recorded in the nested scopes only.
+    """
+
+    node: ScopeNode
+    """Node introducing the scope: a file, function, class, lambda or comprehension."""
+    parent: Scope | None
+    """Enclosing scope, `None` for the module scope."""
+    children: list[Scope]
+    """Scopes nested directly inside this one."""
+    loads: Counter[str]
+    """Number of reads of each name."""
+    stores: Counter[str]
+    """Number of bindings of each name, including deletions, imports and definitions."""
+    deletes: Counter[str]
+    """Number of deletions of each name."""
+    params: list[str]
+    """Parameter names of a function or lambda."""
+    globals: set[str]
+    """Names declared `global`."""
+    nonlocals: set[str]
+    """Names declared `nonlocal`."""
+    captured: set[str]
+    """Names bound in this scope and used by nested scopes."""
+
+    def __init__(self, node: ScopeNode, parent: Scope | None):
+        """Initialize an empty scope.
+
+        Args:
+            node: Node introducing the scope.
+            parent: Enclosing scope.
+        """
+        self.node = node
+        self.parent = parent
+        self.children = []
+        self.loads = Counter()
+        self.stores = Counter()
+        self.deletes = Counter()
+        self.params = []
+        self.globals = set()
+        self.nonlocals = set()
+        self.captured = set()
+        if parent is not None:
+            parent.children.append(self)
+
+    @property
+    def is_module(self) -> bool:
+        """Whether this is the module scope."""
+        return self.parent is None
+
+    def binds(self, name: str) -> bool:
+        """Whether `name` is a variable of this scope.
+
+        Names declared `global` or `nonlocal` belong to other scopes.
+        """
+        return (name in self.stores or name in self.params) and not self.declares_outer(
+            name
+        )
+
+    def declares_outer(self, name: str) -> bool:
+        """Whether `name` is declared `global` or `nonlocal` in this scope."""
+        return name in self.globals or name in self.nonlocals
+
+    def resolve(self, name: str) -> Scope | None:
+        """Find the scope a read of `name` in this scope refers to.
+
+        Class scopes are skipped when resolving names of nested scopes, like Python does.
+
+        Returns:
+            The binding scope, or `None` for builtins and undefined names.
+        """
+        if name in self.globals:
+            module = self.module()
+            return module if module.binds(name) else None
+        if self.binds(name):
+            return self
+        scope = self.parent
+        while scope is not None:
+            if scope.is_module:
+                return scope if scope.binds(name) else None
+            if not isinstance(scope.node, ClassDef) and scope.binds(name):
+                return scope
+            scope = scope.parent
+        return None
+
+    def module(self) -> Scope:
+        """Get the module scope."""
+        scope = self
+        while scope.parent is not None:
+            scope = scope.parent
+        return scope
+
+    def walk(self) -> Iterator[Scope]:
+        """Iterate over this scope and all nested scopes, in pre-order."""
+        stack = [self]
+        while stack:
+            scope = stack.pop()
+            yield scope
+            stack.extend(reversed(scope.children))
+
+
+class ScopeAnalysis(Analysis):
+    r"""Scopes of a file, with the names bound and read in each of them.
+
+    Examples:
+        ```python
+        from synt.passes import AnalysisManager, ScopeAnalysis
+        file = File(
+            id_("x").expr().assign(litint(1)),
+            def_(id_("f"))(arg(id_("a"))).block(
+                return_(id_("a").expr() + id_("x").expr())
+            ),
+        )
+        scopes = AnalysisManager(file).get(ScopeAnalysis)
+        f = scopes.scope(file.body.body[1])
+        assert f.params == ["a"] and f.loads["x"] == 1
+        assert f.resolve("x") is scopes.module
+        ```
+    """
+
+    module: Scope
+    """The module scope."""
+
+    __scopes: dict[int, Scope]
+
+    def __init__(self, file: File, analyses: AnalysisManager):
+        super().__init__(file, analyses)
+        builder = _ScopeBuilder(file)
+        builder.visit(file.body)
+        self.module = builder.scope
+        self.__scopes = builder.scopes
+        for scope in self.module.walk():
+            if scope.is_module:
+                continue
+            for name in (*scope.loads, *scope.nonlocals):
+                if scope.binds(name):
+                    continue
+                owner = scope.resolve(name)
+                if owner is not None and not owner.is_module:
+                    owner.captured.add(name)
+
+    def scope(self, node: ScopeNode) -> Scope:
+        """Get the scope introduced by a node.
+
+        Raises:
+            KeyError: If the node doesn't introduce a scope of the analyzed file.
+        """
+        return self.__scopes[id(node)]
+
+    def __iter__(self) -> Iterator[Scope]:
+        return self.module.walk()
+
+
+class _ScopeBuilder(NodeVisitor):
+    """Record bindings and reads of each scope."""
+
+    scope: Scope
+    scopes: dict[int, Scope]
+
+    def __init__(self, file: File):
+        self.scope = Scope(file, None)
+        self.scopes = {id(file): self.scope}
+
+    def _open(self, node: ScopeNode) -> Scope:
+        scope = Scope(node, self.scope)
+        self.scopes[id(node)] = scope
+        return scope
+
+    def _inside(self, scope: Scope, *nodes: Node | None) -> None:
+        outer, self.scope = self.scope, scope
+        for node in nodes:
+            if node is not None:
+                self.visit(node)
+        self.scope = outer
+
+    def _store(self, target: Expression) -> None:
+        if isinstance(target, IdentifierExpr):
+            self.scope.stores[target.ident.raw] += 1
+        elif isinstance(target, Tuple | ListVerbatim):
+            for item in target.items:
+                self._store(item)
+        elif isinstance(target, Wrapped):
+            self._store(target.inner)
+        elif isinstance(target, UnaryOp) and target.op_type is UnaryOpType.Starred:
+            self._store(target.expression)
+        else:
+            # attributes and subscripts read their operands
+            self.visit(target)
+
+    def _capture(self, pattern: Expression) -> None:
+        if isinstance(pattern, IdentifierExpr):
+            if pattern.ident.raw != "_":
+                self.scope.stores[pattern.ident.raw] += 1
+        elif isinstance(pattern, Tuple | ListVerbatim):
+            for item in pattern.items:
+                self._capture(item)
+        elif isinstance(pattern, Wrapped | UnaryOp):
+            self._capture(
+                pattern.inner if isinstance(pattern, Wrapped) else pattern.expression
+            )
+        elif isinstance(pattern, BinaryOp) and pattern.op_type is BinaryOpType.BitOr:
+            self._capture(pattern.left)
+            self._capture(pattern.right)
+        elif isinstance(pattern, Call):
+            self.visit(pattern.target)
+            for arg in pattern.args:
+                self._capture(arg)
+            for kw in pattern.keywords:
+                self._capture(kw.value)
+        elif isinstance(pattern, DictVerbatim):
+            for kv in pattern.items:
+                self.visit(kv.key)
+                self._capture(kv.value)
+        elif isinstance(pattern, Alias):
+            if isinstance(pattern.names, ModPath):
+                self.visit(pattern.names)
+            else:
+                self._capture(pattern.names)
+            self.scope.stores[pattern.asname.raw] += 1
+        else:
+            self.visit(pattern)
+
+    def visit_IdentifierExpr(self, node: IdentifierExpr) -> bool:
+        self.scope.loads[node.ident.raw] += 1
+        return False
+
+    def visit_Assignment(self, node: Assignment) -> bool:
+        for child in (node.value, node.target_ty):
+            if child is not None:
+                self.visit(child)
+        self._store(node.target)
+        return False
+
+    def visit_Delete(self, node: Delete) -> bool:
+        self._store(node.target)
+        targets = node.target.items if isinstance(node.target, Tuple) else [node.target]
+        for target in targets:
+            if isinstance(target, IdentifierExpr):
+                self.scope.deletes[target.ident.raw] += 1
+        return False
+
+    def visit_ForLoop(self, node: ForLoop) -> bool:
+        self.visit(node.iter)
+        self._store(node.target)
+        self.visit(node.body)
+        if node.orelse is not None:
+            self.visit(node.orelse)
+        return False
+
+    def visit_WithItem(self, node: WithItem) -> bool:
+        self.visit(node.context)
+        if node.asname is not None:
+            self._store(node.asname)
+        return False
+
+    def visit_ExceptionHandler(self, node: ExceptionHandler) -> None:
+        if node.asname is not None:
+            self.scope.stores[node.asname.raw] += 1
+
+    def visit_Import(self, node: Import | ImportFrom) -> bool:
+        for name in node.names:
+            if isinstance(name, Identifier):
+                self.scope.stores[name.raw] += 1
+            elif isinstance(name, ModPath):
+                self.scope.stores[name.names[0].raw] += 1
+            elif isinstance(name, Alias):
+                self.scope.stores[name.asname.raw] += 1
+        return False
+
+    def visit_ImportFrom(self, node: ImportFrom) -> bool:
+        return self.visit_Import(node)
+
+    def visit_Global(self, node: Global) -> bool:
+        self.scope.globals.update(x.raw for x in node.names)
+        return False
+
+    def visit_Nonlocal(self, node: Nonlocal) -> bool:
+        self.scope.nonlocals.update(x.raw for x in node.names)
+        return False
+
+    def visit_NamedExpr(self, node: NamedExpr) -> None:
+        # assignment expressions bind in the nearest enclosing non-comprehension scope
+        scope = self.scope
+        while isinstance(scope.node, Comprehension) and scope.parent is not None:
+            scope = scope.parent
+        scope.stores[node.receiver.raw] += 1
+
+    def visit_MatchCase(self, node: MatchCase) -> bool:
+        self._capture(node.pattern)
+        if node.guard is not None:
+            self.visit(node.guard)
+        self.visit(node.body)
+        return False
+
+    def visit_FunctionDef(self, node: FunctionDef) -> bool:
+        self.scope.stores[node.name.raw] += 1
+        for decorator in node.decorators:
+            self.visit(decorator)
+        for arg in node.args:
+            for child in (arg.annotation, arg.default_expr):
+                if child is not None:
+                    self.visit(child)
+        if node.returns is not None:
+            self.visit(node.returns)
+        scope = self._open(node)
+        scope.params.extend(arg.name.raw for arg in node.args)
+        self._inside(scope, node.body)
+        return False
+
+    def visit_ClassDef(self, node: ClassDef) -> bool:
+        self.scope.stores[node.name.raw] += 1
+        for child in (*node.decorators, *node.cargs, *(v for _, v in node.ckwargs)):
+            self.visit(child)
+        self._inside(self._open(node), node.body)
+        return False
+
+    def visit_Closure(self, node: Closure) -> bool:
+        scope = self._open(node)
+        scope.params.extend(arg.raw for arg in node.args)
+        self._inside(scope, node.body)
+        return False
+
+    def visit_Comprehension(self, node: Comprehension) -> bool:
+        # the outermost iterable is evaluated in the enclosing scope
+        self.visit(node.comprehensions[0].iterator)
+        scope = self._open(node)
+        outer, self.scope = self.scope, scope
+        for i, comp in enumerate(node.comprehensions):
+            if i:
+                self.visit(comp.iterator)
+            for target in comp.target:
+                scope.stores[target.raw] += 1
+            for cond in comp.ifs:
+                self.visit(cond)
+        self.visit(node.elt)
+        self.scope = outer
+        return False
+
+
+# Control flow
+
+
+class BasicBlock:
+    r"""Straight-line sequence of statements of a control flow graph.
+
+    Compound statements appear in the block evaluating their header,
+    e.g. a [`Branch`][synt.stmt.branch.Branch] in the block evaluating its tests,
+    while their bodies start new blocks.
+    """
+
+    statements: list[Statement]
+    """Statements executed in order."""
+    successors: list[BasicBlock]
+    """Blocks control may flow to after this one, including exception handlers."""
+    predecessors: list[BasicBlock]
+    """Blocks control may flow from."""
+
+    def __init__(self) -> None:
+        """Initialize an empty block."""
+        self.statements = []
+        self.successors = []
+        self.predecessors = []
+
+    def link(self, other: BasicBlock) -> None:
+        """Add an edge from this block to `other`."""
+        if other not in self.successors:
+            self.successors.append(other)
+            other.predecessors.append(self)
+
+
+class ControlFlowGraph:
+    r"""Control flow graph of a single code body: a file, a function or a class."""
+
+    owner: File | FunctionDef | ClassDef
+    """Node owning the code body."""
+    entry: BasicBlock
+    """Block control enters the body through."""
+    exit: BasicBlock
+    """Empty block control leaves the body through, by returning, raising or falling off its end."""
+    blocks: list[BasicBlock]
+    """All blocks of the graph, including unreachable ones."""
+
+    def __init__(self, owner: File | FunctionDef | ClassDef):
+        """Initialize a graph with empty entry and exit blocks.
+
+        Args:
+            owner: Node owning the code body.
+        """
+        self.owner = owner
+        self.entry = BasicBlock()
+        self.exit = BasicBlock()
+        self.blocks = [self.entry, self.exit]
+
+    def reachable(self) -> list[BasicBlock]:
+        """Get the blocks reachable from the entry, in depth-first order."""
+        seen = {id(self.entry)}
+        order = []
+        stack = [self.entry]
+        while stack:
+            block = stack.pop()
+            order.append(block)
+            for succ in reversed(block.successors):
+                if id(succ) not in seen:
+                    seen.add(id(succ))
+                    stack.append(succ)
+        return order
+
+
+class ControlFlowAnalysis(Analysis):
+    r"""Control flow graphs of every code body of a file.
+
+    The graphs are conservative: every edge that may be taken is present,
+    e.g. each block inside a `try` may jump to its handlers.
+    Only the literal `while True` is considered an infinite loop.
+
+    Examples:
+        ```python
+        from synt.passes import AnalysisManager, ControlFlowAnalysis
+        dead = id_("print").expr().call().stmt()
+        file = File(def_(id_("f"))().block(return_(litint(1)), dead))
+        flow = AnalysisManager(file).get(ControlFlowAnalysis)
+        assert not flow.is_reachable(dead)
+        assert flow.is_reachable(file.body.body[0])
+        ```
+    """
+
+    __graphs: dict[int, ControlFlowGraph]
+    __reachable: set[int]
+
+    def __init__(self, file: File, analyses: AnalysisManager):
+        super().__init__(file, analyses)
+        self.__graphs = {}
+        self.__reachable = set()
+        pending: list[File | FunctionDef | ClassDef] = [file]
+        while pending:
+            owner = pending.pop()
+            builder = _GraphBuilder(owner)
+            self.__graphs[id(owner)] = builder.graph
+            pending.extend(builder.nested)
+            for block in builder.graph.reachable():
+                self.__reachable.update(id(s) for s in block.statements)
+
+    def graph(self, owner: File | FunctionDef | ClassDef) -> ControlFlowGraph:
+        """Get the control flow graph of a file, function or class body.
+
+        Raises:
+            KeyError: If the node is not part of the analyzed file.
+        """
+        return self.__graphs[id(owner)]
+
+    def is_reachable(self, statement: Statement) -> bool:
+        """Whether control may reach a statement from the start of its code body.
+
+        Statements nested in compound statements, e.g. inside a branch,
+        are reachable if their enclosing block may be entered.
+        """
+        return id(statement) in self.__reachable
+
+    def __iter__(self) -> Iterator[ControlFlowGraph]:
+        return iter(self.__graphs.values())
+
+
+def _is_true_literal(e: Expression) -> bool:
+    """Whether an expression is the literal `True`."""
+    return isinstance(e, Literal) and e.lit == "True"
+
+
+def _irrefutable(case: MatchCase) -> bool:
+    """Whether a case matches any subject."""
+    pattern = case.pattern
+    while isinstance(pattern, Wrapped):
+        pattern = pattern.inner
+    return case.guard is None and isinstance(pattern, IdentifierExpr)
+
+
+class _Finally:
+    """A `finally` block enclosing the statements being added."""
+
+    block: BasicBlock
+    exits: list[BasicBlock]
+    """Destinations of the jumps going through the block."""
+
+    def __init__(self, block: BasicBlock):
+        self.block = block
+        self.exits = []
+
+
+class _GraphBuilder:
+    """Build the control flow graph of a code body."""
+
+    graph: ControlFlowGraph
+    nested: list[FunctionDef | ClassDef]
+    """Definitions whose bodies need their own graphs."""
+
+    __frames: list[tuple[BasicBlock, BasicBlock] | _Finally]
+    """Enclosing loops, as `(continue target, break target)`, and `finally` blocks."""
+    __handlers: list[BasicBlock]
+    """Blocks exceptions raised at this point jump to, innermost last."""
+
+    def __init__(self, owner: File | FunctionDef | ClassDef):
+        self.graph = ControlFlowGraph(owner)
+        self.nested = []
+        self.__frames = []
+        self.__handlers = []
+        end = self.body(owner.body.body, self.graph.entry)
+        if end is not None:
+            end.link(self.graph.exit)
+
+    def new(self) -> BasicBlock:
+        block = BasicBlock()
+        self.graph.blocks.append(block)
+        if self.__handlers:
+            block.link(self.__handlers[-1])
+        return block
+
+    def body(
+        self, statements: list[Statement], cur: BasicBlock | None
+    ) -> BasicBlock | None:
+        """Add statements after `cur`, returning the block control falls through to.
+
+        Returns:
+            The last block, or `None` if control cannot fall off the end of the statements.
+        """
+        reachable = True
+        for statement in statements:
+            if cur is None:
+                # unreachable code still gets a block, without predecessors
+                reachable = False
+                cur = self.new()
+            cur = self.statement(statement, cur)
+        return cur if reachable else None
+
+    def route(self, keyword: str, depth: int) -> BasicBlock:
+        """Find the block a `return`, `break` or `continue` jumps to.
+
+        Jumps out of a `try` go through its `finally` block first,
+        which then continues to the original destination.
+        """
+        for i in range(depth - 1, -1, -1):
+            frame = self.__frames[i]
+            if isinstance(frame, _Finally):
+                frame.exits.append(self.route(keyword, i))
+                return frame.block
+            if keyword != "return":
+                return frame[1] if keyword == "break" else frame[0]
+        return self.graph.exit
+
+    def leave(self, block: BasicBlock) -> None:
+        """Link a block leaving the body."""
+        block.link(self.route("return", len(self.__frames)))
+
+    def statement(self, s: Statement, cur: BasicBlock) -> BasicBlock | None:
+        if not isinstance(s, WhileLoop | ForLoop):
+            cur.statements.append(s)
+        match s:
+            case Return():
+                self.leave(cur)
+                return None
+            case Raise():
+                if self.__handlers:
+                    cur.link(self.__handlers[-1])
+                else:
+                    self.leave(cur)
+                return None
+            case KeywordStatement() if s.keyword in ("break", "continue"):
+                cur.link(self.route(s.keyword, len(self.__frames)))
+                return None
+            case Branch():
+                ends = [self.body(block.body, self.arm(cur)) for _, block in s.tests]
+                if s.fallback is not None:
+                    ends.append(self.body(s.fallback.body, self.arm(cur)))
+                else:
+                    ends.append(cur)
+                return self.join(ends)
+            case WhileLoop() | ForLoop():
+                header = self.new()
+                cur.link(header)
+                header.statements.append(s)
+                after = self.new()
+                self.__frames.append((header, after))
+                end = self.body(s.body.body, self.arm(header))
+                self.__frames.pop()
+                if end is not None:
+                    end.link(header)
+                if not (isinstance(s, WhileLoop) and _is_true_literal(s.test)):
+                    if s.orelse is not None:
+                        end = self.body(s.orelse.body, self.arm(header))
+                        if end is not None:
+                            end.link(after)
+                    else:
+                        header.link(after)
+                return after if after.predecessors else None
+            case Try():
+                return self.try_(s, cur)
+            case Match():
+                ends = []
+                for case in s.cases:
+                    arm = self.arm(cur)
+                    arm.statements.append(case)
+                    ends.append(self.body(case.body.body, arm))
+                if not any(_irrefutable(case) for case in s.cases):
+                    ends.append(cur)
+                return self.join(ends)
+            case With():
+                body = self.arm(cur)
+                end = self.body(s.body.body, body)
+                # exceptions may be suppressed by the context manager
+                return self.join([end, body])
+            case FunctionDef() | ClassDef():
+                self.nested.append(s)
+        return cur
+
+    def arm(self, cur: BasicBlock) -> BasicBlock:
+        block = self.new()
+        cur.link(block)
+        return block
+
+    def join(self, ends: list[BasicBlock | None]) -> BasicBlock | None:
+        if all(end is None for end in ends):
+            return None
+        block = self.new()
+        for end in ends:
+            if end is not None:
+                end.link(block)
+        return block
+
+    def try_(self, s: Try, cur: BasicBlock) -> BasicBlock | None:
+        final = _Finally(self.new()) if s.final is not None else None
+        if final is not None:
+            self.__frames.append(final)
+            self.__handlers.append(final.block)
+        dispatch = self.new() if s.handlers else None
+        if dispatch is not None:
+            self.__handlers.append(dispatch)
+        end = self.body(s.try_block.body, self.arm(cur))
+        if dispatch is not None:
+            self.__handlers.pop()
+        if s.orelse is not None and end is not None:
+            end = self.body(s.orelse.body, end)
+        ends = [end]
+        for handler in s.handlers:
+            block = self.arm(dispatch)  # type:ignore[arg-type]
+            block.statements.append(handler)
+            ends.append(self.body(handler.body.body, block))
+        if final is None:
+            return self.join(ends)
+        self.__handlers.pop()
+        self.__frames.pop()
+        falls_through = False
+        for end in ends:
+            if end is not None:
+                end.link(final.block)
+                falls_through = True
+        end = self.body(s.final.body, final.block)  # type:ignore[union-attr]
+        if end is None:
+            return None
+        # after the `finally` block, control continues to the destination of the jump
+        # or the exception that entered it
+        for target in final.exits:
+            end.link(target)
+        if self.__handlers:
+            end.link(self.__handlers[-1])
+        else:
+            self.leave(end)
+        return self.join([end]) if falls_through else None
+
+
+# Purity
+
+
+PURE_BUILTINS: frozenset[str] = frozenset(
+    {
+        "abs",
+        "all",
+        "any",
+        "ascii",
+        "bin",
+        "bool",
+        "bytes",
+        "callable",
+        "chr",
+        "complex",
+        "dict",
+        "divmod",
+        "enumerate",
+        "float",
+        "format",
+        "frozenset",
+        "getattr",
+        "hasattr",
+        "hash",
+        "hex",
+        "id",
+        "int",
+        "isinstance",
+        "issubclass",
+        "len",
+        "list",
+        "max",
+        "min",
+        "oct",
+        "ord",
+        "pow",
+        "range",
+        "repr",
+        "reversed",
+        "round",
+        "set",
+        "slice",
+        "sorted",
+        "str",
+        "sum",
+        "tuple",
+        "type",
+        "zip",
+    }
+)
+"""Builtin functions whose calls have no side effects on pure arguments."""
+
+_PURE_NODES = (
+    Literal,
+    Identifier,
+    IdentifierExpr,
+    Empty,
+    BinaryOp,
+    Condition,
+    Tuple,
+    ListVerbatim,
+    SetVerbatim,
+    DictVerbatim,
+    KVPair,
+    Keyword,
+    ListComprehension,
+    SetComprehension,
+    DictComprehension,
+    GeneratorComprehension,
+    Comprehension,
+    ComprehensionNode,
+    FormatString,
+    FormatNode,
+    Wrapped,
+    Attribute,
+    Subscript,
+    Slice,
+    Closure,
+)
+_IMPURE_UNARY = (UnaryOpType.Await, UnaryOpType.Yield, UnaryOpType.YieldFrom)
+
+
+class PurityAnalysis(Analysis):
+    r"""Side effects of expressions.
+
+    An expression is pure if evaluating it has no effect other than computing its value,
+    or raising an exception. Operators, attribute and subscript reads are assumed pure,
+    as generated code applies them to plain data.
+    Calls are pure if they call a [builtin][synt.passes.analysis.PURE_BUILTINS]
+    or a pure function of the module, neither of which is rebound anywhere in the file.
+    Assignment expressions, `await` and `yield` are impure.
+
+    A module-level function is pure if it is not decorated,
+    and its body is a single `return` of a pure expression, optionally after a docstring.
+
+    Examples:
+        ```python
+        from synt.passes import AnalysisManager, PurityAnalysis
+        file = File(
+            def_(id_("sq"))(arg(id_("x"))).block(return_(id_("x").expr() * id_("x").expr())),
+        )
+        purity = AnalysisManager(file).get(PurityAnalysis)
+        assert purity.is_pure(id_("sq").expr().call(id_("len").expr().call(id_("a"))))
+        assert not purity.is_pure(id_("print").expr().call(litint(1)))
+        ```
+    """
+
+    pure_functions: set[str]
+    """Names of the pure module-level functions."""
+
+    __rebound: set[str]
+    __memo: dict[int, tuple[Node, bool]]
+
+    def __init__(self, file: File, analyses: AnalysisManager):
+        super().__init__(file, analyses)
+        scopes = analyses.get(ScopeAnalysis)
+        self.__memo = {}
+        self.pure_functions = set()
+        bound = Counter[str]()
+        for scope in scopes:
+            bound.update(scope.stores)
+            bound.update(scope.params)
+        self.__rebound = set(bound)
+        candidates = [
+            s
+            for s in file.body.body
+            if isinstance(s, FunctionDef)
+            and not s.decorators
+            and not s.is_async
+            and bound[s.name.raw] == 1
+        ]
+        changed = True
+        while changed:
+            changed = False
+            for fn in candidates:
+                if fn.name.raw not in self.pure_functions and self.__pure_body(fn):
+                    self.pure_functions.add(fn.name.raw)
+                    self.__memo.clear()
+                    changed = True
+
+    def __pure_body(self, fn: FunctionDef) -> bool:
+        body = fn.body.body
+        if (
+            len(body) == 2
+            and isinstance(body[0], ExprStatement)
+            and isinstance(body[0].expr, Literal)
+        ):
+            body = body[1:]
+        return (
+            len(body) == 1
+            and isinstance(body[0], Return)
+            and (body[0].expression is None or self.is_pure(body[0].expression))
+        )
+
+    def is_pure_call(self, name: str) -> bool:
+        """Whether calling the function named `name` is free of side effects."""
+        if name in self.pure_functions:
+            return True
+        return name in PURE_BUILTINS and name not in self.__rebound
+
+    def is_pure(self, node: Node) -> bool:
+        """Whether evaluating a node is free of side effects."""
+        cached = self.__memo.get(id(node))
+        if cached is not None and cached[0] is node:
+            return cached[1]
+        result = all(self.__pure_node(n) for n in walk(node))
+        self.__memo[id(node)] = (node, result)
+        return result
+
+    def __pure_node(self, node: Node) -> bool:
+        if isinstance(node, _PURE_NODES):
+            return True
+        if isinstance(node, UnaryOp):
+            return node.op_type not in _IMPURE_UNARY
+        if isinstance(node, Call):
+            return isinstance(node.target, IdentifierExpr) and self.is_pure_call(
+                node.target.ident.raw
+            )
+        return False
@@ -0,0 +1,195 @@
+r"""## Common helpers
+
+Helpers shared by the passes, to name the variables they introduce,
+to recognize code they must leave in place, and to drop code safely.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "DYNAMIC_NAMES",
+    "FRAME_NAMES",
+    "fresh_name",
+    "generator_marker",
+    "has_yield",
+    "is_docstring",
+    "is_generator_marker",
+    "is_private",
+    "name_expr",
+    "used_names",
+]
+
+
+from typing import TYPE_CHECKING
+
+from synt.expr.closure import Closure
+from synt.expr.unary_op import UnaryOp
+from synt.expr.unary_op import UnaryOpType
+from synt.expr.wrapped import Wrapped
+from synt.stmt.branch import Branch
+from synt.stmt.branch import if_
+from synt.stmt.cls import ClassDef
+from synt.stmt.expression import ExprStatement
+from synt.stmt.fn import FunctionDef
+from synt.stmt.keyword import KeywordStatement
+from synt.tokens.ident import Identifier
+from synt.tokens.ident import IdentifierExpr
+from synt.tokens.lit import FALSE
+from synt.tokens.lit import Literal
+from synt.visit import children
+from synt.visit import walk
+
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from synt.stmt.stmt import Statement
+    from synt.visit import Node
+
+
+DYNAMIC_NAMES = frozenset({"dir", "eval", "exec", "locals", "vars"})
+"""Builtins that may read local variables by name."""
+
+FRAME_NAMES = DYNAMIC_NAMES | {"globals", "super", "__class__"}
+"""Names whose meaning depends on the function they are read in.
+
+Zero-argument `super()` and `__class__` refer to the class of the enclosing method,
+and the other builtins may read variables by name.
+Code reading them can't be moved to another function, and their values can't be cached.
+"""
+
+
+def used_names(node: Node) -> set[str]:
+    """Get the identifiers of a tree, which fresh names must not clash with.
+
+    Args:
+        node: The tree, usually the whole file.
+
+    Returns:
+        Raw identifiers of the tree.
+    """
+    return {n.raw for n in walk(node) if isinstance(n, Identifier)}
+
+
+def fresh_name(names: set[str], base: str, *, numbered: bool = False) -> str:
+    """Reserve a name that isn't in `names`.
+
+    Args:
+        names: Names in use, extended with the new one.
+        base: Name to use if it is free, or to number otherwise.
+        numbered: Whether to always number the name, starting from `0`.
+
+    Returns:
+        `base` or `{base}_{i}`, or `{base}{i}` if `numbered`.
+
+    Examples:
+        ```python
+        from synt.passes.common import fresh_name
+        names = {"x", "x_1", "_t0"}
+        assert fresh_name(names, "x") == "x_2"
+        assert fresh_name(names, "y") == "y"
+        assert fresh_name(names, "_t", numbered=True) == "_t1"
+        assert {"x_2", "y", "_t1"} <= names
+        ```
+    """
+    if numbered:
+        i = 0
+        while f"{base}{i}" in names:
+            i += 1
+        name = f"{base}{i}"
+    else:
+        name, i = base, 0
+        while name in names:
+            i += 1
+            name = f"{base}_{i}"
+    names.add(name)
+    return name
+
+
+def name_expr(name: str) -> IdentifierExpr:
+    """Build a read of a name."""
+    return IdentifierExpr(Identifier(name))
+
+
+def is_private(name: str) -> bool:
+    """Whether a name is mangled with the name of the enclosing class, like `__x`."""
+    return name.startswith("__") and not name.endswith("__")
+
+
+def is_docstring(s: Statement) -> bool:
+    """Whether a statement is a string literal, which is the docstring at the start of a body."""
+    return (
+        isinstance(s, ExprStatement)
+        and isinstance(s.expr, Literal)
+        and s.expr.lit[-1:] in ("'", '"')
+    )
+
+
+def has_yield(node: Node) -> bool:
+    """Whether a node contains a `yield` of the enclosing function,
+    outside of nested functions, lambdas and classes.
+
+    Args:
+        node: The node, e.g. statements about to be dropped.
+    """
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        match n:
+            case UnaryOp() if n.op_type in (UnaryOpType.Yield, UnaryOpType.YieldFrom):
+                return True
+            case KeywordStatement() if n.keyword == "yield":
+                return True
+            case FunctionDef() | ClassDef() | Closure():
+                continue
+        stack.extend(children(n))
+    return False
+
+
+def is_generator_marker(s: Node) -> bool:
+    """Whether a statement is the `if False: yield` left by
+    [`generator_marker`][synt.passes.common.generator_marker]."""
+    if not isinstance(s, Branch) or len(s.tests) != 1 or s.fallback is not None:
+        return False
+    test, block = s.tests[0]
+    while isinstance(test, Wrapped):
+        test = test.inner
+    return (
+        isinstance(test, Literal)
+        and test.lit == "False"
+        and len(block.body) == 1
+        and isinstance(block.body[0], KeywordStatement)
+        and block.body[0].keyword == "yield"
+    )
+
+
+def generator_marker(dropped: Sequence[Node]) -> list[Statement]:
+    r"""Get the statements to leave in place of dropped code,
+    so that the enclosing function stays a generator.
+
+    A function containing `yield` is a generator even if the `yield` never runs:
+    dropping it turns the function into one returning `None` instead.
+    An `if False: yield` marker, which never runs either, is left in its place.
+
+    Args:
+        dropped: Statements, blocks or expressions about to be dropped.
+
+    Returns:
+        A marker if the dropped code contains a `yield`, nothing otherwise.
+        A marker that is dropped alone is returned as is.
+
+    Examples:
+        ```python
+        from synt.passes.common import generator_marker
+        dropped = [id_("x").expr().assign(yield_(litint(1)))]
+        assert [s.into_code() for s in generator_marker(dropped)] == ["if False:\n    yield"]
+        assert generator_marker([return_(litint(1))]) == []
+        ```
+    """
+    first = dropped[0] if len(dropped) == 1 else None
+    if isinstance(first, Branch) and is_generator_marker(first):
+        return [first]
+    if any(map(has_yield, dropped)):
+        return [if_(FALSE).block(KeywordStatement("yield"))]
+    return []
@@ -0,0 +1,344 @@
+r"""## Comprehension rewriting
+
+Build lists, sets and dicts with comprehensions instead of accumulating loops.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "ComprehensionRewrite",
+]
+
+
+from typing import TYPE_CHECKING
+
+from synt.expr.attribute import Attribute
+from synt.expr.call import Call
+from synt.expr.comprehension import ComprehensionBuilder
+from synt.expr.dict import DictComprehension
+from synt.expr.dict import DictVerbatim
+from synt.expr.expr import ExprPrecedence
+from synt.expr.list import ListComprehension
+from synt.expr.list import ListVerbatim
+from synt.expr.named_expr import NamedExpr
+from synt.expr.set import SetComprehension
+from synt.expr.subscript import Slice
+from synt.expr.subscript import Subscript
+from synt.expr.tuple import Tuple
+from synt.expr.unary_op import UnaryOp
+from synt.expr.unary_op import UnaryOpType
+from synt.passes.analysis import PurityAnalysis
+from synt.passes.analysis import ScopeAnalysis
+from synt.passes.manager import TransformerPass
+from synt.stmt.assign import Assignment
+from synt.stmt.branch import Branch
+from synt.stmt.expression import ExprStatement
+from synt.stmt.loop import ForLoop
+from synt.tokens.ident import IdentifierExpr
+from synt.tokens.kv_pair import KVPair
+from synt.visit import walk
+
+
+if TYPE_CHECKING:
+    from synt.expr.expr import Expression
+    from synt.file import File
+    from synt.passes.analysis import Scope
+    from synt.passes.manager import AnalysisManager
+    from synt.stmt.block import Block
+    from synt.stmt.cls import ClassDef
+    from synt.stmt.context import With
+    from synt.stmt.fn import FunctionDef
+    from synt.stmt.stmt import Statement
+    from synt.stmt.try_catch import Try
+    from synt.tokens.ident import Identifier
+
+
+type _Generator = tuple[list[Identifier], Expression, list[Expression]]
+"""Targets, iterable and conditions of a `for` clause."""
+
+_METHODS = {"list": "append", "set": "add"}
+"""Method adding an item to each kind of accumulated collection."""
+
+
+class ComprehensionRewrite(TransformerPass):
+    r"""Rewrite loops filling an empty collection into comprehensions.
+
+    An assignment of an empty list, set or dict to a variable, followed by
+    a `for` loop whose body only adds one item to it, possibly under nested
+    `if` statements without `else` branches and nested `for` loops, becomes
+    an assignment of a comprehension:
+
+    - `acc = []` with `acc.append(item)` becomes `acc = [item for ...]`;
+    - `acc = set()` with `acc.add(item)` becomes `acc = {item for ...}`;
+    - `acc = {}` with `acc[key] = value` becomes `acc = {key: value for ...}`.
+
+    Only loops of function bodies are rewritten, outside of `try` and `with` statements,
+    as an exception would otherwise leave the variable unassigned instead of partially filled.
+    The loop targets must be locals only used by the loop, which a comprehension doesn't leak,
+    and neither the loop nor nested functions may read the collection while it is filled.
+    The key or the value of a dict item must have no side effects,
+    as comprehensions evaluate keys first.
+
+    Examples:
+        ```python
+        from synt.passes import PassManager
+        from synt.passes.comprehend import ComprehensionRewrite
+        acc, x = id_("acc"), id_("x")
+        file = File(
+            def_(id_("f"))(arg(id_("xs"))).block(
+                acc.expr().assign(list_()),
+                for_(x).in_(id_("xs")).block(
+                    if_(x.expr() > litint(0)).block(
+                        acc.expr().attr("append").call(x.expr() * litint(2)).stmt(),
+                    ),
+                ),
+                return_(acc),
+            ),
+        )
+        PassManager(ComprehensionRewrite()).run(file)
+        assert file.into_str() == (
+            "def f(xs):\n"
+            "    acc = [x * 2 for x in xs if x > 0]\n"
+            "    return acc"
+        )
+        ```
+    """
+
+    requires = (ScopeAnalysis, PurityAnalysis)
+
+    __scopes: list[Scope | None]
+    """Scope of each enclosing function, `None` for classes and the module."""
+    __guarded: int
+    """Number of enclosing `try` and `with` statements in the current function."""
+    __outer: list[int]
+
+    def __init__(self) -> None:
+        """Initialize the pass."""
+        self.__scopes = []
+        self.__guarded = 0
+        self.__outer = []
+
+    def run(self, file: File, analyses: AnalysisManager) -> int:
+        self.__scopes = [None]
+        self.__guarded = 0
+        try:
+            return super().run(file, analyses)
+        finally:
+            self.__scopes.clear()
+            self.__outer.clear()
+
+    def visit_FunctionDef(self, node: FunctionDef) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+        self.__outer.append(self.__guarded)
+        self.__guarded = 0
+
+    def leave_FunctionDef(self, node: FunctionDef) -> FunctionDef:
+        self.__scopes.pop()
+        self.__guarded = self.__outer.pop()
+        return node
+
+    def visit_ClassDef(self, node: ClassDef) -> None:
+        self.__scopes.append(None)
+
+    def leave_ClassDef(self, node: ClassDef) -> ClassDef:
+        self.__scopes.pop()
+        return node
+
+    def visit_Try(self, node: Try) -> None:
+        self.__guarded += 1
+
+    def leave_Try(self, node: Try) -> Try:
+        self.__guarded -= 1
+        return node
+
+    def visit_With(self, node: With) -> None:
+        self.__guarded += 1
+
+    def leave_With(self, node: With) -> With:
+        self.__guarded -= 1
+        return node
+
+    def leave_Block(self, node: Block) -> Block:
+        scope = self.__scopes[-1]
+        if scope is None or self.__guarded:
+            return node
+        body: list[Statement] = []
+        for s in node.body:
+            prev = body[-1] if body else None
+            if (
+                isinstance(s, ForLoop)
+                and isinstance(prev, Assignment)
+                and self.__rewrite(prev, s, scope)
+            ):
+                self.changes += 1
+                continue
+            body.append(s)
+        node.body = body
+        return node
+
+    def __rewrite(self, init: Assignment, loop: ForLoop, scope: Scope) -> bool:
+        """Turn an assignment of an empty collection into one of a comprehension
+        if the following loop fills it.
+
+        Returns:
+            Whether the assignment was changed, replacing the loop.
+        """
+        acc, kind = init.target, _empty(init.value, scope)
+        if kind is None or not isinstance(acc, IdentifierExpr):
+            return False
+        name = acc.ident.raw
+        # nested functions may read the collection while it is filled
+        if not scope.binds(name) or name in scope.captured:
+            return False
+        generators: list[_Generator] = []
+        item = _fill(loop, name, kind, generators)
+        if item is None:
+            return False
+        # only the receiver of the added items may read the collection
+        if sum(1 for n in walk(loop) if _is_name(n, name)) != 1:
+            return False
+        for n in walk(loop):
+            if isinstance(n, NamedExpr) or (
+                isinstance(n, UnaryOp)
+                and n.op_type
+                in (UnaryOpType.Await, UnaryOpType.Yield, UnaryOpType.YieldFrom)
+            ):
+                return False
+        for targets, _, _ in generators:
+            for target in targets:
+                if not _private(target.raw, loop, scope):
+                    return False
+        purity = self.analyses.get(PurityAnalysis)
+        if isinstance(item, KVPair) and not (
+            purity.is_pure(item.key) or purity.is_pure(item.value)
+        ):
+            return False
+
+        (targets, iterable, conditions), *rest = generators
+        builder = ComprehensionBuilder(item, targets)
+        node = builder.curr_node().in_(_clause(iterable))  # type:ignore[union-attr]
+        for condition in conditions:
+            node.if_(_clause(condition))
+        for targets, iterable, conditions in rest:
+            node = builder.for_(*targets).in_(_clause(iterable))
+            for condition in conditions:
+                node.if_(_clause(condition))
+        if kind == "list":
+            init.value = ListComprehension(builder)
+        elif kind == "set":
+            init.value = SetComprehension(builder)
+        else:
+            init.value = DictComprehension(builder)
+        return True
+
+
+def _empty(value: Expression | None, scope: Scope) -> str | None:
+    """Get the kind of an empty collection display, `None` for other values."""
+    match value:
+        case ListVerbatim() if not value.items:
+            return "list"
+        case DictVerbatim() if not value.items:
+            return "dict"
+        case Call() if (
+            isinstance(value.target, IdentifierExpr)
+            and value.target.ident.raw == "set"
+            and scope.resolve("set") is None
+            and not value.args
+            and not value.keywords
+        ):
+            return "set"
+    return None
+
+
+def _fill(
+    s: Statement, acc: str, kind: str, generators: list[_Generator]
+) -> Expression | None:
+    """Match nested loops and branches adding a single item to a collection.
+
+    Args:
+        s: Statement to match.
+        acc: Name of the collection.
+        kind: Kind of the collection.
+        generators: Clauses of the enclosing loops, extended with the matched ones.
+
+    Returns:
+        The added item, a key-value pair for dicts, `None` if nothing matches.
+    """
+    match s:
+        case ForLoop() if s.orelse is None and len(s.body.body) == 1:
+            targets = _targets(s.target)
+            if targets is None:
+                return None
+            generators.append((targets, s.iter, []))
+            return _fill(s.body.body[0], acc, kind, generators)
+        case Branch() if (
+            generators
+            and s.fallback is None
+            and len(s.tests) == 1
+            and len(s.tests[0][1].body) == 1
+        ):
+            test, block = s.tests[0]
+            generators[-1][2].append(test)
+            return _fill(block.body[0], acc, kind, generators)
+        case ExprStatement() if (
+            kind != "dict"
+            and generators
+            and isinstance(s.expr, Call)
+            and isinstance(s.expr.target, Attribute)
+            and s.expr.target.attribute_name == _METHODS[kind]
+            and _is_name(s.expr.target.target, acc)
+            and len(s.expr.args) == 1
+            and not s.expr.keywords
+        ):
+            item = s.expr.args[0]
+            if isinstance(item, UnaryOp) and item.op_type in (
+                UnaryOpType.Starred,
+                UnaryOpType.DoubleStarred,
+            ):
+                return None
+            return item
+        case Assignment() if (
+            kind == "dict"
+            and generators
+            and s.target_ty is None
+            and s.value is not None
+            and isinstance(s.target, Subscript)
+            and _is_name(s.target.target, acc)
+            and len(s.target.slices) == 1
+            and not isinstance(s.target.slices[0], Slice)
+        ):
+            return KVPair(s.target.slices[0], s.value)
+    return None
+
+
+def _targets(target: Expression) -> list[Identifier] | None:
+    """Get the names a loop target binds, `None` if it is not a name or a flat tuple of names."""
+    if isinstance(target, IdentifierExpr):
+        return [target.ident]
+    if (
+        isinstance(target, Tuple)
+        and target.items
+        and all(isinstance(t, IdentifierExpr) for t in target.items)
+    ):
+        return [t.ident for t in target.items]  # type:ignore[attr-defined]
+    return None
+
+
+def _private(name: str, loop: ForLoop, scope: Scope) -> bool:
+    """Whether a loop target is a local of the function only used in the loop."""
+    uses = sum(1 for n in walk(loop) if _is_name(n, name))
+    return (
+        scope.binds(name)
+        and name not in scope.captured
+        and scope.loads[name] + scope.stores[name] == uses
+    )
+
+
+def _clause(e: Expression) -> Expression:
+    """Parenthesize conditional expressions and lambdas in `for` and `if` clauses."""
+    return e.wrapped() if e.precedence > ExprPrecedence.BoolOr else e
+
+
+def _is_name(node: object, name: str) -> bool:
+    return isinstance(node, IdentifierExpr) and node.ident.raw == name
@@ -0,0 +1,518 @@
+r"""## Common subexpression elimination
+
+Evaluate repeated attribute and subscript chains once per function.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "CommonSubexpressionElimination",
+]
+
+
+from typing import TYPE_CHECKING
+
+from synt.expr.attribute import Attribute
+from synt.expr.binary_op import BinaryOp
+from synt.expr.binary_op import BinaryOpType
+from synt.expr.call import Call
+from synt.expr.closure import Closure
+from synt.expr.comprehension import Comprehension
+from synt.expr.comprehension import GeneratorComprehension
+from synt.expr.condition import Condition
+from synt.expr.dict import DictComprehension
+from synt.expr.list import ListComprehension
+from synt.expr.list import ListVerbatim
+from synt.expr.named_expr import NamedExpr
+from synt.expr.set import SetComprehension
+from synt.expr.subscript import Subscript
+from synt.expr.tuple import Tuple
+from synt.expr.unary_op import UnaryOp
+from synt.expr.unary_op import UnaryOpType
+from synt.expr.wrapped import Wrapped
+from synt.passes.analysis import PurityAnalysis
+from synt.passes.common import fresh_name
+from synt.passes.common import name_expr
+from synt.passes.common import used_names
+from synt.passes.manager import TransformerPass
+from synt.stmt.assertion import Assert
+from synt.stmt.assign import Assignment
+from synt.stmt.branch import Branch
+from synt.stmt.cls import ClassDef
+from synt.stmt.context import With
+from synt.stmt.context import WithItem
+from synt.stmt.delete import Delete
+from synt.stmt.expression import ExprStatement
+from synt.stmt.fn import FunctionDef
+from synt.stmt.importing import Import
+from synt.stmt.importing import ImportFrom
+from synt.stmt.loop import ForLoop
+from synt.stmt.loop import WhileLoop
+from synt.stmt.match_case import Match
+from synt.stmt.match_case import MatchCase
+from synt.stmt.raising import Raise
+from synt.stmt.returns import Return
+from synt.stmt.try_catch import ExceptionHandler
+from synt.stmt.try_catch import Try
+from synt.tokens.ident import Identifier
+from synt.tokens.ident import IdentifierExpr
+from synt.tokens.lit import Literal
+from synt.visit import children
+from synt.visit import unshare
+from synt.visit import walk
+
+
+if TYPE_CHECKING:
+    from synt.expr.expr import Expression
+    from synt.file import File
+    from synt.passes.manager import AnalysisManager
+    from synt.stmt.block import Block
+    from synt.stmt.stmt import Statement
+    from synt.visit import Node
+
+
+_COMPREHENSIONS = (
+    ListComprehension,
+    SetComprehension,
+    DictComprehension,
+    GeneratorComprehension,
+    Comprehension,
+    Closure,
+)
+_IMPURE_UNARY = (UnaryOpType.Await, UnaryOpType.Yield, UnaryOpType.YieldFrom)
+
+
+class _Effects:
+    """What evaluating some code may change."""
+
+    everything: bool
+    """Whether anything may change, e.g. through a call."""
+    names: set[str]
+    """Rebound or deleted names."""
+    attributes: set[str]
+    """Names of assigned or deleted attributes."""
+    items: bool
+    """Whether an item is assigned or deleted."""
+
+    def __init__(self, *, everything: bool = False, names: set[str] | None = None):
+        self.everything = everything
+        self.names = names or set()
+        self.attributes = set()
+        self.items = False
+
+    def store(self, target: Expression) -> None:
+        if isinstance(target, IdentifierExpr):
+            self.names.add(target.ident.raw)
+        elif isinstance(target, Tuple | ListVerbatim):
+            for item in target.items:
+                self.store(item)
+        elif isinstance(target, Wrapped):
+            self.store(target.inner)
+        elif isinstance(target, UnaryOp):
+            self.store(target.expression)
+        elif isinstance(target, Attribute):
+            self.attributes.add(target.attribute_name)
+        elif isinstance(target, Subscript):
+            self.items = True
+        else:
+            self.everything = True
+
+    @classmethod
+    def of(cls, node: Node, purity: PurityAnalysis) -> _Effects:
+        """Collect the effects of a node and all of its descendants."""
+        effects = cls()
+        for n in walk(node):
+            match n:
+                case Call() if not purity.is_pure_call(_callee(n)):
+                    effects.everything = True
+                case UnaryOp() if n.op_type in _IMPURE_UNARY:
+                    effects.everything = True
+                case Import() | ImportFrom() | With():
+                    effects.everything = True
+                case NamedExpr():
+                    effects.names.add(n.receiver.raw)
+                case Assignment() | Delete() | ForLoop():
+                    effects.store(n.target)
+                case WithItem() if n.asname is not None:
+                    effects.store(n.asname)
+                case ExceptionHandler() if n.asname is not None:
+                    effects.names.add(n.asname.raw)
+                case FunctionDef() | ClassDef():
+                    effects.names.add(n.name.raw)
+                case MatchCase():
+                    effects.names.update(
+                        x.ident.raw
+                        for x in walk(n.pattern)
+                        if isinstance(x, IdentifierExpr)
+                    )
+            if effects.everything:
+                break
+        return effects
+
+
+def _callee(call: Call) -> str:
+    """Name of a called function, empty if it is not called by name."""
+    return call.target.ident.raw if isinstance(call.target, IdentifierExpr) else ""
+
+
+class _Chain:
+    """Occurrences of an attribute and subscript chain while its value doesn't change."""
+
+    key: str
+    names: set[str]
+    """Names read by the chain."""
+    attributes: set[str]
+    """Attribute names read by the chain."""
+    items: bool
+    """Whether the chain reads an item."""
+    depth: int
+    """Number of attribute and subscript operations."""
+    first: Expression
+    """Occurrence evaluated first, which binds the temporary."""
+    statement: Statement
+    """Statement evaluating the first occurrence."""
+    inline: bool
+    """Whether the first occurrence follows side effects in its statement,
+    so that its value can't be computed in a statement of its own."""
+    uses: list[Expression]
+    """Later occurrences, which read the temporary."""
+    seq: int
+    """Evaluation order of the first occurrence."""
+
+    def __init__(self, key: str, first: Expression, statement: Statement, inline: bool):
+        self.key = key
+        self.names, self.attributes, self.items = set(), set(), False
+        self.depth = 0
+        node = first
+        while isinstance(node, Attribute | Subscript):
+            self.depth += 1
+            if isinstance(node, Attribute):
+                self.attributes.add(node.attribute_name)
+            else:
+                self.items = True
+                self.names.update(
+                    s.ident.raw for s in node.slices if isinstance(s, IdentifierExpr)
+                )
+            node = node.target
+        if isinstance(node, IdentifierExpr):
+            self.names.add(node.ident.raw)
+        self.first = first
+        self.statement = statement
+        self.inline = inline
+        self.uses = []
+        self.seq = 0
+
+    def affected(self, effects: _Effects) -> bool:
+        return (
+            effects.everything
+            or not self.names.isdisjoint(effects.names)
+            or not self.attributes.isdisjoint(effects.attributes)
+            or (self.items and effects.items)
+        )
+
+
+def _is_chain(node: Node) -> bool:
+    """Whether a node is an attribute or subscript chain on a name,
+    indexed by names and literals only."""
+    if not isinstance(node, Attribute | Subscript):
+        return False
+    while isinstance(node, Attribute | Subscript):
+        if isinstance(node, Subscript) and not all(
+            isinstance(s, IdentifierExpr | Literal) for s in node.slices
+        ):
+            return False
+        node = node.target
+    return isinstance(node, IdentifierExpr)
+
+
+class _Planner:
+    """Find the repeated chains of a function body, in evaluation order."""
+
+    purity: PurityAnalysis
+    chains: list[_Chain]
+    available: dict[str, _Chain]
+    """Chains whose value is known at the current point, by rendered code."""
+    statement: Statement
+    dirty: bool
+    """Whether the current statement had side effects so far."""
+
+    def __init__(self, purity: PurityAnalysis):
+        self.purity = purity
+        self.chains = []
+        self.available = {}
+        self.dirty = False
+
+    def effect(self, effects: _Effects) -> None:
+        if effects.everything or effects.names or effects.attributes or effects.items:
+            self.dirty = True
+            self.available = {
+                k: c for k, c in self.available.items() if not c.affected(effects)
+            }
+
+    def block(self, block: Block) -> None:
+        outer = self.available
+        self.available = dict(outer)
+        for s in block.body:
+            self.statement, self.dirty = s, False
+            self.stmt(s)
+        self.available = outer
+
+    def nested(self, s: Statement, *blocks: Block | None) -> None:
+        self.effect(_Effects.of(s, self.purity))
+        available = self.available
+        for b in blocks:
+            if b is not None:
+                self.block(b)
+        self.available = available
+
+    def stmt(self, s: Statement) -> None:
+        match s:
+            case Assignment():
+                if s.value is not None:
+                    self.scan(s.value)
+                self.store(s.target)
+            case Delete():
+                self.store(s.target)
+            case ExprStatement():
+                self.scan(s.expr)
+            case Return() if s.expression is not None:
+                self.scan(s.expression)
+            case Raise():
+                for e in (s.exception, s.cause):
+                    if e is not None:
+                        self.scan(e)
+            case Assert():
+                self.scan(s.test)
+                if s.msg is not None:
+                    self.scan(s.msg, conditional=True)
+            case Branch():
+                self.scan(s.tests[0][0])
+                self.nested(s, *(b for _, b in s.tests), s.fallback)
+            case ForLoop():
+                self.scan(s.iter)
+                self.nested(s, s.body, s.orelse)
+            case Match():
+                self.scan(s.subject)
+                self.nested(s, *(c.body for c in s.cases))
+            case FunctionDef():
+                # the body runs later, when the function is called
+                defaults = [
+                    a.default_expr for a in s.args if a.default_expr is not None
+                ]
+                if all(self.purity.is_pure(e) for e in (*s.decorators, *defaults)):
+                    self.effect(_Effects(names={s.name.raw}))
+                else:
+                    self.effect(_Effects(everything=True))
+            case ClassDef():
+                self.effect(_Effects.of(s, self.purity))
+            case WhileLoop():
+                # the test runs again after each iteration
+                self.nested(s, s.body, s.orelse)
+            case Try():
+                self.nested(
+                    s, s.try_block, *(h.body for h in s.handlers), s.orelse, s.final
+                )
+            case With():
+                self.nested(s, s.body)
+            case _:
+                # simple statements, like `pass`, `break`, `global` or `import`
+                self.effect(_Effects.of(s, self.purity))
+
+    def store(self, target: Expression) -> None:
+        self.operands(target)
+        effects = _Effects()
+        effects.store(target)
+        self.effect(effects)
+
+    def operands(self, target: Expression) -> None:
+        """Scan the operands read by attribute and subscript targets."""
+        match target:
+            case Tuple() | ListVerbatim():
+                for item in target.items:
+                    self.operands(item)
+            case Wrapped():
+                self.operands(target.inner)
+            case UnaryOp():
+                self.operands(target.expression)
+            case Attribute():
+                self.scan(target.target)
+            case Subscript():
+                self.scan(target.target)
+                for s in target.slices:
+                    self.scan(s)
+
+    def scan(self, node: Node, conditional: bool = False) -> None:
+        if _is_chain(node):
+            self.occurrence(node, conditional)  # type:ignore[arg-type]
+            return
+        match node:
+            case _ if isinstance(node, _COMPREHENSIONS):
+                self.effect(_Effects.of(node, self.purity))
+            case Condition():
+                self.scan(node.condition, conditional)
+                self.scan(node.true_expr, True)
+                self.scan(node.false_expr, True)
+            case BinaryOp() if node.op_type in (
+                BinaryOpType.BoolAnd,
+                BinaryOpType.BoolOr,
+            ):
+                self.scan(node.left, conditional)
+                self.scan(node.right, True)
+            case Call():
+                for child in children(node):
+                    self.scan(child, conditional)
+                if not self.purity.is_pure_call(_callee(node)):
+                    self.effect(_Effects(everything=True))
+            case UnaryOp() if node.op_type in _IMPURE_UNARY:
+                self.scan(node.expression, conditional)
+                self.effect(_Effects(everything=True))
+            case NamedExpr():
+                self.scan(node.value, conditional)
+                self.effect(_Effects(names={node.receiver.raw}))
+            case _:
+                for child in children(node):
+                    self.scan(child, conditional)
+
+    def occurrence(self, node: Expression, conditional: bool) -> None:
+        if isinstance(node.target, Attribute | Subscript):  # type:ignore[attr-defined]
+            self.occurrence(node.target, conditional)  # type:ignore[attr-defined]
+        key = node.into_code()
+        chain = self.available.get(key)
+        if chain is not None:
+            chain.uses.append(node)
+        elif not conditional:
+            chain = _Chain(key, node, self.statement, self.dirty)
+            chain.seq = len(self.chains)
+            self.chains.append(chain)
+            self.available[key] = chain
+
+
+class CommonSubexpressionElimination(TransformerPass):
+    r"""Bind repeated attribute and subscript chains to temporaries in function bodies.
+
+    Chains like `self.row.data["x"]`, on a name and indexed by names and literals only,
+    are compared by their rendered code.
+    When a chain is evaluated again while none of its names, attributes or items
+    can have changed, its value is read from a fresh local variable instead.
+    Impure calls, `await` and `yield` are assumed to change anything.
+
+    The temporary is assigned in a new statement before the first occurrence,
+    or with an assignment expression when the first occurrence follows
+    side effects in its statement.
+    Occurrences in branches of conditional expressions and in boolean operands
+    only read temporaries, and chains in lambdas and comprehensions are left alone.
+    Nested chains are bound from the longest one,
+    so that shorter chains are shared by the next iteration.
+
+    Examples:
+        ```python
+        from synt.passes import PassManager
+        from synt.passes.cse import CommonSubexpressionElimination
+        row = id_("self").expr().attr("row").expr()
+        file = File(
+            def_(id_("f"))(arg(id_("self"))).block(
+                return_(row[litstr("x")] + row[litstr("y")]),
+            ),
+        )
+        PassManager(CommonSubexpressionElimination()).run(file)
+        assert file.into_str() == (
+            "def f(self):\n"
+            "    _cse_0 = self.row\n"
+            "    return _cse_0['x'] + _cse_0['y']"
+        )
+        ```
+    """
+
+    requires = (PurityAnalysis,)
+
+    min_uses: int
+    """Minimum number of occurrences of a chain to bind it to a temporary."""
+    prefix: str
+    """Prefix of the temporaries' names."""
+
+    __names: set[str]
+    __replace: dict[int, tuple[Expression, Expression]]
+    __insert: dict[int, list[Statement]]
+
+    def __init__(self, min_uses: int = 2, prefix: str = "_cse_"):
+        """Initialize the pass.
+
+        Args:
+            min_uses: Minimum number of occurrences of a chain to bind it to a temporary.
+            prefix: Prefix of the temporaries' names.
+
+        Raises:
+            ValueError: If `min_uses` is less than 2.
+        """
+        if min_uses < 2:
+            raise ValueError(f"Minimum uses must be at least 2, got {min_uses}.")
+        self.min_uses = min_uses
+        self.prefix = prefix
+        self.__names = set()
+        self.__replace = {}
+        self.__insert = {}
+
+    def run(self, file: File, analyses: AnalysisManager) -> int:
+        # occurrences are told apart by identity
+        unshare(file)
+        self.__names = used_names(file)
+        try:
+            return super().run(file, analyses)
+        finally:
+            self.__names.clear()
+            self.__replace.clear()
+            self.__insert.clear()
+
+    def visit_FunctionDef(self, node: FunctionDef) -> None:
+        planner = _Planner(self.analyses.get(PurityAnalysis))
+        planner.block(node.body)
+        taken: set[int] = set()
+        chains = sorted(planner.chains, key=lambda c: (-c.depth, c.seq))
+        bound = []
+        for chain in chains:
+            occurrences = [chain.first, *chain.uses]
+            if len(occurrences) < self.min_uses:
+                continue
+            ids = [id(n) for o in occurrences for n in walk(o)]
+            if not taken.isdisjoint(ids):
+                # shares nodes with a longer chain, left to the next iteration
+                continue
+            taken.update(ids)
+            bound.append(chain)
+
+        for chain in sorted(bound, key=lambda c: c.seq):
+            name = fresh_name(self.__names, self.prefix, numbered=True)
+            for use in chain.uses:
+                self.__replace[id(use)] = (use, name_expr(name))
+            if chain.inline:
+                value = NamedExpr(Identifier(name), chain.first).wrapped()
+                self.__replace[id(chain.first)] = (chain.first, value)
+            else:
+                self.__replace[id(chain.first)] = (chain.first, name_expr(name))
+                self.__insert.setdefault(id(chain.statement), []).append(
+                    Assignment(name_expr(name)).assign(chain.first)
+                )
+
+    def leave_Attribute(self, node: Expression) -> Expression:
+        entry = self.__replace.get(id(node))
+        if entry is None or entry[0] is not node:
+            return node
+        return entry[1]
+
+    def leave_Subscript(self, node: Expression) -> Expression:
+        return self.leave_Attribute(node)
+
+    def leave_Block(self, node: Block) -> Block:
+        if not self.__insert:
+            return node
+        body: list[Statement] = []
+        for s in node.body:
+            inserted = self.__insert.pop(id(s), None)
+            if inserted is not None:
+                body.extend(inserted)
+                self.changes += len(inserted)
+            body.append(s)
+        if len(body) != len(node.body):
+            node.body = body
+        return node
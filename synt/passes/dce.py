@@ -0,0 +1,354 @@
+r"""## Dead code elimination
+
+Drop statements that never run or whose results are never used.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "DeadCodeElimination",
+]
+
+
+import ast
+
+from typing import TYPE_CHECKING
+from typing import Any
+
+from synt.expr.dict import DictVerbatim
+from synt.expr.list import ListVerbatim
+from synt.expr.set import SetVerbatim
+from synt.expr.tuple import Tuple
+from synt.expr.wrapped import Wrapped
+from synt.passes.analysis import PurityAnalysis
+from synt.passes.analysis import ScopeAnalysis
+from synt.passes.common import DYNAMIC_NAMES
+from synt.passes.common import generator_marker
+from synt.passes.common import is_generator_marker
+from synt.passes.manager import TransformerPass
+from synt.stmt.branch import Branch
+from synt.stmt.context import With
+from synt.stmt.expression import ExprStatement
+from synt.stmt.keyword import PASS
+from synt.stmt.keyword import KeywordStatement
+from synt.stmt.loop import ForLoop
+from synt.stmt.loop import WhileLoop
+from synt.stmt.match_case import Match
+from synt.stmt.raising import Raise
+from synt.stmt.returns import Return
+from synt.stmt.try_catch import Try
+from synt.tokens.ident import IdentifierExpr
+from synt.tokens.lit import Literal
+
+
+if TYPE_CHECKING:
+    from synt.expr.expr import Expression
+    from synt.file import File
+    from synt.passes.analysis import Scope
+    from synt.passes.manager import AnalysisManager
+    from synt.stmt.assign import Assignment
+    from synt.stmt.block import Block
+    from synt.stmt.cls import ClassDef
+    from synt.stmt.fn import FunctionDef
+    from synt.stmt.stmt import Statement
+    from synt.visit import Node
+
+
+class DeadCodeElimination(TransformerPass):
+    r"""Remove unreachable statements, constant branches and dead stores.
+
+    The following statements are removed or simplified in every block:
+
+    - statements following a `return`, `raise`, `break` or `continue`,
+      or a compound statement none of whose branches completes normally;
+    - `if` and `elif` arms whose test is a false literal, and arms following
+      a true literal test, which becomes the `else` branch;
+    - `while` loops whose test is a false literal and `for` loops over an empty
+      literal collection, which are replaced with their `else` branch;
+    - `try` statements whose body only contains `pass`, which are replaced with their
+      `else` and `finally` branches;
+    - assignments to function locals that are never read,
+      keeping the assigned value if evaluating it may have side effects;
+    - expression statements without side effects, except string literals and `...`,
+      and `pass` in blocks with other statements.
+
+    Blocks left empty get a `pass`, and dropped code containing a `yield` leaves
+    an `if False: yield` in its place, so that generators stay generators.
+    Inside `try` statements, expressions are only removed if they can't raise
+    an exception, which a handler could catch: a `try` emptied this way is kept.
+    Functions reading their locals dynamically, e.g. with `locals()`, keep all their stores.
+
+    Examples:
+        ```python
+        from synt.passes import PassManager
+        from synt.passes.dce import DeadCodeElimination
+        x, y = id_("x"), id_("y")
+        file = File(
+            def_(id_("f"))(arg(x)).block(
+                y.expr().assign(x.expr() + litint(1)),
+                if_(FALSE).block(id_("print").expr().call(x).stmt()),
+                return_(x),
+                id_("print").expr().call(litstr("unreachable")).stmt(),
+            ),
+        )
+        PassManager(DeadCodeElimination()).run(file)
+        assert file.into_str() == "def f(x):\n    return x"
+        ```
+    """
+
+    requires = (ScopeAnalysis, PurityAnalysis)
+
+    __file: File | None
+    __scopes: list[Scope | None]
+    """Scope of each enclosing function, `None` for classes and the module."""
+    __tries: list[int]
+    """Number of enclosing `try` statements in each enclosing function."""
+    __empty: set[int]
+    """`try` statements whose body only contained `pass`, by identity."""
+
+    def __init__(self) -> None:
+        """Initialize the pass."""
+        self.__file = None
+        self.__scopes = []
+        self.__tries = []
+        self.__empty = set()
+
+    def run(self, file: File, analyses: AnalysisManager) -> int:
+        self.__file = file
+        self.__scopes = [None]
+        self.__tries = [0]
+        try:
+            return super().run(file, analyses)
+        finally:
+            self.__file = None
+            self.__empty.clear()
+
+    def visit_FunctionDef(self, node: FunctionDef) -> None:
+        scope = self.analyses.get(ScopeAnalysis).scope(node)
+        dynamic = any(name in DYNAMIC_NAMES for s in scope.walk() for name in s.loads)
+        self.__scopes.append(None if dynamic else scope)
+        # the body runs when the function is called
+        self.__tries.append(0)
+
+    def leave_FunctionDef(self, node: FunctionDef) -> FunctionDef:
+        self.__scopes.pop()
+        self.__tries.pop()
+        return node
+
+    def visit_ClassDef(self, node: ClassDef) -> None:
+        self.__scopes.append(None)
+
+    def leave_ClassDef(self, node: ClassDef) -> ClassDef:
+        self.__scopes.pop()
+        return node
+
+    def leave_Assignment(self, node: Assignment) -> Statement | None:
+        scope = self.__scopes[-1]
+        target = node.target
+        if scope is None or not isinstance(target, IdentifierExpr):
+            return node
+        name = target.ident.raw
+        if (
+            not scope.binds(name)
+            or scope.loads[name]
+            or scope.deletes[name]
+            or name in scope.captured
+        ):
+            return node
+        if node.value is None or self.__removable(node.value):
+            return None
+        return ExprStatement(node.value)
+
+    def leave_Branch(self, node: Branch) -> Statement | list[Statement] | None:
+        if is_generator_marker(node):
+            return node
+        tests: list[tuple[Expression, Block]] = []
+        dropped: list[Node] = []
+        fallback = node.fallback
+        for i, (test, block) in enumerate(node.tests):
+            truth = _truth(test)
+            if truth is None:
+                tests.append((test, block))
+            elif truth:
+                fallback = block
+                dropped.extend(x for arm in node.tests[i + 1 :] for x in arm)
+                if node.fallback is not None:
+                    dropped.append(node.fallback)
+                break
+            else:
+                dropped.append(block)
+        marker = generator_marker(dropped)
+        if not tests:
+            return [*([] if fallback is None else fallback.body), *marker] or None
+        if len(tests) != len(node.tests) or fallback is not node.fallback:
+            node.tests = tests
+            node.fallback = fallback
+            self.changes += 1
+        return [node, *marker] if marker else node
+
+    def leave_WhileLoop(self, node: WhileLoop) -> Statement | list[Statement] | None:
+        if _truth(node.test) is False:
+            return _replace(node.orelse, [node.body])
+        return node
+
+    def leave_ForLoop(self, node: ForLoop) -> Statement | list[Statement] | None:
+        it = node.iter
+        if (
+            isinstance(it, Tuple | ListVerbatim | SetVerbatim | DictVerbatim)
+            and not it.items
+        ):
+            return _replace(node.orelse, [node.body])
+        return node
+
+    def visit_Try(self, node: Try) -> None:
+        self.__tries[-1] += 1
+        if all(_is_pass(s) for s in node.try_block.body):
+            self.__empty.add(id(node))
+
+    def leave_Try(self, node: Try) -> Statement | list[Statement] | None:
+        self.__tries[-1] -= 1
+        if id(node) not in self.__empty:
+            return node
+        body = []
+        for block in (node.orelse, node.final):
+            if block is not None:
+                body.extend(block.body)
+        body.extend(generator_marker([h.body for h in node.handlers]))
+        return body or None
+
+    def leave_Block(self, node: Block) -> Block:
+        body = []
+        for i, s in enumerate(node.body):
+            if (
+                isinstance(s, ExprStatement)
+                and not _is_placeholder(s.expr)
+                and self.__removable(s.expr)
+            ):
+                continue
+            body.append(s)
+            if _terminates(s):
+                body.extend(generator_marker(node.body[i + 1 :]))
+                break
+        if len(body) > 1:
+            body = [s for s in body if not _is_pass(s)]
+        if not body and (self.__file is None or node is not self.__file.body):
+            body = [PASS]
+        if len(body) != len(node.body) or any(
+            a is not b for a, b in zip(body, node.body, strict=False)
+        ):
+            self.changes += abs(len(node.body) - len(body)) or 1
+            node.body = body
+        return node
+
+    def __removable(self, e: Expression) -> bool:
+        """Whether an expression whose value is unused may be removed."""
+        if self.__tries[-1] and _raises(e):
+            return False
+        return self.analyses.get(PurityAnalysis).is_pure(e)
+
+
+def _replace(orelse: Block | None, dropped: list[Node]) -> list[Statement] | None:
+    """Get the statements replacing a loop that never iterates."""
+    body = [] if orelse is None else orelse.body
+    return [*body, *generator_marker(dropped)] or None
+
+
+def _raises(e: Expression) -> bool:
+    """Whether evaluating an expression may raise an exception."""
+    if isinstance(e, Wrapped):
+        return _raises(e.inner)
+    if isinstance(e, Tuple | ListVerbatim | SetVerbatim):
+        return any(map(_raises, e.items))
+    return not isinstance(e, Literal)
+
+
+def _truth(test: Expression) -> bool | None:
+    """Get the truth value of a literal test, `None` if it is not a literal."""
+    while isinstance(test, Wrapped):
+        test = test.inner
+    if not isinstance(test, Literal):
+        return None
+    try:
+        value: Any = ast.literal_eval(test.lit)
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return None
+    return bool(value)
+
+
+def _is_pass(s: Statement) -> bool:
+    return isinstance(s, KeywordStatement) and s.keyword == "pass"
+
+
+def _is_placeholder(e: Expression) -> bool:
+    """Whether an expression statement is a docstring or `...`."""
+    return isinstance(e, Literal) and (e.lit == "..." or e.lit[-1:] in ("'", '"'))
+
+
+def _terminates(s: Statement) -> bool:
+    """Whether control never continues after a statement."""
+    match s:
+        case Return() | Raise():
+            return True
+        case KeywordStatement():
+            return s.keyword in ("break", "continue")
+        case Branch():
+            return (
+                s.fallback is not None
+                and _block_terminates(s.fallback)
+                and all(_block_terminates(block) for _, block in s.tests)
+            )
+        case WhileLoop():
+            return _truth(s.test) is True and not _breaks(s.body.body)
+        case Try():
+            if s.final is not None and _block_terminates(s.final):
+                return True
+            return (
+                _block_terminates(s.try_block)
+                and all(_block_terminates(h.body) for h in s.handlers)
+            ) or (
+                s.orelse is not None
+                and _block_terminates(s.orelse)
+                and all(_block_terminates(h.body) for h in s.handlers)
+            )
+        case Match():
+            return any(
+                c.guard is None and isinstance(c.pattern, IdentifierExpr)
+                for c in s.cases
+            ) and all(_block_terminates(c.body) for c in s.cases)
+    return False
+
+
+def _block_terminates(block: Block) -> bool:
+    return any(_terminates(s) for s in block.body)
+
+
+def _breaks(body: list[Statement]) -> bool:
+    """Whether statements contain a `break` of their enclosing loop."""
+    stack = list(body)
+    while stack:
+        s = stack.pop()
+        match s:
+            case KeywordStatement() if s.keyword == "break":
+                return True
+            case Branch():
+                stack.extend(x for _, block in s.tests for x in block.body)
+                if s.fallback is not None:
+                    stack.extend(s.fallback.body)
+            case Try():
+                for block in (s.try_block, s.orelse, s.final):
+                    if block is not None:
+                        stack.extend(block.body)
+                for h in s.handlers:
+                    stack.extend(h.body.body)
+            case With():
+                stack.extend(s.body.body)
+            case Match():
+                for c in s.cases:
+                    stack.extend(c.body.body)
+            case WhileLoop() | ForLoop():
+                # `break` in a nested loop's body leaves the nested loop,
+                # but its `else` branch belongs to this one
+                if s.orelse is not None:
+                    stack.extend(s.orelse.body)
+    return False
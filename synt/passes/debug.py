@@ -0,0 +1,161 @@
+r"""## Debug stripping
+
+Remove assertions and debug-only statements from production builds.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "DebugStripping",
+]
+
+
+from typing import TYPE_CHECKING
+
+from synt.expr.wrapped import Wrapped
+from synt.passes.common import name_expr
+from synt.passes.manager import TransformerPass
+from synt.stmt.assertion import Assert
+from synt.stmt.branch import Branch
+from synt.stmt.branch import if_
+from synt.stmt.debug import Debug
+from synt.stmt.keyword import PASS
+from synt.tokens.ident import IdentifierExpr
+
+
+if TYPE_CHECKING:
+    from synt.expr.expr import Expression
+    from synt.file import File
+    from synt.passes.manager import AnalysisManager
+    from synt.stmt.block import Block
+    from synt.stmt.stmt import Statement
+
+
+class DebugStripping(TransformerPass):
+    r"""Remove `assert` statements and [debug-only][synt.stmt.debug.Debug] statements.
+
+    Python only drops assertions when run with `-O`, which also applies to
+    the code of every other module. Stripping them from the generated code instead
+    saves their cost in production builds, without changing how anything else runs.
+
+    By default, assertions and debug-only statements are removed, and so are
+    the `if __debug__:` and `elif __debug__:` arms, as `-O` would.
+    With `guard`, consecutive assertions and debug-only statements are wrapped
+    in an `if __debug__:` block instead, which CPython compiles away under `-O`
+    but keeps otherwise.
+    Blocks left empty get a `pass`.
+
+    [`File.into_str`][synt.file.File.into_str] renders a stripped copy of the file
+    with `debug=False`, leaving the tree itself unchanged.
+
+    Examples:
+        ```python
+        from synt.passes import PassManager
+        from synt.passes.debug import DebugStripping
+        x = id_("x")
+        def build():
+            return File(
+                def_(id_("f"))(arg(x)).block(
+                    assert_(x.expr().gt(litint(0))),
+                    debug_(id_("log").expr().call(x).stmt()),
+                    return_(x),
+                ),
+            )
+        file = build()
+        PassManager(DebugStripping()).run(file)
+        assert file.into_str() == "def f(x):\n    return x"
+        file = build()
+        PassManager(DebugStripping(guard=True)).run(file)
+        assert file.into_str() == (
+            "def f(x):\n"
+            "    if __debug__:\n"
+            "        assert x > 0\n"
+            "        log(x)\n"
+            "    return x"
+        )
+        ```
+    """
+
+    guard: bool
+    """Whether to wrap the statements in `if __debug__:` blocks instead of removing them."""
+
+    __file: File | None
+    __guarded: set[int]
+    """Blocks only run in debug builds, by identity."""
+
+    def __init__(self, guard: bool = False):
+        """Initialize the pass.
+
+        Args:
+            guard: Whether to wrap the statements in `if __debug__:` blocks
+                instead of removing them.
+        """
+        self.guard = guard
+        self.__file = None
+        self.__guarded = set()
+
+    def run(self, file: File, analyses: AnalysisManager) -> int:
+        self.__file = file
+        try:
+            return super().run(file, analyses)
+        finally:
+            self.__file = None
+            self.__guarded.clear()
+
+    def visit_Branch(self, node: Branch) -> None:
+        test, block = node.tests[0]
+        if len(node.tests) == 1 and node.fallback is None and _is_debug(test):
+            self.__guarded.add(id(block))
+
+    def visit_Debug(self, node: Debug) -> None:
+        self.__guarded.add(id(node.body))
+
+    def leave_Branch(self, node: Branch) -> Statement | list[Statement] | None:
+        if self.guard:
+            return node
+        tests = [(test, block) for test, block in node.tests if not _is_debug(test)]
+        if not tests:
+            return None if node.fallback is None else node.fallback.body
+        if len(tests) != len(node.tests):
+            node.tests = tests
+            self.changes += 1
+        return node
+
+    def leave_Block(self, node: Block) -> Block:
+        guarded = id(node) in self.__guarded
+        body: list[Statement] = []
+        run: list[Statement] = []
+        for s in node.body:
+            if isinstance(s, Assert | Debug):
+                if isinstance(s, Debug) and (guarded or self.guard):
+                    run.extend(s.body.body)
+                else:
+                    run.append(s)
+                continue
+            body.extend(self.__debug_only(run, guarded))
+            run = []
+            body.append(s)
+        body.extend(self.__debug_only(run, guarded))
+        if not body and (self.__file is None or node is not self.__file.body):
+            body = [PASS]
+        if len(body) != len(node.body) or any(
+            a is not b for a, b in zip(body, node.body, strict=False)
+        ):
+            self.changes += 1
+            node.body = body
+        return node
+
+    def __debug_only(self, run: list[Statement], guarded: bool) -> list[Statement]:
+        """Rewrite consecutive debug-only statements."""
+        if not run or guarded:
+            return run
+        if not self.guard:
+            return []
+        return [if_(name_expr("__debug__")).block(*run)]
+
+
+def _is_debug(test: Expression) -> bool:
+    while isinstance(test, Wrapped):
+        test = test.inner
+    return isinstance(test, IdentifierExpr) and test.ident.raw == "__debug__"
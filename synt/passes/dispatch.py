@@ -0,0 +1,483 @@
+r"""## Dict dispatch
+
+Replace long `if`/`elif` chains comparing a name against constants with dict lookups.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "DictDispatch",
+]
+
+
+import ast
+
+from copy import deepcopy
+from typing import TYPE_CHECKING
+
+from synt.expr.binary_op import BinaryOp
+from synt.expr.binary_op import BinaryOpType
+from synt.expr.closure import Closure
+from synt.expr.dict import DictVerbatim
+from synt.expr.list import ListVerbatim
+from synt.expr.set import SetVerbatim
+from synt.expr.tuple import Tuple
+from synt.expr.unary_op import UnaryOp
+from synt.expr.unary_op import UnaryOpType
+from synt.expr.wrapped import Wrapped
+from synt.file import File
+from synt.passes.analysis import ScopeAnalysis
+from synt.passes.common import FRAME_NAMES
+from synt.passes.common import fresh_name
+from synt.passes.common import name_expr
+from synt.passes.common import used_names
+from synt.passes.manager import AnalysisManager
+from synt.passes.manager import TransformerPass
+from synt.stmt.block import Block
+from synt.stmt.branch import Branch
+from synt.stmt.cls import ClassDef
+from synt.stmt.expression import ExprStatement
+from synt.stmt.fn import FnArg
+from synt.stmt.fn import FunctionDef
+from synt.stmt.fn import def_
+from synt.stmt.keyword import KeywordStatement
+from synt.stmt.loop import ForLoop
+from synt.stmt.loop import WhileLoop
+from synt.stmt.raising import Raise
+from synt.stmt.returns import Return
+from synt.tokens.ident import Identifier
+from synt.tokens.ident import IdentifierExpr
+from synt.tokens.kv_pair import KVPair
+from synt.tokens.lit import Literal
+from synt.visit import children
+from synt.visit import walk
+
+
+if TYPE_CHECKING:
+    from synt.expr.expr import Expression
+    from synt.passes.analysis import Scope
+    from synt.stmt.stmt import Statement
+    from synt.visit import Node
+
+
+_HASHABLE = (str, bytes, int, float, complex, bool, type(None))
+"""Types of the constants used as dict keys."""
+
+_MISSING = object()
+"""Value of expressions which are not hashable constants."""
+
+
+class DictDispatch(TransformerPass):
+    r"""Rewrite chains of equality tests of a single name into dict lookups.
+
+    When at least `min_arms` leading `if`/`elif` arms of a branch in a function
+    each test `subject == constant`, `subject in (constant, ...)` or an `or` of such tests
+    against the same name, they are replaced with a single lookup in a dict
+    defined at module level, mapping each constant to its arm:
+
+    - if every arm only returns a literal, the dict maps to the returned values,
+      and the branch becomes `return TABLE.get(subject, default)`
+      when the `else` branch also returns a literal;
+    - otherwise each arm becomes a module-level helper function taking
+      the function parameters the arm reads, and the dict maps to the helpers.
+      Either all arms must end with a `return` or `raise`, or none may return.
+
+    Remaining arms and the `else` branch follow the lookup as `elif` and `else` branches.
+    Constants repeated in later arms are dropped, as the chain never reaches them.
+
+    Helpers are only extracted from arms which read no other locals than parameters
+    and the subject, only assign locals nothing else uses, and neither
+    `yield`, `await`, `break` or `continue` an enclosing loop, nor declare globals.
+    Definitions are inserted before the top-level statement containing the function.
+
+    Lookups hash the subject: it must be hashable and compare like the constants,
+    which holds for the strings, numbers and enums such chains usually test.
+
+    Examples:
+        ```python
+        from synt.passes import PassManager
+        from synt.passes.dispatch import DictDispatch
+        op = id_("op")
+        chain = if_(op.expr().eq(litstr("add"))).block(return_(litint(1)))
+        for i, name in enumerate(("sub", "mul", "div"), 2):
+            chain = chain.elif_(op.expr().eq(litstr(name))).block(return_(litint(i)))
+        file = File(def_(id_("code"))(arg(op)).block(chain.else_(return_(litint(0)))))
+        PassManager(DictDispatch()).run(file)
+        assert file.into_str() == (
+            "_DISPATCH = {'add': 1, 'sub': 2, 'mul': 3, 'div': 4}\n"
+            "def code(op):\n"
+            "    return _DISPATCH.get(op, 0)"
+        )
+        ```
+    """
+
+    requires = (ScopeAnalysis,)
+
+    min_arms: int
+    """Minimum number of leading arms testing the same name."""
+    prefix: str
+    """Prefix of the names of the helper functions, upper-cased for the dicts."""
+
+    __scopes: list[Scope | None]
+    """Scope of each enclosing function, `None` for classes and the module."""
+    __loops: list[int]
+    """Number of loops enclosing the current node in each enclosing function."""
+    __outermost: list[Statement]
+    """Top-level definition enclosing the current node."""
+    __pending: dict[int, tuple[Statement, list[Statement]]]
+    """Module-level definitions to insert before each top-level definition."""
+    __names: set[str]
+
+    def __init__(self, min_arms: int = 4, prefix: str = "_dispatch"):
+        """Initialize the pass.
+
+        Args:
+            min_arms: Minimum number of leading arms testing the same name.
+            prefix: Prefix of the names of the helper functions,
+                upper-cased for the dicts.
+
+        Raises:
+            ValueError: If `min_arms` is less than 1.
+        """
+        if min_arms < 1:
+            raise ValueError("Dispatched chains need at least one arm.")
+        self.min_arms = min_arms
+        self.prefix = prefix
+        self.__scopes = []
+        self.__loops = []
+        self.__outermost = []
+        self.__pending = {}
+        self.__names = set()
+
+    def run(self, file: File, analyses: AnalysisManager) -> int:
+        self.__scopes = [None]
+        self.__loops = [0]
+        self.__names = used_names(file)
+        try:
+            return super().run(file, analyses)
+        finally:
+            self.__scopes.clear()
+            self.__loops.clear()
+            self.__outermost.clear()
+            self.__pending.clear()
+            self.__names.clear()
+
+    def visit_FunctionDef(self, node: FunctionDef) -> None:
+        self.__enter(node, self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_FunctionDef(self, node: FunctionDef) -> FunctionDef:
+        self.__leave()
+        return node
+
+    def visit_ClassDef(self, node: ClassDef) -> None:
+        self.__enter(node, None)
+
+    def leave_ClassDef(self, node: ClassDef) -> ClassDef:
+        self.__leave()
+        return node
+
+    def __enter(self, node: Statement, scope: Scope | None) -> None:
+        if len(self.__scopes) == 1:
+            self.__outermost.append(node)
+        self.__scopes.append(scope)
+        self.__loops.append(0)
+
+    def __leave(self) -> None:
+        self.__scopes.pop()
+        self.__loops.pop()
+        if len(self.__scopes) == 1:
+            self.__outermost.pop()
+
+    def visit_ForLoop(self, node: ForLoop) -> None:
+        self.__loops[-1] += 1
+
+    def leave_ForLoop(self, node: ForLoop) -> ForLoop:
+        self.__loops[-1] -= 1
+        return node
+
+    def visit_WhileLoop(self, node: WhileLoop) -> None:
+        self.__loops[-1] += 1
+
+    def leave_WhileLoop(self, node: WhileLoop) -> WhileLoop:
+        self.__loops[-1] -= 1
+        return node
+
+    def leave_Block(self, node: Block) -> Block:
+        if not self.__pending:
+            return node
+        body: list[Statement] = []
+        for s in node.body:
+            pending = self.__pending.get(id(s))
+            if pending is not None and pending[0] is s:
+                del self.__pending[id(s)]
+                body.extend(pending[1])
+            body.append(s)
+        node.body = body
+        return node
+
+    def leave_Branch(self, node: Branch) -> Statement:
+        scope = self.__scopes[-1]
+        if scope is None:
+            return node
+        subject: str | None = None
+        arms: list[tuple[list[Expression], Block]] = []
+        seen: set[object] = set()
+        for test, block in node.tests:
+            matched = _keys(test)
+            if matched is None or subject not in (None, matched[0]):
+                break
+            subject = matched[0]
+            keys = []
+            for key, value in matched[1]:
+                if value not in seen:
+                    seen.add(value)
+                    keys.append(key)
+            arms.append((keys, block))
+        if subject is None or len(arms) < self.min_arms:
+            return node
+        rest = node.tests[len(arms) :]
+
+        definitions: list[Statement] = []
+        items: list[KVPair] = []
+        default: Expression | None = None
+        values = [_literal_return(block) for _, block in arms]
+        if all(value is not None for value in values):
+            for (keys, _), value in zip(arms, values, strict=True):
+                items.extend(KVPair(key, deepcopy(value)) for key in keys)  # type:ignore[arg-type]
+            table = fresh_name(self.__names, self.prefix.upper())
+            default = None if rest else _literal_return(node.fallback)
+            lookup: Statement = Return(name_expr(table)[name_expr(subject)])
+            if default is not None:
+                args = (
+                    [name_expr(subject)]
+                    if _is_none(default)
+                    else [name_expr(subject), default]
+                )
+                lookup = Return(name_expr(table).attr("get").call(*args))
+        else:
+            blocks = [block for _, block in arms]
+            mode = _mode(blocks)
+            helpers = [_helper(block) for block in blocks]
+            params = _params(helpers, subject, scope, self.__loops[-1] > 0)
+            if mode is None or params is None:
+                return node
+            for (keys, _), helper in zip(arms, helpers, strict=True):
+                if not keys:
+                    continue
+                name = fresh_name(self.__names, self.prefix)
+                helper.name = Identifier(name)
+                helper.args = [FnArg(Identifier(p)) for p in params]
+                definitions.append(helper)
+                items.extend(KVPair(key, name_expr(name)) for key in keys)
+            table = fresh_name(self.__names, self.prefix.upper())
+            call = name_expr(table)[name_expr(subject)].call(*map(name_expr, params))
+            lookup = Return(call) if mode == "return" else ExprStatement(call)
+
+        definitions.append(name_expr(table).assign(DictVerbatim(*items)))
+        outermost = self.__outermost[0]
+        self.__pending.setdefault(id(outermost), (outermost, []))[1].extend(definitions)
+        if default is not None:
+            # the default replaces the `else` branch
+            return lookup
+        branch = Branch()
+        branch.tests = [
+            (name_expr(subject).in_(name_expr(table)), Block(lookup)),
+            *rest,
+        ]
+        branch.fallback = node.fallback
+        return branch
+
+
+def _keys(test: Expression) -> tuple[str, list[tuple[Expression, object]]] | None:
+    """Match a test of a name against constants.
+
+    Returns:
+        The tested name with each constant and its value, `None` for other tests.
+    """
+    while isinstance(test, Wrapped):
+        test = test.inner
+    if not isinstance(test, BinaryOp):
+        return None
+    if test.op_type is BinaryOpType.BoolOr:
+        left, right = _keys(test.left), _keys(test.right)
+        if left is None or right is None or left[0] != right[0]:
+            return None
+        return left[0], left[1] + right[1]
+    if test.op_type is BinaryOpType.Equal:
+        for name, key in ((test.left, test.right), (test.right, test.left)):
+            value = _constant(key)
+            if isinstance(name, IdentifierExpr) and value is not _MISSING:
+                return name.ident.raw, [(key, value)]
+        return None
+    if (
+        test.op_type is BinaryOpType.In
+        and isinstance(test.left, IdentifierExpr)
+        and isinstance(test.right, Tuple | ListVerbatim | SetVerbatim)
+    ):
+        keys = [(key, _constant(key)) for key in test.right.items]
+        if any(value is _MISSING for _, value in keys):
+            return None
+        return test.left.ident.raw, keys
+    return None
+
+
+def _constant(e: Expression) -> object:
+    """Get the value of a hashable constant, `_MISSING` for other expressions."""
+    if not isinstance(e, Literal | UnaryOp | Wrapped | Tuple):
+        return _MISSING
+    try:
+        value = ast.literal_eval(e.into_code())
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return _MISSING
+    return value if _hashable(value) else _MISSING
+
+
+def _hashable(value: object) -> bool:
+    if isinstance(value, tuple):
+        return all(_hashable(v) for v in value)
+    return isinstance(value, _HASHABLE)
+
+
+def _literal_return(block: Block | None) -> Expression | None:
+    """Get the literal returned by a block only made of a `return`, `None` otherwise."""
+    if block is None or len(block.body) != 1 or not isinstance(block.body[0], Return):
+        return None
+    value = block.body[0].expression
+    if value is None:
+        return Literal("None")
+    return value if _is_literal(value) else None
+
+
+def _is_literal(e: Expression) -> bool:
+    """Whether an expression is a literal or a tuple of literals, evaluable anywhere."""
+    if isinstance(e, Tuple):
+        return all(_is_literal(item) for item in e.items)
+    return isinstance(e, Literal)
+
+
+def _is_none(e: Expression) -> bool:
+    return isinstance(e, Literal) and e.lit == "None"
+
+
+def _mode(blocks: list[Block]) -> str | None:
+    """Get how the helper functions extracted from arms hand control back.
+
+    Returns:
+        `"return"` if all arms exit the function, `"call"` if none returns,
+        `None` if some may return and others continue,
+        or if an arm may jump out of an enclosing loop.
+    """
+    returns = [_returns(block) for block in blocks]
+    if None in returns:
+        return None
+    if not any(returns):
+        return "call"
+    return "return" if all(_exits(block.body) for block in blocks) else None
+
+
+def _returns(block: Block) -> bool | None:
+    """Whether a block contains a `return`, `None` if it may `break` or `continue`."""
+    found = False
+    stack: list[tuple[Node, bool]] = [(block, False)]
+    while stack:
+        n, looped = stack.pop()
+        match n:
+            case Return():
+                found = True
+            case KeywordStatement() if n.keyword in ("break", "continue"):
+                if not looped:
+                    return None
+            case WhileLoop() | ForLoop():
+                # jumps in the `else` branch belong to the enclosing loop
+                stack.extend((c, looped or c is n.body) for c in children(n))
+            case FunctionDef() | ClassDef() | Closure():
+                pass
+            case _:
+                stack.extend((c, looped) for c in children(n))
+    return found
+
+
+def _exits(body: list[Statement]) -> bool:
+    """Whether statements always end with a `return` or a `raise`."""
+    if not body:
+        return False
+    last = body[-1]
+    if isinstance(last, Return | Raise):
+        return True
+    if isinstance(last, Branch) and last.fallback is not None:
+        return all(_exits(block.body) for _, block in last.tests) and _exits(
+            last.fallback.body
+        )
+    return False
+
+
+def _helper(block: Block) -> FunctionDef:
+    """Wrap the statements of an arm in a function, named and given parameters later."""
+    return def_(Identifier("_"))().block(*block.body)
+
+
+def _params(
+    helpers: list[FunctionDef], subject: str, scope: Scope, looped: bool
+) -> list[str] | None:
+    """Get the parameters of the helper functions extracted from arms.
+
+    Args:
+        helpers: Helper functions, without parameters.
+        subject: Name tested by the arms.
+        scope: Scope of the function the arms belong to.
+        looped: Whether the arms run in a loop, where locals keep their values
+            from one iteration to the next.
+
+    Returns:
+        The parameters of the function and the subject if the arms read them,
+        `None` if an arm may not run in another function.
+    """
+    read: set[str] = set()
+    scopes: list[Scope] = []
+    for helper in helpers:
+        for n in walk(helper.body):
+            if isinstance(n, UnaryOp) and n.op_type in (
+                UnaryOpType.Await,
+                UnaryOpType.Yield,
+                UnaryOpType.YieldFrom,
+            ):
+                return None
+        own = AnalysisManager(File(helper)).get(ScopeAnalysis).scope(helper)
+        if own.globals or own.nonlocals or (looped and own.stores):
+            return None
+        scopes.append(own)
+    for name in {name for own in scopes for name in own.stores}:
+        # locals of the arms must not be used anywhere else in the function
+        uses = sum(own.loads[name] + own.stores[name] for own in scopes)
+        if (
+            not scope.binds(name)
+            or name in scope.params
+            or name == subject
+            or name in scope.captured
+            or scope.loads[name] + scope.stores[name] != uses
+        ):
+            return None
+    for own in scopes:
+        for inner in own.walk():
+            for name in inner.loads:
+                if name in FRAME_NAMES:
+                    return None
+                owner = inner.resolve(name)
+                if owner is not None and not owner.is_module:
+                    continue
+                if not scope.binds(name):
+                    # globals and builtins resolve the same at module level
+                    outer = scope.resolve(name)
+                    if outer is not None and not outer.is_module:
+                        return None
+                elif (name in scope.params or name == subject) and not scope.deletes[
+                    name
+                ]:
+                    read.add(name)
+                else:
+                    return None
+    params = [p for p in scope.params if p in read]
+    if subject in read and subject not in params:
+        params.append(subject)
+    return params
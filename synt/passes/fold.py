@@ -0,0 +1,426 @@
+r"""## Constant folding
+
+Evaluate operations on literals at generation time.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "ConstantFolding",
+]
+
+
+import ast
+import math
+import operator
+import re
+
+from functools import lru_cache
+from typing import TYPE_CHECKING
+from typing import Any
+
+from synt.compiler import lower_expression
+from synt.expr.binary_op import BinaryOp
+from synt.expr.binary_op import BinaryOpType
+from synt.expr.expr import ExprPrecedence
+from synt.expr.unary_op import UnaryOp
+from synt.expr.unary_op import UnaryOpType
+from synt.expr.wrapped import Wrapped
+from synt.passes.manager import TransformerPass
+from synt.tokens.lit import Literal
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from synt.expr.attribute import Attribute
+    from synt.expr.call import Call
+    from synt.expr.condition import Condition
+    from synt.expr.expr import Expression
+    from synt.expr.subscript import Subscript
+
+
+class _NotConstant(Exception):
+    """Raised when an expression cannot be evaluated at generation time."""
+
+
+_MISSING: Any = object()
+
+
+@lru_cache(maxsize=4096)
+def _literal_value(lit: str) -> Any:
+    """Evaluate a literal's source text, `_MISSING` if it is not a constant."""
+    try:
+        value = ast.literal_eval(lit)
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return _MISSING
+    return value if isinstance(value, _SCALARS) else _MISSING
+
+
+_SCALARS = (bool, int, float, complex, str, bytes, type(None))
+_UNARY = (
+    UnaryOpType.Positive,
+    UnaryOpType.Neg,
+    UnaryOpType.BitNot,
+    UnaryOpType.BoolNot,
+)
+_RIGHT_GROUPING = (BinaryOpType.BoolAnd, BinaryOpType.BoolOr, BinaryOpType.Pow)
+_FORMAT_FIELD = re.compile(r"%(?:%|(?:\([^)]*\))?[-#0 +]*(\*|\d*)(?:\.(\*|\d*))?)")
+"""Fields of `%` formatting, capturing their width and precision."""
+_BIN_OPS: dict[type[ast.operator], Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.LShift: operator.lshift,
+    ast.RShift: operator.rshift,
+    ast.BitAnd: operator.and_,
+    ast.BitOr: operator.or_,
+    ast.BitXor: operator.xor,
+}
+_CMP_OPS: dict[type[ast.cmpop], Callable[[Any, Any], Any]] = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: operator.contains,
+    ast.NotIn: operator.contains,
+}
+_UNARY_OPS: dict[type[ast.unaryop], Callable[[Any], Any]] = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+    ast.Invert: operator.invert,
+    ast.Not: operator.not_,
+}
+
+
+def _precedence(e: Expression) -> ExprPrecedence:
+    """Get the precedence of an expression, where negative number literals are unary operations."""
+    if isinstance(e, Literal) and e.lit.startswith("-"):
+        return ExprPrecedence.Unary
+    return e.precedence
+
+
+class ConstantFolding(TransformerPass):
+    r"""Replace operations on literals with their results.
+
+    Folded expressions are arithmetic, bitwise, boolean and comparison operations,
+    and conditional expressions, whose operands are literals:
+
+    | Expression           | Result   |
+    | -------------------- | -------- |
+    | `60 * 60 * 24`       | `86400`  |
+    | `not True`           | `False`  |
+    | `'a' + 'b'`          | `'ab'`   |
+    | `1 < 2 < 3`          | `True`   |
+    | `True and x`         | `x`      |
+    | `x if False else y`  | `y`      |
+
+    Operations are grouped the way their rendered code parses,
+    e.g. unparenthesized nested comparisons are folded as a comparison chain.
+    To keep the output small and the pass fast, results are only folded if integers
+    fit in `max_int_bits` bits, and strings in `max_str_length` characters.
+    Operations raising an exception, e.g. `1 / 0`, are left for runtime.
+
+    Examples:
+        ```python
+        from synt.passes import PassManager
+        from synt.passes.fold import ConstantFolding
+        file = File(
+            id_("DAY").expr().assign(litint(60) * litint(60) * litint(24)),
+            id_("s").expr().assign(litstr("a") + litstr("b") * litint(2)),
+            id_("big").expr().assign(litint(2).pow(litint(100_000))),
+        )
+        PassManager(ConstantFolding()).run(file)
+        assert file.into_str() == "DAY = 86400\ns = 'abb'\nbig = 2 ** 100000"
+        ```
+    """
+
+    max_int_bits: int
+    """Maximum number of bits of folded integers."""
+    max_str_length: int
+    """Maximum length of folded strings and bytes."""
+
+    __grouped: set[int]
+    """Operations grouped with their parent in the rendered code, e.g. inside a chain."""
+    __loose: set[int]
+    """Non-atomic replacements, which may need parentheses in their new parent."""
+
+    def __init__(self, max_int_bits: int = 128, max_str_length: int = 4096):
+        """Initialize the pass.
+
+        Args:
+            max_int_bits: Maximum number of bits of folded integers.
+            max_str_length: Maximum length of folded strings and bytes.
+        """
+        self.max_int_bits = max_int_bits
+        self.max_str_length = max_str_length
+        self.__grouped = set()
+        self.__loose = set()
+
+    def transform(self, node: Any) -> Any:
+        try:
+            return super().transform(node)
+        finally:
+            self.__grouped.clear()
+            self.__loose.clear()
+
+    def visit_BinaryOp(self, node: BinaryOp) -> None:
+        # operands parsed together with this operation can't be folded on their own,
+        # e.g. `BinaryOp(Sub, x, BinaryOp(Sub, 1, 2))` renders as `x - 1 - 2`
+        prec = node.precedence
+        left, right = node.left, node.right
+        if id(node) in self.__grouped:
+            # the operands of a grouped operation are flattened into the same chain,
+            # e.g. `BinaryOp(Sub, x, BinaryOp(Sub, BinaryOp(Sub, 8, 2), y))`
+            # renders as `x - 8 - 2 - y`, where `8 - 2` is not an operation
+            for operand in (left, right):
+                if isinstance(operand, BinaryOp) and operand.precedence == prec:
+                    self.__grouped.add(id(operand))
+        if (
+            isinstance(left, BinaryOp)
+            and left.precedence == prec
+            and (prec == ExprPrecedence.Comparative or node.op_type is BinaryOpType.Pow)
+        ):
+            self.__grouped.add(id(left))
+        # `**` groups to the right, and `and` and `or` give the same result either way
+        if (
+            isinstance(right, BinaryOp)
+            and right.precedence == prec
+            and node.op_type not in _RIGHT_GROUPING
+        ):
+            self.__grouped.add(id(right))
+
+    def leave_BinaryOp(self, node: BinaryOp) -> Expression:
+        self.__fix_operand(node, "left")
+        self.__fix_operand(node, "right")
+        if id(node) in self.__grouped:
+            return node
+        if node.op_type in (BinaryOpType.BoolAnd, BinaryOpType.BoolOr):
+            return self.__fold_bool(node)
+        if not (self.__constant(node.left) and self.__constant(node.right)):
+            return node
+        if (
+            node.op_type is BinaryOpType.Pow
+            and isinstance(node.left, Literal)
+            and node.left.lit.startswith("-")
+        ):
+            # `-2 ** 2` is `-(2 ** 2)`
+            return node
+        return self.__fold(node)
+
+    def leave_UnaryOp(self, node: UnaryOp) -> Expression:
+        self.__fix_operand(node, "expression")
+        if node.op_type not in _UNARY or not self.__constant(node.expression):
+            return node
+        return self.__fold(node)
+
+    def leave_Condition(self, node: Condition) -> Expression:
+        if not self.__constant(node.condition):
+            return node
+        try:
+            test = self.__evaluate(lower_expression(node.condition))
+        except _NotConstant:
+            return node
+        return self.__replacement(node.true_expr if test else node.false_expr)
+
+    def leave_Wrapped(self, node: Wrapped) -> Expression:
+        inner = node.inner
+        if isinstance(inner, Literal) and not inner.lit.startswith("-"):
+            # parentheses around a literal are only needed for attribute access,
+            # which is handled by the parent
+            value = _literal_value(inner.lit)
+            if value is not _MISSING and not isinstance(value, complex):
+                return inner
+        return node
+
+    def leave_Attribute(self, node: Attribute) -> Expression:
+        self.__fix_target(node)
+        return node
+
+    def leave_Call(self, node: Call) -> Expression:
+        self.__fix_target(node)
+        return node
+
+    def leave_Subscript(self, node: Subscript) -> Expression:
+        self.__fix_target(node)
+        return node
+
+    def __fix_operand(self, node: Expression, field: str) -> None:
+        """Parenthesize an operand replaced by a looser expression."""
+        child = getattr(node, field)
+        if id(child) in self.__loose and _precedence(child) >= node.precedence:
+            setattr(node, field, child.wrapped())
+
+    def __fix_target(self, node: Attribute | Call | Subscript) -> None:
+        """Parenthesize the target of an attribute, call or subscript if needed."""
+        target = node.target
+        if id(target) in self.__loose and _precedence(target) > ExprPrecedence.Call:
+            node.target = target.wrapped()
+        elif isinstance(target, Literal) and isinstance(
+            _literal_value(target.lit), int | float | complex
+        ):
+            # `1.real` doesn't parse
+            node.target = target.wrapped()
+
+    def __constant(self, e: Expression) -> bool:
+        """Whether an expression only contains literals and operators.
+
+        Operations that are not grouped with their parent were already folded,
+        so only grouped operations are looked into.
+        """
+        stack = [e]
+        while stack:
+            e = stack.pop()
+            if isinstance(e, Literal):
+                if _literal_value(e.lit) is _MISSING:
+                    return False
+            elif isinstance(e, Wrapped):
+                stack.append(e.inner)
+            elif isinstance(e, UnaryOp):
+                if e.op_type not in _UNARY:
+                    return False
+                stack.append(e.expression)
+            elif isinstance(e, BinaryOp) and id(e) in self.__grouped:
+                stack.append(e.left)
+                stack.append(e.right)
+            else:
+                return False
+        return True
+
+    def __fold(self, node: Expression) -> Expression:
+        try:
+            value = self.__evaluate(lower_expression(node))
+        except _NotConstant:
+            return node
+        result = self.__literal(value)
+        return node if result is None else self.__replacement(result)
+
+    def __fold_bool(self, node: BinaryOp) -> Expression:
+        """Fold `and` and `or` operations with a constant left operand."""
+        if not self.__constant(node.left):
+            return node
+        try:
+            left = self.__evaluate(lower_expression(node.left))
+        except _NotConstant:
+            return node
+        if bool(left) != (node.op_type is BinaryOpType.BoolAnd):
+            result = self.__literal(left)
+            return node if result is None else self.__replacement(result)
+        return self.__replacement(node.right)
+
+    def __replacement(self, e: Expression) -> Expression:
+        if isinstance(e, Wrapped):
+            e = e.inner
+        if _precedence(e) != ExprPrecedence.Atom:
+            self.__loose.add(id(e))
+        return e
+
+    def __literal(self, value: Any) -> Expression | None:
+        """Build the expression of a constant, `None` if it can't be represented."""
+        if isinstance(value, bool) or value is None:
+            return Literal(repr(value))
+        if isinstance(value, int | float):
+            if isinstance(value, float) and not math.isfinite(value):
+                return None
+            if isinstance(value, int) and value.bit_length() > self.max_int_bits:
+                return None
+            return Literal(repr(value))
+        if isinstance(value, str | bytes):
+            if len(value) > self.max_str_length:
+                return None
+            return Literal(repr(value))
+        return None
+
+    def __evaluate(self, node: ast.expr) -> Any:
+        """Evaluate a lowered constant expression, with size guards."""
+        match node:
+            case ast.Constant(value=value):
+                if not isinstance(value, _SCALARS):
+                    raise _NotConstant
+                return value
+            case ast.UnaryOp(op=op, operand=operand):
+                return self.__apply(_UNARY_OPS[type(op)], self.__evaluate(operand))
+            case ast.BinOp(left=left, op=op, right=right):
+                lhs, rhs = self.__evaluate(left), self.__evaluate(right)
+                self.__check_size(op, lhs, rhs)
+                fn = _BIN_OPS.get(type(op))
+                if fn is None:
+                    raise _NotConstant
+                return self.__apply(fn, lhs, rhs)
+            case ast.BoolOp(op=bool_op, values=values):
+                result = None
+                for item in values:
+                    result = self.__evaluate(item)
+                    if bool(result) != isinstance(bool_op, ast.And):
+                        break
+                return result
+            case ast.Compare(left=first, ops=cmp_ops, comparators=comparators):
+                lhs = self.__evaluate(first)
+                for cmp_op, item in zip(cmp_ops, comparators, strict=True):
+                    rhs = self.__evaluate(item)
+                    cmp = _CMP_OPS.get(type(cmp_op))
+                    if cmp is None:
+                        # identity of constants is an implementation detail
+                        raise _NotConstant
+                    if isinstance(cmp_op, ast.In | ast.NotIn):
+                        res = self.__apply(cmp, rhs, lhs) != isinstance(
+                            cmp_op, ast.NotIn
+                        )
+                    else:
+                        res = self.__apply(cmp, lhs, rhs)
+                    if not res:
+                        return res
+                    lhs = rhs
+                return res
+            case ast.IfExp(test=test, body=body, orelse=orelse):
+                return self.__evaluate(body if self.__evaluate(test) else orelse)
+            case _:
+                raise _NotConstant
+
+    def __check_size(self, op: ast.operator, lhs: Any, rhs: Any) -> None:
+        """Refuse operations whose result would exceed the size limits."""
+        ints = isinstance(lhs, int) and isinstance(rhs, int)
+        if isinstance(op, ast.Pow) and ints:
+            if (
+                rhs > 0
+                and abs(lhs) > 1
+                and (abs(lhs).bit_length() - 1) * rhs > self.max_int_bits
+            ):
+                raise _NotConstant
+        elif isinstance(op, ast.LShift) and ints:
+            if rhs > self.max_int_bits or lhs.bit_length() + rhs > self.max_int_bits:
+                raise _NotConstant
+        elif isinstance(op, ast.Mult):
+            if ints and lhs.bit_length() + rhs.bit_length() > self.max_int_bits + 1:
+                raise _NotConstant
+            for seq, n in ((lhs, rhs), (rhs, lhs)):
+                if (
+                    isinstance(seq, str | bytes)
+                    and isinstance(n, int)
+                    and len(seq) * n > self.max_str_length
+                ):
+                    raise _NotConstant
+        elif isinstance(op, ast.Mod) and isinstance(lhs, str | bytes):
+            # widths and precisions pad the result, e.g. `'%200000000s' % 1`
+            fmt = lhs.decode("latin-1") if isinstance(lhs, bytes) else lhs
+            size = len(fmt)
+            for field in _FORMAT_FIELD.findall(fmt):
+                for n in field:
+                    if n == "*" or len(n) > len(str(self.max_str_length)):
+                        raise _NotConstant
+                    size += int(n or 0)
+            if size > self.max_str_length:
+                raise _NotConstant
+
+    def __apply(self, fn: Callable[..., Any], *args: Any) -> Any:
+        try:
+            return fn(*args)
+        except (ArithmeticError, TypeError, ValueError) as e:
+            raise _NotConstant from e
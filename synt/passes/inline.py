@@ -0,0 +1,552 @@
+r"""## Function inlining
+
+Replace calls of small module-level functions with their returned expression.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "FunctionInlining",
+]
+
+
+from collections import Counter
+from copy import deepcopy
+from typing import TYPE_CHECKING
+
+from synt.expr.attribute import Attribute
+from synt.expr.binary_op import BinaryOp
+from synt.expr.binary_op import BinaryOpType
+from synt.expr.call import Call
+from synt.expr.closure import Closure
+from synt.expr.comprehension import Comprehension
+from synt.expr.condition import Condition
+from synt.expr.expr import ExprPrecedence
+from synt.expr.named_expr import NamedExpr
+from synt.expr.subscript import Subscript
+from synt.expr.unary_op import UnaryOp
+from synt.expr.unary_op import UnaryOpType
+from synt.expr.wrapped import Wrapped
+from synt.passes.analysis import PurityAnalysis
+from synt.passes.analysis import ScopeAnalysis
+from synt.passes.common import FRAME_NAMES
+from synt.passes.common import fresh_name
+from synt.passes.common import used_names
+from synt.passes.manager import TransformerPass
+from synt.stmt.assign import Assignment
+from synt.stmt.expression import ExprStatement
+from synt.stmt.fn import FunctionDef
+from synt.stmt.returns import Return
+from synt.tokens.ident import Identifier
+from synt.tokens.ident import IdentifierExpr
+from synt.tokens.lit import Literal
+from synt.visit import NodeTransformer
+from synt.visit import walk
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Iterator
+
+    from synt.expr.expr import Expression
+    from synt.file import File
+    from synt.passes.analysis import Scope
+    from synt.passes.manager import AnalysisManager
+    from synt.stmt.block import Block
+    from synt.stmt.cls import ClassDef
+    from synt.stmt.stmt import Statement
+
+
+_IMPURE_UNARY = (UnaryOpType.Await, UnaryOpType.Yield, UnaryOpType.YieldFrom)
+
+
+class FunctionInlining(TransformerPass):
+    r"""Replace calls of small module-level functions with the expression they return.
+
+    A module-level function is inlined if it is not decorated, not `async`,
+    bound once in the file, and its body is a single `return` of an expression
+    of at most `max_size` nodes, optionally after a docstring.
+    Its parameters must be plain positional parameters without defaults,
+    and the returned expression must neither call the function itself,
+    contain lambdas, comprehensions, assignment expressions, `await` or `yield`,
+    nor use names whose meaning depends on the calling function, like `locals`.
+
+    Calls inside functions passing each parameter once, by position or keyword,
+    are replaced with the expression, where parameters are replaced with the arguments:
+
+    - literals, and locals of the caller which no other function can rebind,
+      are substituted wherever the parameter is used;
+    - if the expression is [pure][synt.passes.analysis.PurityAnalysis],
+      other pure arguments are substituted where their parameter is used once;
+    - remaining arguments are evaluated into temporaries, in order,
+      right before the statement containing the call.
+
+    Temporaries are only introduced when the call is the first thing its statement
+    evaluates, e.g. `return f(g())` or `x = f(g()) + 1`, so no evaluation is reordered;
+    other calls needing them are kept. Globals read by the expression
+    must not be shadowed where the call is.
+
+    With `remove=True`, inlined functions the file doesn't use anymore are removed.
+    Code outside the file must not import them.
+
+    Examples:
+        ```python
+        from synt.passes import PassManager
+        from synt.passes.inline import FunctionInlining
+        a, b, x = id_("a"), id_("b"), id_("x")
+        file = File(
+            def_(id_("mid"))(arg(a), arg(b)).block(return_((a.expr() + b.expr()) / litint(2))),
+            def_(id_("f"))(arg(x)).block(
+                return_(id_("mid").expr().call(x, id_("load").expr().call()) * litint(3))
+            ),
+        )
+        PassManager(FunctionInlining(remove=True)).run(file)
+        assert file.into_str() == (
+            "def f(x):\n"
+            "    _b = load()\n"
+            "    return (x + _b) / 2 * 3"
+        )
+        ```
+    """
+
+    requires = (ScopeAnalysis, PurityAnalysis)
+
+    max_size: int
+    """Maximum number of nodes of an inlined expression."""
+    remove: bool
+    """Whether to remove inlined functions the file doesn't use anymore."""
+    prefix: str
+    """Prefix of the names of the temporaries, followed by the parameter name."""
+
+    __helpers: dict[str, tuple[list[str], Expression, set[str]]]
+    """Parameters, returned expression and globals read of each inlined function."""
+    __inlined: set[str]
+    __scopes: list[Scope]
+    __statement: Statement | None
+    """Simple statement containing the current node, in a function body."""
+    __pending: dict[int, tuple[Statement, list[Statement]]]
+    """Temporaries to insert before each statement."""
+    __loose: set[int]
+    """Replacements binding looser than the calls they replaced."""
+    __names: set[str]
+    __temps: set[str]
+    """Temporaries assigned once before their statement."""
+
+    def __init__(self, max_size: int = 32, remove: bool = False, prefix: str = "_"):
+        """Initialize the pass.
+
+        Args:
+            max_size: Maximum number of nodes of an inlined expression.
+            remove: Whether to remove inlined functions the file doesn't use anymore.
+            prefix: Prefix of the names of the temporaries,
+                followed by the parameter name.
+        """
+        self.max_size = max_size
+        self.remove = remove
+        self.prefix = prefix
+        self.__helpers = {}
+        self.__inlined = set()
+        self.__scopes = []
+        self.__statement = None
+        self.__pending = {}
+        self.__loose = set()
+        self.__names = set()
+        self.__temps = set()
+
+    def run(self, file: File, analyses: AnalysisManager) -> int:
+        scopes = analyses.get(ScopeAnalysis)
+        self.__scopes = [scopes.module]
+        self.__names = used_names(file)
+        bound = Counter[str]()
+        for scope in scopes:
+            bound.update(scope.stores)
+            bound.update(scope.params)
+        for s in file.body.body:
+            if isinstance(s, FunctionDef) and bound[s.name.raw] == 1:
+                helper = self.__helper(s, scopes.scope(s))
+                if helper is not None:
+                    self.__helpers[s.name.raw] = helper
+        try:
+            changes = super().run(file, analyses)
+            if self.remove and self.__inlined:
+                changes += self.__remove(file)
+            return changes
+        finally:
+            self.__helpers.clear()
+            self.__inlined.clear()
+            self.__scopes.clear()
+            self.__pending.clear()
+            self.__loose.clear()
+            self.__names.clear()
+            self.__temps.clear()
+
+    def __helper(
+        self, fn: FunctionDef, scope: Scope
+    ) -> tuple[list[str], Expression, set[str]] | None:
+        """Get the parameters, returned expression and globals of an inlined function."""
+        body = fn.body.body
+        if (
+            len(body) == 2
+            and isinstance(body[0], ExprStatement)
+            and isinstance(body[0].expr, Literal)
+        ):
+            body = body[1:]
+        if (
+            fn.decorators
+            or fn.is_async
+            or fn.type_params
+            or len(body) != 1
+            or not isinstance(body[0], Return)
+            or any(
+                a.is_vararg or a.is_kwarg or a.is_kwonly or a.default_expr is not None
+                for a in fn.args
+            )
+        ):
+            return None
+        e = body[0].expression
+        if e is None:
+            e = Literal("None")
+        nodes = list(walk(e))
+        if len(nodes) > self.max_size or any(
+            isinstance(n, Closure | Comprehension | NamedExpr)
+            or (isinstance(n, UnaryOp) and n.op_type in _IMPURE_UNARY)
+            for n in nodes
+        ):
+            return None
+        params = [a.name.raw for a in fn.args]
+        free = set(scope.loads) - set(params)
+        if fn.name.raw in free or free & FRAME_NAMES or scope.globals:
+            return None
+        # calls in the body itself may be inlined with temporaries during the run
+        return params, deepcopy(e), free
+
+    def __remove(self, file: File) -> int:
+        """Remove inlined functions the file doesn't read anymore."""
+        read = {n.ident.raw for n in walk(file) if isinstance(n, IdentifierExpr)}
+        body = [
+            s
+            for s in file.body.body
+            if not (
+                isinstance(s, FunctionDef)
+                and s.name.raw in self.__inlined
+                and s.name.raw not in read
+            )
+        ]
+        removed = len(file.body.body) - len(body)
+        file.body.body = body
+        return removed
+
+    def visit_FunctionDef(self, node: FunctionDef) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_FunctionDef(self, node: FunctionDef) -> FunctionDef:
+        self.__scopes.pop()
+        return node
+
+    def visit_ClassDef(self, node: ClassDef) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_ClassDef(self, node: ClassDef) -> ClassDef:
+        self.__scopes.pop()
+        return node
+
+    def visit_Closure(self, node: Closure) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_Closure(self, node: Closure) -> Expression:
+        self.__scopes.pop()
+        return node
+
+    def visit_Comprehension(self, node: Comprehension) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_Comprehension(self, node: Comprehension) -> Comprehension:
+        self.__scopes.pop()
+        return node
+
+    def visit_ExprStatement(self, node: ExprStatement) -> None:
+        self.__statement = node
+
+    def leave_ExprStatement(self, node: ExprStatement) -> ExprStatement:
+        self.__statement = None
+        return node
+
+    def visit_Return(self, node: Return) -> None:
+        self.__statement = node
+
+    def leave_Return(self, node: Return) -> Return:
+        self.__statement = None
+        return node
+
+    def visit_Assignment(self, node: Assignment) -> None:
+        self.__statement = node
+
+    def leave_Assignment(self, node: Assignment) -> Assignment:
+        self.__statement = None
+        return node
+
+    def leave_Block(self, node: Block) -> Block:
+        if not self.__pending:
+            return node
+        body: list[Statement] = []
+        for s in node.body:
+            pending = self.__pending.get(id(s))
+            if pending is not None and pending[0] is s:
+                del self.__pending[id(s)]
+                body.extend(pending[1])
+            body.append(s)
+        node.body = body
+        return node
+
+    def leave_BinaryOp(self, node: BinaryOp) -> Expression:
+        self.__fix_operand(node, "left")
+        self.__fix_operand(node, "right")
+        return node
+
+    def leave_UnaryOp(self, node: UnaryOp) -> Expression:
+        self.__fix_operand(node, "expression")
+        return node
+
+    def leave_Condition(self, node: Condition) -> Expression:
+        for field in ("condition", "true_expr", "false_expr"):
+            self.__fix_operand(node, field)
+        return node
+
+    def leave_Attribute(self, node: Attribute) -> Expression:
+        self.__fix_operand(node, "target")
+        return node
+
+    def leave_Subscript(self, node: Subscript) -> Expression:
+        self.__fix_operand(node, "target")
+        return node
+
+    def __fix_operand(self, node: Expression, field: str) -> None:
+        _fix_operand(node, field, self.__loose)
+
+    def leave_Call(self, node: Call) -> Expression:
+        self.__fix_operand(node, "target")
+        target = node.target
+        scope = self.__scopes[-1]
+        if not isinstance(target, IdentifierExpr):
+            return node
+        name = target.ident.raw
+        helper = self.__helpers.get(name)
+        if helper is None or scope.resolve(name) is not scope.module():
+            return node
+        params, body, free = helper
+        function = _function(scope)
+        if function is None or any(not _global(scope, n) for n in free):
+            return node
+        args = _arguments(node, params)
+        if args is None:
+            return node
+
+        purity = self.analyses.get(PurityAnalysis)
+        uses = Counter(n.ident.raw for n in walk(body) if isinstance(n, IdentifierExpr))
+        pure = purity.is_pure(body)
+        fixed = [
+            _fixed(arg, scope)
+            or (isinstance(arg, IdentifierExpr) and arg.ident.raw in self.__temps)
+            for arg in args
+        ]
+        direct = [
+            f or (pure and uses[p] == 1 and purity.is_pure(arg))
+            for p, arg, f in zip(params, args, fixed, strict=True)
+        ]
+        replace: dict[str, Callable[[], Expression]] = {}
+        if all(direct):
+            for p, arg in zip(params, args, strict=True):
+                replace[p] = _copier(arg)
+        else:
+            statement = self.__statement
+            if (
+                statement is None
+                or scope is not function
+                or not _first(statement, node)
+            ):
+                return node
+            temps: list[Statement] = []
+            for p, arg, f in zip(params, args, fixed, strict=True):
+                if f:
+                    replace[p] = _copier(arg)
+                    continue
+                temp = fresh_name(self.__names, self.prefix + p)
+                self.__temps.add(temp)
+                temps.append(IdentifierExpr(Identifier(temp)).assign(arg))
+                replace[p] = _copier(IdentifierExpr(Identifier(temp)))
+            self.__pending.setdefault(id(statement), (statement, []))[1].extend(temps)
+
+        self.__inlined.add(name)
+        result: Expression = _Substitute(replace).transform(deepcopy(body))
+        if result.precedence > node.precedence:
+            self.__loose.add(id(result))
+        return result
+
+
+class _Substitute(NodeTransformer):
+    """Replace parameters with arguments, parenthesizing them where needed."""
+
+    replace: dict[str, Callable[[], Expression]]
+    loose: set[int]
+
+    def __init__(self, replace: dict[str, Callable[[], Expression]]):
+        self.replace = replace
+        self.loose = set()
+
+    def leave_IdentifierExpr(self, node: IdentifierExpr) -> Expression:
+        copy = self.replace.get(node.ident.raw)
+        if copy is None:
+            return node
+        e = copy()
+        if e.precedence != ExprPrecedence.Atom:
+            self.loose.add(id(e))
+        return e
+
+    def leave_BinaryOp(self, node: BinaryOp) -> Expression:
+        self.__fix(node, "left")
+        self.__fix(node, "right")
+        return node
+
+    def leave_UnaryOp(self, node: UnaryOp) -> Expression:
+        self.__fix(node, "expression")
+        return node
+
+    def leave_Condition(self, node: Condition) -> Expression:
+        for field in ("condition", "true_expr", "false_expr"):
+            self.__fix(node, field)
+        return node
+
+    def leave_Attribute(self, node: Attribute) -> Expression:
+        self.__fix(node, "target")
+        return node
+
+    def leave_Call(self, node: Call) -> Expression:
+        self.__fix(node, "target")
+        return node
+
+    def leave_Subscript(self, node: Subscript) -> Expression:
+        self.__fix(node, "target")
+        return node
+
+    def __fix(self, node: Expression, field: str) -> None:
+        _fix_operand(node, field, self.loose)
+
+
+def _fix_operand(node: Expression, field: str, loose: set[int]) -> None:
+    """Parenthesize an operand replaced by a looser expression."""
+    child = getattr(node, field)
+    if id(child) not in loose or child.precedence < node.precedence:
+        return
+    if (
+        child.precedence == node.precedence
+        and field == "left"
+        and isinstance(node, BinaryOp)
+        and node.precedence != ExprPrecedence.Comparative
+        and node.op_type is not BinaryOpType.Pow
+    ):
+        # left-associative operators
+        return
+    setattr(node, field, child.wrapped())
+
+
+def _copier(e: Expression) -> Callable[[], Expression]:
+    """Build copies of an argument, reusing the argument itself for its first use."""
+    first = [e]
+
+    def copy() -> Expression:
+        return first.pop() if first else deepcopy(e)
+
+    return copy
+
+
+def _function(scope: Scope) -> Scope | None:
+    """Get the innermost function scope containing a scope."""
+    s: Scope | None = scope
+    while s is not None:
+        if isinstance(s.node, FunctionDef):
+            return s
+        s = s.parent
+    return None
+
+
+def _global(scope: Scope, name: str) -> bool:
+    """Whether `name` read in `scope` is the same global or builtin as in the module."""
+    module = scope.module()
+    owner = scope.resolve(name)
+    return owner is module if module.binds(name) else owner is None
+
+
+def _fixed(arg: Expression, scope: Scope) -> bool:
+    """Whether an argument has the same value wherever it is evaluated in the call."""
+    if isinstance(arg, Literal):
+        return True
+    if not isinstance(arg, IdentifierExpr):
+        return False
+    name = arg.ident.raw
+    return (
+        scope.binds(name)
+        and name not in scope.captured
+        and not any(name in s.nonlocals for s in scope.walk())
+    )
+
+
+def _arguments(call: Call, params: list[str]) -> list[Expression] | None:
+    """Match the arguments of a call with parameters, `None` if they don't match."""
+    if len(call.args) > len(params) or any(
+        isinstance(a, UnaryOp)
+        and a.op_type in (UnaryOpType.Starred, UnaryOpType.DoubleStarred)
+        for a in call.args
+    ):
+        return None
+    args: dict[str, Expression] = dict(zip(params, call.args, strict=False))
+    for k in call.keywords:
+        key = k.key.raw
+        if key not in params or key in args:
+            return None
+        args[key] = k.value
+    if list(args) != params:
+        # arguments must be evaluated in the order of the parameters
+        return None
+    return [args[p] for p in params]
+
+
+def _first(statement: Statement, call: Call) -> bool:
+    """Whether a call is evaluated before anything else in a statement."""
+    if isinstance(statement, ExprStatement):
+        root = statement.expr
+    elif isinstance(statement, Return):
+        if statement.expression is None:
+            return False
+        root = statement.expression
+    elif isinstance(statement, Assignment):
+        if statement.value is None:
+            return False
+        root = statement.value
+    else:
+        return False
+    return any(e is call for e in _leading(root))
+
+
+def _leading(e: Expression) -> Iterator[Expression]:
+    """Iterate over the sub-expressions evaluated first in an expression."""
+    while True:
+        yield e
+        if isinstance(e, BinaryOp):
+            e = e.left
+        elif isinstance(e, UnaryOp) and e.op_type not in _IMPURE_UNARY:
+            e = e.expression
+        elif isinstance(e, Wrapped):
+            e = e.inner
+        elif isinstance(e, Condition):
+            e = e.condition
+        elif isinstance(e, Attribute | Subscript):
+            e = e.target
+        elif isinstance(e, Call):
+            if isinstance(e.target, IdentifierExpr) and e.args:
+                # reading the function's name has no effect
+                e = e.args[0]
+            else:
+                e = e.target
+        else:
+            return
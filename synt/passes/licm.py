@@ -0,0 +1,777 @@
+r"""## Loop-invariant code motion
+
+Compute values that don't change between iterations once, before the loop.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "LoopInvariantCodeMotion",
+]
+
+
+from copy import deepcopy
+from typing import TYPE_CHECKING
+
+from synt.expr.attribute import Attribute
+from synt.expr.binary_op import BinaryOp
+from synt.expr.binary_op import BinaryOpType
+from synt.expr.call import Call
+from synt.expr.closure import Closure
+from synt.expr.comprehension import Comprehension
+from synt.expr.comprehension import GeneratorComprehension
+from synt.expr.condition import Condition
+from synt.expr.dict import DictComprehension
+from synt.expr.dict import DictVerbatim
+from synt.expr.list import ListComprehension
+from synt.expr.list import ListVerbatim
+from synt.expr.named_expr import NamedExpr
+from synt.expr.set import SetComprehension
+from synt.expr.set import SetVerbatim
+from synt.expr.subscript import Slice
+from synt.expr.subscript import Subscript
+from synt.expr.tuple import Tuple
+from synt.expr.unary_op import UnaryOp
+from synt.expr.unary_op import UnaryOpType
+from synt.expr.wrapped import Wrapped
+from synt.passes.analysis import PurityAnalysis
+from synt.passes.analysis import ScopeAnalysis
+from synt.passes.common import fresh_name
+from synt.passes.common import name_expr
+from synt.passes.common import used_names
+from synt.passes.manager import TransformerPass
+from synt.stmt.assign import Assignment
+from synt.stmt.branch import Branch
+from synt.stmt.cls import ClassDef
+from synt.stmt.context import With
+from synt.stmt.delete import Delete
+from synt.stmt.expression import ExprStatement
+from synt.stmt.fn import FunctionDef
+from synt.stmt.importing import Import
+from synt.stmt.importing import ImportFrom
+from synt.stmt.keyword import KeywordStatement
+from synt.stmt.loop import ForLoop
+from synt.stmt.loop import WhileLoop
+from synt.stmt.match_case import Match
+from synt.stmt.match_case import MatchCase
+from synt.stmt.raising import Raise
+from synt.stmt.returns import Return
+from synt.stmt.try_catch import ExceptionHandler
+from synt.stmt.try_catch import Try
+from synt.stmt.try_catch import try_
+from synt.tokens.ident import IdentifierExpr
+from synt.tokens.lit import Literal
+from synt.visit import NodeTransformer
+from synt.visit import children
+from synt.visit import unshare
+from synt.visit import walk
+
+
+if TYPE_CHECKING:
+    from synt.expr.expr import Expression
+    from synt.file import File
+    from synt.passes.analysis import Scope
+    from synt.passes.manager import AnalysisManager
+    from synt.stmt.stmt import Statement
+    from synt.visit import Node
+
+
+IMMUTABLE_BUILTINS = frozenset(
+    {
+        "abs",
+        "ascii",
+        "bin",
+        "bool",
+        "callable",
+        "chr",
+        "complex",
+        "divmod",
+        "float",
+        "format",
+        "frozenset",
+        "getattr",
+        "hasattr",
+        "hash",
+        "hex",
+        "id",
+        "int",
+        "isinstance",
+        "issubclass",
+        "len",
+        "max",
+        "min",
+        "oct",
+        "ord",
+        "pow",
+        "range",
+        "repr",
+        "round",
+        "slice",
+        "str",
+        "sum",
+        "tuple",
+        "type",
+    }
+)
+"""Pure builtins whose results can be shared between iterations,
+as they never create mutable or stateful objects."""
+
+_SCOPED = (
+    Closure,
+    ListComprehension,
+    SetComprehension,
+    DictComprehension,
+    GeneratorComprehension,
+    Comprehension,
+)
+_IMPURE_UNARY = (UnaryOpType.Await, UnaryOpType.Yield, UnaryOpType.YieldFrom)
+
+
+class _LoopEffects:
+    """Names a loop may rebind or mutate, assuming objects are not aliased."""
+
+    everything: bool
+    """Whether other code may run in the middle of the loop, e.g. at an `await`."""
+    calls: bool
+    """Whether the loop calls impure functions, which may change any shared state."""
+    stores: set[str]
+    """Names rebound in the loop."""
+    mutated: set[str]
+    """Names and attribute or subscript paths, like `self.rows`,
+    of objects whose items or attributes may be changed in the loop."""
+    attributes: set[str]
+    """Names of attributes assigned in the loop."""
+    contents: bool
+    """Whether the loop calls local variables, which may hold methods of any object."""
+
+    def __init__(
+        self, purity: PurityAnalysis, scope: Scope, methods: dict[str, Expression]
+    ):
+        self.purity = purity
+        self.scope = scope
+        self.methods = methods
+        self.everything = self.calls = self.contents = False
+        self.stores, self.mutated, self.attributes = set(), set(), set()
+
+    def add(self, node: Node) -> None:
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            match n:
+                case FunctionDef() | ClassDef():
+                    # bodies only run when called, which is an impure call here
+                    self.stores.add(n.name.raw)
+                    stack.extend(n.decorators)
+                    continue
+                case Closure():
+                    continue
+                case Call() if not _pure_call(n, self.purity):
+                    self.calls = True
+                    if isinstance(n.target, IdentifierExpr):
+                        callee = n.target.ident.raw
+                        if callee in self.methods:
+                            self.mutated.update(_reachable(self.methods[callee]))
+                        elif self.scope.binds(callee):
+                            self.contents = True
+                    if isinstance(n.target, Attribute):
+                        # a method may change its receiver
+                        self.mutated.update(_reachable(n.target.target))
+                    for child in children(n)[1:]:
+                        self.mutated.update(_reachable(child))
+                case UnaryOp() if n.op_type in _IMPURE_UNARY:
+                    self.everything = True
+                case Import() | ImportFrom() | With():
+                    self.everything = True
+                case NamedExpr():
+                    self.stores.add(n.receiver.raw)
+                case Assignment() | Delete() | ForLoop():
+                    self.store(n.target)
+                case ExceptionHandler() if n.asname is not None:
+                    self.stores.add(n.asname.raw)
+                case MatchCase():
+                    self.stores.update(_names(n.pattern))
+            stack.extend(children(n))
+
+    def store(self, target: Expression) -> None:
+        if isinstance(target, IdentifierExpr):
+            self.stores.add(target.ident.raw)
+        elif isinstance(target, Tuple | ListVerbatim):
+            for item in target.items:
+                self.store(item)
+        elif isinstance(target, Wrapped):
+            self.store(target.inner)
+        elif isinstance(target, UnaryOp):
+            self.store(target.expression)
+        else:
+            if isinstance(target, Attribute):
+                self.attributes.add(target.attribute_name)
+            owner = (
+                _path(target.target)
+                if isinstance(target, Attribute | Subscript)
+                else None
+            )
+            if owner is None:
+                self.everything = True
+            else:
+                self.mutated.add(owner)
+
+
+def _pure_call(call: Call, purity: PurityAnalysis) -> bool:
+    return isinstance(call.target, IdentifierExpr) and purity.is_pure_call(
+        call.target.ident.raw
+    )
+
+
+def _names(node: Node) -> set[str]:
+    return {n.ident.raw for n in walk(node) if isinstance(n, IdentifierExpr)}
+
+
+def _path(node: Node) -> str | None:
+    """Rendered code of a name, or of attributes and subscripts of a name
+    indexed by names and literals, `None` for other expressions."""
+    e = node
+    while isinstance(e, Attribute | Subscript):
+        if isinstance(e, Subscript) and not all(
+            isinstance(s, IdentifierExpr | Literal) for s in e.slices
+        ):
+            return None
+        e = e.target
+    return node.into_code() if isinstance(e, IdentifierExpr) else None  # type:ignore[union-attr]
+
+
+def _within(path: str, owner: str) -> bool:
+    """Whether a path reads through the object at another path."""
+    return path == owner or (path.startswith(owner) and path[len(owner)] in ".[")
+
+
+def _reachable(node: Node) -> set[str]:
+    """Paths of the objects that may be reached from the value of an expression."""
+    path = _path(node)
+    if path is not None:
+        return {path}
+    match node:
+        case Literal():
+            return set()
+        case Call() if (
+            isinstance(node.target, IdentifierExpr)
+            and node.target.ident.raw in IMMUTABLE_BUILTINS
+        ):
+            return set()
+        case BinaryOp() if node.op_type not in (
+            BinaryOpType.BoolAnd,
+            BinaryOpType.BoolOr,
+        ):
+            # operators compute new values
+            return set()
+        case UnaryOp() if node.op_type is UnaryOpType.BoolNot:
+            return set()
+        case Call():
+            # the called object is not part of the result
+            return set().union(*(_reachable(c) for c in children(node)[1:]))
+    return set().union(*(_reachable(c) for c in children(node)))
+
+
+def _paths(node: Node) -> list[str]:
+    """Paths read by an expression, except the names of called builtins."""
+    paths = []
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        path = _path(n)
+        if path is not None:
+            paths.append(path)
+        elif isinstance(n, Call) and isinstance(n.target, IdentifierExpr):
+            stack.extend(children(n)[1:])
+        else:
+            stack.extend(children(n))
+    return paths
+
+
+def _exits(s: Statement) -> bool:
+    """Whether a statement may leave the current iteration early."""
+    return any(
+        isinstance(n, Return | Raise)
+        or (isinstance(n, KeywordStatement) and n.keyword in ("break", "continue"))
+        for n in walk(s)
+    )
+
+
+class _Invariance:
+    """Decide which expressions of a loop have the same value in every iteration."""
+
+    effects: _LoopEffects
+    scope: Scope
+    purity: PurityAnalysis
+    temps: set[str]
+    """Temporaries created by the pass, which are locals of the function."""
+
+    def __init__(
+        self,
+        effects: _LoopEffects,
+        scope: Scope,
+        purity: PurityAnalysis,
+        temps: set[str],
+    ):
+        self.effects = effects
+        self.scope = scope
+        self.purity = purity
+        self.temps = temps
+
+    def binding(self, name: str) -> bool:
+        """Whether a name is bound to the same object in every iteration."""
+        if name in self.effects.stores:
+            return False
+        # calls may rebind globals and variables shared with nested functions
+        local = name in self.temps or (
+            self.scope.binds(name) and name not in self.scope.captured
+        )
+        return local or not self.effects.calls
+
+    def stable(self, path: str, exact: bool = False) -> bool:
+        """Whether reading a path in the loop always gives the same object.
+
+        Args:
+            path: Path of the read object.
+            exact: Whether the read object itself may be changed,
+                e.g. for method lookups.
+        """
+        if self.effects.contents:
+            return False
+        return not any(
+            _within(path, owner) and not (exact and path == owner)
+            for owner in self.effects.mutated
+        )
+
+    def invariant(self, node: Node, exact: bool = False) -> bool:
+        """Whether an expression always evaluates to the same object."""
+        if isinstance(node, (*_SCOPED, NamedExpr, Slice)) or not self.purity.is_pure(
+            node
+        ):
+            return False
+        if not all(self.stable(p, exact) for p in _paths(node)):
+            return False
+        callees: set[int] = set()
+        for n in walk(node):
+            if isinstance(n, Call):
+                # pure builtins are never rebound in the file
+                if not (
+                    isinstance(n.target, IdentifierExpr)
+                    and n.target.ident.raw in IMMUTABLE_BUILTINS
+                ):
+                    return False
+                callees.add(id(n.target))
+            if (
+                isinstance(n, IdentifierExpr)
+                and id(n) not in callees
+                and not self.binding(n.ident.raw)
+            ):
+                return False
+            if isinstance(n, (*_SCOPED, Slice, ListVerbatim)):
+                return False
+        return True
+
+    def method(self, node: Attribute) -> bool:
+        """Whether a method lookup always finds the same method.
+
+        Methods are assumed not to be reassigned on their classes,
+        so only the receiver's binding and its own attributes matter.
+        """
+        if node.attribute_name in self.effects.attributes:
+            return False
+        receiver = node.target
+        if isinstance(receiver, IdentifierExpr):
+            return self.binding(receiver.ident.raw)
+        return self.worth(receiver) and self.invariant(receiver, exact=True)
+
+    @staticmethod
+    def worth(node: Node) -> bool:
+        """Whether evaluating an expression once saves more than reading a variable."""
+        return isinstance(node, Attribute | Subscript | Call)
+
+
+class LoopInvariantCodeMotion(TransformerPass):
+    r"""Move loop-invariant expressions of function bodies into temporaries before the loop.
+
+    An expression is hoisted out of a `for` or `while` loop when it is evaluated
+    in every iteration, i.e. in the `while` test or in a statement of the body
+    before any statement that may `break`, `continue`, `return` or `raise`,
+    outside conditional expressions, boolean operands, lambdas and comprehensions.
+    Hoisted expressions are attribute reads, subscripts and calls of
+    [immutable builtins][synt.passes.licm.IMMUTABLE_BUILTINS] like `len`,
+    as well as method lookups like `out.append`, whose value can't change in the loop:
+
+    - none of their names is rebound in the loop;
+    - no item or attribute of their objects is assigned in the loop,
+      nor are the objects passed to, or called methods of, by an impure call;
+    - if the loop makes impure calls, their names are locals of the function
+      that no nested function uses.
+
+    Objects are assumed not to be aliased by different names.
+    Hoisted expressions are evaluated before the loop even if it makes no iteration,
+    where they may raise, like `cfg["scale"]` with an empty `cfg`.
+    Unless the loop surely iterates or they are evaluated by the `while` test anyway,
+    the loop is versioned: the temporaries are bound in a `try` statement
+    which runs the original loop if that raises, and the rewritten loop otherwise.
+    Temporaries hoisted out of an inner loop move further out of invariant outer loops.
+
+    Examples:
+        ```python
+        from synt.passes import PassManager
+        from synt.passes.licm import LoopInvariantCodeMotion
+        out, x, cfg = id_("out"), id_("x"), id_("cfg")
+        file = File(
+            def_(id_("f"))(arg(cfg), arg(id_("xs"))).block(
+                out.expr().assign(list_()),
+                for_(x).in_(id_("xs")).block(
+                    out.expr().attr("append").call(
+                        x.expr() * id_("len").expr().call(cfg.expr().attr("scale"))
+                    ).stmt(),
+                ),
+                return_(out),
+            ),
+        )
+        PassManager(LoopInvariantCodeMotion()).run(file)
+        assert file.into_str() == (
+            "def f(cfg, xs):\n"
+            "    out = []\n"
+            "    try:\n"
+            "        _licm_0 = out.append\n"
+            "        _licm_1 = len(cfg.scale)\n"
+            "    except Exception:\n"
+            "        for x in xs:\n"
+            "            out.append(x * len(cfg.scale))\n"
+            "    else:\n"
+            "        for x in xs:\n"
+            "            _licm_0(x * _licm_1)\n"
+            "    return out"
+        )
+        ```
+    """
+
+    requires = (ScopeAnalysis, PurityAnalysis)
+
+    prefix: str
+    """Prefix of the temporaries' names."""
+
+    __names: set[str]
+    __temps: set[str]
+    """Temporaries created by the current run."""
+    __methods: dict[str, Expression]
+    """Receivers of the attributes held by temporaries."""
+    __scopes: list[Scope | None]
+    __originals: dict[int, ForLoop | WhileLoop]
+    """Copies of the loops being rewritten, as they were before."""
+    __fallbacks: set[int]
+    """Handlers of versioned loops, by identity."""
+    __fallback: int
+    """Number of enclosing handlers of versioned loops."""
+
+    def __init__(self, prefix: str = "_licm_"):
+        """Initialize the pass.
+
+        Args:
+            prefix: Prefix of the temporaries' names.
+        """
+        self.prefix = prefix
+        self.__names = set()
+        self.__temps = set()
+        self.__methods = {}
+        self.__scopes = []
+        self.__originals = {}
+        self.__fallbacks = set()
+        self.__fallback = 0
+
+    def run(self, file: File, analyses: AnalysisManager) -> int:
+        # hoisted expressions are found by identity
+        unshare(file)
+        self.__names = used_names(file)
+        self.__scopes = [None]
+        try:
+            return super().run(file, analyses)
+        finally:
+            self.__names.clear()
+            self.__temps.clear()
+            self.__methods.clear()
+            self.__originals.clear()
+            self.__fallbacks.clear()
+            self.__fallback = 0
+
+    def __fresh(self) -> str:
+        name = fresh_name(self.__names, self.prefix, numbered=True)
+        self.__temps.add(name)
+        return name
+
+    def visit_FunctionDef(self, node: FunctionDef) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_FunctionDef(self, node: FunctionDef) -> FunctionDef:
+        self.__scopes.pop()
+        return node
+
+    def visit_ClassDef(self, node: ClassDef) -> None:
+        self.__scopes.append(None)
+
+    def leave_ClassDef(self, node: ClassDef) -> ClassDef:
+        self.__scopes.pop()
+        return node
+
+    def visit_Try(self, node: Try) -> None:
+        if self.__versioned(node):
+            # the original loop is kept as is
+            self.__fallbacks.add(id(node.handlers[0]))
+
+    def visit_ExceptionHandler(self, node: ExceptionHandler) -> None:
+        if id(node) in self.__fallbacks:
+            self.__fallback += 1
+
+    def leave_ExceptionHandler(self, node: ExceptionHandler) -> ExceptionHandler:
+        if id(node) in self.__fallbacks:
+            self.__fallbacks.discard(id(node))
+            self.__fallback -= 1
+        return node
+
+    def visit_ForLoop(self, node: ForLoop) -> None:
+        self.__keep(node)
+
+    def visit_WhileLoop(self, node: WhileLoop) -> None:
+        self.__keep(node)
+
+    def __keep(self, loop: ForLoop | WhileLoop) -> None:
+        """Copy a loop before its inner loops are rewritten, in case it needs versioning."""
+        if self.__scopes[-1] is not None and not self.__fallback:
+            self.__originals[id(loop)] = deepcopy(loop)
+
+    def leave_ForLoop(self, node: ForLoop) -> Statement | list[Statement]:
+        original = self.__originals.pop(id(node), None)
+        if original is None:
+            return node
+        return self.__hoist(node, original, [])
+
+    def leave_WhileLoop(self, node: WhileLoop) -> Statement | list[Statement]:
+        original = self.__originals.pop(id(node), None)
+        if original is None:
+            return node
+        return self.__hoist(node, original, [node.test])
+
+    def __versioned(self, s: Statement) -> bool:
+        """Whether a statement is a `try` statement binding temporaries,
+        which runs the original loop if that raises, and the rewritten one otherwise."""
+        if not (
+            isinstance(s, Try)
+            and s.try_block.body
+            and len(s.handlers) == 1
+            and s.orelse is not None
+            and s.final is None
+        ):
+            return False
+        handler = s.handlers[0]
+        return (
+            isinstance(handler.type, IdentifierExpr)
+            and handler.type.ident.raw == "Exception"
+            and handler.asname is None
+            and len(handler.body.body) == 1
+            and isinstance(handler.body.body[0], ForLoop | WhileLoop)
+            and len(s.orelse.body) == 1
+            and isinstance(s.orelse.body[0], ForLoop | WhileLoop)
+            and all(
+                isinstance(a, Assignment)
+                and isinstance(a.target, IdentifierExpr)
+                and a.target.ident.raw.startswith(self.prefix)
+                for a in s.try_block.body
+            )
+        )
+
+    def __hoist(
+        self,
+        loop: ForLoop | WhileLoop,
+        original: ForLoop | WhileLoop,
+        heads: list[Expression],
+    ) -> Statement | list[Statement]:
+        scope = self.__scopes[-1]
+        if scope is None:
+            return loop
+        purity = self.analyses.get(PurityAnalysis)
+
+        # statements run in every iteration
+        body = []
+        for s in loop.body.body:
+            if _exits(s):
+                if isinstance(s, Branch):
+                    heads.append(s.tests[0][0])
+                break
+            body.append(s)
+
+        # temporaries of inner loops move along with the expressions they hold
+        versioned = [s for s in body if isinstance(s, Try) and self.__versioned(s)]
+        temps = [
+            s
+            for s in [*body, *(a for v in versioned for a in v.try_block.body)]
+            if isinstance(s, Assignment)
+            and isinstance(s.target, IdentifierExpr)
+            and s.target.ident.raw in self.__temps
+        ]
+        effects = _LoopEffects(purity, scope, self.__methods)
+        if isinstance(loop, ForLoop):
+            effects.store(loop.target)
+        effects.add(loop.body)
+        if isinstance(loop, WhileLoop):
+            effects.add(loop.test)
+        if effects.everything:
+            return loop
+        invariance = _Invariance(effects, scope, purity, self.__temps)
+
+        hoisted: list[Statement] = []
+        moved: set[str] = set()
+        for s in temps:
+            name = s.target.ident.raw  # type:ignore[attr-defined]
+            effects.stores.discard(name)
+            value = s.value
+            if value is not None and (
+                invariance.invariant(value)
+                or (isinstance(value, Attribute) and invariance.method(value))
+            ):
+                moved.add(name)
+                hoisted.append(s)
+            else:
+                # rebound in every iteration
+                effects.stores.add(name)
+        if hoisted:
+            loop.body.body = _without(loop.body.body, hoisted)
+            body = _without(body, hoisted)
+
+        found: dict[str, list[Expression]] = {}
+        for head in heads:
+            self.__collect(head, invariance, found)
+        # the test of a `while` loop is evaluated before it makes any iteration
+        entry = (
+            {id(e) for occurrences in found.values() for e in occurrences}
+            if isinstance(loop, WhileLoop)
+            else set()
+        )
+        for s in body:
+            for e in _evaluated(s):
+                self.__collect(e, invariance, found)
+        # values first evaluated in the body may raise although the loop makes no iteration
+        guarded = not _iterates(loop) and (
+            bool(hoisted)
+            or any(not any(id(e) in entry for e in o) for o in found.values())
+        )
+
+        replace: dict[int, tuple[Expression, IdentifierExpr]] = {}
+        for occurrences in found.values():
+            name = self.__fresh()
+            first = occurrences[0]
+            hoisted.append(Assignment(name_expr(name)).assign(first))
+            if isinstance(first, Attribute):
+                # calls of the temporary may change the receiver
+                self.__methods[name] = first.target
+            for e in occurrences:
+                replace[id(e)] = (e, name_expr(name))
+        if replace:
+            rewrite = _Replace(replace)
+            if isinstance(loop, WhileLoop):
+                loop.test = rewrite.transform(loop.test)
+            rewrite.transform(loop.body)
+            self.changes += len(replace)
+        if not hoisted:
+            return loop
+        if not guarded:
+            return [*hoisted, loop]
+        return (
+            try_(*hoisted).except_(name_expr("Exception")).block(original).else_(loop)
+        )
+
+    def __collect(
+        self, node: Node, invariance: _Invariance, found: dict[str, list[Expression]]
+    ) -> None:
+        """Collect the largest hoistable expressions evaluated whenever `node` is."""
+        if invariance.worth(node) and invariance.invariant(node):
+            found.setdefault(node.into_code(), []).append(node)  # type:ignore[union-attr,arg-type]
+            return
+        match node:
+            case _ if isinstance(node, _SCOPED):
+                return
+            case Condition():
+                self.__collect(node.condition, invariance, found)
+            case BinaryOp() if node.op_type in (
+                BinaryOpType.BoolAnd,
+                BinaryOpType.BoolOr,
+            ):
+                self.__collect(node.left, invariance, found)
+            case Call():
+                target = node.target
+                if isinstance(target, Attribute) and invariance.method(target):
+                    found.setdefault(target.into_code(), []).append(target)
+                else:
+                    self.__collect(target, invariance, found)
+                for child in children(node)[1:]:
+                    self.__collect(child, invariance, found)
+            case _:
+                for child in children(node):
+                    self.__collect(child, invariance, found)
+
+
+def _without(body: list[Statement], hoisted: list[Statement]) -> list[Statement]:
+    """Remove hoisted temporaries from statements, and from the `try` statements
+    of versioned inner loops, replaced with the rewritten loop once they bind nothing."""
+    res = []
+    for s in body:
+        if any(s is h for h in hoisted):
+            continue
+        if isinstance(s, Try) and any(
+            a is h for a in s.try_block.body for h in hoisted
+        ):
+            s.try_block.body = [
+                a for a in s.try_block.body if not any(a is h for h in hoisted)
+            ]
+            if not s.try_block.body and s.orelse is not None:
+                res.extend(s.orelse.body)
+                continue
+        res.append(s)
+    return res
+
+
+def _iterates(loop: ForLoop | WhileLoop) -> bool:
+    """Whether a loop surely makes an iteration."""
+    if isinstance(loop, WhileLoop):
+        return isinstance(loop.test, Literal) and loop.test.lit == "True"
+    it = loop.iter
+    while isinstance(it, Wrapped):
+        it = it.inner
+    return isinstance(it, Tuple | ListVerbatim | SetVerbatim | DictVerbatim) and bool(
+        it.items
+    )
+
+
+def _evaluated(s: Statement) -> list[Node]:
+    """Expressions evaluated whenever a statement runs."""
+    match s:
+        case Assignment():
+            # attribute and subscript targets read their operands
+            operands: list[Node] = []
+            if isinstance(s.target, Attribute | Subscript):
+                operands = children(s.target)
+            return [*([s.value] if s.value is not None else []), *operands]
+        case ExprStatement():
+            return [s.expr]
+        case Branch():
+            return [s.tests[0][0]]
+        case ForLoop():
+            return [s.iter]
+        case WhileLoop():
+            return [s.test]
+        case Match():
+            return [s.subject]
+    return []
+
+
+class _Replace(NodeTransformer):
+    """Replace expressions by identity."""
+
+    def __init__(self, replace: dict[int, tuple[Expression, IdentifierExpr]]):
+        self.replace = replace
+
+    def leave_Expression(self, node: Expression) -> Expression:
+        entry = self.replace.get(id(node))
+        return node if entry is None or entry[0] is not node else entry[1]
@@ -0,0 +1,247 @@
+r"""## Lambda lifting
+
+Define the lambdas created in loops once, as named functions.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "LambdaLifting",
+]
+
+
+from typing import TYPE_CHECKING
+
+from synt.expr.attribute import Attribute
+from synt.expr.unary_op import UnaryOp
+from synt.expr.unary_op import UnaryOpType
+from synt.passes.analysis import ScopeAnalysis
+from synt.passes.common import FRAME_NAMES
+from synt.passes.common import fresh_name
+from synt.passes.common import is_private
+from synt.passes.common import used_names
+from synt.passes.manager import TransformerPass
+from synt.stmt.cls import ClassDef
+from synt.stmt.fn import FnArg
+from synt.stmt.fn import def_
+from synt.stmt.returns import Return
+from synt.tokens.ident import Identifier
+from synt.tokens.ident import IdentifierExpr
+from synt.visit import unshare
+from synt.visit import walk
+
+
+if TYPE_CHECKING:
+    from synt.expr.closure import Closure
+    from synt.expr.expr import Expression
+    from synt.file import File
+    from synt.passes.analysis import Scope
+    from synt.passes.manager import AnalysisManager
+    from synt.stmt.block import Block
+    from synt.stmt.fn import FunctionDef
+    from synt.stmt.loop import ForLoop
+    from synt.stmt.loop import WhileLoop
+    from synt.stmt.stmt import Statement
+
+
+class LambdaLifting(TransformerPass):
+    r"""Replace lambdas created in loops with functions defined once, before the loop.
+
+    A `lambda` in a `for` or `while` loop creates a new function object on each
+    iteration, e.g. when it is passed as a sort key or a callback.
+    Such lambdas are replaced with the name of an equivalent function:
+
+    - lambdas reading no local of an enclosing function become
+      module-level functions, defined once before the top-level statement
+      containing the loop;
+    - other lambdas, and lambdas of methods using private names like `self.__x`,
+      which are mangled with the name of the class, become functions defined
+      in the enclosing function, right before its outermost loop containing the lambda,
+      so they are created once per call instead of once per iteration.
+
+    Both kinds read globals and captured variables when they are called,
+    like the lambda. In particular, closures read captured variables from cells
+    shared with the enclosing function, so a function defined before the loop
+    sees the current value of loop variables, and no binding of captures with
+    `functools.partial` is needed.
+
+    Lambdas nested in other lambdas or comprehensions, lambdas in class bodies,
+    and lambdas which `yield`, `await`, use `super` or read variables by name,
+    like `locals()`, are kept.
+    Lifted functions are named `prefix` with a numeric suffix if needed;
+    their `__name__` differs from the `<lambda>` of the replaced lambdas.
+
+    Examples:
+        ```python
+        from synt.passes import PassManager
+        from synt.passes.lift import LambdaLifting
+        x, k, rows = id_("x"), id_("k"), id_("rows")
+        file = File(
+            def_(id_("f"))(arg(rows), arg(k)).block(
+                for_(id_("row")).in_(rows).block(
+                    id_("row").expr().attr("sort")
+                    .call(key=lambda_(x).ret(x.expr().attr("name"))).stmt(),
+                    id_("row").expr().attr("sort")
+                    .call(key=lambda_(x).ret(x.expr()[k])).stmt(),
+                ),
+            )
+        )
+        PassManager(LambdaLifting()).run(file)
+        assert file.into_str() == (
+            "def _lambda(x):\n"
+            "    return x.name\n"
+            "def f(rows, k):\n"
+            "    def _lambda_1(x):\n"
+            "        return x[k]\n"
+            "    for row in rows:\n"
+            "        row.sort(key=_lambda)\n"
+            "        row.sort(key=_lambda_1)"
+        )
+        ```
+    """
+
+    requires = (ScopeAnalysis,)
+
+    prefix: str
+    """Prefix of the names of the lifted functions."""
+
+    __frames: list[tuple[Scope, list[Statement]]]
+    """Scope of each enclosing function, class or module, with its enclosing loops."""
+    __outermost: list[Statement]
+    """Top-level definition enclosing the current node."""
+    __pending: dict[int, tuple[Statement, list[Statement]]]
+    """Definitions to insert before each statement."""
+    __names: set[str]
+
+    def __init__(self, prefix: str = "_lambda"):
+        """Initialize the pass.
+
+        Args:
+            prefix: Prefix of the names of the lifted functions.
+        """
+        self.prefix = prefix
+        self.__frames = []
+        self.__outermost = []
+        self.__pending = {}
+        self.__names = set()
+
+    def run(self, file: File, analyses: AnalysisManager) -> int:
+        # lambdas are found by identity
+        unshare(file)
+        self.__frames = [(analyses.get(ScopeAnalysis).module, [])]
+        self.__names = used_names(file)
+        try:
+            return super().run(file, analyses)
+        finally:
+            self.__frames.clear()
+            self.__outermost.clear()
+            self.__pending.clear()
+            self.__names.clear()
+
+    def visit_FunctionDef(self, node: FunctionDef) -> None:
+        self.__enter(node)
+
+    def leave_FunctionDef(self, node: FunctionDef) -> FunctionDef:
+        self.__leave()
+        return node
+
+    def visit_ClassDef(self, node: ClassDef) -> None:
+        self.__enter(node)
+
+    def leave_ClassDef(self, node: ClassDef) -> ClassDef:
+        self.__leave()
+        return node
+
+    def __enter(self, node: FunctionDef | ClassDef) -> None:
+        if len(self.__frames) == 1:
+            self.__outermost.append(node)
+        self.__frames.append((self.analyses.get(ScopeAnalysis).scope(node), []))
+
+    def __leave(self) -> None:
+        self.__frames.pop()
+        if len(self.__frames) == 1:
+            self.__outermost.pop()
+
+    def visit_ForLoop(self, node: ForLoop) -> None:
+        self.__frames[-1][1].append(node)
+
+    def leave_ForLoop(self, node: ForLoop) -> ForLoop:
+        self.__frames[-1][1].pop()
+        return node
+
+    def visit_WhileLoop(self, node: WhileLoop) -> None:
+        self.__frames[-1][1].append(node)
+
+    def leave_WhileLoop(self, node: WhileLoop) -> WhileLoop:
+        self.__frames[-1][1].pop()
+        return node
+
+    def leave_Block(self, node: Block) -> Block:
+        if not self.__pending:
+            return node
+        body: list[Statement] = []
+        for s in node.body:
+            pending = self.__pending.get(id(s))
+            if pending is not None and pending[0] is s:
+                del self.__pending[id(s)]
+                body.extend(pending[1])
+            body.append(s)
+        node.body = body
+        return node
+
+    def leave_Closure(self, node: Closure) -> Expression:
+        frame, loops = self.__frames[-1]
+        scope = self.analyses.get(ScopeAnalysis).scope(node)
+        if not loops or scope.parent is not frame or isinstance(frame.node, ClassDef):
+            return node
+        captures = _captures(node, scope)
+        if captures is None:
+            return node
+        # private names are mangled with the name of the enclosing class
+        mangled = _has_private(node) and any(
+            isinstance(s.node, ClassDef) for s, _ in self.__frames
+        )
+        if captures or mangled or frame.is_module:
+            anchor = loops[0]
+        else:
+            anchor = self.__outermost[0]
+        name = fresh_name(self.__names, self.prefix)
+        params = (FnArg(Identifier(a.raw)) for a in node.args)
+        helper = def_(Identifier(name))(*params).block(Return(node.body))
+        self.__pending.setdefault(id(anchor), (anchor, []))[1].append(helper)
+        return IdentifierExpr(Identifier(name))
+
+
+def _captures(node: Closure, scope: Scope) -> bool | None:
+    """Whether a lambda reads locals of enclosing functions.
+
+    Returns:
+        `None` if the lambda can't be lifted.
+    """
+    if any(
+        isinstance(n, UnaryOp)
+        and n.op_type in (UnaryOpType.Yield, UnaryOpType.YieldFrom, UnaryOpType.Await)
+        for n in walk(node.body)
+    ):
+        return None
+    inner = {id(s) for s in scope.walk()}
+    captures = False
+    for s in scope.walk():
+        for name in s.loads:
+            if name in FRAME_NAMES:
+                return None
+            owner = s.resolve(name)
+            if owner is not None and not owner.is_module and id(owner) not in inner:
+                captures = True
+    return captures
+
+
+def _has_private(node: Closure) -> bool:
+    """Whether a lambda uses private names, like `self.__x`."""
+    for n in walk(node):
+        if isinstance(n, Identifier) and is_private(n.raw):
+            return True
+        if isinstance(n, Attribute) and is_private(n.attribute_name):
+            return True
+    return False
@@ -0,0 +1,359 @@
+r"""## Global localization
+
+Read globals and builtins used in loops through local variables.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "GlobalLocalization",
+]
+
+
+import builtins
+
+from typing import TYPE_CHECKING
+
+from synt.expr.alias import Alias
+from synt.expr.attribute import Attribute
+from synt.expr.closure import Closure
+from synt.expr.comprehension import Comprehension
+from synt.expr.list import ListVerbatim
+from synt.expr.modpath import ModPath
+from synt.expr.tuple import Tuple
+from synt.passes.analysis import ScopeAnalysis
+from synt.passes.common import FRAME_NAMES
+from synt.passes.common import fresh_name
+from synt.passes.common import is_docstring
+from synt.passes.common import name_expr
+from synt.passes.common import used_names
+from synt.passes.manager import TransformerPass
+from synt.stmt.assign import Assignment
+from synt.stmt.cls import ClassDef
+from synt.stmt.delete import Delete
+from synt.stmt.fn import FnArg
+from synt.stmt.fn import FunctionDef
+from synt.stmt.importing import Import
+from synt.stmt.importing import ImportFrom
+from synt.stmt.loop import ForLoop
+from synt.stmt.loop import WhileLoop
+from synt.tokens.ident import Identifier
+from synt.tokens.ident import IdentifierExpr
+from synt.visit import NodeTransformer
+from synt.visit import children
+from synt.visit import unshare
+from synt.visit import walk
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from synt.expr.expr import Expression
+    from synt.file import File
+    from synt.passes.analysis import Scope
+    from synt.passes.manager import AnalysisManager
+    from synt.stmt.stmt import Statement
+    from synt.visit import Node
+
+
+class GlobalLocalization(TransformerPass):
+    r"""Bind globals and builtins read in loops of a function to locals at its entry.
+
+    Reading a local variable is faster than looking up a global or a builtin,
+    so names read in a `for` or `while` body, a `while` test or a comprehension
+    of a function are bound to fresh locals when the function starts,
+    and all their reads in the function body go through the locals.
+    Attributes of modules imported at the top of the file, like `math.sqrt`,
+    are bound the same way.
+
+    Only names that nothing in the file may rebind while the function runs qualify:
+
+    - builtins which the module doesn't bind, except `super` and the builtins
+      reading variables by name, like `locals`;
+    - module globals which no function declares `global` and the module never deletes;
+    - attributes of module-level `import`s which are never assigned in the file.
+
+    Functions declaring a name `global` or `nonlocal` keep reading it directly.
+    Like any local, the bound value is looked up when the function starts,
+    even if the loop makes no iteration.
+
+    With `defaults=True`, values which are bound before the function is defined,
+    i.e. builtins and globals bound once by a preceding top-level statement,
+    are bound with keyword-only arguments instead, like `*, _len=len`,
+    so they are looked up once, when the function is defined.
+
+    Examples:
+        ```python
+        from synt.passes import PassManager
+        from synt.passes.localize import GlobalLocalization
+        x = id_("x")
+        file = File(
+            import_(id_("math")),
+            def_(id_("f"))(arg(id_("xs"))).block(
+                return_(
+                    list_comp(
+                        id_("math").expr().attr("sqrt").call(id_("abs").expr().call(x))
+                        .for_(x).in_(id_("xs"))
+                    )
+                ),
+            ),
+        )
+        PassManager(GlobalLocalization()).run(file)
+        assert file.into_str() == (
+            "import math\n"
+            "def f(xs):\n"
+            "    _math_sqrt = math.sqrt\n"
+            "    _abs = abs\n"
+            "    return [_math_sqrt(_abs(x)) for x in xs]"
+        )
+        PassManager(GlobalLocalization(defaults=True)).run(file := File(
+            def_(id_("g"))(arg(id_("xs"))).block(
+                for_(x).in_(id_("xs")).block(id_("print").expr().call(x).stmt())
+            )
+        ))
+        assert file.into_str() == (
+            "def g(xs, *, _print = print):\n"
+            "    for x in xs:\n"
+            "        _print(x)"
+        )
+        ```
+    """
+
+    requires = (ScopeAnalysis,)
+
+    defaults: bool
+    """Whether to bind values available at definition time with keyword-only arguments."""
+    prefix: str
+    """Prefix of the names of the locals."""
+
+    __names: set[str]
+    __declared: set[str]
+    """Names declared `global` anywhere in the file."""
+    __imports: set[str]
+    """Module names bound by top-level `import` statements."""
+    __attributes: set[str]
+    """Names of attributes assigned or deleted in the file."""
+    __defined: dict[int, set[str]]
+    """Globals bound by the top-level statements preceding each function."""
+
+    def __init__(self, defaults: bool = False, prefix: str = "_"):
+        """Initialize the pass.
+
+        Args:
+            defaults: Whether to bind values available when the function is defined
+                with keyword-only arguments instead of assignments.
+            prefix: Prefix of the names of the locals, followed by the bound name.
+        """
+        self.defaults = defaults
+        self.prefix = prefix
+        self.__names = set()
+        self.__declared = set()
+        self.__imports = set()
+        self.__attributes = set()
+        self.__defined = {}
+
+    def run(self, file: File, analyses: AnalysisManager) -> int:
+        # replaced reads are found by identity
+        unshare(file)
+        self.__names = used_names(file)
+        self.__declared = {
+            name for scope in analyses.get(ScopeAnalysis) for name in scope.globals
+        }
+        self.__attributes = {
+            n.target.attribute_name
+            for n in walk(file)
+            if isinstance(n, Assignment | Delete) and isinstance(n.target, Attribute)
+        }
+        defined: set[str] = set()
+        for s in file.body.body:
+            for n in walk(s):
+                if isinstance(n, FunctionDef):
+                    self.__defined[id(n)] = set(defined)
+            if isinstance(s, Import):
+                self.__imports.update(_bound(s))
+            defined.update(_bound(s))
+        try:
+            return super().run(file, analyses)
+        finally:
+            self.__names.clear()
+            self.__imports.clear()
+            self.__defined.clear()
+
+    def visit_FunctionDef(self, node: FunctionDef) -> None:
+        scopes = self.analyses.get(ScopeAnalysis)
+        function = scopes.scope(node)
+        uses = list(_reads(node.body, function, False, scopes))
+
+        # pick attributes first, so their module names are only read by the locals
+        reads: dict[str, list[Expression]] = {}
+        looped: set[str] = set()
+        inside: set[int] = set()
+        for e, scope, loop in uses:
+            if isinstance(e, Attribute):
+                key = self.__attribute(e, scope, function)
+                if key is not None:
+                    reads.setdefault(key, []).append(e)
+                    if loop:
+                        looped.add(key)
+        for key in list(reads):
+            if key in looped:
+                inside.update(id(e.target) for e in reads[key])  # type:ignore[attr-defined]
+            else:
+                del reads[key]
+        for e, scope, loop in uses:
+            if isinstance(e, IdentifierExpr) and id(e) not in inside:
+                key = self.__global(e.ident.raw, scope, function)
+                if key is not None:
+                    reads.setdefault(key, []).append(e)
+                    if loop:
+                        looped.add(key)
+        first = {id(e): i for i, (e, _, _) in enumerate(uses)}
+        keys = sorted(
+            (key for key in reads if key in looped),
+            key=lambda key: first[id(reads[key][0])],
+        )
+        if not keys:
+            return
+
+        available = self.__defined.get(id(node), set())
+        replace: dict[int, IdentifierExpr] = {}
+        bindings: list[Statement] = []
+        defaults: list[FnArg] = []
+        for key in keys:
+            name = fresh_name(self.__names, self.prefix + key.replace(".", "_"))
+            for e in reads[key]:
+                replace[id(e)] = name_expr(name)
+            value = _value(key)
+            # defaults are evaluated in the enclosing scope, which may be a class
+            root = key.partition(".")[0]
+            owner = function.parent.resolve(root) if function.parent else None
+            if self.defaults and (
+                owner is None
+                or (owner.is_module and root in available and owner.stores[root] == 1)
+            ):
+                defaults.append(FnArg(Identifier(name), default=value, is_kwonly=True))
+            else:
+                bindings.append(Assignment(name_expr(name)).assign(value))
+
+        _Rename(replace).transform(node.body)
+        start = 1 if node.body.body and is_docstring(node.body.body[0]) else 0
+        node.body.body[start:start] = bindings
+        end = len(node.args) - (1 if node.args and node.args[-1].is_kwarg else 0)
+        node.args[end:end] = defaults
+        self.changes += len(replace)
+
+    def __global(self, name: str, scope: Scope, function: Scope) -> str | None:
+        """Get the key of a global or builtin read, `None` if it may not be bound."""
+        if function.declares_outer(name):
+            return None
+        owner = scope.resolve(name)
+        if owner is None:
+            return name if name in vars(builtins) and name not in FRAME_NAMES else None
+        if not owner.is_module or name in self.__declared or owner.deletes[name]:
+            return None
+        return name
+
+    def __attribute(self, e: Attribute, scope: Scope, function: Scope) -> str | None:
+        """Get the key of a module attribute read, `None` if it may change."""
+        if not isinstance(e.target, IdentifierExpr):
+            return None
+        module = e.target.ident.raw
+        if (
+            module not in self.__imports
+            or e.attribute_name in self.__attributes
+            or self.__global(module, scope, function) is None
+            or scope.resolve(module) is None
+            or function.module().stores[module] != 1
+        ):
+            return None
+        return f"{module}.{e.attribute_name}"
+
+
+def _reads(
+    node: Node, scope: Scope, loop: bool, scopes: ScopeAnalysis
+) -> Iterator[tuple[Expression, Scope, bool]]:
+    """Find the names and attributes of names read in a function's own scope.
+
+    Yields:
+        Each read with the scope it is evaluated in,
+        and whether it is evaluated repeatedly in a loop.
+    """
+    match node:
+        case FunctionDef() | ClassDef():
+            # decorators, defaults and bases are evaluated here, bodies are not
+            for child in children(node):
+                if child is not node.body:
+                    yield from _reads(child, scope, loop, scopes)
+            return
+        case Closure():
+            return
+        case Comprehension():
+            inner = scopes.scope(node)
+            for i, comp in enumerate(node.comprehensions):
+                if i:
+                    yield from _reads(comp.iterator, inner, True, scopes)
+                else:
+                    yield from _reads(comp.iterator, scope, loop, scopes)
+                for cond in comp.ifs:
+                    yield from _reads(cond, inner, True, scopes)
+            yield from _reads(node.elt, inner, True, scopes)
+            return
+        case ForLoop():
+            yield from _reads(node.iter, scope, loop, scopes)
+            yield from _reads(node.target, scope, loop, scopes)
+            yield from _reads(node.body, scope, True, scopes)
+            if node.orelse is not None:
+                yield from _reads(node.orelse, scope, loop, scopes)
+            return
+        case WhileLoop():
+            yield from _reads(node.test, scope, True, scopes)
+            yield from _reads(node.body, scope, True, scopes)
+            if node.orelse is not None:
+                yield from _reads(node.orelse, scope, loop, scopes)
+            return
+        case IdentifierExpr() | Attribute():
+            yield node, scope, loop
+    for child in children(node):
+        yield from _reads(child, scope, loop, scopes)
+
+
+def _bound(s: Statement) -> set[str]:
+    """Names a top-level statement always binds in the module."""
+    match s:
+        case FunctionDef() | ClassDef():
+            return {s.name.raw}
+        case Import() | ImportFrom():
+            names = set()
+            for name in s.names:
+                if isinstance(name, Identifier):
+                    names.add(name.raw)
+                elif isinstance(name, ModPath):
+                    names.add(name.names[0].raw)
+                elif isinstance(name, Alias):
+                    names.add(name.asname.raw)
+            return names
+        case Assignment():
+            targets = (
+                s.target.items
+                if isinstance(s.target, Tuple | ListVerbatim)
+                else [s.target]
+            )
+            return {t.ident.raw for t in targets if isinstance(t, IdentifierExpr)}
+    return set()
+
+
+def _value(key: str) -> Expression:
+    """Build the expression a local is bound to."""
+    module, _, attribute = key.partition(".")
+    return Attribute(name_expr(module), attribute) if attribute else name_expr(module)
+
+
+class _Rename(NodeTransformer):
+    """Replace reads by identity."""
+
+    def __init__(self, replace: dict[int, IdentifierExpr]):
+        self.replace = replace
+
+    def leave_Expression(self, node: Expression) -> Expression:
+        return self.replace.get(id(node), node)
@@ -0,0 +1,360 @@
+r"""## Pass manager
+
+Schedule rewrite passes over a file, sharing analyses between them.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "AnalysisManager",
+    "Pass",
+    "TransformerPass",
+    "PassStats",
+    "AnalysisStats",
+    "PassReport",
+    "PassManager",
+]
+
+
+import time
+
+from abc import ABCMeta
+from abc import abstractmethod
+from dataclasses import dataclass
+from dataclasses import field
+from typing import TYPE_CHECKING
+from typing import ClassVar
+
+from synt.visit import NodeTransformer
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from synt.file import File
+    from synt.passes.analysis import Analysis
+
+
+@dataclass
+class AnalysisStats:
+    r"""Usage of a single analysis during a pass manager run."""
+
+    name: str
+    """Name of the analysis class."""
+    computations: int = 0
+    """Number of times the analysis was computed."""
+    hits: int = 0
+    """Number of requests served from the cache."""
+    time: float = 0.0
+    """Total wall time spent computing the analysis, in seconds."""
+
+
+class AnalysisManager:
+    r"""Cache of the analyses of a file.
+
+    Analyses are computed on the first request, and kept until
+    [`invalidate`][synt.passes.manager.AnalysisManager.invalidate] drops them.
+
+    Examples:
+        ```python
+        from synt.passes import AnalysisManager, ScopeAnalysis
+        analyses = AnalysisManager(File(id_("x").expr().assign(litint(1))))
+        scopes = analyses.get(ScopeAnalysis)
+        assert analyses.get(ScopeAnalysis) is scopes
+        analyses.invalidate()
+        assert analyses.get(ScopeAnalysis) is not scopes
+        ```
+    """
+
+    file: File
+    """The analyzed file."""
+    stats: dict[type[Analysis], AnalysisStats]
+    """Usage of each analysis requested so far."""
+
+    __results: dict[type[Analysis], Analysis]
+
+    def __init__(self, file: File):
+        """Initialize an empty cache.
+
+        Args:
+            file: The analyzed file.
+        """
+        self.file = file
+        self.stats = {}
+        self.__results = {}
+
+    def get[A: Analysis](self, analysis: type[A]) -> A:
+        """Get an analysis of the file, computing it if it is not cached.
+
+        Args:
+            analysis: Class of the analysis.
+        """
+        stats = self.stats.get(analysis)
+        if stats is None:
+            stats = self.stats[analysis] = AnalysisStats(analysis.__name__)
+        cached = self.__results.get(analysis)
+        if cached is not None:
+            stats.hits += 1
+            return cached  # type:ignore[return-value]
+        start = time.perf_counter()
+        result = analysis(self.file, self)
+        stats.time += time.perf_counter() - start
+        stats.computations += 1
+        self.__results[analysis] = result
+        return result
+
+    def is_cached(self, analysis: type[Analysis]) -> bool:
+        """Whether an analysis is cached."""
+        return analysis in self.__results
+
+    def invalidate(self, preserved: Iterable[type[Analysis]] = ()) -> None:
+        """Drop cached analyses after the file changed.
+
+        Args:
+            preserved: Analyses that are still valid, and are kept.
+        """
+        keep = set(preserved)
+        for analysis in list(self.__results):
+            if analysis not in keep:
+                del self.__results[analysis]
+
+
+class Pass(metaclass=ABCMeta):
+    r"""Base class of rewrite passes run by a [`PassManager`][synt.passes.manager.PassManager].
+
+    Subclasses implement [`run`][synt.passes.manager.Pass.run], which rewrites the file
+    in place and returns the number of changed nodes.
+    """
+
+    name: ClassVar[str] = ""
+    """Name of the pass in reports and ordering constraints. Defaults to the class name."""
+    requires: ClassVar[tuple[type[Analysis], ...]] = ()
+    """Analyses used by the pass, computed before it runs."""
+    preserves: ClassVar[tuple[type[Analysis], ...]] = ()
+    """Analyses that stay valid after the pass changed the file."""
+    after: ClassVar[tuple[str, ...]] = ()
+    """Names of passes that must run before this one, when they are scheduled together."""
+
+    def __init_subclass__(cls, **kwargs: object) -> None:
+        super().__init_subclass__(**kwargs)
+        if "name" not in cls.__dict__:
+            cls.name = cls.__name__
+
+    @abstractmethod
+    def run(self, file: File, analyses: AnalysisManager) -> int:
+        """Rewrite a file in place.
+
+        Args:
+            file: The file to rewrite.
+            analyses: Cached analyses of the file.
+
+        Returns:
+            Number of changed nodes, `0` if the file was left unchanged.
+        """
+
+
+class TransformerPass(Pass, NodeTransformer):
+    r"""Pass applying a [`NodeTransformer`][synt.visit.NodeTransformer] to the whole file.
+
+    The analyses are available to the handlers as `self.analyses` during the run.
+
+    Examples:
+        ```python
+        from synt.passes import PassManager, TransformerPass
+        class Upper(TransformerPass):
+            def leave_Identifier(self, node):
+                return node if node.raw.isupper() else id_(node.raw.upper())
+        file = File(id_("x").expr().assign(litint(1)))
+        report = PassManager(Upper()).run(file)
+        assert file.into_str() == "X = 1"
+        assert report.passes["Upper"].changes == 1
+        ```
+    """
+
+    analyses: AnalysisManager
+    """Cached analyses of the file being rewritten."""
+
+    def run(self, file: File, analyses: AnalysisManager) -> int:
+        self.analyses = analyses
+        self.transform(file)
+        return self.changes
+
+
+@dataclass
+class PassStats:
+    r"""Work done by a single pass during a pass manager run."""
+
+    name: str
+    """Name of the pass."""
+    runs: int = 0
+    """Number of times the pass ran."""
+    changes: int = 0
+    """Total number of nodes changed by the pass."""
+    time: float = 0.0
+    """Total wall time spent in the pass, in seconds, excluding analyses."""
+
+
+@dataclass
+class PassReport:
+    r"""Outcome of a pass manager run."""
+
+    iterations: int = 0
+    """Number of rounds over the passes."""
+    converged: bool = False
+    """Whether a fixed point was reached, i.e. the last round changed nothing."""
+    time: float = 0.0
+    """Total wall time of the run, in seconds."""
+    passes: dict[str, PassStats] = field(default_factory=dict)
+    """Statistics of each pass, in run order."""
+    analyses: dict[str, AnalysisStats] = field(default_factory=dict)
+    """Statistics of each analysis requested during the run."""
+
+    @property
+    def changes(self) -> int:
+        """Total number of nodes changed by all passes."""
+        return sum(p.changes for p in self.passes.values())
+
+    def summary(self) -> str:
+        """Format the statistics as a table."""
+        lines = [f"{'pass':<32} {'runs':>5} {'changes':>8} {'time (ms)':>10}"]
+        lines.extend(
+            f"{p.name:<32} {p.runs:>5} {p.changes:>8} {p.time * 1000:>10.2f}"
+            for p in self.passes.values()
+        )
+        lines.extend(
+            f"{'[' + a.name + ']':<32} {a.computations:>5} {'':>8} {a.time * 1000:>10.2f}"
+            for a in self.analyses.values()
+        )
+        status = "converged" if self.converged else "not converged"
+        lines.append(
+            f"{self.iterations} iteration(s), {status}, {self.time * 1000:.2f} ms"
+        )
+        return "\n".join(lines)
+
+
+class PassManager:
+    r"""Run passes over a file until none of them changes it anymore.
+
+    Passes run in the given order, except that a pass runs after the passes named
+    in its [`after`][synt.passes.manager.Pass.after] constraint.
+    Rounds over the passes are repeated until a fixed point is reached,
+    or `max_iterations` rounds or the time `budget` are exhausted.
+    A pass is skipped when nothing changed since it last ran.
+
+    Analyses are shared between passes through an
+    [`AnalysisManager`][synt.passes.manager.AnalysisManager]: after a pass changes the file,
+    only the analyses it [preserves][synt.passes.manager.Pass.preserves] are kept.
+
+    Examples:
+        ```python
+        from synt.passes import PassManager, TransformerPass
+        class Halve(TransformerPass):
+            def leave_Literal(self, node):
+                n = int(node.lit)
+                return litint(n // 2) if n > 1 else node
+        file = File(id_("x").expr().assign(litint(8)))
+        report = PassManager(Halve(), max_iterations=10).run(file)
+        assert file.into_str() == "x = 1"
+        assert report.converged and report.iterations == 4
+        ```
+    """
+
+    passes: list[Pass]
+    """Passes, in run order."""
+    max_iterations: int
+    """Maximum number of rounds over the passes."""
+    budget: float | None
+    """Time budget of a run, in seconds. `None` for no limit."""
+
+    def __init__(
+        self, *passes: Pass, max_iterations: int = 8, budget: float | None = None
+    ):
+        """Initialize a pass manager.
+
+        Args:
+            passes: Passes to run.
+            max_iterations: Maximum number of rounds over the passes.
+            budget: Time budget of a run, in seconds.
+                The run stops after the first pass exceeding it.
+
+        Raises:
+            ValueError: If `max_iterations` is not positive,
+                or the passes' ordering constraints are cyclic.
+        """
+        if max_iterations <= 0:
+            raise ValueError(
+                f"Maximum iterations must be positive, got {max_iterations}."
+            )
+        self.passes = _order(list(passes))
+        self.max_iterations = max_iterations
+        self.budget = budget
+
+    def run(self, file: File) -> PassReport:
+        """Rewrite a file in place.
+
+        Args:
+            file: The file to rewrite.
+
+        Returns:
+            Statistics of the run.
+        """
+        report = PassReport()
+        analyses = AnalysisManager(file)
+        stats = [
+            report.passes.setdefault(p.name, PassStats(p.name)) for p in self.passes
+        ]
+        start = time.perf_counter()
+        deadline = None if self.budget is None else start + self.budget
+
+        step = 0
+        last_change = 0
+        last_run = [-1] * len(self.passes)
+        while report.iterations < self.max_iterations:
+            report.iterations += 1
+            changed = False
+            for i, (p, s) in enumerate(zip(self.passes, stats, strict=True)):
+                step += 1
+                if last_run[i] > last_change:
+                    # nothing changed since this pass last ran
+                    continue
+                last_run[i] = step
+                for analysis in p.requires:
+                    analyses.get(analysis)
+                t0 = time.perf_counter()
+                n = p.run(file, analyses)
+                s.time += time.perf_counter() - t0
+                s.runs += 1
+                if n:
+                    s.changes += n
+                    changed = True
+                    last_change = step
+                    analyses.invalidate(p.preserves)
+                if deadline is not None and time.perf_counter() > deadline:
+                    break
+            else:
+                if not changed:
+                    report.converged = True
+                    break
+                continue
+            break
+
+        report.time = time.perf_counter() - start
+        report.analyses = {a.name: a for a in analyses.stats.values()}
+        return report
+
+
+def _order(passes: list[Pass]) -> list[Pass]:
+    """Sort passes by their `after` constraints, keeping the given order otherwise."""
+    remaining = list(passes)
+    ordered: list[Pass] = []
+    while remaining:
+        names = {p.name for p in remaining}
+        for i, p in enumerate(remaining):
+            if not any(dep in names and dep != p.name for dep in p.after):
+                ordered.append(remaining.pop(i))
+                break
+        else:
+            cycle = ", ".join(p.name for p in remaining)
+            raise ValueError(f"Cyclic pass ordering constraints between: {cycle}")
+    return ordered
@@ -0,0 +1,452 @@
+r"""## Match lowering
+
+Replace sequential `match` statements over many literal or class patterns
+with a table lookup and a binary decision tree over the matched case.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "MatchLowering",
+]
+
+
+import ast
+
+from typing import TYPE_CHECKING
+
+from synt.expr.attribute import Attribute
+from synt.expr.binary_op import BinaryOp
+from synt.expr.binary_op import BinaryOpType
+from synt.expr.call import Call
+from synt.expr.dict import DictVerbatim
+from synt.expr.named_expr import NamedExpr
+from synt.expr.tuple import Tuple
+from synt.expr.unary_op import UnaryOp
+from synt.expr.wrapped import Wrapped
+from synt.passes.analysis import ScopeAnalysis
+from synt.passes.common import fresh_name
+from synt.passes.common import name_expr
+from synt.passes.manager import TransformerPass
+from synt.stmt.assign import Assignment
+from synt.stmt.block import Block
+from synt.stmt.branch import Branch
+from synt.stmt.branch import if_
+from synt.stmt.cls import ClassDef
+from synt.stmt.fn import FnArg
+from synt.stmt.fn import FunctionDef
+from synt.stmt.fn import def_
+from synt.stmt.loop import for_
+from synt.stmt.match_case import Match
+from synt.stmt.returns import Return
+from synt.stmt.try_catch import try_
+from synt.tokens.ident import Identifier
+from synt.tokens.ident import IdentifierExpr
+from synt.tokens.kv_pair import KVPair
+from synt.tokens.lit import Literal
+from synt.visit import walk
+
+
+if TYPE_CHECKING:
+    from synt.expr.expr import Expression
+    from synt.file import File
+    from synt.passes.analysis import Scope
+    from synt.passes.manager import AnalysisManager
+    from synt.stmt.match_case import MatchCase
+    from synt.stmt.stmt import Statement
+
+
+_KEYS = (str, bytes, int, float, complex)
+"""Types of the literal patterns compared by equality, unlike `None`, `True` and `False`."""
+
+
+class MatchLowering(TransformerPass):
+    r"""Lower the leading literal or class cases of `match` statements to table lookups.
+
+    CPython tries the cases of a `match` statement one after the other.
+    When at least `min_cases` leading cases all match literals, or all match classes,
+    the pass finds the matching case with a single lookup in a module-level dict,
+    then reaches its body through a binary tree of `if` statements
+    comparing the index of the case, in logarithmic time:
+
+    - literal cases, like `case 1 | 2:` or `case "add":`, possibly with guards,
+      are found by looking the subject up in a dict mapping each literal to its case;
+      a failed guard moves on to the remaining cases;
+    - class cases without sub-patterns nor guards, like `case Point():`,
+      are found by looking `type(subject)` up in a cache, filled on first sight of a type
+      by testing the classes in order with `issubclass`, like `isinstance` patterns do.
+
+    Cases after the lowered ones are kept in a `match` statement
+    run when no lowered case matched, which the pass may lower again.
+    Literals already matched by an earlier case are dropped, and so are the cases
+    left without any, as they are never reached.
+    Literals repeated after a guarded case end the lowered cases, as do
+    `None`, `True` and `False`, which patterns compare by identity.
+
+    Lookups hash the subject: it must compare like the literals,
+    which holds for the numbers and strings such cases usually match.
+    Unhashable subjects, for which the lookup raises `TypeError`, match no literal.
+    Classes must be module-level or builtin names, bound once, whose instance checks
+    don't change over time, as the result is cached per type.
+    `match` statements in class bodies are kept as is.
+
+    Examples:
+        ```python
+        from synt.passes import PassManager
+        from synt.passes.match import MatchLowering
+        op = id_("op")
+        m = match_(op)
+        for i, name in enumerate(("add", "sub", "mul", "div")):
+            m = m.case_(litstr(name)).block(return_(litint(i)))
+        m = m.case_(UNDERSCORE).block(return_(litint(-1)))
+        file = File(def_(id_("code"))(arg(op)).block(m))
+        PassManager(MatchLowering(min_cases=4)).run(file)
+        assert file.into_str() == (
+            "_MATCH = {'add': 0, 'sub': 1, 'mul': 2, 'div': 3}\n"
+            "def code(op):\n"
+            "    try:\n"
+            "        _case = _MATCH.get(op, 4)\n"
+            "    except TypeError:\n"
+            "        _case = 4\n"
+            "    if _case < 2:\n"
+            "        if _case < 1:\n"
+            "            return 0\n"
+            "        else:\n"
+            "            return 1\n"
+            "    elif _case < 3:\n"
+            "        return 2\n"
+            "    elif _case < 4:\n"
+            "        return 3\n"
+            "    else:\n"
+            "        return -1"
+        )
+        ```
+    """
+
+    requires = (ScopeAnalysis,)
+
+    min_cases: int
+    """Minimum number of leading literal or class cases."""
+
+    __scopes: list[Scope]
+    __top: dict[int, Statement]
+    """Top-level statement containing each statement of the file."""
+    __pending: dict[int, tuple[Statement, list[Statement]]]
+    """Module-level definitions to insert before each top-level statement."""
+    __names: set[str]
+    __helper: str | None
+    """Name of the function finding the case of a type, once defined."""
+
+    def __init__(self, min_cases: int = 8):
+        """Initialize the pass.
+
+        Args:
+            min_cases: Minimum number of leading literal or class cases.
+
+        Raises:
+            ValueError: If `min_cases` is less than 1.
+        """
+        if min_cases < 1:
+            raise ValueError("Lowered matches need at least one case.")
+        self.min_cases = min_cases
+        self.__scopes = []
+        self.__top = {}
+        self.__pending = {}
+        self.__names = set()
+        self.__helper = None
+
+    def run(self, file: File, analyses: AnalysisManager) -> int:
+        self.__scopes = [analyses.get(ScopeAnalysis).module]
+        self.__names = set()
+        for s in file.body.body:
+            for n in walk(s):
+                if isinstance(n, Match):
+                    self.__top[id(n)] = s
+                elif isinstance(n, Identifier):
+                    self.__names.add(n.raw)
+        try:
+            return super().run(file, analyses)
+        finally:
+            self.__scopes.clear()
+            self.__top.clear()
+            self.__pending.clear()
+            self.__names.clear()
+            self.__helper = None
+
+    def visit_FunctionDef(self, node: FunctionDef) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_FunctionDef(self, node: FunctionDef) -> FunctionDef:
+        self.__scopes.pop()
+        return node
+
+    def visit_ClassDef(self, node: ClassDef) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_ClassDef(self, node: ClassDef) -> ClassDef:
+        self.__scopes.pop()
+        return node
+
+    def leave_Block(self, node: Block) -> Block:
+        if not self.__pending:
+            return node
+        body: list[Statement] = []
+        for s in node.body:
+            pending = self.__pending.get(id(s))
+            if pending is not None and pending[0] is s:
+                del self.__pending[id(s)]
+                body.extend(pending[1])
+            body.append(s)
+        node.body = body
+        return node
+
+    def leave_Match(self, node: Match) -> Statement | list[Statement]:
+        scope = self.__scopes[-1]
+        top = self.__top.get(id(node))
+        if isinstance(scope.node, ClassDef) or top is None:
+            return node
+        lowered = _literal_cases(node.cases)
+        if len(lowered[0]) < self.min_cases:
+            lowered = _class_cases(node.cases, scope)
+        cases, keys, count = lowered
+        if len(cases) < self.min_cases:
+            return node
+        rest = node.cases[count:]
+
+        body: list[Statement] = []
+        subject = node.subject
+        if not isinstance(subject, IdentifierExpr):
+            temp = name_expr(fresh_name(self.__names, "_subject"))
+            body.append(temp.assign(subject))
+            subject = temp
+        elif any(
+            isinstance(n, NamedExpr) and n.receiver.raw == subject.ident.raw
+            for case in cases
+            if case.guard is not None
+            for n in walk(case.guard)
+        ):
+            return node
+
+        index = name_expr(fresh_name(self.__names, "_case"))
+        table = name_expr(fresh_name(self.__names, "_MATCH"))
+        definitions: list[Statement] = []
+        n = len(cases)
+        if keys is not None:
+            items = [
+                KVPair(key, Literal(str(i)))
+                for i, literals in enumerate(keys)
+                for key in literals
+            ]
+            definitions.append(table.assign(DictVerbatim(*items)))
+            # unhashable subjects, like lists, match none of the literals
+            body.append(
+                try_(index.assign(table.attr("get").call(subject, Literal(str(n)))))
+                .except_(name_expr("TypeError"))
+                .block(index.assign(Literal(str(n))))
+            )
+        else:
+            if self.__helper is None:
+                self.__helper = fresh_name(self.__names, "_match_class")
+                definitions.append(_class_helper(self.__helper))
+            definitions.append(table.assign(DictVerbatim()))
+            kind = name_expr("type").call(subject)
+            classes = Tuple(*(_classes(case.pattern) for case in cases))
+            body.append(index.assign(table.attr("get").call(kind)))
+            find = Branch()
+            find.tests = [
+                (
+                    index.is_(Literal("None")),
+                    Block(
+                        Assignment(index).assign(
+                            name_expr(self.__helper).call(kind, classes)
+                        ),
+                        table[kind].assign(index),
+                    ),
+                )
+            ]
+            body.append(find)
+
+        leaves: list[list[Statement]] = []
+        guarded = any(case.guard is not None for case in cases)
+        for case in cases:
+            if case.guard is None:
+                leaves.append(case.body.body)
+            else:
+                branch = Branch()
+                branch.tests = [(case.guard, case.body)]
+                branch.fallback = Block(index.assign(Literal(str(n))))
+                leaves.append([branch])
+        remaining = _remaining(subject, rest)
+        if guarded:
+            leaves.append([])
+            body.extend(_tree(index, leaves, 0, n + 1))
+            if remaining:
+                after = Branch()
+                after.tests = [(index.eq(Literal(str(n))), Block(*remaining))]
+                body.append(after)
+        else:
+            leaves.append(remaining)
+            body.extend(_tree(index, leaves, 0, n + 1))
+
+        if top is node:
+            return [*definitions, *body]
+        self.__pending.setdefault(id(top), (top, []))[1].extend(definitions)
+        return body
+
+
+type _Lowered = tuple[list[MatchCase], list[list[Expression]] | None, int]
+"""Lowered cases, the literals of each for literal cases, and the number of cases read."""
+
+
+def _literal_cases(cases: list[MatchCase]) -> _Lowered:
+    """Find the leading literal cases of a `match` statement."""
+    lowered: list[MatchCase] = []
+    keys: list[list[Expression]] = []
+    claimed: set[object] = set()
+    guarded: set[object] = set()
+    count = 0
+    for case in cases:
+        literals = _literals(case.pattern)
+        if literals is None or any(value in guarded for _, value in literals):
+            break
+        count += 1
+        own = []
+        for key, value in literals:
+            if value not in claimed:
+                claimed.add(value)
+                own.append(key)
+                if case.guard is not None:
+                    guarded.add(value)
+        if own:
+            lowered.append(case)
+            keys.append(own)
+    return lowered, keys, count
+
+
+def _literals(pattern: Expression) -> list[tuple[Expression, object]] | None:
+    """Get the literals of a literal or an or-pattern of literals, with their values."""
+    while isinstance(pattern, Wrapped):
+        pattern = pattern.inner
+    if isinstance(pattern, BinaryOp) and pattern.op_type is BinaryOpType.BitOr:
+        left, right = _literals(pattern.left), _literals(pattern.right)
+        return None if left is None or right is None else left + right
+    if not isinstance(pattern, Literal | UnaryOp):
+        return None
+    try:
+        value = ast.literal_eval(pattern.into_code())
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return None
+    if not isinstance(value, _KEYS) or isinstance(value, bool):
+        return None
+    return [(pattern, value)]
+
+
+_BUILTINS = ("type", "issubclass", "enumerate", "len")
+"""Builtins the lookup of class cases relies on."""
+
+
+def _class_cases(cases: list[MatchCase], scope: Scope) -> _Lowered:
+    """Find the leading class cases of a `match` statement, without sub-patterns."""
+    module = scope.module()
+    if scope.resolve("type") is not None or any(module.binds(b) for b in _BUILTINS):
+        return [], None, 0
+    lowered: list[MatchCase] = []
+    for case in cases:
+        if case.guard is not None or not all(
+            _stable(c, scope) for c in _flatten(case.pattern)
+        ):
+            break
+        lowered.append(case)
+    return lowered, None, len(lowered)
+
+
+def _flatten(pattern: Expression) -> list[Expression]:
+    """Get the alternatives of an or-pattern."""
+    while isinstance(pattern, Wrapped):
+        pattern = pattern.inner
+    if isinstance(pattern, BinaryOp) and pattern.op_type is BinaryOpType.BitOr:
+        return _flatten(pattern.left) + _flatten(pattern.right)
+    return [pattern]
+
+
+def _stable(pattern: Expression, scope: Scope) -> bool:
+    """Whether a pattern is a class pattern without sub-patterns of a class bound once."""
+    if not isinstance(pattern, Call) or pattern.args or pattern.keywords:
+        return False
+    root = pattern.target
+    while isinstance(root, Attribute):
+        root = root.target
+    if not isinstance(root, IdentifierExpr):
+        return False
+    owner = scope.resolve(root.ident.raw)
+    return owner is None or (
+        owner.is_module
+        and owner.stores[root.ident.raw] == 1
+        and not owner.deletes[root.ident.raw]
+    )
+
+
+def _classes(pattern: Expression) -> Expression:
+    """Get the class of a class pattern, or a tuple of the classes of an or-pattern."""
+    alternatives = [c.target for c in _flatten(pattern)]  # type:ignore[attr-defined]
+    return alternatives[0] if len(alternatives) == 1 else Tuple(*alternatives)
+
+
+def _class_helper(name: str) -> FunctionDef:
+    """Define the function finding the first of some classes a type derives from."""
+    kind, classes, i, cls = (name_expr(n) for n in ("kind", "classes", "i", "cls"))
+    return def_(Identifier(name))(
+        FnArg(Identifier("kind")), FnArg(Identifier("classes"))
+    ).block(
+        for_(Tuple(i, cls))
+        .in_(name_expr("enumerate").call(classes))
+        .block(if_(name_expr("issubclass").call(kind, cls)).block(Return(i))),
+        Return(name_expr("len").call(classes)),
+    )
+
+
+def _remaining(subject: Expression, cases: list[MatchCase]) -> list[Statement]:
+    """Match the cases following the lowered ones."""
+    if not cases:
+        return []
+    if len(cases) == 1 and cases[0].guard is None:
+        pattern = cases[0].pattern
+        if isinstance(pattern, Literal) and pattern.lit == "_":
+            return cases[0].body.body
+        if isinstance(pattern, IdentifierExpr):
+            return [pattern.assign(subject), *cases[0].body.body]
+    match = Match(subject)
+    match.cases = cases
+    return [match]
+
+
+def _tree(
+    index: IdentifierExpr, leaves: list[list[Statement]], lo: int, hi: int
+) -> list[Statement]:
+    """Reach the statements of the leaf at `index` with a binary search.
+
+    Args:
+        index: Name of the index of the leaf to run.
+        leaves: Statements of each leaf.
+        lo: First leaf of the searched range.
+        hi: End of the searched range.
+    """
+    if hi - lo == 1:
+        return leaves[lo]
+    mid = (lo + hi) // 2
+    left, right = _tree(index, leaves, lo, mid), _tree(index, leaves, mid, hi)
+    if not left and not right:
+        return []
+    branch = Branch()
+    if not left:
+        branch.tests = [(index >= Literal(str(mid)), Block(*right))]
+        return [branch]
+    branch.tests = [(index < Literal(str(mid)), Block(*left))]
+    if len(right) == 1 and isinstance(right[0], Branch) and right[0].tests:
+        # keep the tree flat with `elif` branches
+        branch.tests.extend(right[0].tests)
+        branch.fallback = right[0].fallback
+    elif right:
+        branch.fallback = Block(*right)
+    return [branch]
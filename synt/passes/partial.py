@@ -0,0 +1,381 @@
+r"""## Partial evaluation
+
+Specialize generated code for names whose values are known at generation time.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "PartialEvaluation",
+    "partial_eval",
+]
+
+
+import ast
+
+from copy import deepcopy
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import overload
+
+from synt.expr.binary_op import BinaryOp
+from synt.expr.binary_op import BinaryOpType
+from synt.expr.expr import ExprPrecedence
+from synt.expr.unary_op import UnaryOp
+from synt.expr.wrapped import Wrapped
+from synt.file import File
+from synt.passes.analysis import ScopeAnalysis
+from synt.passes.common import generator_marker
+from synt.passes.common import is_generator_marker
+from synt.passes.fold import ConstantFolding
+from synt.passes.manager import PassManager
+from synt.passes.manager import TransformerPass
+from synt.passes.unroll import LoopUnrolling
+from synt.stmt.block import Block
+from synt.stmt.expression import ExprStatement
+from synt.stmt.keyword import PASS
+from synt.stmt.stmt import Statement
+from synt.tokens.ident import IdentifierExpr
+from synt.tokens.lit import Literal
+from synt.visit import walk
+
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from synt.expr.attribute import Attribute
+    from synt.expr.closure import Closure
+    from synt.expr.comprehension import Comprehension
+    from synt.expr.expr import Expression
+    from synt.expr.expr import IntoExpression
+    from synt.passes.analysis import Scope
+    from synt.passes.manager import AnalysisManager
+    from synt.stmt.branch import Branch
+    from synt.stmt.cls import ClassDef
+    from synt.stmt.fn import FunctionDef
+    from synt.stmt.match_case import Match
+    from synt.stmt.match_case import MatchCase
+    from synt.visit import Node
+
+
+_SCALARS = (bool, int, float, complex, str, bytes, type(None))
+_MISSING: Any = object()
+
+
+class PartialEvaluation(TransformerPass):
+    r"""Substitute names with known values, and prune the branches they decide.
+
+    Reads of the names of `env` are replaced with their values wherever they refer
+    to a global or builtin that the file never binds, e.g. configuration or feature flags
+    the generated code would otherwise look up at runtime.
+    Names bound by the file, including through `global` declarations, are kept,
+    as are names in `match` patterns.
+
+    The pass then prunes the statements whose outcome is known:
+
+    - `if` and `elif` arms whose test is a false literal are removed, and arms
+      following a true literal test are replaced with it;
+    - `match` statements over a literal drop the cases whose literal patterns
+      don't match it, and are replaced with the body of the first case
+      known to match, like `case _:` or an equal literal, if it has no guard.
+
+    Blocks left empty get a `pass`, and pruned code containing a `yield` leaves
+    an `if False: yield` in its place, so that generators stay generators.
+    Folding the tests into literals is left to
+    [`ConstantFolding`][synt.passes.fold.ConstantFolding]:
+    [`partial_eval`][synt.passes.partial.partial_eval] runs both passes,
+    with [`LoopUnrolling`][synt.passes.unroll.LoopUnrolling], until the code is stable.
+
+    Examples:
+        ```python
+        from synt.passes import PassManager
+        from synt.passes.partial import PartialEvaluation
+        flag, x = id_("flag"), id_("x")
+        file = File(
+            def_(id_("f"))(arg(x)).block(
+                if_(flag).block(return_(x)).else_(return_(-x.expr())),
+            ),
+        )
+        PassManager(PartialEvaluation({"flag": TRUE})).run(file)
+        assert file.into_str() == "def f(x):\n    return x"
+        ```
+    """
+
+    requires = (ScopeAnalysis,)
+
+    env: dict[str, Expression]
+    """Values of the known names."""
+
+    __file: File | None
+    __scopes: list[Scope]
+    __rebound: set[str]
+    """Known names assigned through `global` declarations."""
+    __patterns: set[int]
+    """Identifiers in `match` patterns, by identity."""
+
+    def __init__(self, env: Mapping[str, IntoExpression]):
+        """Initialize the pass.
+
+        Args:
+            env: Values of the known names.
+        """
+        self.env = {name: value.into_expression() for name, value in env.items()}
+        self.__file = None
+        self.__scopes = []
+        self.__rebound = set()
+        self.__patterns = set()
+
+    def run(self, file: File, analyses: AnalysisManager) -> int:
+        module = analyses.get(ScopeAnalysis).module
+        self.__file = file
+        self.__scopes = [module]
+        self.__rebound = {
+            name
+            for scope in module.walk()
+            for name in scope.globals
+            if name in self.env and scope.stores[name]
+        }
+        try:
+            return super().run(file, analyses)
+        finally:
+            self.__file = None
+            self.__scopes.clear()
+            self.__rebound.clear()
+            self.__patterns.clear()
+
+    def visit_FunctionDef(self, node: FunctionDef) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_FunctionDef(self, node: FunctionDef) -> FunctionDef:
+        self.__scopes.pop()
+        return node
+
+    def visit_ClassDef(self, node: ClassDef) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_ClassDef(self, node: ClassDef) -> ClassDef:
+        self.__scopes.pop()
+        return node
+
+    def visit_Closure(self, node: Closure) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_Closure(self, node: Closure) -> Expression:
+        self.__scopes.pop()
+        return node
+
+    def visit_Comprehension(self, node: Comprehension) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_Comprehension(self, node: Comprehension) -> Comprehension:
+        self.__scopes.pop()
+        return node
+
+    def visit_MatchCase(self, node: MatchCase) -> None:
+        self.__patterns.update(map(id, walk(node.pattern)))
+
+    def leave_IdentifierExpr(self, node: IdentifierExpr) -> Expression:
+        name = node.ident.raw
+        value = self.env.get(name)
+        if (
+            value is None
+            or name in self.__rebound
+            or id(node) in self.__patterns
+            or self.__scopes[-1].resolve(name) is not None
+        ):
+            return node
+        value = deepcopy(value)
+        if _precedence(value) != ExprPrecedence.Atom:
+            return value.wrapped()
+        return value
+
+    def leave_Attribute(self, node: Attribute) -> Expression:
+        target = node.target
+        if isinstance(target, Literal) and target.lit[:1].isdigit():
+            # `1.real` would read as a float
+            node.target = target.wrapped()
+        return node
+
+    def leave_Branch(self, node: Branch) -> Statement | list[Statement] | None:
+        if is_generator_marker(node):
+            return node
+        tests: list[tuple[Expression, Block]] = []
+        dropped: list[Node] = []
+        fallback = node.fallback
+        for i, (test, block) in enumerate(node.tests):
+            value = _constant(test)
+            if value is _MISSING:
+                tests.append((test, block))
+            elif value:
+                fallback = block
+                dropped.extend(x for arm in node.tests[i + 1 :] for x in arm)
+                if node.fallback is not None:
+                    dropped.append(node.fallback)
+                break
+            else:
+                dropped.append(block)
+        marker = generator_marker(dropped)
+        if not tests:
+            return [*([] if fallback is None else fallback.body), *marker] or None
+        if len(tests) != len(node.tests) or fallback is not node.fallback:
+            node.tests = tests
+            node.fallback = fallback
+            self.changes += 1
+        return [node, *marker] if marker else node
+
+    def leave_Match(self, node: Match) -> Statement | list[Statement] | None:
+        subject = _constant(node.subject)
+        if subject is _MISSING:
+            return node
+        cases: list[MatchCase] = []
+        for case in node.cases:
+            matches = _matches(case.pattern, subject)
+            if matches is False:
+                continue
+            if matches and case.guard is None:
+                if not cases:
+                    dropped = [c for c in node.cases if c is not case]
+                    return [*case.body.body, *generator_marker(dropped)]
+                # the following cases are never reached
+                cases.append(case)
+                break
+            cases.append(case)
+        kept = set(map(id, cases))
+        marker = generator_marker([c for c in node.cases if id(c) not in kept])
+        if not cases:
+            return marker or None
+        if len(cases) != len(node.cases):
+            node.cases = cases
+            self.changes += 1
+        return [node, *marker] if marker else node
+
+    def leave_Block(self, node: Block) -> Block:
+        if not node.body and (self.__file is None or node is not self.__file.body):
+            node.body = [PASS]
+        return node
+
+
+@overload
+def partial_eval(
+    node: File, env: Mapping[str, IntoExpression], *, max_unroll: int = 8
+) -> File: ...
+
+
+@overload
+def partial_eval(
+    node: Expression, env: Mapping[str, IntoExpression], *, max_unroll: int = 8
+) -> Expression: ...
+
+
+@overload
+def partial_eval(
+    node: Statement, env: Mapping[str, IntoExpression], *, max_unroll: int = 8
+) -> Statement: ...
+
+
+def partial_eval(
+    node: File | Expression | Statement,
+    env: Mapping[str, IntoExpression],
+    *,
+    max_unroll: int = 8,
+) -> File | Expression | Statement:
+    r"""Specialize code for names whose values are known at generation time.
+
+    Known names are substituted with their values, then operations on literals
+    are folded, `if` and `match` arms that can't run are pruned, and loops over
+    sequences of at most `max_unroll` literals are unrolled, until the code is stable.
+
+    Files are rewritten in place.
+    Statements and expressions are rewritten in place too when possible,
+    but the result should be used instead of the original node:
+    a statement may be replaced with several others, returned in a
+    [`Block`][synt.stmt.block.Block], or with `pass` if none is left.
+
+    Args:
+        node: The file, statement or expression to specialize.
+        env: Values of the known names.
+        max_unroll: Maximum number of items of unrolled sequences.
+
+    Returns:
+        The specialized node.
+
+    Examples:
+        ```python
+        from synt import partial_eval
+        flag, width, x = id_("flag"), id_("width"), id_("x")
+        fn = def_(id_("pad"))(arg(x)).block(
+            if_(flag.expr().not_()).block(return_(x)),
+            return_(x.expr().attr("ljust").call(width.expr() * litint(2))),
+        )
+        fn = partial_eval(fn, env={"flag": TRUE, "width": litint(8)})
+        assert fn.into_code() == "def pad(x):\n    return x.ljust(16)"
+        ```
+
+    References:
+        [`PartialEvaluation`][synt.passes.partial.PartialEvaluation],
+        [`ConstantFolding`][synt.passes.fold.ConstantFolding],
+        [`LoopUnrolling`][synt.passes.unroll.LoopUnrolling].
+    """
+    if isinstance(node, File):
+        file = node
+    elif isinstance(node, Statement):
+        file = File(node)
+    else:
+        file = File(ExprStatement(node))
+    PassManager(
+        PartialEvaluation(env),
+        ConstantFolding(),
+        LoopUnrolling(max_length=max_unroll),
+    ).run(file)
+
+    body = file.body.body
+    if isinstance(node, File):
+        return file
+    if isinstance(node, Statement):
+        if len(body) == 1:
+            return body[0]
+        return Block(*body) if body else PASS
+    statement = body[0]
+    return statement.expr if isinstance(statement, ExprStatement) else node
+
+
+def _precedence(e: Expression) -> ExprPrecedence:
+    """Get the precedence of an expression, where negative number literals are unary operations."""
+    if isinstance(e, Literal) and e.lit.startswith("-"):
+        return ExprPrecedence.Unary
+    return e.precedence
+
+
+def _constant(e: Expression) -> Any:
+    """Get the value of a literal, `_MISSING` if it is not a constant."""
+    while isinstance(e, Wrapped):
+        e = e.inner
+    if not isinstance(e, Literal | UnaryOp):
+        return _MISSING
+    try:
+        value = ast.literal_eval(e.into_code())
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return _MISSING
+    return value if isinstance(value, _SCALARS) else _MISSING
+
+
+def _matches(pattern: Expression, subject: Any) -> bool | None:
+    """Whether a pattern matches a constant subject, `None` if unknown."""
+    if isinstance(pattern, Literal | IdentifierExpr) and pattern.into_code() == "_":
+        return True
+    if isinstance(pattern, BinaryOp) and pattern.op_type is BinaryOpType.BitOr:
+        left = _matches(pattern.left, subject)
+        right = _matches(pattern.right, subject)
+        if left or right:
+            return True
+        if left is None or right is None:
+            return None
+        return False
+    value = _constant(pattern)
+    if value is _MISSING:
+        return None
+    if value is None or isinstance(value, bool):
+        # singletons are compared by identity
+        return subject is value
+    return bool(subject == value)
@@ -0,0 +1,503 @@
+r"""## Peephole rewrites
+
+Replace operations with cheaper equivalents, given the types known from annotations.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "PeepholeRewrite",
+]
+
+
+import ast
+
+from collections import Counter
+from functools import lru_cache
+from typing import TYPE_CHECKING
+from typing import Any
+
+from synt.expr.binary_op import BinaryOp
+from synt.expr.binary_op import BinaryOpType
+from synt.expr.call import Call
+from synt.expr.expr import ExprPrecedence
+from synt.expr.list import ListVerbatim
+from synt.expr.set import SetVerbatim
+from synt.expr.subscript import Subscript
+from synt.expr.tuple import Tuple
+from synt.expr.unary_op import UnaryOp
+from synt.expr.unary_op import UnaryOpType
+from synt.expr.wrapped import Wrapped
+from synt.passes.analysis import ScopeAnalysis
+from synt.passes.manager import TransformerPass
+from synt.tokens.ident import Identifier
+from synt.tokens.ident import IdentifierExpr
+from synt.tokens.lit import Literal
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from synt.expr.attribute import Attribute
+    from synt.expr.closure import Closure
+    from synt.expr.comprehension import Comprehension
+    from synt.expr.comprehension import ComprehensionNode
+    from synt.expr.condition import Condition
+    from synt.expr.expr import Expression
+    from synt.file import File
+    from synt.passes.analysis import Scope
+    from synt.passes.manager import AnalysisManager
+    from synt.stmt.assertion import Assert
+    from synt.stmt.branch import Branch
+    from synt.stmt.cls import ClassDef
+    from synt.stmt.fn import FunctionDef
+    from synt.stmt.loop import WhileLoop
+
+
+_RULES = ("square", "negated_compare", "bool_compare", "membership", "empty_len")
+"""Names of the rewrite rules, in the order they are documented."""
+
+_MISSING: Any = object()
+
+_SCALARS = (bool, int, float, complex, str, bytes, type(None))
+_INTEGERS = frozenset({"int", "bool"})
+_EQUALITY = frozenset({"bool", "int", "float", "complex", "str", "bytes", "NoneType"})
+"""Types whose `!=` is the negation of their `==`."""
+_HASHABLE = _EQUALITY | {"frozenset", "range"}
+_SIZED = frozenset(
+    {"str", "bytes", "bytearray", "list", "tuple", "dict", "set", "frozenset", "range"}
+)
+"""Types whose truth value is whether their length is non-zero."""
+_ANNOTATIONS = _HASHABLE | _SIZED
+_RESULTS = {
+    "bool": "bool",
+    "callable": "bool",
+    "hasattr": "bool",
+    "isinstance": "bool",
+    "issubclass": "bool",
+    "len": "int",
+    "ascii": "str",
+    "repr": "str",
+    "str": "str",
+}
+"""Types of the results of builtin calls."""
+_NEGATED = {
+    BinaryOpType.Equal: BinaryOpType.NotEqual,
+    BinaryOpType.NotEqual: BinaryOpType.Equal,
+    BinaryOpType.In: BinaryOpType.NotIn,
+    BinaryOpType.NotIn: BinaryOpType.In,
+    BinaryOpType.Is: BinaryOpType.IsNot,
+    BinaryOpType.IsNot: BinaryOpType.Is,
+}
+_BOOL_COMPARE = {
+    # (operator, constant) -> whether the result is the other operand itself
+    (BinaryOpType.Equal, "True"): True,
+    (BinaryOpType.Is, "True"): True,
+    (BinaryOpType.NotEqual, "False"): True,
+    (BinaryOpType.IsNot, "False"): True,
+    (BinaryOpType.Equal, "False"): False,
+    (BinaryOpType.Is, "False"): False,
+    (BinaryOpType.NotEqual, "True"): False,
+    (BinaryOpType.IsNot, "True"): False,
+}
+_EMPTY_LEN = {
+    # (operator, whether `len` is the left operand) -> whether the test is emptiness
+    (BinaryOpType.Equal, True): True,
+    (BinaryOpType.Equal, False): True,
+    (BinaryOpType.NotEqual, True): False,
+    (BinaryOpType.NotEqual, False): False,
+    (BinaryOpType.Greater, True): False,
+    (BinaryOpType.Less, False): False,
+}
+
+
+@lru_cache(maxsize=4096)
+def _literal_value(lit: str) -> Any:
+    """Evaluate a literal's source text, `_MISSING` if it is not a scalar constant."""
+    try:
+        value = ast.literal_eval(lit)
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return _MISSING
+    return value if isinstance(value, _SCALARS) else _MISSING
+
+
+class PeepholeRewrite(TransformerPass):
+    r"""Replace operations with cheaper equivalents.
+
+    Each rule can be enabled on its own, and counts its rewrites in `counts`:
+
+    | Rule              | Expression     | Result        |
+    | ----------------- | -------------- | ------------- |
+    | `square`          | `x ** 2`       | `x * x`       |
+    | `negated_compare` | `not a == b`   | `a != b`      |
+    | `bool_compare`    | `x == True`    | `x`           |
+    | `bool_compare`    | `x is False`   | `not x`       |
+    | `membership`      | `x in [1, 2]`  | `x in {1, 2}` |
+    | `empty_len`       | `len(x) == 0`  | `not x`       |
+
+    Rewrites are only applied when the types of the operands make them equivalent.
+    Types are known for literals, for results of `not`, `in`, `is` and some builtins
+    like `isinstance` or `len`, and for function parameters annotated with builtin
+    types, like `x: int` or `xs: list[str]`, which the function never reassigns.
+    Annotations are trusted: a parameter annotated `int` is assumed to be an `int`.
+
+    - `square` applies to integer names, as `**` of floats raises on overflow
+      where `*` gives infinity.
+    - `negated_compare` applies to `in`, `is` and their negations,
+      and to `==` and `!=` between numbers, strings, bytes and `None`,
+      where `!=` is the negation of `==`.
+    - `bool_compare` applies when the other operand is a `bool`.
+    - `membership` turns lists of hashable literals into sets, which CPython builds
+      once as a `frozenset` constant and searches in constant time,
+      when the searched value is hashable; other lists become tuples.
+    - `empty_len` applies to names of sized builtin types, like lists or strings.
+      Length comparisons with zero that are true for non-empty values,
+      like `len(x) > 0`, become `x` in tests only, as the result isn't a `bool`.
+
+    Operations which are part of a comparison chain, like `a < b == True`, are kept.
+
+    Examples:
+        ```python
+        from synt.passes import PassManager
+        from synt.passes.peephole import PeepholeRewrite
+        n, xs = id_("n"), id_("xs")
+        file = File(
+            def_(id_("f"))(arg(n, id_("int")), arg(xs, id_("list"))).block(
+                if_(id_("len").expr().call(xs).eq(litint(0))).block(
+                    return_(n.expr().pow(litint(2)))
+                ),
+                return_(n.expr().in_(list_(litint(1), litint(2)))),
+            )
+        )
+        peephole = PeepholeRewrite()
+        PassManager(peephole).run(file)
+        assert file.into_str() == (
+            "def f(n: int, xs: list):\n"
+            "    if not xs:\n"
+            "        return n * n\n"
+            "    return n in {1, 2}"
+        )
+        assert peephole.counts == {"square": 1, "membership": 1, "empty_len": 1}
+        ```
+    """
+
+    requires = (ScopeAnalysis,)
+
+    rules: frozenset[str]
+    """Names of the enabled rules."""
+    counts: Counter[str]
+    """Number of rewrites of each rule since the pass was created."""
+
+    __scopes: list[Scope]
+    __types: dict[int, dict[str, str]]
+    """Known types of the parameters of each function scope, by scope identity."""
+    __grouped: set[int]
+    """Comparisons grouped with their parent or child in a chain, and `**` grouped to the right."""
+    __tests: set[int]
+    """Expressions only used for their truth value."""
+    __loose: set[int]
+    """Replacements binding looser than the replaced expressions."""
+
+    def __init__(self, rules: Iterable[str] | None = None):
+        """Initialize the pass.
+
+        Args:
+            rules: Names of the enabled rules, all of them by default.
+
+        Raises:
+            ValueError: If a rule name is unknown.
+        """
+        self.rules = frozenset(_RULES if rules is None else rules)
+        for name in sorted(self.rules - set(_RULES)):
+            raise ValueError(f"Unknown peephole rule: {name!r}.")
+        self.counts = Counter()
+        self.__scopes = []
+        self.__types = {}
+        self.__grouped = set()
+        self.__tests = set()
+        self.__loose = set()
+
+    def run(self, file: File, analyses: AnalysisManager) -> int:
+        self.__scopes = [analyses.get(ScopeAnalysis).module]
+        try:
+            return super().run(file, analyses)
+        finally:
+            self.__scopes.clear()
+            self.__types.clear()
+            self.__grouped.clear()
+            self.__tests.clear()
+            self.__loose.clear()
+
+    def visit_FunctionDef(self, node: FunctionDef) -> None:
+        scope = self.analyses.get(ScopeAnalysis).scope(node)
+        outer = self.__scopes[-1]
+        types = self.__types[id(scope)] = {}
+        for a in node.args:
+            name = a.name.raw
+            if a.annotation is None or a.is_vararg or a.is_kwarg or scope.stores[name]:
+                continue
+            if any(name in s.nonlocals for s in scope.walk()):
+                continue
+            annotation = _unwrap(a.annotation)
+            if isinstance(annotation, Subscript):
+                annotation = annotation.target
+            if (
+                isinstance(annotation, IdentifierExpr)
+                and annotation.ident.raw in _ANNOTATIONS
+                and outer.resolve(annotation.ident.raw) is None
+            ):
+                types[name] = annotation.ident.raw
+        self.__scopes.append(scope)
+
+    def leave_FunctionDef(self, node: FunctionDef) -> FunctionDef:
+        self.__scopes.pop()
+        return node
+
+    def visit_ClassDef(self, node: ClassDef) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_ClassDef(self, node: ClassDef) -> ClassDef:
+        self.__scopes.pop()
+        return node
+
+    def visit_Closure(self, node: Closure) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_Closure(self, node: Closure) -> Expression:
+        self.__scopes.pop()
+        return node
+
+    def visit_Comprehension(self, node: Comprehension) -> None:
+        # the outermost iterable belongs to the enclosing scope,
+        # but names it shares with the comprehension are only treated as unknown
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_Comprehension(self, node: Comprehension) -> Comprehension:
+        self.__scopes.pop()
+        return node
+
+    def visit_Branch(self, node: Branch) -> None:
+        self.__tests.update(id(_unwrap(test)) for test, _ in node.tests)
+
+    def visit_WhileLoop(self, node: WhileLoop) -> None:
+        self.__tests.add(id(_unwrap(node.test)))
+
+    def visit_Assert(self, node: Assert) -> None:
+        self.__tests.add(id(_unwrap(node.test)))
+
+    def visit_Condition(self, node: Condition) -> None:
+        self.__tests.add(id(_unwrap(node.condition)))
+
+    def visit_ComprehensionNode(self, node: ComprehensionNode) -> None:
+        self.__tests.update(id(_unwrap(cond)) for cond in node.ifs)
+
+    def visit_UnaryOp(self, node: UnaryOp) -> None:
+        if node.op_type is UnaryOpType.BoolNot:
+            self.__tests.add(id(_unwrap(node.expression)))
+
+    def visit_BinaryOp(self, node: BinaryOp) -> None:
+        op = node.op_type
+        if (
+            op in (BinaryOpType.BoolAnd, BinaryOpType.BoolOr)
+            and id(node) in self.__tests
+        ):
+            self.__tests.add(id(_unwrap(node.left)))
+            self.__tests.add(id(_unwrap(node.right)))
+        elif node.precedence == ExprPrecedence.Comparative:
+            for side in (node.left, node.right):
+                if side.precedence == ExprPrecedence.Comparative:
+                    # renders as a chain, like `a < b == c`
+                    self.__grouped.add(id(side))
+                    self.__grouped.add(id(node))
+        elif op is BinaryOpType.Pow and isinstance(node.left, BinaryOp):
+            if node.left.op_type is BinaryOpType.Pow:
+                # `BinaryOp(Pow, BinaryOp(Pow, x, 2), y)` renders as `x ** 2 ** y`
+                self.__grouped.add(id(node.left))
+
+    def leave_BinaryOp(self, node: BinaryOp) -> Expression:
+        self.__fix_operand(node, "left")
+        self.__fix_operand(node, "right")
+        if id(node) in self.__grouped:
+            return node
+        op = node.op_type
+        if op is BinaryOpType.Pow:
+            return self.__square(node)
+        if op in (BinaryOpType.In, BinaryOpType.NotIn):
+            return self.__membership(node)
+        if node.precedence == ExprPrecedence.Comparative:
+            result = self.__bool_compare(node)
+            return self.__empty_len(node) if result is node else result
+        return node
+
+    def leave_UnaryOp(self, node: UnaryOp) -> Expression:
+        self.__fix_operand(node, "expression")
+        if node.op_type is UnaryOpType.BoolNot:
+            return self.__negated_compare(node)
+        return node
+
+    def leave_Attribute(self, node: Attribute) -> Expression:
+        self.__fix_operand(node, "target")
+        return node
+
+    def leave_Call(self, node: Call) -> Expression:
+        self.__fix_operand(node, "target")
+        return node
+
+    def leave_Subscript(self, node: Subscript) -> Expression:
+        self.__fix_operand(node, "target")
+        return node
+
+    def __fix_operand(self, node: Expression, field: str) -> None:
+        """Parenthesize an operand replaced by a looser expression."""
+        child = getattr(node, field)
+        if id(child) in self.__loose and child.precedence >= node.precedence:
+            setattr(node, field, child.wrapped())
+
+    def __rewrite(self, rule: str, node: Expression, result: Expression) -> Expression:
+        """Count a rewrite, and mark the result if it may need parentheses."""
+        self.counts[rule] += 1
+        if result.precedence > node.precedence:
+            self.__loose.add(id(result))
+        return result
+
+    def __square(self, node: BinaryOp) -> Expression:
+        """`x ** 2` -> `x * x`."""
+        base = node.left
+        if (
+            "square" not in self.rules
+            or not isinstance(base, IdentifierExpr)
+            or not _is_literal(node.right, "2")
+            or self.__type(base) not in _INTEGERS
+        ):
+            return node
+        copy = IdentifierExpr(Identifier(base.ident.raw))
+        return self.__rewrite("square", node, BinaryOp(BinaryOpType.Mul, base, copy))
+
+    def __negated_compare(self, node: UnaryOp) -> Expression:
+        """`not a == b` -> `a != b`."""
+        inner = _unwrap(node.expression)
+        if (
+            "negated_compare" not in self.rules
+            or not isinstance(inner, BinaryOp)
+            or inner.op_type not in _NEGATED
+            or id(inner) in self.__grouped
+        ):
+            return node
+        if inner.op_type in (BinaryOpType.Equal, BinaryOpType.NotEqual) and not (
+            self.__type(inner.left) in _EQUALITY
+            and self.__type(inner.right) in _EQUALITY
+        ):
+            return node
+        result = BinaryOp(_NEGATED[inner.op_type], inner.left, inner.right)
+        return self.__rewrite("negated_compare", node, result)
+
+    def __bool_compare(self, node: BinaryOp) -> Expression:
+        """`x == True` -> `x`, `x == False` -> `not x`."""
+        if "bool_compare" not in self.rules:
+            return node
+        for constant, other in ((node.right, node.left), (node.left, node.right)):
+            if not isinstance(constant, Literal):
+                continue
+            same = _BOOL_COMPARE.get((node.op_type, constant.lit))
+            if same is None or self.__type(other) != "bool":
+                continue
+            result = other if same else UnaryOp(UnaryOpType.BoolNot, other)
+            return self.__rewrite("bool_compare", node, result)
+        return node
+
+    def __membership(self, node: BinaryOp) -> Expression:
+        """`x in [1, 2]` -> `x in {1, 2}`, `x in [a, b]` -> `x in (a, b)`."""
+        items = node.right
+        if "membership" not in self.rules or not isinstance(items, ListVerbatim):
+            return node
+        if (
+            items.items
+            and self.__type(node.left) in _HASHABLE
+            and all(self.__type(item) in _HASHABLE for item in items.items)
+            and all(isinstance(item, Literal) for item in items.items)
+        ):
+            node.right = SetVerbatim(*items.items)
+        else:
+            node.right = Tuple(*items.items)
+        self.counts["membership"] += 1
+        self.changes += 1
+        return node
+
+    def __empty_len(self, node: BinaryOp) -> Expression:
+        """`len(x) == 0` -> `not x`, `len(x) > 0` -> `x` in tests."""
+        if "empty_len" not in self.rules:
+            return node
+        for call, zero, left in (
+            (node.left, node.right, True),
+            (node.right, node.left, False),
+        ):
+            empty = _EMPTY_LEN.get((node.op_type, left))
+            if empty is None or not _is_literal(zero, "0"):
+                continue
+            value = self.__sized(call)
+            if value is None or not (empty or id(node) in self.__tests):
+                continue
+            result = UnaryOp(UnaryOpType.BoolNot, value) if empty else value
+            return self.__rewrite("empty_len", node, result)
+        return node
+
+    def __sized(self, e: Expression) -> Expression | None:
+        """Get the argument of a `len` call of a sized builtin value, `None` if it isn't one."""
+        if (
+            isinstance(e, Call)
+            and self.__builtin(e.target) == "len"
+            and len(e.args) == 1
+            and not e.keywords
+            and self.__type(e.args[0]) in _SIZED
+        ):
+            return e.args[0]
+        return None
+
+    def __builtin(self, e: Expression) -> str | None:
+        """Get the name of the builtin an expression reads, `None` if it isn't one."""
+        if (
+            isinstance(e, IdentifierExpr)
+            and self.__scopes[-1].resolve(e.ident.raw) is None
+        ):
+            return e.ident.raw
+        return None
+
+    def __type(self, e: Expression) -> str | None:
+        """Get the name of the exact builtin type of an expression, `None` if it is unknown."""
+        e = _unwrap(e)
+        if isinstance(e, Literal):
+            value = _literal_value(e.lit)
+            return None if value is _MISSING else type(value).__name__
+        if isinstance(e, IdentifierExpr):
+            owner = self.__scopes[-1].resolve(e.ident.raw)
+            if owner is None:
+                return None
+            return self.__types.get(id(owner), {}).get(e.ident.raw)
+        if isinstance(e, UnaryOp) and e.op_type is UnaryOpType.BoolNot:
+            return "bool"
+        if (
+            isinstance(e, BinaryOp)
+            and e.op_type in _NEGATED
+            and e.op_type
+            not in (
+                BinaryOpType.Equal,
+                BinaryOpType.NotEqual,
+            )
+        ):
+            return "bool"
+        if isinstance(e, Call):
+            name = self.__builtin(e.target)
+            if name is not None:
+                return _RESULTS.get(name)
+        return None
+
+
+def _unwrap(e: Expression) -> Expression:
+    while isinstance(e, Wrapped):
+        e = e.inner
+    return e
+
+
+def _is_literal(e: Expression, lit: str) -> bool:
+    return isinstance(e, Literal) and e.lit == lit
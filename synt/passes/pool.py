@@ -0,0 +1,300 @@
+r"""## Constant pooling
+
+Define repeated literal containers once, as module-level constants.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "ConstantPooling",
+]
+
+
+from functools import partial
+from typing import TYPE_CHECKING
+
+from synt.expr.attribute import Attribute
+from synt.expr.binary_op import BinaryOp
+from synt.expr.binary_op import BinaryOpType
+from synt.expr.call import Call
+from synt.expr.dict import DictVerbatim
+from synt.expr.list import ListVerbatim
+from synt.expr.set import SetVerbatim
+from synt.expr.subscript import Slice
+from synt.expr.tuple import Tuple
+from synt.expr.unary_op import UnaryOp
+from synt.expr.unary_op import UnaryOpType
+from synt.passes.analysis import ScopeAnalysis
+from synt.passes.common import fresh_name
+from synt.passes.common import is_docstring
+from synt.passes.common import name_expr
+from synt.passes.common import used_names
+from synt.passes.manager import TransformerPass
+from synt.stmt.importing import ImportFrom
+from synt.tokens.ident import IdentifierExpr
+from synt.tokens.kv_pair import KVPair
+from synt.tokens.lit import Literal
+from synt.visit import walk
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from synt.expr.closure import Closure
+    from synt.expr.comprehension import Comprehension
+    from synt.expr.comprehension import ComprehensionNode
+    from synt.expr.expr import Expression
+    from synt.expr.subscript import Subscript
+    from synt.file import File
+    from synt.passes.analysis import Scope
+    from synt.passes.manager import AnalysisManager
+    from synt.stmt.assign import Assignment
+    from synt.stmt.cls import ClassDef
+    from synt.stmt.delete import Delete
+    from synt.stmt.fn import FunctionDef
+    from synt.stmt.loop import ForLoop
+    from synt.stmt.stmt import Statement
+
+
+_READERS = frozenset(
+    {
+        "all",
+        "any",
+        "dict",
+        "enumerate",
+        "filter",
+        "frozenset",
+        "iter",
+        "len",
+        "list",
+        "map",
+        "max",
+        "min",
+        "reversed",
+        "set",
+        "sorted",
+        "sum",
+        "tuple",
+        "zip",
+    }
+)
+"""Builtins reading their positional arguments only by iterating over them."""
+
+_METHODS: dict[type, frozenset[str]] = {
+    DictVerbatim: frozenset({"copy", "get", "items", "keys", "values"}),
+    ListVerbatim: frozenset({"count", "index"}),
+    SetVerbatim: frozenset({"isdisjoint", "issubset", "issuperset"}),
+    Tuple: frozenset({"count", "index"}),
+}
+"""Methods returning the same result on the converted constant."""
+
+
+class ConstantPooling(TransformerPass):
+    r"""Replace repeated literal containers with module-level constants.
+
+    Lists, tuples, sets and dicts of literals, e.g. field names or configuration
+    maps, are rebuilt each time they are evaluated, except when the compiler folds
+    them into constants. Containers with at least `min_size` nodes occurring at least
+    `min_uses` times are defined once in a `prefix_n` module-level constant,
+    right after the module docstring and `__future__` imports, and read from there.
+    Lists become tuples and sets become frozensets.
+
+    As the constant is shared, only uses reading the container without keeping
+    or mutating it, and giving the same result after the conversion, are pooled:
+
+    - iterating over it, in `for` loops, comprehensions and `*` or `**` unpacking;
+    - membership tests with `in` and `not in`;
+    - reading an item, but not a slice;
+    - passing it to builtins only iterating over it, like `len`, `sorted` or `set`;
+    - calling methods reading it, like `dict.get` or `list.index`.
+
+    Containers with nested mutable containers are kept.
+
+    Examples:
+        ```python
+        from synt.passes import PassManager
+        from synt.passes.pool import ConstantPooling
+        k = id_("k")
+        names = list_(*(litstr(c) for c in "abcdefgh"))
+        file = File(
+            def_(id_("known"))(arg(k)).block(return_(k.expr().in_(names))),
+            def_(id_("count"))().block(return_(id_("len").expr().call(names))),
+        )
+        PassManager(ConstantPooling(min_size=8)).run(file)
+        assert file.into_str() == (
+            "_CONST_0 = ('a', 'b', 'c', 'd', 'e', 'f', 'g', 'h')\n"
+            "def known(k):\n"
+            "    return k in _CONST_0\n"
+            "def count():\n"
+            "    return len(_CONST_0)"
+        )
+        ```
+    """
+
+    requires = (ScopeAnalysis,)
+
+    min_size: int
+    """Minimum number of nodes of a pooled container."""
+    min_uses: int
+    """Minimum number of uses of a pooled container."""
+    prefix: str
+    """Prefix of the names of the constants."""
+
+    __scopes: list[Scope]
+    __stores: set[int]
+    """Targets of assignments and deletions."""
+    __uses: dict[str, tuple[Expression, list[Callable[[Expression], None]]]]
+    """Converted value of each candidate container, and setters of its uses."""
+
+    def __init__(self, min_size: int = 16, min_uses: int = 2, prefix: str = "_CONST"):
+        """Initialize the pass.
+
+        Args:
+            min_size: Minimum number of nodes of a pooled container.
+            min_uses: Minimum number of uses of a pooled container.
+            prefix: Prefix of the names of the constants,
+                followed by an underscore and a number.
+        """
+        self.min_size = min_size
+        self.min_uses = min_uses
+        self.prefix = prefix
+        self.__scopes = []
+        self.__stores = set()
+        self.__uses = {}
+
+    def run(self, file: File, analyses: AnalysisManager) -> int:
+        module = analyses.get(ScopeAnalysis).module
+        self.__scopes = [module]
+        try:
+            super().run(file, analyses)
+            names = used_names(file)
+            constants: list[Statement] = []
+            changes = 0
+            for value, setters in self.__uses.values():
+                if len(setters) < self.min_uses:
+                    continue
+                if isinstance(value, Call) and module.resolve("frozenset") is not None:
+                    continue
+                name = fresh_name(names, f"{self.prefix}_", numbered=True)
+                constants.append(name_expr(name).assign(value))
+                for setter in setters:
+                    setter(name_expr(name))
+                changes += len(setters)
+            body = file.body.body
+            start = 1 if body and is_docstring(body[0]) else 0
+            while start < len(body) and _is_future(body[start]):
+                start += 1
+            body[start:start] = constants
+            return changes
+        finally:
+            self.__scopes.clear()
+            self.__stores.clear()
+            self.__uses.clear()
+
+    def visit_FunctionDef(self, node: FunctionDef) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_FunctionDef(self, node: FunctionDef) -> FunctionDef:
+        self.__scopes.pop()
+        return node
+
+    def visit_ClassDef(self, node: ClassDef) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_ClassDef(self, node: ClassDef) -> ClassDef:
+        self.__scopes.pop()
+        return node
+
+    def visit_Closure(self, node: Closure) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_Closure(self, node: Closure) -> Expression:
+        self.__scopes.pop()
+        return node
+
+    def visit_Comprehension(self, node: Comprehension) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_Comprehension(self, node: Comprehension) -> Comprehension:
+        self.__scopes.pop()
+        return node
+
+    def visit_Assignment(self, node: Assignment) -> None:
+        self.__stores.update(id(n) for n in walk(node.target))
+
+    def visit_Delete(self, node: Delete) -> None:
+        self.__stores.update(id(n) for n in walk(node.target))
+
+    def leave_ForLoop(self, node: ForLoop) -> ForLoop:
+        self.__use(node.iter, partial(setattr, node, "iter"))
+        return node
+
+    def leave_ComprehensionNode(self, node: ComprehensionNode) -> ComprehensionNode:
+        self.__use(node.iterator, partial(setattr, node, "iterator"))
+        return node
+
+    def leave_BinaryOp(self, node: BinaryOp) -> Expression:
+        if node.op_type in (BinaryOpType.In, BinaryOpType.NotIn):
+            self.__use(node.right, partial(setattr, node, "right"))
+        return node
+
+    def leave_UnaryOp(self, node: UnaryOp) -> Expression:
+        if node.op_type in (UnaryOpType.Starred, UnaryOpType.DoubleStarred):
+            self.__use(node.expression, partial(setattr, node, "expression"))
+        return node
+
+    def leave_Subscript(self, node: Subscript) -> Expression:
+        if (
+            id(node) not in self.__stores
+            and len(node.slices) == 1
+            and not isinstance(node.slices[0], Slice)
+        ):
+            self.__use(node.target, partial(setattr, node, "target"))
+        return node
+
+    def leave_Call(self, node: Call) -> Expression:
+        target = node.target
+        if isinstance(target, IdentifierExpr):
+            name = target.ident.raw
+            if name in _READERS and self.__scopes[-1].resolve(name) is None:
+                for i, a in enumerate(node.args):
+                    self.__use(a, partial(node.args.__setitem__, i))
+        elif isinstance(target, Attribute):
+            methods = _METHODS.get(type(target.target))
+            if methods is not None and target.attribute_name in methods:
+                self.__use(target.target, partial(setattr, target, "target"))
+        return node
+
+    def __use(self, e: Expression, setter: Callable[[Expression], None]) -> None:
+        """Record a use of a candidate container."""
+        if not isinstance(e, ListVerbatim | Tuple | SetVerbatim | DictVerbatim):
+            return
+        nodes = list(walk(e))
+        if len(nodes) < self.min_size or not all(map(_is_constant, nodes[1:])):
+            return
+        value = _convert(e)
+        key = value.into_code()
+        self.__uses.setdefault(key, (value, []))[1].append(setter)
+
+
+def _is_constant(node: object) -> bool:
+    """Whether a node inside a pooled container is immutable."""
+    if isinstance(node, UnaryOp):
+        return node.op_type in (UnaryOpType.Neg, UnaryOpType.Positive) and isinstance(
+            node.expression, Literal
+        )
+    return isinstance(node, Literal | Tuple | KVPair)
+
+
+def _convert(e: Expression) -> Expression:
+    """Convert a container into an immutable one."""
+    if isinstance(e, ListVerbatim):
+        return Tuple(*e.items)
+    if isinstance(e, SetVerbatim):
+        return name_expr("frozenset").call(e)
+    return e
+
+
+def _is_future(s: Statement) -> bool:
+    return isinstance(s, ImportFrom) and s.module.into_code() == "__future__"
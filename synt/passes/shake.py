@@ -0,0 +1,259 @@
+r"""## Tree shaking
+
+Remove the top-level definitions and imports a module's entry points don't use.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "TreeShaking",
+]
+
+
+import ast
+
+from typing import TYPE_CHECKING
+
+from synt.expr.list import ListVerbatim
+from synt.expr.modpath import ModPath
+from synt.expr.tuple import Tuple
+from synt.expr.unary_op import UnaryOp
+from synt.expr.unary_op import UnaryOpType
+from synt.expr.wrapped import Wrapped
+from synt.passes.analysis import PurityAnalysis
+from synt.passes.analysis import ScopeAnalysis
+from synt.passes.manager import Pass
+from synt.stmt.assign import Assignment
+from synt.stmt.cls import ClassDef
+from synt.stmt.fn import FunctionDef
+from synt.stmt.importing import Import
+from synt.stmt.importing import ImportFrom
+from synt.tokens.ident import Identifier
+from synt.tokens.ident import IdentifierExpr
+from synt.tokens.lit import Literal
+from synt.visit import walk
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from synt.expr.expr import Expression
+    from synt.file import File
+    from synt.passes.manager import AnalysisManager
+    from synt.stmt.importing import ImportType
+    from synt.stmt.stmt import Statement
+
+
+class TreeShaking(Pass):
+    r"""Remove top-level definitions and imports unreachable from entry points.
+
+    The module-level names read by each top-level statement are collected from
+    its whole subtree, including function bodies, decorators, defaults,
+    annotations and class bases. Starting from the entry points, the pinned names
+    and the statements which are kept anyway, the definitions of every reachable
+    name are kept, and the others are removed:
+
+    - function and class definitions;
+    - assignments to names of pure values, e.g. constants and lookup tables;
+    - names imported with `import` and `from ... import`.
+
+    Other top-level statements, like calls, branches or loops, may have effects
+    when the module is imported, and are kept with the names they read.
+    So are star and `__future__` imports, and dunder names like `__all__`
+    or `__getattr__`. The strings of a literal `__all__` naming removed
+    definitions are removed as well.
+
+    Names are matched textually: a local variable named like a top-level definition
+    keeps the definition. Names only reached dynamically, e.g. through `getattr`,
+    `globals()` or string annotations, and definitions whose decorators or imports
+    have side effects must be pinned.
+
+    Examples:
+        ```python
+        from synt.passes.manager import AnalysisManager
+        from synt.passes.shake import TreeShaking
+        x = id_("x")
+        file = File(
+            import_(id_("math")),
+            import_(id_("json")),
+            id_("SCALE").expr().assign(litint(3)),
+            def_(id_("scale"))(arg(x)).block(
+                return_(x.expr() * id_("SCALE") + id_("math").expr().attr("pi"))
+            ),
+            def_(id_("dump"))(arg(x)).block(
+                return_(id_("json").expr().attr("dumps").call(x))
+            ),
+            def_(id_("main"))().block(return_(id_("scale").expr().call(litint(2)))),
+        )
+        removed = TreeShaking(["main"]).run(file, AnalysisManager(file))
+        assert removed == 2
+        assert file.into_str() == (
+            "import math\n"
+            "SCALE = 3\n"
+            "def scale(x):\n"
+            "    return x * SCALE + math.pi\n"
+            "def main():\n"
+            "    return scale(2)"
+        )
+        ```
+    """
+
+    requires = (ScopeAnalysis, PurityAnalysis)
+
+    entry_points: set[str]
+    """Names of the definitions used from outside the module."""
+    pinned: set[str]
+    """Names kept whether they are reachable or not."""
+
+    def __init__(self, entry_points: Iterable[str], pinned: Iterable[str] = ()):
+        """Initialize the pass.
+
+        Args:
+            entry_points: Names of the definitions used from outside the module.
+            pinned: Names kept whether they are reachable or not.
+        """
+        self.entry_points = set(entry_points)
+        self.pinned = set(pinned)
+
+    def run(self, file: File, analyses: AnalysisManager) -> int:
+        """Remove the unreachable definitions of a file.
+
+        Raises:
+            ValueError: If an entry point is not bound at module level.
+        """
+        module = analyses.get(ScopeAnalysis).module
+        for name in sorted(self.entry_points):
+            if not module.binds(name):
+                raise ValueError(f"Unknown entry point: {name!r}")
+        purity = analyses.get(PurityAnalysis)
+        body = file.body.body
+        defines = [_defines(s, purity) for s in body]
+
+        providers: dict[str, list[int]] = {}
+        live: set[str] = set()
+        for i, names in enumerate(defines):
+            if names is None:
+                live.update(_reads(body[i]))
+                continue
+            for name in names:
+                providers.setdefault(name, []).append(i)
+                if _is_dunder(name):
+                    live.add(name)
+        live |= self.entry_points | self.pinned
+        visited: set[int] = set()
+        pending = list(live)
+        while pending:
+            for i in providers.get(pending.pop(), ()):
+                if i not in visited:
+                    visited.add(i)
+                    new = _reads(body[i]) - live
+                    live |= new
+                    pending.extend(new)
+
+        changes = 0
+        removed: set[str] = set()
+        kept: list[Statement] = []
+        for s, names in zip(body, defines, strict=True):
+            if names is None or (
+                names & live and not isinstance(s, Import | ImportFrom)
+            ):
+                kept.append(s)
+                continue
+            removed |= names - live
+            if isinstance(s, Import | ImportFrom):
+                items = [n for n in s.names if _imported(n) in live]
+                changes += len(s.names) - len(items)
+                if items:
+                    s.names = items
+                    kept.append(s)
+            else:
+                changes += 1
+        file.body.body = kept
+        return changes + _prune_all(kept, removed)
+
+
+def _defines(s: Statement, purity: PurityAnalysis) -> set[str] | None:
+    """Names defined by a removable top-level statement, `None` if it must be kept."""
+    names: set[str] = set()
+    if isinstance(s, FunctionDef | ClassDef):
+        return {s.name.raw}
+    if isinstance(s, Import | ImportFrom):
+        if isinstance(s, ImportFrom) and s.module.into_code() == "__future__":
+            return None
+        for n in s.names:
+            name = _imported(n)
+            if name is None:
+                return None
+            names.add(name)
+        return names
+    if isinstance(s, Assignment):
+        if not _targets(s.target, names):
+            return None
+        for child in (s.target_ty, s.value):
+            if child is not None and not purity.is_pure(child):
+                return None
+        return names
+    return None
+
+
+def _targets(target: Expression, names: set[str]) -> bool:
+    """Collect the names an assignment binds, `False` if it stores anything else."""
+    if isinstance(target, IdentifierExpr):
+        names.add(target.ident.raw)
+        return True
+    if isinstance(target, Tuple | ListVerbatim):
+        return all(_targets(item, names) for item in target.items)
+    if isinstance(target, Wrapped):
+        return _targets(target.inner, names)
+    if isinstance(target, UnaryOp) and target.op_type is UnaryOpType.Starred:
+        return _targets(target.expression, names)
+    return False
+
+
+def _imported(name: ImportType) -> str | None:
+    """Name bound by an imported item, `None` for star imports."""
+    if isinstance(name, str):
+        return None
+    if isinstance(name, Identifier):
+        return name.raw
+    if isinstance(name, ModPath):
+        return name.names[0].raw
+    return name.asname.raw
+
+
+def _reads(s: Statement) -> set[str]:
+    """Names read anywhere in a statement."""
+    return {n.ident.raw for n in walk(s) if isinstance(n, IdentifierExpr)}
+
+
+def _is_dunder(name: str) -> bool:
+    return len(name) > 4 and name.startswith("__") and name.endswith("__")
+
+
+def _prune_all(body: list[Statement], removed: set[str]) -> int:
+    """Remove the removed names from literal `__all__` lists, returning their number."""
+    changes = 0
+    for s in body:
+        if not (
+            isinstance(s, Assignment)
+            and isinstance(s.target, IdentifierExpr)
+            and s.target.ident.raw == "__all__"
+            and isinstance(s.value, ListVerbatim | Tuple)
+        ):
+            continue
+        items = [e for e in s.value.items if _exported(e) not in removed]
+        changes += len(s.value.items) - len(items)
+        s.value.items = items
+    return changes
+
+
+def _exported(e: Expression) -> str | None:
+    """Name exported by an item of `__all__`."""
+    if not isinstance(e, Literal):
+        return None
+    try:
+        value = ast.literal_eval(e.lit)
+    except (ValueError, SyntaxError):
+        return None
+    return value if isinstance(value, str) else None
@@ -0,0 +1,642 @@
+r"""## Function splitting
+
+Outline chunks of the statements of giant functions into helper functions.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "FunctionSplitting",
+]
+
+
+from collections import Counter
+from typing import TYPE_CHECKING
+
+from synt.expr.attribute import Attribute
+from synt.expr.call import Call
+from synt.expr.closure import Closure
+from synt.expr.comprehension import Comprehension
+from synt.expr.comprehension import ComprehensionNode
+from synt.expr.comprehension import GeneratorComprehension
+from synt.expr.list import ListVerbatim
+from synt.expr.modpath import ModPath
+from synt.expr.named_expr import NamedExpr
+from synt.expr.tuple import Tuple
+from synt.expr.unary_op import UnaryOp
+from synt.expr.unary_op import UnaryOpType
+from synt.expr.wrapped import Wrapped
+from synt.passes.analysis import ScopeAnalysis
+from synt.passes.common import FRAME_NAMES
+from synt.passes.common import fresh_name
+from synt.passes.common import is_private
+from synt.passes.common import name_expr
+from synt.passes.common import used_names
+from synt.passes.manager import TransformerPass
+from synt.stmt.assign import Assignment
+from synt.stmt.block import Block
+from synt.stmt.branch import Branch
+from synt.stmt.cls import ClassDef
+from synt.stmt.context import With
+from synt.stmt.delete import Delete
+from synt.stmt.expression import ExprStatement
+from synt.stmt.fn import FnArg
+from synt.stmt.fn import FunctionDef
+from synt.stmt.fn import def_
+from synt.stmt.importing import Import
+from synt.stmt.importing import ImportFrom
+from synt.stmt.keyword import KeywordStatement
+from synt.stmt.loop import ForLoop
+from synt.stmt.loop import WhileLoop
+from synt.stmt.match_case import Match
+from synt.stmt.namespace import Global
+from synt.stmt.namespace import Nonlocal
+from synt.stmt.returns import Return
+from synt.stmt.stmt import Statement
+from synt.stmt.try_catch import ExceptionHandler
+from synt.stmt.try_catch import Try
+from synt.tokens.ident import Identifier
+from synt.tokens.ident import IdentifierExpr
+from synt.visit import children
+from synt.visit import walk
+
+
+if TYPE_CHECKING:
+    from synt.expr.expr import Expression
+    from synt.file import File
+    from synt.passes.analysis import Scope
+    from synt.passes.manager import AnalysisManager
+    from synt.visit import Node
+
+
+_CONSUMERS = frozenset(
+    {
+        "all",
+        "any",
+        "dict",
+        "frozenset",
+        "list",
+        "max",
+        "min",
+        "set",
+        "sorted",
+        "sum",
+        "tuple",
+    }
+)
+"""Builtins consuming a generator argument before they return."""
+
+
+class FunctionSplitting(TransformerPass):
+    r"""Move chunks of the statements of long blocks into helper functions.
+
+    Compiling a function takes time and memory growing faster than its size,
+    and generated functions with thousands of statements compile slowly.
+    Blocks of module-level functions and methods with more than `max_size` statements
+    are cut into chunks of at most `chunk_size` consecutive statements, each moved
+    into a module-level helper function defined before the function, and replaced
+    with a call to it.
+
+    A liveness analysis of the function's locals decides the signature of each helper:
+
+    - locals the chunk may read before assigning them become parameters;
+    - locals the chunk assigns and the rest of the function reads are returned,
+      and assigned from the result of the call.
+
+    A chunk is only moved if its parameters are always bound before it,
+    and its results always bound after it.
+    Chunks can't contain `return`, `yield` or `await`, `break` or `continue` of
+    loops around them, `global` or `nonlocal` declarations, assignment expressions,
+    `match` statements, reads of `super`, `locals` and other frame-dependent names,
+    or closures and generators reading locals of the function. Blocks inside `try`
+    and `with` statements are kept, as an exception would leave the caller's locals
+    unchanged, as are chunks deleting locals the rest of the function reads,
+    which would stay bound in the caller, and chunks of methods using private names,
+    which are mangled with the class name.
+
+    Examples:
+        ```python
+        from synt.passes import PassManager
+        from synt.passes.split import FunctionSplitting
+        x, y, z = id_("x"), id_("y"), id_("z")
+        file = File(
+            def_(id_("f"))(arg(x)).block(
+                y.expr().assign(x.expr() + litint(1)),
+                z.expr().assign(y.expr() * litint(2)),
+                id_("print").expr().call(z).stmt(),
+                y.expr().assign(z.expr() - y.expr()),
+                return_(y),
+            )
+        )
+        PassManager(FunctionSplitting(max_size=4, chunk_size=2)).run(file)
+        assert file.into_str() == (
+            "def _f_part(x):\n"
+            "    y = x + 1\n"
+            "    z = y * 2\n"
+            "    return (y, z)\n"
+            "def _f_part_1(y, z):\n"
+            "    print(z)\n"
+            "    y = z - y\n"
+            "    return y\n"
+            "def f(x):\n"
+            "    y, z = _f_part(x)\n"
+            "    y = _f_part_1(y, z)\n"
+            "    return y"
+        )
+        ```
+    """
+
+    requires = (ScopeAnalysis,)
+
+    max_size: int
+    """Maximum number of statements of a block kept as it is."""
+    chunk_size: int
+    """Maximum number of statements moved into a helper."""
+
+    __outermost: list[Statement]
+    """Top-level definition enclosing the current node."""
+    __pending: dict[int, tuple[Statement, list[Statement]]]
+    """Helpers to insert before each top-level statement."""
+    __names: set[str]
+    __moved: int
+
+    def __init__(self, max_size: int = 256, chunk_size: int = 64):
+        """Initialize the pass.
+
+        Args:
+            max_size: Maximum number of statements of a block kept as it is.
+            chunk_size: Maximum number of statements moved into a helper.
+
+        Raises:
+            ValueError: If `chunk_size` is not positive, or larger than `max_size`.
+        """
+        if not 0 < chunk_size <= max_size:
+            raise ValueError(
+                f"Chunk size must be positive and at most {max_size}, got {chunk_size}."
+            )
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.__outermost = []
+        self.__pending = {}
+        self.__names = set()
+        self.__moved = 0
+
+    def run(self, file: File, analyses: AnalysisManager) -> int:
+        self.__names = used_names(file)
+        self.__moved = 0
+        try:
+            return super().run(file, analyses) + self.__moved
+        finally:
+            self.__outermost.clear()
+            self.__pending.clear()
+            self.__names.clear()
+
+    def visit_FunctionDef(self, node: FunctionDef) -> None:
+        self.__outermost.append(node)
+
+    def leave_FunctionDef(self, node: FunctionDef) -> FunctionDef:
+        self.__outermost.pop()
+        scope = self.analyses.get(ScopeAnalysis).scope(node)
+        parent = scope.parent
+        if parent is None or scope.globals or scope.nonlocals or node.type_params:
+            return node
+        in_class = isinstance(parent.node, ClassDef)
+        if in_class and parent.parent is not None:
+            parent = parent.parent
+        if not parent.is_module:
+            return node
+        fn = _Function(node, scope, in_class)
+        params = {a.name.raw for a in node.args}
+        self.__split(fn, node.body, params)
+        return node
+
+    def visit_ClassDef(self, node: ClassDef) -> None:
+        self.__outermost.append(node)
+
+    def leave_ClassDef(self, node: ClassDef) -> ClassDef:
+        self.__outermost.pop()
+        return node
+
+    def leave_Block(self, node: Block) -> Block:
+        if not self.__pending:
+            return node
+        body: list[Statement] = []
+        for s in node.body:
+            pending = self.__pending.get(id(s))
+            if pending is not None and pending[0] is s:
+                del self.__pending[id(s)]
+                body.extend(pending[1])
+            body.append(s)
+        node.body = body
+        return node
+
+    def __split(self, fn: _Function, block: Block, defined: set[str]) -> None:
+        """Split the long blocks nested in a block, then the block itself."""
+        current = defined
+        for s in block.body:
+            for inner, entry in _inner_blocks(s, current, fn):
+                self.__split(fn, inner, entry)
+            current = fn.step(s, current, set())
+        if len(block.body) <= self.max_size:
+            return
+
+        body = block.body
+        before = []
+        current = defined
+        for s in body:
+            before.append(current)
+            current = fn.step(s, current, set())
+        smallest = max(2, self.chunk_size // 4)
+        new: list[Statement] = []
+        i = 0
+        while i < len(body):
+            end = i
+            while (
+                end < len(body) and end - i < self.chunk_size and fn.movable(body[end])
+            ):
+                end += 1
+            size = end - i
+            while size >= smallest:
+                outlined = self.__outline(fn, body[i : i + size], before[i])
+                if outlined is not None:
+                    new.append(outlined)
+                    i += size
+                    break
+                size //= 2
+            else:
+                new.append(body[i])
+                i += 1
+        block.body = new
+
+    def __outline(
+        self, fn: _Function, chunk: list[Statement], entry: set[str]
+    ) -> Statement | None:
+        """Move a chunk into a helper, returning the statement calling it."""
+        exposed: set[str] = set()
+        after = fn.flow(chunk, set(), exposed)
+        loads: Counter[str] = Counter()
+        bound: set[str] = set()
+        deleted: set[str] = set()
+        for s in chunk:
+            loads += fn.loads(s)
+            bound |= fn.bound(s)
+            deleted |= fn.deleted(s)
+        results = sorted(n for n in bound if fn.total[n] > loads[n])
+        passed = {n for n in results if n not in after}
+        if any(n not in entry for n in passed):
+            return None
+        # the caller's binding would survive the helper unbinding it
+        if any(fn.total[n] > loads[n] for n in deleted):
+            return None
+        params = sorted(exposed | passed)
+        if not entry.issuperset(params):
+            return None
+
+        name = fresh_name(self.__names, f"_{fn.node.name.raw}_part")
+        body = list(chunk)
+        if results:
+            body.append(Return(_names(results)))
+        helper = def_(Identifier(name))(*(FnArg(Identifier(p)) for p in params))
+        outermost = self.__outermost[0] if self.__outermost else fn.node
+        self.__pending.setdefault(id(outermost), (outermost, []))[1].append(
+            helper.block(*body)
+        )
+        self.__moved += len(chunk)
+        call = name_expr(name).call(*(name_expr(p) for p in params))
+        if not results:
+            return ExprStatement(call)
+        target = _names(results)
+        fn.stored(target)
+        return target.assign(call)
+
+
+def _unbound(target: Expression) -> set[str]:
+    """Names unbound by a `del` statement, not those read to delete items and attributes."""
+    while isinstance(target, Wrapped):
+        target = target.inner
+    if isinstance(target, IdentifierExpr):
+        return {target.ident.raw}
+    if isinstance(target, Tuple | ListVerbatim):
+        return set().union(*map(_unbound, target.items))
+    return set()
+
+
+class _Function:
+    """Reads and bindings of the locals of a function being split."""
+
+    node: FunctionDef
+    scope: Scope
+    in_class: bool
+    """Whether the function is a method, whose private names are mangled."""
+    total: Counter[str]
+    """Number of reads of each local in the whole function."""
+
+    __stores: set[int]
+    """Names assigned to, by identity."""
+    __blocked: set[int]
+    """Closures, classes and generators reading locals, by identity."""
+    __info: dict[int, tuple[Statement, bool, Counter[str], set[str], set[str]]]
+
+    def __init__(self, node: FunctionDef, scope: Scope, in_class: bool):
+        self.node = node
+        self.scope = scope
+        self.in_class = in_class
+        self.__info = {}
+        self.__stores = set()
+        consumed: set[int] = set()
+        for n in walk(node.body):
+            if isinstance(n, Assignment | ForLoop):
+                self.__stores.update(map(id, _stored(n.target)))
+            elif isinstance(n, With):
+                for item in n.items:
+                    if item.asname is not None:
+                        self.__stores.update(map(id, _stored(item.asname)))
+            elif isinstance(n, Call) and _consumes(n, scope):
+                consumed.update(id(a) for a in n.args)
+        generators = {
+            id(n.comprehension)
+            for n in walk(node.body)
+            if isinstance(n, GeneratorComprehension) and id(n) not in consumed
+        }
+        self.__blocked = set()
+        for inner in scope.walk():
+            kept = (
+                isinstance(inner.node, Comprehension)
+                and id(inner.node) not in generators
+            )
+            if inner is scope or kept:
+                continue
+            if any(s.resolve(n) is scope for s in inner.walk() for n in s.loads):
+                self.__blocked.add(id(inner.node))
+        self.total = Counter()
+        for s in node.body.body:
+            self.total += self.loads(s)
+
+    def stored(self, target: Expression) -> None:
+        """Register the names of a new assignment target."""
+        self.__stores.update(map(id, _stored(target)))
+
+    def reads(self, node: Node) -> set[str]:
+        """Locals read in a node."""
+        return {
+            n.ident.raw
+            for n in walk(node)
+            if isinstance(n, IdentifierExpr)
+            and id(n) not in self.__stores
+            and self.scope.binds(n.ident.raw)
+        }
+
+    def targets(self, target: Node | None) -> set[str]:
+        """Locals assigned in an assignment target."""
+        if target is None:
+            return set()
+        return {
+            n.ident.raw
+            for n in walk(target)
+            if isinstance(n, IdentifierExpr)
+            and id(n) in self.__stores
+            and self.scope.binds(n.ident.raw)
+        }
+
+    def __summary(
+        self, s: Statement
+    ) -> tuple[Statement, bool, Counter[str], set[str], set[str]]:
+        info = self.__info.get(id(s))
+        if info is not None and info[0] is s:
+            return info
+        movable = not _escapes(s, False)
+        loads: Counter[str] = Counter()
+        bound: set[str] = set()
+        deleted: set[str] = set()
+        for n in walk(s):
+            if movable and not self.__movable_node(n):
+                movable = False
+            match n:
+                case IdentifierExpr() if self.scope.binds(n.ident.raw):
+                    if id(n) in self.__stores:
+                        bound.add(n.ident.raw)
+                    else:
+                        loads[n.ident.raw] += 1
+                case FunctionDef() | ClassDef():
+                    bound.add(n.name.raw)
+                case Import() | ImportFrom():
+                    bound.update(_imported(n))
+                case ExceptionHandler() if n.asname is not None:
+                    bound.add(n.asname.raw)
+                    deleted.add(n.asname.raw)
+                case Delete():
+                    deleted.update(_unbound(n.target))
+        info = (s, movable, loads, bound & set(self.scope.stores), deleted)
+        self.__info[id(s)] = info
+        return info
+
+    def __movable_node(self, n: Node) -> bool:
+        match n:
+            case Return() | Match() | Global() | Nonlocal() | NamedExpr():
+                return False
+            case UnaryOp():
+                return n.op_type not in (
+                    UnaryOpType.Yield,
+                    UnaryOpType.YieldFrom,
+                    UnaryOpType.Await,
+                )
+            case ComprehensionNode():
+                return not n.is_async
+            case IdentifierExpr():
+                return n.ident.raw not in FRAME_NAMES and not (
+                    self.in_class and is_private(n.ident.raw)
+                )
+            case Identifier():
+                return not (self.in_class and is_private(n.raw))
+            case Attribute():
+                return not (self.in_class and is_private(n.attribute_name))
+            case Closure() | Comprehension() | FunctionDef() | ClassDef():
+                return id(n) not in self.__blocked
+        return True
+
+    def movable(self, s: Statement) -> bool:
+        """Whether a statement can be moved into a helper."""
+        return self.__summary(s)[1]
+
+    def loads(self, s: Statement) -> Counter[str]:
+        """Number of reads of each local in a statement."""
+        return self.__summary(s)[2]
+
+    def bound(self, s: Statement) -> set[str]:
+        """Locals a statement may bind."""
+        return self.__summary(s)[3]
+
+    def deleted(self, s: Statement) -> set[str]:
+        """Locals a statement may unbind."""
+        return self.__summary(s)[4]
+
+    def flow(
+        self, body: list[Statement], defined: set[str], exposed: set[str]
+    ) -> set[str]:
+        """Follow the locals bound by statements.
+
+        Args:
+            body: Statements executed in order.
+            defined: Locals bound before the statements.
+            exposed: Collects the locals read while they may be unbound.
+
+        Returns:
+            Locals always bound after the statements.
+        """
+        for s in body:
+            defined = self.step(s, defined, exposed)
+        return defined
+
+    def step(self, s: Statement, defined: set[str], exposed: set[str]) -> set[str]:
+        """Follow the locals bound by a statement, like [`flow`][synt.passes.split._Function.flow]."""
+        match s:
+            case Assignment():
+                for child in (s.value, s.target_ty, s.target):
+                    if child is not None:
+                        exposed |= self.reads(child) - defined
+                return defined | self.targets(s.target)
+            case Delete():
+                exposed |= self.reads(s.target) - defined
+                return defined - self.reads(s.target)
+            case Branch():
+                ends = []
+                for test, block in s.tests:
+                    exposed |= self.reads(test) - defined
+                    ends.append(self.flow(block.body, defined, exposed))
+                if s.fallback is None:
+                    return defined
+                ends.append(self.flow(s.fallback.body, defined, exposed))
+                return set.intersection(*ends)
+            case ForLoop():
+                exposed |= (self.reads(s.iter) | self.reads(s.target)) - defined
+                self.flow(s.body.body, defined | self.targets(s.target), exposed)
+                if s.orelse is not None:
+                    self.flow(s.orelse.body, defined, exposed)
+                return defined
+            case WhileLoop():
+                exposed |= self.reads(s.test) - defined
+                self.flow(s.body.body, defined, exposed)
+                if s.orelse is not None:
+                    self.flow(s.orelse.body, defined, exposed)
+                return defined
+            case With():
+                names = set()
+                for item in s.items:
+                    exposed |= self.reads(item) - defined
+                    names |= self.targets(item.asname)
+                self.flow(s.body.body, defined | names, exposed)
+                return defined | names
+            case Try():
+                ended = self.flow(s.try_block.body, defined, exposed)
+                handled = set()
+                for h in s.handlers:
+                    if h.type is not None:
+                        exposed |= self.reads(h.type) - defined
+                    names = {h.asname.raw} if h.asname is not None else set()
+                    handled |= names
+                    self.flow(h.body.body, defined | names, exposed)
+                if s.orelse is not None:
+                    self.flow(s.orelse.body, ended, exposed)
+                defined = defined - handled
+                if s.final is not None:
+                    defined = self.flow(s.final.body, defined, exposed)
+                return defined
+            case FunctionDef() | ClassDef():
+                for part in children(s):
+                    if part is not s.body:
+                        exposed |= self.reads(part) - defined
+                return defined | {s.name.raw}
+            case Import() | ImportFrom():
+                return defined | _imported(s)
+        exposed |= self.reads(s) - defined
+        return defined
+
+
+def _inner_blocks(
+    s: Statement, defined: set[str], fn: _Function
+) -> list[tuple[Block, set[str]]]:
+    """Blocks nested in a statement which can be split, with the locals bound before them.
+
+    Bodies of `try` and `with` statements are excluded.
+    """
+    match s:
+        case Branch():
+            branches = [block for _, block in s.tests]
+            if s.fallback is not None:
+                branches.append(s.fallback)
+            return [(block, defined) for block in branches]
+        case ForLoop():
+            blocks = [(s.body, defined | fn.targets(s.target))]
+        case WhileLoop():
+            blocks = [(s.body, defined)]
+        case _:
+            return []
+    if s.orelse is not None:
+        blocks.append((s.orelse, defined))
+    return blocks
+
+
+def _escapes(s: Statement, loop: bool) -> bool:
+    """Whether a statement contains a `break` or `continue` of a loop around it."""
+    match s:
+        case KeywordStatement():
+            return not loop and s.keyword in ("break", "continue")
+        case ForLoop() | WhileLoop():
+            return any(_escapes(x, True) for x in s.body.body) or (
+                s.orelse is not None and any(_escapes(x, loop) for x in s.orelse.body)
+            )
+        case FunctionDef() | ClassDef():
+            return False
+    for child in children(s):
+        if isinstance(child, Block):
+            if any(_escapes(x, loop) for x in child.body):
+                return True
+        elif isinstance(child, Statement) and _escapes(child, loop):
+            return True
+    return False
+
+
+def _stored(target: Expression) -> list[IdentifierExpr]:
+    """Names an assignment target binds."""
+    if isinstance(target, IdentifierExpr):
+        return [target]
+    if isinstance(target, Tuple | ListVerbatim):
+        return [n for item in target.items for n in _stored(item)]
+    if isinstance(target, Wrapped):
+        return _stored(target.inner)
+    if isinstance(target, UnaryOp) and target.op_type is UnaryOpType.Starred:
+        return _stored(target.expression)
+    return []
+
+
+def _consumes(call: Call, scope: Scope) -> bool:
+    """Whether a call consumes its generator arguments before returning."""
+    target = call.target
+    if isinstance(target, Attribute):
+        return target.attribute_name == "join"
+    return (
+        isinstance(target, IdentifierExpr)
+        and target.ident.raw in _CONSUMERS
+        and scope.resolve(target.ident.raw) is None
+    )
+
+
+def _imported(s: Import | ImportFrom) -> set[str]:
+    """Names bound by an import."""
+    names = set()
+    for name in s.names:
+        if isinstance(name, Identifier):
+            names.add(name.raw)
+        elif isinstance(name, ModPath):
+            names.add(name.names[0].raw)
+        elif not isinstance(name, str):
+            names.add(name.asname.raw)
+    return names
+
+
+def _names(names: list[str]) -> Expression:
+    """A local, or a tuple of locals."""
+    if len(names) == 1:
+        return name_expr(names[0])
+    return Tuple(*(name_expr(n) for n in names))
@@ -0,0 +1,497 @@
+r"""## String building
+
+Build strings with f-strings and `str.join` instead of repeated concatenation.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "StringBuilding",
+]
+
+
+import ast
+
+from typing import TYPE_CHECKING
+
+from synt.expr.binary_op import BinaryOp
+from synt.expr.binary_op import BinaryOpType
+from synt.expr.call import Call
+from synt.expr.comprehension import ComprehensionBuilder
+from synt.expr.expr import ExprPrecedence
+from synt.expr.fstring import FormatConversionType
+from synt.expr.fstring import FormatNode
+from synt.expr.fstring import FormatString
+from synt.expr.list import ListComprehension
+from synt.expr.named_expr import NamedExpr
+from synt.expr.tuple import Tuple
+from synt.expr.unary_op import UnaryOp
+from synt.expr.unary_op import UnaryOpType
+from synt.expr.wrapped import Wrapped
+from synt.passes.analysis import ScopeAnalysis
+from synt.passes.manager import TransformerPass
+from synt.stmt.assign import Assignment
+from synt.stmt.branch import Branch
+from synt.stmt.fn import FunctionDef
+from synt.stmt.loop import ForLoop
+from synt.tokens.ident import IdentifierExpr
+from synt.tokens.lit import Literal
+from synt.visit import walk
+
+
+if TYPE_CHECKING:
+    from synt.expr.expr import Expression
+    from synt.file import File
+    from synt.passes.analysis import Scope
+    from synt.passes.manager import AnalysisManager
+    from synt.stmt.block import Block
+    from synt.stmt.cls import ClassDef
+    from synt.stmt.context import With
+    from synt.stmt.stmt import Statement
+    from synt.stmt.try_catch import Try
+    from synt.tokens.ident import Identifier
+
+
+type _Part = FormatNode | str
+type _Generator = tuple[list[Identifier], Expression, list[Expression]]
+"""Targets, iterable and conditions of a `for` clause."""
+
+_CONVERSIONS = {
+    "str": FormatConversionType.Str,
+    "repr": FormatConversionType.Repr,
+    "ascii": FormatConversionType.Ascii,
+    "format": FormatConversionType.No,
+}
+"""Builtins converting their argument to a string, with the matching conversion."""
+
+
+class StringBuilding(TransformerPass):
+    r"""Rewrite string concatenations into f-strings and joins.
+
+    The pass performs three rewrites:
+
+    - chains of `+` of at least three strings, or converting a value with `str`, `repr`,
+      `ascii` or `format`, become a single f-string, formatting all parts at once
+      instead of copying each intermediate result;
+    - literal strings and nested f-strings formatted without a spec or a conversion
+      are inlined into the enclosing f-string, and adjacent text nodes are merged;
+    - in functions, an assignment of a literal string followed by a `for` loop
+      only appending to it with `acc = acc + item`, possibly under nested loops and
+      `if` statements without `else` branches, becomes an assignment of
+      `"".join([item for ...])`, instead of copying the string on each iteration.
+
+    Chains only contain strings when every operand is a string literal, an f-string
+    or a call of the string conversion builtins; with `assume_str`, other operands are
+    assumed to be strings too, as long as the chain contains one of the former.
+    Otherwise the chain may add numbers, or call custom `__add__` methods, and is kept.
+    Reassignments of a name to itself plus more strings are kept out of loops,
+    as CPython extends such strings in place.
+
+    Joined loops must be outside of `try` and `with` statements,
+    and their targets must be locals only used by the loop, as comprehensions don't leak them.
+
+    Examples:
+        ```python
+        from synt.passes import PassManager
+        from synt.passes.strings import StringBuilding
+        name, n = id_("name"), id_("n")
+        file = File(
+            return_(
+                litstr("Hello, ") + name.expr() + litstr("! You have ")
+                + id_("str").expr().call(n) + litstr(" messages.")
+            )
+        )
+        PassManager(StringBuilding(assume_str=True)).run(file)
+        assert file.into_str() == 'return f"Hello, {name}! You have {n!s} messages."'
+        ```
+    """
+
+    requires = (ScopeAnalysis,)
+
+    assume_str: bool
+    """Whether values of unknown types concatenated with strings are strings."""
+
+    __scopes: list[Scope]
+    __inner: set[int]
+    """Concatenations nested in a longer chain."""
+    __guarded: int
+    """Number of enclosing `try` and `with` statements in the current function."""
+    __outer: list[int]
+
+    def __init__(self, assume_str: bool = False):
+        """Initialize the pass.
+
+        Args:
+            assume_str: Whether values of unknown types concatenated with strings
+                are strings, and may be formatted into f-strings.
+        """
+        self.assume_str = assume_str
+        self.__scopes = []
+        self.__inner = set()
+        self.__guarded = 0
+        self.__outer = []
+
+    def run(self, file: File, analyses: AnalysisManager) -> int:
+        self.__scopes = [analyses.get(ScopeAnalysis).module]
+        self.__guarded = 0
+        try:
+            return super().run(file, analyses)
+        finally:
+            self.__scopes.clear()
+            self.__inner.clear()
+            self.__outer.clear()
+
+    def visit_FunctionDef(self, node: FunctionDef) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+        self.__outer.append(self.__guarded)
+        self.__guarded = 0
+
+    def leave_FunctionDef(self, node: FunctionDef) -> FunctionDef:
+        self.__scopes.pop()
+        self.__guarded = self.__outer.pop()
+        return node
+
+    def visit_ClassDef(self, node: ClassDef) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_ClassDef(self, node: ClassDef) -> ClassDef:
+        self.__scopes.pop()
+        return node
+
+    def visit_Try(self, node: Try) -> None:
+        self.__guarded += 1
+
+    def leave_Try(self, node: Try) -> Try:
+        self.__guarded -= 1
+        return node
+
+    def visit_With(self, node: With) -> None:
+        self.__guarded += 1
+
+    def leave_With(self, node: With) -> With:
+        self.__guarded -= 1
+        return node
+
+    def visit_Assignment(self, node: Assignment) -> None:
+        value = node.value
+        if isinstance(node.target, IdentifierExpr) and _is_add(value):
+            operands = _operands(value)  # type:ignore[arg-type]
+            if _is_name(operands[0], node.target.ident.raw):
+                # `s = s + t` extends `s` in place
+                self.__inner.add(id(value))
+
+    def visit_BinaryOp(self, node: BinaryOp) -> None:
+        if node.op_type is BinaryOpType.Add:
+            for side in (node.left, node.right):
+                if _is_add(_unwrap(side)):
+                    self.__inner.add(id(_unwrap(side)))
+
+    def leave_BinaryOp(self, node: BinaryOp) -> Expression:
+        if node.op_type is not BinaryOpType.Add or id(node) in self.__inner:
+            return node
+        operands = _operands(node)
+        parts = self.__parts(operands)
+        if parts is None or not (
+            len(operands) >= 3 or any(_converts(_unwrap(o)) for o in operands)
+        ):
+            return node
+        return _fstring(parts)
+
+    def leave_FormatString(self, node: FormatString) -> FormatString:
+        nodes = _merge(_inline(node.nodes))
+        if len(nodes) != len(node.nodes) or any(
+            a is not b for a, b in zip(nodes, node.nodes, strict=True)
+        ):
+            node.nodes = nodes
+            self.changes += 1
+        return node
+
+    def leave_Block(self, node: Block) -> Block:
+        scope = self.__scopes[-1]
+        if not isinstance(scope.node, FunctionDef) or self.__guarded:
+            return node
+        body: list[Statement] = []
+        for s in node.body:
+            prev = body[-1] if body else None
+            if (
+                isinstance(s, ForLoop)
+                and isinstance(prev, Assignment)
+                and self.__join(prev, s, scope)
+            ):
+                self.changes += 1
+                continue
+            body.append(s)
+        node.body = body
+        return node
+
+    def __parts(
+        self, operands: list[Expression], appended: bool = False
+    ) -> list[_Part] | None:
+        """Get the f-string parts of concatenated operands.
+
+        Args:
+            operands: Concatenated operands.
+            appended: Whether the operands are known to be appended to a string.
+
+        Returns:
+            The parts, `None` if the operands may not all be strings.
+        """
+        parts: list[_Part] = []
+        known = appended
+        for operand in operands:
+            own = _string_parts(_unwrap(operand), self.__scopes[-1])
+            if own is None:
+                if not self.assume_str:
+                    return None
+                own = [FormatNode(_embedded(_unwrap(operand)))]
+            else:
+                known = True
+            parts.extend(own)
+        return parts if known else None
+
+    def __join(self, init: Assignment, loop: ForLoop, scope: Scope) -> bool:
+        """Turn an assignment of a literal string into a join if the following loop appends to it.
+
+        Returns:
+            Whether the assignment was changed, replacing the loop.
+        """
+        acc = init.target
+        prefix = _str_value(init.value) if init.target_ty is None else None
+        if prefix is None or not isinstance(acc, IdentifierExpr):
+            return False
+        name = acc.ident.raw
+        generators: list[_Generator] = []
+        operands = _fill(loop, name, generators)
+        if operands is None:
+            return False
+        parts = self.__parts(operands, appended=True)
+        if parts is None:
+            return False
+        if sum(1 for n in walk(loop) if _is_name(n, name)) != 2:
+            return False
+        for n in walk(loop):
+            if isinstance(n, NamedExpr) or (
+                isinstance(n, UnaryOp)
+                and n.op_type
+                in (UnaryOpType.Await, UnaryOpType.Yield, UnaryOpType.YieldFrom)
+            ):
+                return False
+        for targets, _, _ in generators:
+            for target in targets:
+                if not _private(target.raw, loop, scope):
+                    return False
+
+        item = _fstring(parts) if len(operands) > 1 else _unwrap(operands[0])
+        (targets, iterable, conditions), *rest = generators
+        builder = ComprehensionBuilder(_clause(item), targets)
+        comp = builder.curr_node().in_(_clause(iterable))  # type:ignore[union-attr]
+        for condition in conditions:
+            comp.if_(_clause(condition))
+        for targets, iterable, conditions in rest:
+            comp = builder.for_(*targets).in_(_clause(iterable))
+            for condition in conditions:
+                comp.if_(_clause(condition))
+        joined = Literal.str_("").attr("join").call(ListComprehension(builder))
+        init.value = joined if not prefix else init.value + joined  # type:ignore[operator]
+        return True
+
+
+def _is_add(e: Expression | None) -> bool:
+    return isinstance(e, BinaryOp) and e.op_type is BinaryOpType.Add
+
+
+def _unwrap(e: Expression) -> Expression:
+    while isinstance(e, Wrapped):
+        e = e.inner
+    return e
+
+
+def _operands(node: BinaryOp) -> list[Expression]:
+    """Flatten a chain of `+`, including parenthesized ones."""
+    operands: list[Expression] = []
+    stack: list[Expression] = [node]
+    while stack:
+        e = stack.pop()
+        if _is_add(_unwrap(e)):
+            inner: BinaryOp = _unwrap(e)  # type:ignore[assignment]
+            stack.extend((inner.right, inner.left))
+        else:
+            operands.append(e)
+    return operands
+
+
+def _str_value(e: Expression | None) -> str | None:
+    """Get the value of a string literal."""
+    if not isinstance(e, Literal):
+        return None
+    try:
+        value = ast.literal_eval(e.into_code())
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return None
+    return value if isinstance(value, str) else None
+
+
+def _string_parts(e: Expression, scope: Scope) -> list[_Part] | None:
+    """Get the f-string parts of an expression known to be a string, `None` otherwise."""
+    if isinstance(e, FormatString):
+        return list(e.nodes)
+    value = _str_value(e)
+    if value is not None:
+        return [_escape(value)]
+    if (
+        isinstance(e, Call)
+        and isinstance(e.target, IdentifierExpr)
+        and e.target.ident.raw in _CONVERSIONS
+        and scope.resolve(e.target.ident.raw) is None
+        and len(e.args) == 1
+        and not e.keywords
+        and not (
+            isinstance(e.args[0], UnaryOp) and e.args[0].op_type is UnaryOpType.Starred
+        )
+    ):
+        conversion = _CONVERSIONS[e.target.ident.raw]
+        return [FormatNode(_embedded(e.args[0]), conversion=conversion)]
+    return None
+
+
+def _converts(e: Expression) -> bool:
+    """Whether an expression is a f-string or a call of a string conversion builtin."""
+    return isinstance(e, FormatString) or (
+        isinstance(e, Call)
+        and isinstance(e.target, IdentifierExpr)
+        and e.target.ident.raw in _CONVERSIONS
+    )
+
+
+def _embedded(e: Expression) -> Expression:
+    """Parenthesize expressions which can't appear bare in a replacement field."""
+    if e.precedence >= ExprPrecedence.Lambda or e.into_code().startswith("{"):
+        return e.wrapped()
+    return e
+
+
+def _escape(value: str) -> str:
+    """Escape a string as text of an f-string."""
+    out = []
+    for ch in value:
+        if ch in '\\"':
+            out.append("\\" + ch)
+        elif ch in "{}":
+            out.append(ch * 2)
+        elif ch.isprintable():
+            out.append(ch)
+        else:
+            out.append(ch.encode("unicode_escape").decode("ascii"))
+    return "".join(out)
+
+
+def _inline(nodes: list[_Part]) -> list[_Part]:
+    """Inline literal strings and nested f-strings formatted without a spec or a conversion."""
+    out: list[_Part] = []
+    for node in nodes:
+        if (
+            isinstance(node, FormatNode)
+            and not node.format_spec
+            and node.conversion is FormatConversionType.No
+        ):
+            value = _unwrap(node.value)
+            if isinstance(value, FormatString):
+                out.extend(_inline(value.nodes))
+                continue
+            text = _str_value(value)
+            if text is not None:
+                out.append(_escape(text))
+                continue
+        out.append(node)
+    return out
+
+
+def _merge(nodes: list[_Part]) -> list[_Part]:
+    """Merge adjacent text nodes, dropping empty ones."""
+    out: list[_Part] = []
+    for node in nodes:
+        if isinstance(node, str):
+            if not node:
+                continue
+            if out and isinstance(out[-1], str):
+                out[-1] += node
+                continue
+        out.append(node)
+    return out
+
+
+def _fstring(parts: list[_Part]) -> FormatString:
+    return FormatString(*_merge(_inline(parts)))
+
+
+def _fill(
+    s: Statement, acc: str, generators: list[_Generator]
+) -> list[Expression] | None:
+    """Match nested loops and branches appending to a string.
+
+    Args:
+        s: Statement to match.
+        acc: Name of the string.
+        generators: Clauses of the enclosing loops, extended with the matched ones.
+
+    Returns:
+        The appended operands, `None` if nothing matches.
+    """
+    match s:
+        case ForLoop() if s.orelse is None and len(s.body.body) == 1:
+            targets = _targets(s.target)
+            if targets is None:
+                return None
+            generators.append((targets, s.iter, []))
+            return _fill(s.body.body[0], acc, generators)
+        case Branch() if (
+            generators
+            and s.fallback is None
+            and len(s.tests) == 1
+            and len(s.tests[0][1].body) == 1
+        ):
+            test, block = s.tests[0]
+            generators[-1][2].append(test)
+            return _fill(block.body[0], acc, generators)
+        case Assignment() if (
+            generators
+            and s.target_ty is None
+            and _is_name(s.target, acc)
+            and _is_add(s.value)
+        ):
+            first, *rest = _operands(s.value)  # type:ignore[arg-type]
+            return rest if _is_name(first, acc) else None
+    return None
+
+
+def _targets(target: Expression) -> list[Identifier] | None:
+    """Get the names a loop target binds, `None` if it is not a name or a flat tuple of names."""
+    if isinstance(target, IdentifierExpr):
+        return [target.ident]
+    if (
+        isinstance(target, Tuple)
+        and target.items
+        and all(isinstance(t, IdentifierExpr) for t in target.items)
+    ):
+        return [t.ident for t in target.items]  # type:ignore[attr-defined]
+    return None
+
+
+def _private(name: str, loop: ForLoop, scope: Scope) -> bool:
+    """Whether a loop target is a local of the function only used in the loop."""
+    uses = sum(1 for n in walk(loop) if _is_name(n, name))
+    return (
+        scope.binds(name)
+        and name not in scope.captured
+        and scope.loads[name] + scope.stores[name] == uses
+    )
+
+
+def _clause(e: Expression) -> Expression:
+    """Parenthesize conditional expressions and lambdas in comprehension clauses."""
+    return e.wrapped() if e.precedence > ExprPrecedence.BoolOr else e
+
+
+def _is_name(node: object, name: str) -> bool:
+    return isinstance(node, IdentifierExpr) and node.ident.raw == name
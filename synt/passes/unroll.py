@@ -0,0 +1,300 @@
+r"""## Loop unrolling
+
+Expand loops over sequences known at generation time into straight-line code.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "LoopUnrolling",
+]
+
+
+import ast
+
+from copy import deepcopy
+from typing import TYPE_CHECKING
+
+from synt.expr.call import Call
+from synt.expr.closure import Closure
+from synt.expr.comprehension import Comprehension
+from synt.expr.list import ListVerbatim
+from synt.expr.named_expr import NamedExpr
+from synt.expr.tuple import Tuple
+from synt.expr.unary_op import UnaryOp
+from synt.expr.wrapped import Wrapped
+from synt.passes.analysis import ScopeAnalysis
+from synt.passes.common import DYNAMIC_NAMES
+from synt.passes.manager import TransformerPass
+from synt.stmt.assign import Assignment
+from synt.stmt.cls import ClassDef
+from synt.stmt.context import WithItem
+from synt.stmt.delete import Delete
+from synt.stmt.fn import FunctionDef
+from synt.stmt.keyword import PASS
+from synt.stmt.keyword import KeywordStatement
+from synt.stmt.loop import ForLoop
+from synt.stmt.loop import WhileLoop
+from synt.stmt.match_case import MatchCase
+from synt.stmt.stmt import Statement
+from synt.stmt.try_catch import ExceptionHandler
+from synt.tokens.ident import Identifier
+from synt.tokens.ident import IdentifierExpr
+from synt.tokens.lit import Literal
+from synt.visit import NodeTransformer
+from synt.visit import children
+from synt.visit import walk
+
+
+if TYPE_CHECKING:
+    from synt.expr.attribute import Attribute
+    from synt.expr.expr import Expression
+    from synt.file import File
+    from synt.passes.analysis import Scope
+    from synt.passes.manager import AnalysisManager
+    from synt.visit import Node
+
+
+class LoopUnrolling(TransformerPass):
+    r"""Replace `for` loops over short constant sequences with a copy of the body per item.
+
+    Loops are unrolled when they iterate over a tuple or list literal
+    whose items are literals or tuples of literals, or over a call
+    of the builtin `range` with integer literal arguments.
+    Each copy of the body is preceded by an assignment of the item to the target,
+    except for function locals which no nested scope uses and the body doesn't rebind,
+    whose reads are replaced with the item instead;
+    the target is then assigned the last item after the copies, as the loop would leave it.
+    The `else` branch follows the copies.
+
+    Loops whose body may `break` or `continue` are left as is,
+    as are sequences longer than `max_length` items
+    and bodies that would grow beyond `max_statements` statements.
+
+    Examples:
+        ```python
+        from synt.passes import PassManager
+        from synt.passes.unroll import LoopUnrolling
+        f, row = id_("f"), id_("row")
+        file = File(
+            def_(id_("g"))(arg(row)).block(
+                for_(f).in_(tup(litstr("a"), litstr("b"))).block(
+                    id_("print").expr().call(row.expr()[f]).stmt(),
+                ),
+            ),
+        )
+        PassManager(LoopUnrolling()).run(file)
+        assert file.into_str() == (
+            "def g(row):\n"
+            "    print(row['a'])\n"
+            "    print(row['b'])\n"
+            "    f = 'b'"
+        )
+        ```
+    """
+
+    requires = (ScopeAnalysis,)
+
+    max_length: int
+    """Maximum number of items of unrolled sequences."""
+    max_statements: int
+    """Maximum number of statements of the unrolled copies of a body."""
+
+    __scopes: list[Scope]
+
+    def __init__(self, max_length: int = 8, max_statements: int = 64):
+        """Initialize the pass.
+
+        Args:
+            max_length: Maximum number of items of unrolled sequences.
+            max_statements: Maximum number of statements, including nested ones,
+                of the unrolled copies of a body.
+
+        Raises:
+            ValueError: If a limit is negative.
+        """
+        if max_length < 0 or max_statements < 0:
+            raise ValueError("Unrolling limits must not be negative.")
+        self.max_length = max_length
+        self.max_statements = max_statements
+        self.__scopes = []
+
+    def run(self, file: File, analyses: AnalysisManager) -> int:
+        self.__scopes = [analyses.get(ScopeAnalysis).module]
+        try:
+            return super().run(file, analyses)
+        finally:
+            self.__scopes.clear()
+
+    def visit_FunctionDef(self, node: FunctionDef) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_FunctionDef(self, node: FunctionDef) -> FunctionDef:
+        self.__scopes.pop()
+        return node
+
+    def visit_ClassDef(self, node: ClassDef) -> None:
+        self.__scopes.append(self.analyses.get(ScopeAnalysis).scope(node))
+
+    def leave_ClassDef(self, node: ClassDef) -> ClassDef:
+        self.__scopes.pop()
+        return node
+
+    def leave_ForLoop(self, node: ForLoop) -> Statement | list[Statement]:
+        scope = self.__scopes[-1]
+        items = self.__items(node.iter, scope)
+        if items is None or _jumps(node.body.body):
+            return node
+        size = sum(
+            1 for s in node.body.body for n in walk(s) if isinstance(n, Statement)
+        )
+        if size * len(items) > self.max_statements:
+            return node
+
+        target = node.target
+        substitute = (
+            isinstance(target, IdentifierExpr)
+            and _substitutable(target.ident.raw, scope)
+            and not _mentions(node.body, target.ident.raw)
+            and all(isinstance(item, Literal) for item in items)
+        )
+        body: list[Statement] = []
+        for item in items:
+            if substitute:
+                name = target.ident.raw  # type:ignore[attr-defined]
+                copy = deepcopy(node.body)
+                _Substitute(name, item).transform(copy)
+                body.extend(copy.body)
+            else:
+                body.append(Assignment(deepcopy(target)).assign(item))
+                body.extend(deepcopy(node.body.body))
+        if substitute and items:
+            body.append(Assignment(target).assign(items[-1]))
+        if node.orelse is not None:
+            body.extend(node.orelse.body)
+        self.changes += 1
+        return body or PASS
+
+    def __items(self, it: Expression, scope: Scope) -> list[Expression] | None:
+        """Get the items of a constant sequence, `None` if it may not be unrolled."""
+        if isinstance(it, Tuple | ListVerbatim):
+            if len(it.items) > self.max_length or not all(
+                _is_constant(item) for item in it.items
+            ):
+                return None
+            return list(it.items)
+        if (
+            isinstance(it, Call)
+            and isinstance(it.target, IdentifierExpr)
+            and it.target.ident.raw == "range"
+            and scope.resolve("range") is None
+            and not it.keywords
+            and 1 <= len(it.args) <= 3
+        ):
+            bounds = [_int(a) for a in it.args]
+            if None in bounds or (len(bounds) == 3 and bounds[2] == 0):
+                return None
+            r = range(*bounds)  # type:ignore[arg-type]
+            if len(r) > self.max_length:
+                return None
+            return [Literal(repr(i)) for i in r]
+        return None
+
+
+def _int(e: Expression) -> int | None:
+    """Get the value of an integer literal, possibly negated."""
+    if not isinstance(e, Literal | UnaryOp | Wrapped):
+        return None
+    try:
+        value = ast.literal_eval(e.into_code())
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return None
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+def _is_constant(e: Expression) -> bool:
+    """Whether an expression is a literal or a tuple of constants."""
+    if isinstance(e, Tuple):
+        return all(_is_constant(item) for item in e.items)
+    return isinstance(e, Literal)
+
+
+def _jumps(body: list[Statement]) -> bool:
+    """Whether statements contain a `break` or `continue` of their enclosing loop."""
+    stack: list[Node] = list(body)
+    while stack:
+        n = stack.pop()
+        match n:
+            case KeywordStatement() if n.keyword in ("break", "continue"):
+                return True
+            case WhileLoop() | ForLoop():
+                # jumps in a nested loop's body belong to it, but not in its `else`
+                if n.orelse is not None:
+                    stack.extend(n.orelse.body)
+            case FunctionDef() | ClassDef():
+                pass
+            case _:
+                stack.extend(children(n))
+    return False
+
+
+def _substitutable(name: str, scope: Scope) -> bool:
+    """Whether reads of a loop target may be replaced with its value."""
+    return (
+        isinstance(scope.node, FunctionDef)
+        and scope.binds(name)
+        and name not in scope.captured
+        and not any(n in scope.loads for n in DYNAMIC_NAMES)
+    )
+
+
+def _mentions(node: Node, name: str) -> bool:
+    """Whether a loop body may rebind a name, or uses it in a nested scope."""
+    for n in walk(node):
+        match n:
+            case Assignment() | Delete() if name in _names(n.target):
+                return True
+            case ForLoop() if name in _names(n.target):
+                return True
+            case WithItem() if n.asname is not None and name in _names(n.asname):
+                return True
+            case MatchCase() if name in _names(n.pattern):
+                return True
+            case NamedExpr() if n.receiver.raw == name:
+                return True
+            case ExceptionHandler() if n.asname is not None and n.asname.raw == name:
+                return True
+            case FunctionDef() | ClassDef() | Closure() | Comprehension() if (
+                name in _names(n)
+            ):
+                return True
+    return False
+
+
+def _names(node: Node) -> set[str]:
+    return {n.raw for n in walk(node) if isinstance(n, Identifier)}
+
+
+class _Substitute(NodeTransformer):
+    """Replace reads of a name with a literal."""
+
+    def __init__(self, name: str, value: Expression):
+        self.name = name
+        self.value = value
+
+    def leave_IdentifierExpr(self, node: IdentifierExpr) -> Expression:
+        if node.ident.raw != self.name:
+            return node
+        value = deepcopy(self.value)
+        # negative numbers bind looser than the names they replace
+        if isinstance(value, Literal) and value.lit.startswith("-"):
+            return value.wrapped()
+        return value
+
+    def leave_Attribute(self, node: Attribute) -> Attribute:
+        target = node.target
+        if isinstance(target, Literal) and target.lit[:1].isdigit():
+            # `1.real` would read as a float
+            node.target = target.wrapped()
+        return node
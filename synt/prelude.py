@@ -53,12 +53,14 @@ __all__ = [
     "wrapped",
     "assert_",
     "Block",
+    "debug_",
     "class_",
     "dec",
     "arg",
     "async_def",
     "def_",
     "kwarg",
+    "kwonly",
     "vararg",
     "BREAK",
     "CONTINUE",
@@ -96,6 +98,7 @@ __all__ = [
     "nonlocal_",
     "match_",
     "File",
+    "quote",
 ]
 
 from synt.expr.closure import lambda_
@@ -141,18 +144,21 @@ from synt.expr.wrapped import par
 from synt.expr.wrapped import wrap
 from synt.expr.wrapped import wrapped
 from synt.file import File
+from synt.quasi import quote
 from synt.stmt.assertion import assert_
 from synt.stmt.block import Block
 from synt.stmt.branch import if_
 from synt.stmt.cls import class_
 from synt.stmt.context import with_
 from synt.stmt.context import with_item
+from synt.stmt.debug import debug_
 from synt.stmt.decorator import dec
 from synt.stmt.delete import del_
 from synt.stmt.fn import arg
 from synt.stmt.fn import async_def
 from synt.stmt.fn import def_
 from synt.stmt.fn import kwarg
+from synt.stmt.fn import kwonly
 from synt.stmt.fn import vararg
 from synt.stmt.importing import from_
 from synt.stmt.importing import import_
@@ -0,0 +1,1036 @@
+r"""## Quasi-quoting
+
+Build Synt trees from ordinary Python source with `{name}` placeholders.
+
+Templates are parsed with the standard `ast` module once, compiled into node builders
+and cached by their source text, so quoting the same snippet again only constructs the nodes
+and substitutes the placeholders.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "Template",
+    "template",
+    "quote",
+]
+
+
+import ast
+import re
+import string
+import textwrap
+
+from functools import lru_cache
+from typing import TYPE_CHECKING
+from typing import Any
+
+from synt.expr.alias import Alias
+from synt.expr.attribute import Attribute
+from synt.expr.binary_op import BinaryOp
+from synt.expr.binary_op import BinaryOpType
+from synt.expr.call import Call
+from synt.expr.call import Keyword
+from synt.expr.closure import Closure
+from synt.expr.comprehension import Comprehension
+from synt.expr.comprehension import ComprehensionNode
+from synt.expr.comprehension import GeneratorComprehension
+from synt.expr.condition import Condition
+from synt.expr.dict import DictComprehension
+from synt.expr.dict import DictVerbatim
+from synt.expr.empty import EMPTY
+from synt.expr.expr import Expression
+from synt.expr.expr import ExprPrecedence
+from synt.expr.expr import IntoExpression
+from synt.expr.fstring import FormatConversionType
+from synt.expr.fstring import FormatNode
+from synt.expr.fstring import FormatString
+from synt.expr.list import ListComprehension
+from synt.expr.list import ListVerbatim
+from synt.expr.modpath import ModPath
+from synt.expr.named_expr import NamedExpr
+from synt.expr.set import SetComprehension
+from synt.expr.set import SetVerbatim
+from synt.expr.subscript import Slice
+from synt.expr.subscript import Subscript
+from synt.expr.tuple import Tuple
+from synt.expr.unary_op import UnaryOp
+from synt.expr.unary_op import UnaryOpType
+from synt.stmt.assertion import Assert
+from synt.stmt.assign import Assignment
+from synt.stmt.block import Block
+from synt.stmt.branch import Branch
+from synt.stmt.cls import ClassDef
+from synt.stmt.context import With
+from synt.stmt.context import WithItem
+from synt.stmt.delete import Delete
+from synt.stmt.expression import ExprStatement
+from synt.stmt.fn import FnArg
+from synt.stmt.fn import FunctionDef
+from synt.stmt.importing import Import
+from synt.stmt.importing import ImportFrom
+from synt.stmt.keyword import BREAK
+from synt.stmt.keyword import CONTINUE
+from synt.stmt.keyword import PASS
+from synt.stmt.loop import ForLoop
+from synt.stmt.loop import WhileLoop
+from synt.stmt.match_case import Match
+from synt.stmt.match_case import MatchCase
+from synt.stmt.namespace import Global
+from synt.stmt.namespace import Nonlocal
+from synt.stmt.raising import Raise
+from synt.stmt.returns import Return
+from synt.stmt.stmt import IntoStatement
+from synt.stmt.stmt import Statement
+from synt.stmt.try_catch import ExceptionHandler
+from synt.stmt.try_catch import Try
+from synt.tokens.ident import Identifier
+from synt.tokens.ident import IdentifierExpr
+from synt.tokens.kv_pair import KVPair
+from synt.tokens.lit import Literal
+from synt.ty.type_param import TypeParamSpec
+from synt.ty.type_param import TypeVar
+from synt.ty.type_param import TypeVarTuple
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Sequence
+
+    from synt.stmt.importing import ImportType
+    from synt.ty.type_param import TypeParam
+
+
+type _Build[T] = Callable[[Sequence[Any]], T]
+"""Builds a fresh node from the placeholder values, indexed by placeholder number."""
+
+_PLACEHOLDER_RE = re.compile(r"__synt_ph(\d+)__")
+
+_BIN_OPS: dict[type[ast.AST], BinaryOpType] = {
+    ast.Add: BinaryOpType.Add,
+    ast.Sub: BinaryOpType.Sub,
+    ast.Mult: BinaryOpType.Mul,
+    ast.Div: BinaryOpType.Div,
+    ast.FloorDiv: BinaryOpType.FloorDiv,
+    ast.Mod: BinaryOpType.Mod,
+    ast.Pow: BinaryOpType.Pow,
+    ast.MatMult: BinaryOpType.At,
+    ast.LShift: BinaryOpType.LShift,
+    ast.RShift: BinaryOpType.RShift,
+    ast.BitAnd: BinaryOpType.BitAnd,
+    ast.BitOr: BinaryOpType.BitOr,
+    ast.BitXor: BinaryOpType.BitXor,
+    ast.And: BinaryOpType.BoolAnd,
+    ast.Or: BinaryOpType.BoolOr,
+    ast.Eq: BinaryOpType.Equal,
+    ast.NotEq: BinaryOpType.NotEqual,
+    ast.Lt: BinaryOpType.Less,
+    ast.LtE: BinaryOpType.LessEqual,
+    ast.Gt: BinaryOpType.Greater,
+    ast.GtE: BinaryOpType.GreaterEqual,
+    ast.Is: BinaryOpType.Is,
+    ast.IsNot: BinaryOpType.IsNot,
+    ast.In: BinaryOpType.In,
+    ast.NotIn: BinaryOpType.NotIn,
+}
+
+_UNARY_OPS: dict[type[ast.AST], UnaryOpType] = {
+    ast.UAdd: UnaryOpType.Positive,
+    ast.USub: UnaryOpType.Neg,
+    ast.Invert: UnaryOpType.BitNot,
+    ast.Not: UnaryOpType.BoolNot,
+}
+
+
+class Template:
+    r"""A parsed quasi-quote template.
+
+    Placeholders are written as `{name}`, following [`str.format`][str.format]'s syntax.
+    Literal braces, e.g. of a dict or set display, must be doubled (`{{`, `}}`).
+
+    A placeholder can appear anywhere an identifier or a string constant can,
+    including inside a longer identifier such as `get_{name}`.
+    What it is replaced with depends on the bound value:
+
+    - `str`, `int`, [`Identifier`][synt.tokens.ident.Identifier]: spliced into the surrounding source text.
+    - [`IntoExpression`][synt.expr.expr.IntoExpression] or a plain `int`/`float`/`bool`/`None`:
+        replaces the whole expression when the placeholder stands alone in an expression position.
+    - [`IntoStatement`][synt.stmt.stmt.IntoStatement] or a list of them:
+        replaces the whole statement when the placeholder stands alone as an expression statement.
+
+    Examples:
+        ```python
+        tmpl = Template("def get_{name}(self): return self._{name}")
+        assert tmpl.placeholders == ("name",)
+        func = tmpl.substitute(name="width")
+        assert func.into_code() == "def get_width(self):\n    return self._width"
+        ```
+    """
+
+    source: str
+    """Template source, with placeholders."""
+    placeholders: tuple[str, ...]
+    """Placeholder names, in order of first appearance."""
+    tree: ast.Expression | ast.Module
+    """Parsed syntax tree of the template."""
+    __build: _Build[Expression | Statement]
+
+    def __init__(self, source: str):
+        """Parse a template.
+
+        Prefer [`template`][synt.quasi.template], which caches parsed templates by their source.
+
+        Args:
+            source: Template source.
+
+        Raises:
+            ValueError: If a placeholder is not a plain identifier,
+                or the template uses syntax that Synt can't represent.
+            SyntaxError: If the template is not valid Python code.
+        """
+        names: list[str] = []
+        parts: list[str] = []
+        for literal_text, field, spec, conversion in string.Formatter().parse(source):
+            parts.append(literal_text)
+            if field is None:
+                continue
+            if not field.isidentifier() or spec or conversion:
+                raise ValueError(f"Invalid placeholder: `{{{field}}}`")
+            if field not in names:
+                names.append(field)
+            parts.append(f"__synt_ph{names.index(field)}__")
+        code = textwrap.dedent("".join(parts))
+
+        self.source = source
+        self.placeholders = tuple(names)
+        try:
+            self.tree = ast.parse(code, mode="eval")
+        except SyntaxError:
+            self.tree = ast.parse(code, mode="exec")
+
+        compiler = _Compiler()
+        if isinstance(self.tree, ast.Expression):
+            self.__build = compiler.expr(self.tree.body)
+        else:
+            statements = compiler.stmts(self.tree.body)
+            self.__build = lambda v: _statements_result(statements(v))
+
+    def substitute(self, **bindings: Any) -> Expression | Statement:
+        """Build a new Synt tree from the template.
+
+        Every call returns a fresh tree, so the result can be modified freely.
+
+        Args:
+            **bindings: Values of the placeholders.
+
+        Returns:
+            An expression if the template is a single expression,
+            a statement if it is a single statement,
+            or a [`Block`][synt.stmt.block.Block] otherwise.
+
+        Raises:
+            ValueError: If a placeholder is not bound, a binding matches no placeholder,
+                or a bound value can't be used where its placeholder appears.
+        """
+        missing = [name for name in self.placeholders if name not in bindings]
+        if missing:
+            raise ValueError(
+                f"Missing placeholder(s): {', '.join(f'`{t}`' for t in missing)}"
+            )
+        unknown = [name for name in bindings if name not in self.placeholders]
+        if unknown:
+            raise ValueError(
+                f"Unknown placeholder(s): {', '.join(f'`{t}`' for t in unknown)}"
+            )
+
+        return self.__build([bindings[name] for name in self.placeholders])
+
+    def __call__(self, **bindings: Any) -> Expression | Statement:
+        """Alias [`substitute`][synt.quasi.Template.substitute]."""
+        return self.substitute(**bindings)
+
+
+@lru_cache(maxsize=512)
+def template(source: str) -> Template:
+    r"""Parse a template, or return the cached one parsed from the same source.
+
+    Args:
+        source: Template source.
+
+    Raises:
+        ValueError: If a placeholder is not a plain identifier,
+            or the template uses syntax that Synt can't represent.
+        SyntaxError: If the template is not valid Python code.
+
+    Examples:
+        ```python
+        assert template("{a} + 1") is template("{a} + 1")
+        ```
+    """
+    return Template(source)
+
+
+def quote(source: str, **bindings: Any) -> Expression | Statement:
+    r"""Build a Synt tree from a snippet of Python code.
+
+    The snippet is parsed and compiled only once and cached, see [`Template`][synt.quasi.Template]
+    for the placeholder syntax.
+
+    Args:
+        source: Template source.
+        **bindings: Values of the placeholders.
+
+    Raises:
+        ValueError: If the placeholders don't match the bindings,
+            or the template uses syntax that Synt can't represent.
+        SyntaxError: If the template is not valid Python code.
+
+    Examples:
+        ```python
+        e = quote("{x} * 2 + offset", x=id_("width"))
+        assert e.into_code() == "width * 2 + offset"
+        getter = quote('''
+        def get_{name}(self):
+            return self._{name}
+        ''', name="size")
+        assert getter.into_code() == "def get_size(self):\n    return self._size"
+        ```
+    """
+    return template(source).substitute(**bindings)
+
+
+class _Compiler:
+    r"""Compile a template's syntax tree into builders of Synt nodes.
+
+    All syntax checks happen here, once per template.
+    The returned builders only construct nodes and substitute placeholder values.
+    """
+
+    # placeholders
+
+    def text(self, s: str) -> _Build[str]:
+        """Compile a piece of source text that may contain placeholders."""
+        if _PLACEHOLDER_RE.search(s) is None:
+            return lambda _: s
+
+        def build(v: Sequence[Any]) -> str:
+            return _PLACEHOLDER_RE.sub(lambda m: _splice(v[int(m.group(1))]), s)
+
+        return build
+
+    def ident(self, s: str) -> _Build[Identifier]:
+        """Compile a name."""
+        text = self.text(s)
+        return lambda v: Identifier(text(v))
+
+    def opt_expr(self, node: ast.expr | None) -> _Build[Expression | None]:
+        """Compile an optional expression."""
+        if node is None:
+            return lambda _: None
+        return self.expr(node)
+
+    def exprs(self, nodes: Sequence[ast.expr]) -> _Build[list[Expression]]:
+        """Compile a list of expressions."""
+        builds = [self.expr(x) for x in nodes]
+        return lambda v: [b(v) for b in builds]
+
+    # expressions
+
+    def expr(self, node: ast.expr) -> _Build[Expression]:
+        """Compile an expression."""
+        match node:
+            case ast.Name(id=name):
+                m = _PLACEHOLDER_RE.fullmatch(name)
+                if m is not None:
+                    idx = int(m.group(1))
+                    return lambda v: _expr_value(v[idx])
+                ident = self.ident(name)
+                return lambda v: IdentifierExpr(ident(v))
+            case ast.Constant(value=str(value)):
+                text = self.text(value)
+                return lambda v: Literal(repr(text(v)))
+            case ast.Constant(value=value):
+                src = "..." if value is Ellipsis else repr(value)
+                return lambda _: Literal(src)
+            case ast.Attribute(value=target, attr=attr):
+                target_b, attr_b = self.expr(target), self.text(attr)
+                return lambda v: Attribute(target_b(v), attr_b(v))
+            case ast.BinOp(left=left, op=op, right=right):
+                op_ty, left_b, right_b = (
+                    _BIN_OPS[type(op)],
+                    self.expr(left),
+                    self.expr(right),
+                )
+                return lambda v: _binary(op_ty, left_b(v), right_b(v))
+            case ast.BoolOp(op=op, values=values):
+                op_ty, builds = _BIN_OPS[type(op)], [self.expr(x) for x in values]
+
+                def build_bool(v: Sequence[Any]) -> Expression:
+                    res = builds[0](v)
+                    for b in builds[1:]:
+                        res = _binary(op_ty, res, b(v))
+                    return res
+
+                return build_bool
+            case ast.Compare(left=left, ops=ops, comparators=comparators):
+                left_b, wrap_left = self.expr(left), isinstance(left, ast.Compare)
+                chain = [
+                    (_BIN_OPS[type(op)], self.expr(x))
+                    for op, x in zip(ops, comparators, strict=True)
+                ]
+
+                def build_compare(v: Sequence[Any]) -> Expression:
+                    # chained comparisons are kept as unwrapped left-nested operations,
+                    # which are rendered as a chain again.
+                    res = left_b(v)
+                    if wrap_left and res.precedence == ExprPrecedence.Comparative:
+                        res = res.wrapped()
+                    for op_ty, b in chain:
+                        res = _binary(op_ty, res, b(v))
+                    return res
+
+                return build_compare
+            case ast.UnaryOp(op=op, operand=operand):
+                unary_ty, operand_b = _UNARY_OPS[type(op)], self.expr(operand)
+                return lambda v: UnaryOp(unary_ty, operand_b(v))
+            case ast.Call(func=func, args=args, keywords=keywords):
+                return self._call(func, args, keywords)
+            case ast.Subscript(value=target, slice=sl):
+                target_b = self.expr(target)
+                items = sl.elts if isinstance(sl, ast.Tuple) else [sl]
+                slices = [self._slice(x) for x in items]
+                return lambda v: Subscript(target_b(v), [s(v) for s in slices])
+            case ast.Lambda(args=arguments, body=body):
+                if (
+                    arguments.posonlyargs
+                    or arguments.vararg
+                    or arguments.kwonlyargs
+                    or arguments.kwarg
+                    or arguments.defaults
+                    or any(a.annotation is not None for a in arguments.args)
+                ):
+                    raise ValueError(
+                        "Only plain positional lambda arguments are supported."
+                    )
+                names = [self.ident(a.arg) for a in arguments.args]
+                body_b = self.expr(body)
+                return lambda v: Closure([n(v) for n in names], body_b(v))
+            case ast.IfExp(test=test, body=body, orelse=orelse):
+                test_b, body_b, orelse_b = (
+                    self.expr(test),
+                    self.expr(body),
+                    self.expr(orelse),
+                )
+                return lambda v: _condition(test_b(v), body_b(v), orelse_b(v))
+            case ast.NamedExpr(target=ast.Name(id=name), value=value):
+                ident, value_b = self.ident(name), self.expr(value)
+                return lambda v: _named(ident(v), value_b(v))
+            case ast.Tuple(elts=elts):
+                items_b = self.exprs(elts)
+                return lambda v: Tuple(*items_b(v))
+            case ast.List(elts=elts):
+                items_b = self.exprs(elts)
+                return lambda v: ListVerbatim(*items_b(v))
+            case ast.Set(elts=elts):
+                items_b = self.exprs(elts)
+                return lambda v: SetVerbatim(*items_b(v))
+            case ast.Dict(keys=keys, values=values):
+                if any(k is None for k in keys):
+                    raise ValueError("Dict unpacking (`**`) is not supported.")
+                pairs = [
+                    (self.expr(k), self.expr(x))  # type:ignore[arg-type]
+                    for k, x in zip(keys, values, strict=True)
+                ]
+                return lambda v: DictVerbatim(*(KVPair(k(v), x(v)) for k, x in pairs))
+            case ast.ListComp(elt=elt, generators=generators):
+                comp = self._comprehension(self.expr(elt), generators)
+                return lambda v: ListComprehension(comp(v))
+            case ast.SetComp(elt=elt, generators=generators):
+                comp = self._comprehension(self.expr(elt), generators)
+                return lambda v: SetComprehension(comp(v))
+            case ast.GeneratorExp(elt=elt, generators=generators):
+                comp = self._comprehension(self.expr(elt), generators)
+                return lambda v: GeneratorComprehension(comp(v))
+            case ast.DictComp(key=key, value=value, generators=generators):
+                key_b, value_b = self.expr(key), self.expr(value)
+                comp = self._comprehension(
+                    lambda v: KVPair(key_b(v), value_b(v)), generators
+                )
+                return lambda v: DictComprehension(comp(v))
+            case ast.JoinedStr(values=values):
+                parts = [self._fstring_part(x) for x in values]
+                return lambda v: FormatString(*(p(v) for p in parts))
+            case ast.Await(value=value):
+                value_b = self.expr(value)
+                return lambda v: UnaryOp(UnaryOpType.Await, value_b(v))
+            case ast.Yield(value=value):
+                value_b = self.expr(value) if value is not None else lambda _: EMPTY
+                return lambda v: UnaryOp(UnaryOpType.Yield, value_b(v))
+            case ast.YieldFrom(value=value):
+                value_b = self.expr(value)
+                return lambda v: UnaryOp(UnaryOpType.YieldFrom, value_b(v))
+            case ast.Starred(value=value):
+                value_b = self.expr(value)
+                return lambda v: UnaryOp(UnaryOpType.Starred, value_b(v))
+            case _:
+                raise ValueError(
+                    f"Unsupported expression in template: `{ast.unparse(node)}`"
+                )
+
+    def _call(
+        self, func: ast.expr, args: list[ast.expr], keywords: list[ast.keyword]
+    ) -> _Build[Expression]:
+        """Compile a call."""
+        func_b, args_b = self.expr(func), self.exprs(args)
+        unpacked = self.exprs([kw.value for kw in keywords if kw.arg is None])
+        kws = [(self.ident(kw.arg), self.expr(kw.value)) for kw in keywords if kw.arg]
+
+        def build(v: Sequence[Any]) -> Expression:
+            pos: list[IntoExpression] = list(args_b(v))
+            pos.extend(UnaryOp(UnaryOpType.DoubleStarred, x) for x in unpacked(v))
+            return Call(func_b(v), pos, [Keyword(k(v), x(v)) for k, x in kws])
+
+        return build
+
+    def _slice(self, node: ast.expr) -> _Build[Slice | Expression]:
+        """Compile a subscript item."""
+        if isinstance(node, ast.Slice):
+            lower, upper, step = (
+                self.opt_expr(node.lower),
+                self.opt_expr(node.upper),
+                self.opt_expr(node.step),
+            )
+            return lambda v: Slice(lower(v) or EMPTY, upper(v) or EMPTY, step(v))
+        return self.expr(node)
+
+    def _targets(self, node: ast.expr) -> list[_Build[Identifier]]:
+        """Compile a comprehension target."""
+        match node:
+            case ast.Name(id=name):
+                return [self.ident(name)]
+            case ast.Tuple(elts=elts) if all(isinstance(x, ast.Name) for x in elts):
+                return [self.ident(x.id) for x in elts]  # type:ignore[attr-defined]
+            case _:
+                raise ValueError(
+                    f"Unsupported comprehension target: `{ast.unparse(node)}`"
+                )
+
+    def _comprehension(
+        self, elt: _Build[Expression], generators: list[ast.comprehension]
+    ) -> _Build[Comprehension]:
+        """Compile the body of a comprehension."""
+        nodes = [
+            (
+                self._targets(g.target),
+                self.expr(g.iter),
+                self.exprs(g.ifs),
+                bool(g.is_async),
+            )
+            for g in generators
+        ]
+        return lambda v: Comprehension(
+            elt(v),
+            [
+                ComprehensionNode([t(v) for t in target], it(v), ifs(v), is_async)  # type:ignore[arg-type]
+                for target, it, ifs, is_async in nodes
+            ],
+        )
+
+    def _fstring_part(self, node: ast.expr) -> _Build[FormatNode | str]:
+        """Compile a part of an f-string."""
+        match node:
+            case ast.Constant(value=str(value)):
+                text = self.text(value)
+                return lambda v: _fstring_text(text(v))
+            case ast.FormattedValue(value=value, conversion=conv, format_spec=spec):
+                value_b, conversion = self.expr(value), FormatConversionType(conv)
+                if spec is None:
+                    return lambda v: FormatNode(value_b(v), None, conversion)
+                parts = [self._fstring_part(x) for x in spec.values]  # type:ignore[attr-defined]
+
+                def build(v: Sequence[Any]) -> FormatNode | str:
+                    spec_text = "".join(
+                        x if isinstance(x, str) else x.into_code()
+                        for x in (p(v) for p in parts)
+                    )
+                    return FormatNode(value_b(v), spec_text, conversion)
+
+                return build
+            case _:
+                raise ValueError(
+                    f"Unsupported f-string part in template: `{ast.unparse(node)}`"
+                )
+
+    # statements
+
+    def stmts(self, nodes: list[ast.stmt]) -> _Build[list[Statement]]:
+        """Compile a list of statements, splicing statement placeholders."""
+        parts: list[tuple[bool, _Build[Any]]] = []
+        for node in nodes:
+            if isinstance(node, ast.Expr) and isinstance(node.value, ast.Name):
+                m = _PLACEHOLDER_RE.fullmatch(node.value.id)
+                if m is not None:
+                    idx = int(m.group(1))
+                    parts.append((True, lambda v, idx=idx: _stmt_value(v[idx])))  # type:ignore[misc]
+                    continue
+            parts.append((False, self.stmt(node)))
+
+        def build(v: Sequence[Any]) -> list[Statement]:
+            res: list[Statement] = []
+            for spliced, b in parts:
+                if spliced:
+                    res.extend(b(v))
+                else:
+                    res.append(b(v))
+            return res
+
+        return build
+
+    def block(self, nodes: list[ast.stmt]) -> _Build[Block]:
+        """Compile a list of statements into a block builder."""
+        statements = self.stmts(nodes)
+        return lambda v: Block(*statements(v))
+
+    def opt_block(self, nodes: list[ast.stmt]) -> _Build[Block | None]:
+        """Compile an optional block, which is `None` if there are no statements."""
+        if not nodes:
+            return lambda _: None
+        return self.block(nodes)
+
+    def stmt(self, node: ast.stmt) -> _Build[Statement]:
+        """Compile a statement."""
+        match node:
+            case ast.Expr(value=value):
+                value_b = self.expr(value)
+                return lambda v: ExprStatement(value_b(v))
+            case ast.FunctionDef() | ast.AsyncFunctionDef():
+                return self._function(node)
+            case ast.ClassDef():
+                return self._class(node)
+            case ast.Return(value=value):
+                ret_b = self.opt_expr(value)
+                return lambda v: Return(ret_b(v))
+            case ast.Delete(targets=[target]):
+                target_b = self.expr(target)
+                return lambda v: Delete(target_b(v))
+            case ast.Delete(targets=targets):
+                targets_b = self.exprs(targets)
+                return lambda v: Delete(Tuple(*targets_b(v)))
+            case ast.Assign(targets=[target], value=value):
+                target_b, value_b = self.expr(target), self.expr(value)
+                return lambda v: Assignment(target_b(v)).assign(value_b(v))
+            case ast.AnnAssign(target=target, annotation=annotation, value=value):
+                target_b, ann_b, opt_b = (
+                    self.expr(target),
+                    self.expr(annotation),
+                    self.opt_expr(value),
+                )
+
+                def build_ann(v: Sequence[Any]) -> Statement:
+                    ass = Assignment(target_b(v)).type(ann_b(v))
+                    ass.value = opt_b(v)
+                    return ass
+
+                return build_ann
+            case ast.For(target=target, iter=it, body=body, orelse=orelse):
+                target_b, iter_b = self.expr(target), self.expr(it)
+                body_b, orelse_b = self.block(body), self.opt_block(orelse)
+
+                def build_for(v: Sequence[Any]) -> Statement:
+                    loop = ForLoop(target_b(v), iter_b(v), body_b(v))
+                    loop.orelse = orelse_b(v)
+                    return loop
+
+                return build_for
+            case ast.While(test=test, body=body, orelse=orelse):
+                test_b, body_b, orelse_b = (
+                    self.expr(test),
+                    self.block(body),
+                    self.opt_block(orelse),
+                )
+
+                def build_while(v: Sequence[Any]) -> Statement:
+                    loop = WhileLoop(test_b(v), body_b(v))
+                    loop.orelse = orelse_b(v)
+                    return loop
+
+                return build_while
+            case ast.If():
+                return self._branch(node)
+            case ast.With(items=items, body=body):
+                with_items = [
+                    (self.expr(x.context_expr), self.opt_expr(x.optional_vars))
+                    for x in items
+                ]
+                body_b = self.block(body)
+
+                def build_with(v: Sequence[Any]) -> Statement:
+                    res: list[WithItem] = []
+                    for ctx, asname in with_items:
+                        item = WithItem(ctx(v))
+                        item.asname = asname(v)
+                        res.append(item)
+                    return With(res, body_b(v))
+
+                return build_with
+            case ast.Match(subject=subject, cases=cases):
+                subject_b = self.expr(subject)
+                cases_b = [
+                    (
+                        self._pattern(c.pattern),
+                        self.opt_expr(c.guard),
+                        self.block(c.body),
+                    )
+                    for c in cases
+                ]
+
+                def build_match(v: Sequence[Any]) -> Statement:
+                    m = Match(subject_b(v))
+                    m.cases = [MatchCase(p(v), g(v), b(v)) for p, g, b in cases_b]
+                    return m
+
+                return build_match
+            case ast.Raise(exc=exc, cause=cause):
+                exc_b, cause_b = self.opt_expr(exc), self.opt_expr(cause)
+
+                def build_raise(v: Sequence[Any]) -> Statement:
+                    r = Raise(exc_b(v))
+                    r.cause = cause_b(v)
+                    return r
+
+                return build_raise
+            case ast.Try() | ast.TryStar():
+                return self._try(node)
+            case ast.Assert(test=test, msg=msg):
+                test_b, msg_b = self.expr(test), self.opt_expr(msg)
+                return lambda v: Assert(test_b(v), msg_b(v))
+            case ast.Import(names=names):
+                names_b = [self._import_name(x) for x in names]
+                return lambda v: Import(*(n(v) for n in names_b))
+            case ast.ImportFrom(module=module, names=names, level=level):
+                module_b = self.text(module or "")
+                names_b = [self._import_name(x) for x in names]
+
+                def build_from(v: Sequence[Any]) -> Statement:
+                    mod = module_b(v)
+                    path = ModPath(
+                        *(Identifier(x) for x in mod.split(".") if mod), depth=level
+                    )
+                    return ImportFrom(path, *(n(v) for n in names_b))
+
+                return build_from
+            case ast.Global(names=names):
+                idents = [self.ident(x) for x in names]
+                return lambda v: Global(*(i(v) for i in idents))
+            case ast.Nonlocal(names=names):
+                idents = [self.ident(x) for x in names]
+                return lambda v: Nonlocal(*(i(v) for i in idents))
+            case ast.Pass():
+                return lambda _: PASS
+            case ast.Break():
+                return lambda _: BREAK
+            case ast.Continue():
+                return lambda _: CONTINUE
+            case _:
+                raise ValueError(
+                    f"Unsupported statement in template: `{ast.unparse(node)}`"
+                )
+
+    def _function(
+        self, node: ast.FunctionDef | ast.AsyncFunctionDef
+    ) -> _Build[Statement]:
+        """Compile a function definition."""
+        is_async = isinstance(node, ast.AsyncFunctionDef)
+        decorators, type_params = (
+            self.exprs(node.decorator_list),
+            self._type_params(node.type_params),
+        )
+        args, returns = self._args(node.args), self.opt_expr(node.returns)
+        name, body = self.ident(node.name), self.block(node.body)
+        return lambda v: FunctionDef(
+            decorators=decorators(v),
+            is_async=is_async,
+            type_params=type_params(v),
+            args=[a(v) for a in args],
+            returns=returns(v),
+            name=name(v),
+            body=body(v),
+        )
+
+    def _class(self, node: ast.ClassDef) -> _Build[Statement]:
+        """Compile a class definition."""
+        if any(kw.arg is None for kw in node.keywords):
+            raise ValueError("Class keyword unpacking (`**`) is not supported.")
+        decorators, type_params = (
+            self.exprs(node.decorator_list),
+            self._type_params(node.type_params),
+        )
+        name, bases, body = (
+            self.ident(node.name),
+            self.exprs(node.bases),
+            self.block(node.body),
+        )
+        kws = [(self.ident(kw.arg), self.expr(kw.value)) for kw in node.keywords]  # type:ignore[arg-type]
+        return lambda v: ClassDef(
+            decorators=decorators(v),
+            type_params=type_params(v),
+            name=name(v),
+            cargs=bases(v),
+            ckwargs=[(k(v), x(v)) for k, x in kws],
+            body=body(v),
+        )
+
+    def _branch(self, node: ast.If) -> _Build[Statement]:
+        """Compile an `if` statement, flattening `elif` chains."""
+        tests: list[tuple[_Build[Expression], _Build[Block]]] = []
+        curr = node
+        while True:
+            tests.append((self.expr(curr.test), self.block(curr.body)))
+            if len(curr.orelse) == 1 and isinstance(curr.orelse[0], ast.If):
+                curr = curr.orelse[0]
+                continue
+            break
+        fallback = self.opt_block(curr.orelse)
+
+        def build(v: Sequence[Any]) -> Statement:
+            branch = Branch()
+            branch.tests = [(t(v), b(v)) for t, b in tests]
+            branch.fallback = fallback(v)
+            return branch
+
+        return build
+
+    def _try(self, node: ast.Try | ast.TryStar) -> _Build[Statement]:
+        """Compile a `try` statement."""
+        is_group = isinstance(node, ast.TryStar)
+        body, orelse, final = (
+            self.block(node.body),
+            self.opt_block(node.orelse),
+            self.opt_block(node.finalbody),
+        )
+        handlers = [
+            (
+                self.opt_expr(h.type),
+                self.ident(h.name) if h.name is not None else lambda _: None,
+                self.block(h.body),
+            )
+            for h in node.handlers
+        ]
+        return lambda v: Try(
+            body(v),
+            [ExceptionHandler(t(v), is_group, n(v), b(v)) for t, n, b in handlers],
+            orelse(v),
+            final(v),
+        )
+
+    def _args(self, arguments: ast.arguments) -> list[_Build[FnArg]]:
+        """Compile a function's argument list."""
+        if arguments.posonlyargs:
+            raise ValueError("Positional-only arguments are not supported.")
+
+        res: list[_Build[FnArg]] = []
+        defaults: list[ast.expr | None] = [None] * (
+            len(arguments.args) - len(arguments.defaults)
+        )
+        defaults.extend(arguments.defaults)
+        for a, default in zip(arguments.args, defaults, strict=True):
+            res.append(self._arg(a, default))
+        if arguments.vararg is not None:
+            res.append(self._arg(arguments.vararg, None, is_vararg=True))
+        for a, default in zip(arguments.kwonlyargs, arguments.kw_defaults, strict=True):
+            res.append(self._arg(a, default, is_kwonly=True))
+        if arguments.kwarg is not None:
+            res.append(self._arg(arguments.kwarg, None, is_kwarg=True))
+        return res
+
+    def _arg(
+        self,
+        a: ast.arg,
+        default: ast.expr | None,
+        is_vararg: bool = False,
+        is_kwarg: bool = False,
+        is_kwonly: bool = False,
+    ) -> _Build[FnArg]:
+        """Compile a single function argument."""
+        name, ann, default_b = (
+            self.ident(a.arg),
+            self.opt_expr(a.annotation),
+            self.opt_expr(default),
+        )
+        return lambda v: FnArg(
+            name(v), ann(v), default_b(v), is_vararg, is_kwarg, is_kwonly
+        )
+
+    def _type_params(self, params: list[ast.type_param]) -> _Build[list[TypeParam]]:
+        """Compile type parameters."""
+        builds: list[_Build[TypeParam]] = []
+        for p in params:
+            match p:
+                case ast.TypeVar(name=name, bound=bound):
+                    ident, bound_b = self.ident(name), self.opt_expr(bound)
+                    builds.append(
+                        lambda v, i=ident, b=bound_b: TypeVar(i(v), b(v))  # type:ignore[misc]
+                    )
+                case ast.TypeVarTuple(name=name):
+                    ident = self.ident(name)
+                    builds.append(lambda v, i=ident: TypeVarTuple(i(v)))  # type:ignore[misc]
+                case ast.ParamSpec(name=name):
+                    ident = self.ident(name)
+                    builds.append(lambda v, i=ident: TypeParamSpec(i(v)))  # type:ignore[misc]
+        return lambda v: [b(v) for b in builds]
+
+    def _import_name(self, alias: ast.alias) -> _Build[ImportType]:
+        """Compile an imported name."""
+        if alias.name == "*":
+            return lambda _: "*"
+        name_b = self.text(alias.name)
+        asname = self.ident(alias.asname) if alias.asname is not None else None
+
+        def build(v: Sequence[Any]) -> ImportType:
+            path = ModPath(*(Identifier(x) for x in name_b(v).split(".")))
+            if asname is not None:
+                return Alias(path, asname(v))
+            if len(path.names) == 1:
+                return path.names[0]
+            return path
+
+        return build
+
+    def _pattern(self, node: ast.pattern) -> _Build[Expression]:
+        """Compile a `case` pattern into a builder of its expression form."""
+        match node:
+            case ast.MatchValue(value=value):
+                return self.expr(value)
+            case ast.MatchSingleton(value=value):
+                src = repr(value)
+                return lambda _: Literal(src)
+            case ast.MatchSequence(patterns=patterns):
+                items = [self._pattern(x) for x in patterns]
+                return lambda v: ListVerbatim(*(p(v) for p in items))
+            case ast.MatchMapping(keys=keys, patterns=patterns, rest=None):
+                pairs = [
+                    (self.expr(k), self._pattern(p))
+                    for k, p in zip(keys, patterns, strict=True)
+                ]
+                return lambda v: DictVerbatim(*(KVPair(k(v), p(v)) for k, p in pairs))
+            case ast.MatchClass(
+                cls=cls, patterns=patterns, kwd_attrs=kwd_attrs, kwd_patterns=kwd
+            ):
+                cls_b = self.expr(cls)
+                pos = [self._pattern(x) for x in patterns]
+                kws = [
+                    (self.ident(k), self._pattern(p))
+                    for k, p in zip(kwd_attrs, kwd, strict=True)
+                ]
+                return lambda v: Call(
+                    cls_b(v), [p(v) for p in pos], [Keyword(k(v), p(v)) for k, p in kws]
+                )
+            case ast.MatchStar(name=None):
+                return lambda _: UnaryOp(UnaryOpType.Starred, Literal("_"))
+            case ast.MatchStar(name=str(name)):
+                ident = self.ident(name)
+                return lambda v: UnaryOp(UnaryOpType.Starred, IdentifierExpr(ident(v)))
+            case ast.MatchAs(pattern=None, name=None):
+                return lambda _: Literal("_")
+            case ast.MatchAs(pattern=None, name=str(name)):
+                ident = self.ident(name)
+                return lambda v: IdentifierExpr(ident(v))
+            case ast.MatchAs(pattern=pattern, name=str(name)) if pattern is not None:
+                inner, ident = self._pattern(pattern), self.ident(name)
+                return lambda v: Alias(inner(v), ident(v))
+            case ast.MatchOr(patterns=patterns):
+                alternatives = [self._pattern(x) for x in patterns]
+
+                def build(v: Sequence[Any]) -> Expression:
+                    res = alternatives[0](v)
+                    for p in alternatives[1:]:
+                        res = BinaryOp(BinaryOpType.BitOr, res, p(v))
+                    return res
+
+                return build
+            case _:
+                raise ValueError(
+                    f"Unsupported pattern in template: `{ast.unparse(node)}`"
+                )
+
+
+def _binary(op: BinaryOpType, lhs: Expression, rhs: Expression) -> BinaryOp:
+    """Build a binary operation, keeping the associativity of the source."""
+    prec = op.to_precedence()
+    if op == BinaryOpType.Pow:
+        # right-associative
+        if lhs.precedence >= prec:
+            lhs = lhs.wrapped()
+    elif rhs.precedence >= prec:
+        rhs = rhs.wrapped()
+    return BinaryOp(op, lhs, rhs)
+
+
+def _condition(test: Expression, body: Expression, orelse: Expression) -> Condition:
+    """Build a conditional expression, keeping the associativity of the source."""
+    prec = ExprPrecedence.Conditional
+    # `a if b else c if d else e` nests in the `else` branch
+    if test.precedence >= prec:
+        test = test.wrapped()
+    if body.precedence >= prec:
+        body = body.wrapped()
+    return Condition(test, body, orelse)
+
+
+def _named(ident: Identifier, value: Expression) -> Expression:
+    """Build an assignment expression.
+
+    Unlike other operations, assignment expressions are only valid without
+    parentheses in a few places, like arguments, so they are always parenthesized.
+    """
+    if value.precedence >= ExprPrecedence.NamedExpr:
+        value = value.wrapped()
+    return NamedExpr(ident, value).wrapped()
+
+
+def _splice(value: Any) -> str:
+    """Convert a value spliced into source text."""
+    if isinstance(value, Identifier):
+        return value.raw
+    if isinstance(value, str | int):
+        return str(value)
+    raise ValueError(
+        f"Cannot splice {type(value).__name__} into source text: {value!r}"
+    )
+
+
+def _expr_value(value: Any) -> Expression:
+    """Convert a value substituted for a whole expression."""
+    if isinstance(value, IntoExpression):
+        return value.into_expression()
+    if value is None or isinstance(value, bool | int | float):
+        return Literal(repr(value))
+    return IdentifierExpr(Identifier(_splice(value)))
+
+
+def _stmt_value(value: Any) -> list[Statement]:
+    """Convert a value substituted for a whole statement."""
+    if isinstance(value, list | tuple):
+        return [_into_statement(x) for x in value]
+    return [_into_statement(value)]
+
+
+def _into_statement(value: Any) -> Statement:
+    """Convert a single value substituted for a statement."""
+    if isinstance(value, IntoStatement):
+        return value.into_statement()
+    return ExprStatement(_expr_value(value))
+
+
+def _statements_result(statements: list[Statement]) -> Expression | Statement:
+    """Unwrap a single statement from a template's statement list."""
+    if len(statements) == 1:
+        return statements[0]
+    return Block(*statements)
+
+
+def _fstring_text(s: str) -> str:
+    """Escape a string constant so it can be embedded in an f-string's source."""
+    text = s.encode("unicode_escape").decode("ascii").replace('"', '\\"')
+    return text.replace("{", "{{").replace("}", "}}")
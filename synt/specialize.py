@@ -0,0 +1,130 @@
+r"""## Specialization
+
+Compile generated functions on demand and keep a bounded number of them around.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "Specializer",
+]
+
+
+import builtins
+
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Literal
+
+from synt.cache import LFUCache
+from synt.cache import LRUCache
+from synt.stmt.fn import FunctionDef
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Hashable
+    from collections.abc import Mapping
+
+    from synt.cache import BoundedCache
+    from synt.cache import CacheStats
+
+
+class Specializer:
+    r"""Cache of functions generated and compiled for specific key arguments.
+
+    The generator receives the key arguments and returns a
+    [`FunctionDef`][synt.stmt.fn.FunctionDef], which is compiled once per distinct key.
+    Callers requesting a key that is being compiled wait for that compilation instead of
+    compiling the function again.
+    Once `maxsize` specializations are cached, the least recently (`"lru"`)
+    or least frequently (`"lfu"`) used one is evicted.
+
+    Examples:
+        ```python
+        from synt.specialize import Specializer
+        def make_getter(index: int) -> FunctionDef:
+            return def_(id_(f"get_{index}"))(arg(id_("row"))).block(
+                return_(id_("row").expr()[litint(index)])
+            )
+        getters = Specializer(make_getter, maxsize=16)
+        assert getters(1)(("a", "b")) == "b"
+        assert getters(1) is getters(1)
+        assert getters.stats().hits == 1
+        ```
+    """
+
+    generator: Callable[..., FunctionDef]
+    """Function generating the definition for the given key arguments."""
+    globals: Mapping[str, Any]
+    """Global namespace of the compiled functions."""
+
+    __cache: BoundedCache[Hashable, Callable[..., Any]]
+
+    def __init__(
+        self,
+        generator: Callable[..., FunctionDef],
+        maxsize: int = 128,
+        policy: Literal["lru", "lfu"] = "lru",
+        globals: Mapping[str, Any] | None = None,
+    ):
+        """Initialize a specializer.
+
+        Args:
+            generator: Function generating the definition for the given key arguments.
+                Its arguments must be hashable.
+            maxsize: Maximum number of compiled functions to keep.
+            policy: Eviction policy, `"lru"` (least recently used) or `"lfu"` (least frequently used).
+            globals: Global namespace of the compiled functions. Defaults to builtins only.
+
+        Raises:
+            ValueError: If the policy is unknown, or `maxsize` is not positive.
+        """
+        match policy:
+            case "lru":
+                self.__cache = LRUCache(maxsize)
+            case "lfu":
+                self.__cache = LFUCache(maxsize)
+            case _:
+                raise ValueError(f"Unknown eviction policy: {policy}")
+        self.generator = generator
+        self.globals = globals if globals is not None else {}
+
+    def __call__(self, *args: Hashable, **kwargs: Hashable) -> Callable[..., Any]:
+        """Get the function specialized for the given key arguments, compiling it on a miss.
+
+        Args:
+            args: Positional key arguments passed to the generator.
+            kwargs: Keyword key arguments passed to the generator.
+
+        Raises:
+            TypeError: If the generator does not return a `FunctionDef`.
+        """
+        key = (args, tuple(sorted(kwargs.items())))
+        return self.__cache.get_or_create(key, lambda: self.__compile(args, kwargs))
+
+    def __compile(
+        self, args: tuple[Hashable, ...], kwargs: dict[str, Hashable]
+    ) -> Callable[..., Any]:
+        """Generate and compile a specialization."""
+        fn = self.generator(*args, **kwargs)
+        if not isinstance(fn, FunctionDef):
+            raise TypeError(
+                f"Specializer generator must return a FunctionDef, got {type(fn).__name__}."
+            )
+        name = fn.name.raw
+        namespace = dict(self.globals)
+        namespace.setdefault("__builtins__", builtins)
+        code = compile(fn.into_code(), f"<synt-specialized {name}>", "exec")
+        exec(code, namespace)
+        compiled: Callable[..., Any] = namespace[name]
+        return compiled
+
+    def stats(self) -> CacheStats:
+        """Get hit, miss and eviction counts of the cached specializations."""
+        return self.__cache.stats()
+
+    def clear(self) -> None:
+        """Drop all compiled specializations."""
+        self.__cache.clear()
@@ -12,6 +12,7 @@ __all__ = [
     "delete",
     "assign",
     "assertion",
+    "debug",
     "raising",
     "importing",
     "branch",
@@ -29,6 +30,7 @@ from . import block
 from . import branch
 from . import cls
 from . import context
+from . import debug
 from . import decorator
 from . import delete
 from . import expression
@@ -35,6 +35,8 @@ class Assert(Statement):
     msg: Expression | None
     """The assert message."""
 
+    child_fields = ("test", "msg")
+
     def __init__(self, test: IntoExpression, msg: IntoExpression | None = None):
         """Initialize the assertion.
 
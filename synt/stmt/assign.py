@@ -45,6 +45,8 @@ class Assignment(Statement):
     value: Expression | None
     """The value to be assigned."""
 
+    child_fields = ("target", "target_ty", "value")
+
     def __init__(self, target: IntoExpression):
         """Initialize a new assignment statement.
 
@@ -14,6 +14,8 @@ class Block(Statement):
     body: list[Statement]
     """Code lines in the block."""
 
+    child_fields = ("body",)
+
     def __init__(self, *args: Statement):
         """Initialize a new code block.
 
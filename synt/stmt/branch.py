@@ -75,6 +75,8 @@ class Branch(Statement):
     fallback: Block | None
     """Fallback branch, aka `else`."""
 
+    child_fields = ("tests", "fallback")
+
     def __init__(self) -> None:
         """Initialize a new empty branch statement.
 
@@ -75,6 +75,8 @@ class ClassDef(Statement):
     body: Block
     """Function body."""
 
+    child_fields = ("decorators", "name", "type_params", "cargs", "ckwargs", "body")
+
     def __init__(
         self,
         decorators: list[Expression],
@@ -45,6 +45,8 @@ class WithItem(IntoCode):
         a `tuple`, `list`, or a single `Identifier`.
     """
 
+    child_fields = ("context", "asname")
+
     def __init__(self, context: IntoExpression):
         """Initialize a new `with` item.
 
@@ -94,6 +96,8 @@ class With(Statement):
     body: Block
     """Statement block."""
 
+    child_fields = ("items", "body")
+
     def __init__(self, items: list[WithItem], body: Block):
         """Initialize a `with` statement.
 
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+
+__all__ = [
+    "Debug",
+    "debug_",
+]
+
+
+from synt.stmt.block import Block
+from synt.stmt.stmt import Statement
+
+
+class Debug(Statement):
+    r"""Statements tagged as debug-only, like logging or consistency checks.
+
+    They are rendered as is, like the statements of the enclosing block.
+    [`DebugStripping`][synt.passes.debug.DebugStripping] removes them along with assertions,
+    or guards them with `if __debug__:`, so that the same tree serves both builds.
+
+    Examples:
+        ```python
+        check = debug_(id_("check").expr().call(id_("x")).stmt())
+        assert check.into_code() == "check(x)"
+        file = File(check, return_(id_("x")))
+        assert file.into_str() == "check(x)\nreturn x"
+        assert file.into_str(debug=False) == "return x"
+        ```
+    """
+
+    body: Block
+    """Debug-only statements."""
+
+    child_fields = ("body",)
+
+    def __init__(self, *statements: Statement):
+        """Initialize debug-only statements.
+
+        Args:
+            statements: Debug-only statements.
+        """
+        self.body = Block(*statements)
+
+    def indented(self, indent_width: int, indent_atom: str) -> str:
+        if not self.body.body:
+            return f"{indent_width * indent_atom}pass"
+        return self.body.indented(indent_width, indent_atom)
+
+
+debug_ = Debug
+"""Alias [`Debug`][synt.stmt.debug.Debug]."""
@@ -33,6 +33,8 @@ class Delete(Statement):
     target: Expression
     """The expression to be deleted."""
 
+    child_fields = ("target",)
+
     def __init__(self, target: IntoExpression):
         """Initialize the delete statement.
 
@@ -23,6 +23,8 @@ class ExprStatement(Statement):
     expr: Expression
     """Inner expression."""
 
+    child_fields = ("expr",)
+
     def __init__(self, expr: IntoExpression):
         """Initialize a nwe statement.
 
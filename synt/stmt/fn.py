@@ -7,6 +7,7 @@ __all__ = [
     "arg",
     "vararg",
     "kwarg",
+    "kwonly",
     "FunctionDefBuilder",
     "def_",
     "async_def",
@@ -51,6 +52,10 @@ class FnArg(IntoCode):
     """Whether the argument is a variable argument, or `*args`."""
     is_kwarg: bool
     """Whether the argument is a keyword argument, or `**kwargs`."""
+    is_kwonly: bool
+    """Whether the argument is keyword-only, i.e. follows `*` or `*args`."""
+
+    child_fields = ("name", "annotation", "default_expr")
 
     def __init__(
         self,
@@ -59,6 +64,7 @@ class FnArg(IntoCode):
         default: IntoExpression | None = None,
         is_vararg: bool = False,
         is_kwarg: bool = False,
+        is_kwonly: bool = False,
     ):
         """Initialize a new argument.
 
@@ -68,6 +74,7 @@ class FnArg(IntoCode):
             default: Default value for the argument.
             is_vararg: Whether the argument is a variable argument, or `*args`.
             is_kwarg: Whether the argument is a keyword argument, or `**kwargs`.
+            is_kwonly: Whether the argument is keyword-only.
         """
         self.name = name
         self.annotation = (
@@ -76,6 +83,7 @@ class FnArg(IntoCode):
         self.default_expr = default.into_expression() if default is not None else None
         self.is_vararg = is_vararg
         self.is_kwarg = is_kwarg
+        self.is_kwonly = is_kwonly
 
     def vararg(self) -> Self:
         """Set the argument as a variable argument."""
@@ -87,6 +95,15 @@ class FnArg(IntoCode):
         self.is_kwarg = True
         return self
 
+    def kwonly(self) -> Self:
+        """Set the argument as keyword-only.
+
+        A bare `*` is rendered before the first keyword-only argument
+        of a function without `*args`.
+        """
+        self.is_kwonly = True
+        return self
+
     def annotate(self, annotation: IntoExpression) -> Self:
         """Add annotation for the argument.
 
@@ -142,6 +159,20 @@ def vararg(i: Identifier) -> FnArg:
     return FnArg(i).vararg()
 
 
+def kwonly(i: Identifier) -> FnArg:
+    r"""Initialize a keyword-only argument.
+
+    This is equivalent to `FnArg(...).kwonly()`.
+
+    Examples:
+        ```python
+        f = def_(id_("f"))(id_("a"), kwonly(id_("b")).default(NONE)).block(PASS)
+        assert f.into_code() == "def f(a, *, b = None):\n    pass"
+        ```
+    """
+    return FnArg(i).kwonly()
+
+
 def kwarg(i: Identifier) -> FnArg:
     r"""Initialize a keyword argument.
 
@@ -220,6 +251,8 @@ class FunctionDef(Statement):
     body: Block
     """Function body."""
 
+    child_fields = ("decorators", "name", "type_params", "args", "returns", "body")
+
     def __init__(
         self,
         decorators: list[Expression],
@@ -250,13 +283,25 @@ class FunctionDef(Statement):
             if not self.type_params
             else f"[{', '.join(x.into_code() for x in self.type_params)}]"
         )
-        args = ", ".join(a.into_code() for a in self.args)
+        args = ", ".join(_args(self.args))
         returns = f" -> {self.returns.into_code()}" if self.returns else ""
         body = self.body.indented(indent_width + 1, indent_atom)
         async_ = "async " if self.is_async else ""
         return f"{decorators}{indent}{async_}def {self.name.into_code()}{type_param}({args}){returns}:\n{body}"
 
 
+def _args(args: list[FnArg]) -> list[str]:
+    """Render arguments, with a bare `*` before keyword-only ones if needed."""
+    res = []
+    star = False
+    for a in args:
+        if a.is_kwonly and not star:
+            res.append("*")
+        star = star or a.is_vararg or a.is_kwonly
+        res.append(a.into_code())
+    return res
+
+
 class FunctionDefBuilder:
     r"""Function definition builder.
 
@@ -45,6 +45,8 @@ class Import(Statement):
     names: list[ImportType]
     """Identifiers that are imported."""
 
+    child_fields = ("names",)
+
     def __init__(self, *names: ImportType):
         """Initialize a new `import` statement.
 
@@ -98,6 +100,8 @@ class ImportFrom(Statement):
     names: list[ImportType]
     """Identifiers that are imported."""
 
+    child_fields = ("module", "names")
+
     def __init__(self, module: ModPath, *names: ImportType):
         """Initialize a new `from ... import` statement.
 
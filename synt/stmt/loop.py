@@ -71,6 +71,8 @@ class ForLoop(Statement):
     orelse: Block | None
     """The body of the fallback block, aka `for ... else`."""
 
+    child_fields = ("target", "iter", "body", "orelse")
+
     def __init__(self, target: IntoExpression, it: IntoExpression, body: Block):
         """Initialize the loop.
 
@@ -167,7 +169,7 @@ for_ = ForLoopBuilder
 """Alias [`ForLoopBuilder`][synt.stmt.loop.ForLoopBuilder]."""
 
 
-class WhileLoop:
+class WhileLoop(Statement):
     r"""The `while` loop.
 
     References:
@@ -176,9 +178,13 @@ class WhileLoop:
 
     test: Expression
     """The condition."""
+    body: Block
+    """Code to execute repeatedly."""
     orelse: Block | None
     """The body of the fallback block, aka `while ... else`."""
 
+    child_fields = ("test", "body", "orelse")
+
     def __init__(self, test: IntoExpression, body: Block):
         """Initialize a new `while` loop.
 
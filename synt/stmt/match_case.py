@@ -35,6 +35,8 @@ class MatchCase(Statement):
     body: Block
     """Case body."""
 
+    child_fields = ("pattern", "guard", "body")
+
     def __init__(
         self, pattern: IntoExpression, guard: IntoExpression | None, body: Block
     ):
@@ -146,6 +148,8 @@ class Match(Statement):
     cases: list[MatchCase]
     """Match cases."""
 
+    child_fields = ("subject", "cases")
+
     def __init__(self, subject: IntoExpression):
         """Initialize a new `match` statement.
 
@@ -34,6 +34,8 @@ class Global(Statement):
     names: list[Identifier]
     """Global variable names."""
 
+    child_fields = ("names",)
+
     def __init__(self, *names: Identifier):
         """Initialize a new `global` statement.
 
@@ -71,6 +73,8 @@ class Nonlocal(Statement):
     names: list[Identifier]
     """Nonlocal variable names."""
 
+    child_fields = ("names",)
+
     def __init__(self, *names: Identifier):
         """Initialize a new `nonlocal` statement.
 
@@ -40,6 +40,8 @@ class Raise(Statement):
     cause: Expression | None
     """The origin of the raised exception."""
 
+    child_fields = ("exception", "cause")
+
     def __init__(self, exception: IntoExpression | None = None):
         """Initialize a new `raise` statement.
 
@@ -28,6 +28,8 @@ class Return(Statement):
     expression: Expression | None
     """The value to return from the function."""
 
+    child_fields = ("expression",)
+
     def __init__(self, expression: IntoExpression | None = None):
         """Initialize the return statement.
 
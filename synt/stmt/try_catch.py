@@ -38,6 +38,8 @@ class ExceptionHandler(Statement):
     body: Block
     """The handler body."""
 
+    child_fields = ("type", "asname", "body")
+
     def __init__(
         self,
         ty: IntoExpression | None,
@@ -202,6 +204,8 @@ class Try(Statement):
     final: Block | None
     """Final workaround body, aka `finally`."""
 
+    child_fields = ("try_block", "handlers", "orelse", "final")
+
     def __init__(
         self,
         try_block: Block,
@@ -97,6 +97,7 @@ class IdentifierExpr(expr.Expression):
 
     precedence = expr.ExprPrecedence.Atom
     expr_type = expr.ExprType.Identifier
+    child_fields = ("ident",)
 
     ident: Identifier
     """Inner identifier."""
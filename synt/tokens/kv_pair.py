@@ -25,6 +25,7 @@ class KVPair(Expression):
     """Value expression."""
     precedence = ExprPrecedence.Atom
     expr_type = ExprType.KeyValuePair
+    child_fields = ("key", "value")
 
     def __init__(self, key: IntoExpression, value: IntoExpression):
         """Initialize a key-value pair.
@@ -40,6 +40,8 @@ class TypeVar(IntoCode):
     bound: Expression | None
     """The bound of the type variable."""
 
+    child_fields = ("name", "bound")
+
     def __init__(self, name: Identifier, bound: IntoExpression | None = None):
         """Initialize a type variable.
 
@@ -78,6 +80,8 @@ class TypeVarTuple(IntoCode):
     name: Identifier
     """The name of the type variable tuple."""
 
+    child_fields = ("name",)
+
     def __init__(self, name: Identifier):
         """Initialize a type variable tuple.
 
@@ -110,6 +114,8 @@ class TypeParamSpec(IntoCode):
     name: Identifier
     """The name of the type variable tuple."""
 
+    child_fields = ("name",)
+
     def __init__(self, name: Identifier):
         """Initialize a type parameter spec.
 
@@ -0,0 +1,276 @@
+r"""## Vectorization
+
+Translate Synt expressions into NumPy kernels evaluated over whole columns at once.
+
+NumPy is an optional dependency, imported the first time a kernel is built.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "kernel_cache",
+    "to_numpy_kernel",
+]
+
+
+import ast
+import importlib
+
+from functools import reduce
+from typing import TYPE_CHECKING
+from typing import Any
+
+from synt.cache import LRUCache
+from synt.compiler import lower_expression
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Sequence
+    from types import ModuleType
+
+    from synt.expr.expr import IntoExpression
+    from synt.tokens.ident import Identifier
+
+
+kernel_cache: LRUCache[tuple[str, tuple[str, ...]], Callable[..., Any]] = LRUCache(
+    maxsize=256
+)
+"""Compiled kernels, keyed by the expression's structure and column names."""
+
+
+def to_numpy_kernel(
+    expression: IntoExpression, columns: Sequence[Identifier]
+) -> Callable[..., Any]:
+    r"""Compile an expression into a function over NumPy column arrays.
+
+    Each name in the expression must be one of `columns`, which become the kernel's
+    positional arguments. The expression is translated as follows:
+
+    | Expression                        | Kernel                                |
+    | --------------------------------- | ------------------------------------- |
+    | arithmetic, bitwise, comparisons  | the same operators, element-wise      |
+    | `a < b < c`                       | `(a < b) & (b < c)`                   |
+    | `a in b`, `a not in b`            | `np.isin(a, b)`, `~np.isin(a, b)`     |
+    | constant lists, tuples and sets   | lists                                 |
+    | `and`, `or`, `not`                | `np.logical_and`, `np.logical_or`, `np.logical_not` |
+    | `x if cond else y`                | `np.where(cond, x, y)`                |
+    | `abs`, `min`, `max`, `round`      | `np.abs`, `np.minimum`, `np.maximum`, `np.round` |
+    | `f(...)`, `math.f(...)`, `np.f(...)` | `np.f(...)` if `np.f` is a ufunc   |
+
+    Note that boolean operations always produce boolean arrays,
+    and both branches of a condition are evaluated.
+    `min` and `max` of more than two values are reduced pairwise, and
+    calls with more arguments than the function takes are rejected,
+    as NumPy would write the result into the extra ones.
+
+    Args:
+        expression: The expression to translate.
+        columns: Names of the column arrays, in argument order.
+
+    Raises:
+        ImportError: If NumPy is not installed.
+        ValueError: If the expression contains nodes with no vectorized equivalent.
+
+    Examples:
+        ```python
+        import numpy as np
+        price, qty = id_("price").expr(), id_("qty").expr()
+        total = (price * qty).if_(qty.gt(litint(0))).else_(litint(0))
+        kernel = total.to_numpy_kernel(columns=[id_("price"), id_("qty")])
+        assert kernel(np.array([2.0, 3.0]), np.array([1, -1])).tolist() == [2.0, 0.0]
+        ```
+    """
+    lowered = lower_expression(expression)
+    names = tuple(c.raw for c in columns)
+    return kernel_cache.get_or_create(
+        (ast.dump(lowered), names),
+        lambda: _build_kernel(lowered, names),
+    )
+
+
+def _numpy() -> ModuleType:
+    """Import NumPy, failing with an actionable message."""
+    try:
+        return importlib.import_module("numpy")
+    except ImportError as e:
+        raise ImportError(
+            "NumPy is required to build vectorized kernels. "
+            "Install it with `pip install numpy`."
+        ) from e
+
+
+def _build_kernel(lowered: ast.expr, columns: tuple[str, ...]) -> Callable[..., Any]:
+    """Translate and compile the kernel of a lowered expression."""
+    np = _numpy()
+    body = _Vectorizer(np, frozenset(columns)).visit(lowered)
+    fn = ast.FunctionDef(
+        name="kernel",
+        args=ast.arguments(
+            posonlyargs=[],
+            args=[ast.arg(arg=c) for c in columns],
+            kwonlyargs=[],
+            kw_defaults=[],
+            defaults=[],
+        ),
+        body=[
+            *(
+                ast.Assign(
+                    targets=[ast.Name(id=c, ctx=ast.Store())],
+                    value=_np_call("asarray", ast.Name(id=c, ctx=ast.Load())),
+                )
+                for c in columns
+            ),
+            ast.Return(value=body),
+        ],
+        decorator_list=[],
+        type_params=[],
+    )
+    module = ast.fix_missing_locations(ast.Module(body=[fn], type_ignores=[]))
+    namespace: dict[str, Any] = {"_np": np}
+    exec(compile(module, "<synt-kernel>", "exec"), namespace)
+    kernel: Callable[..., Any] = namespace["kernel"]
+    return kernel
+
+
+def _np_call(name: str, *args: ast.expr) -> ast.expr:
+    """Build a call to a NumPy function."""
+    return ast.Call(
+        func=ast.Attribute(
+            value=ast.Name(id="_np", ctx=ast.Load()), attr=name, ctx=ast.Load()
+        ),
+        args=list(args),
+        keywords=[],
+    )
+
+
+_BUILTIN_CALLS = {"abs": "abs", "min": "minimum", "max": "maximum", "round": "round"}
+_ARITIES = {"round": (1, 2)}
+"""Numbers of arguments of the functions that are not ufuncs, e.g. `round(x, ndigits)`."""
+_NAMESPACES = {"math", "np", "numpy"}
+
+
+class _Vectorizer:
+    """Rewrite a scalar `ast` expression into NumPy operations."""
+
+    np: ModuleType
+    columns: frozenset[str]
+
+    def __init__(self, np: ModuleType, columns: frozenset[str]):
+        self.np = np
+        self.columns = columns
+
+    def visit(self, node: ast.expr) -> ast.expr:
+        match node:
+            case ast.Name(id=name):
+                if name not in self.columns:
+                    raise ValueError(
+                        f"Unknown column in vectorized expression: `{name}`"
+                    )
+                return node
+            case ast.Constant(value=int() | float() | complex() | bool() | str()):
+                return node
+            case ast.List(elts=elts) | ast.Tuple(elts=elts) | ast.Set(elts=elts) if all(
+                isinstance(x, ast.Constant) for x in elts
+            ):
+                # constant collections, e.g. the right side of `in`
+                return ast.List(elts=elts, ctx=ast.Load())
+            case ast.BinOp(left=left, op=op, right=right):
+                return ast.BinOp(left=self.visit(left), op=op, right=self.visit(right))
+            case ast.UnaryOp(op=ast.Not(), operand=operand):
+                return _np_call("logical_not", self.visit(operand))
+            case ast.UnaryOp(op=op, operand=operand):
+                return ast.UnaryOp(op=op, operand=self.visit(operand))
+            case ast.BoolOp(op=op, values=values):
+                fn = "logical_and" if isinstance(op, ast.And) else "logical_or"
+                return reduce(
+                    lambda acc, x: _np_call(fn, acc, x), (self.visit(x) for x in values)
+                )
+            case ast.Compare(left=left, ops=ops, comparators=comparators):
+                operands = [self.visit(left), *(self.visit(x) for x in comparators)]
+                tests = [
+                    self._compare(op, lhs, rhs)
+                    for op, lhs, rhs in zip(ops, operands, operands[1:], strict=False)
+                ]
+                return reduce(
+                    lambda acc, x: ast.BinOp(left=acc, op=ast.BitAnd(), right=x), tests
+                )
+            case ast.IfExp(test=test, body=body, orelse=orelse):
+                return _np_call(
+                    "where", self.visit(test), self.visit(body), self.visit(orelse)
+                )
+            case ast.Call(
+                func=ast.Name(id="min" | "max" as name), args=args, keywords=[]
+            ):
+                if len(args) < 2:
+                    raise ValueError(
+                        f"Cannot vectorize `{ast.unparse(node)}`: "
+                        f"`{name}` of a single iterable has no NumPy equivalent."
+                    )
+                # the ufuncs are binary, so more operands are reduced pairwise
+                fn = _BUILTIN_CALLS[name]
+                return reduce(
+                    lambda acc, x: _np_call(fn, acc, x), (self.visit(x) for x in args)
+                )
+            case ast.Call(func=func, args=args, keywords=[]):
+                fn = self._function(func)
+                low, high = self._arity(fn)
+                if not low <= len(args) <= high:
+                    # extra arguments of ufuncs are their outputs
+                    raise ValueError(
+                        f"Cannot vectorize `{ast.unparse(node)}`: "
+                        f"`{ast.unparse(func)}` takes {_plural(low, high)}."
+                    )
+                return _np_call(fn, *(self.visit(x) for x in args))
+            case _:
+                raise ValueError(
+                    f"Cannot vectorize `{ast.unparse(node)}`: "
+                    f"{type(node).__name__} has no NumPy equivalent."
+                )
+
+    def _compare(self, op: ast.cmpop, lhs: ast.expr, rhs: ast.expr) -> ast.expr:
+        """Translate a single comparison."""
+        match op:
+            case ast.In():
+                return _np_call("isin", lhs, rhs)
+            case ast.NotIn():
+                return ast.UnaryOp(op=ast.Invert(), operand=_np_call("isin", lhs, rhs))
+            case ast.Is() | ast.IsNot():
+                raise ValueError(
+                    "Cannot vectorize identity comparisons (`is`, `is not`)."
+                )
+            case _:
+                return ast.Compare(left=lhs, ops=[op], comparators=[rhs])
+
+    def _arity(self, name: str) -> tuple[int, int]:
+        """Get the minimum and maximum number of arguments of a NumPy function."""
+        if name in _ARITIES:
+            return _ARITIES[name]
+        nin: int = getattr(self.np, name).nin
+        return nin, nin
+
+    def _function(self, func: ast.expr) -> str:
+        """Resolve the NumPy function called in place of `func`."""
+        name: str | None = None
+        if isinstance(func, ast.Name):
+            if func.id in _BUILTIN_CALLS:
+                return _BUILTIN_CALLS[func.id]
+            name = func.id
+        elif (
+            isinstance(func, ast.Attribute)
+            and isinstance(func.value, ast.Name)
+            and func.value.id in _NAMESPACES
+        ):
+            name = func.attr
+        if name is not None and isinstance(getattr(self.np, name, None), self.np.ufunc):
+            return name
+        raise ValueError(
+            f"Cannot vectorize call to `{ast.unparse(func)}`: not a NumPy ufunc."
+        )
+
+
+def _plural(low: int, high: int) -> str:
+    """Describe a number of arguments."""
+    count = str(low) if low == high else f"{low} to {high}"
+    return f"{count} argument" if high == 1 else f"{count} arguments"
@@ -0,0 +1,413 @@
+r"""## Visitors
+
+Traverse and rewrite Synt trees.
+
+Every node class declares the attributes holding its children in
+[`child_fields`][synt.code.IntoCode.child_fields], so traversals never need to know
+the fields of each class.
+Handlers are looked up once per node class and visitor class, and the traversal is
+iterative, so deep trees don't hit the recursion limit.
+"""
+
+from __future__ import annotations
+
+
+__all__ = [
+    "Node",
+    "children",
+    "walk",
+    "unshare",
+    "NodeVisitor",
+    "NodeTransformer",
+]
+
+
+from copy import deepcopy
+from operator import is_not
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import ClassVar
+
+from synt.code import IntoCode
+from synt.file import File
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Iterator
+
+
+type Node = IntoCode | File
+"""Any node of a Synt tree."""
+
+type _Handler = Callable[[Any, Any], Any]
+
+_NODE_TYPES = (IntoCode, File)
+
+
+def children(node: Node) -> list[Node]:
+    r"""Get the direct children of a node, in the order of its `child_fields`.
+
+    Examples:
+        ```python
+        from synt.visit import children
+        e = id_("a").expr() + litint(1)
+        assert [c.into_code() for c in children(e)] == ["a", "1"]
+        ```
+    """
+    try:
+        return _CHILDREN[type(node)](node)
+    except KeyError:
+        return _children_getter(type(node))(node)
+
+
+_CHILDREN: dict[type, Callable[[Any], list[Node]]] = {}
+
+
+def _children_getter(node_type: type[Node]) -> Callable[[Any], list[Node]]:
+    """Generate the function collecting the children of a node class.
+
+    The field annotations decide how each field is read: plain nodes are appended
+    directly, optional nodes are checked for `None`, lists of nodes are extended,
+    and anything else goes through a generic check.
+    """
+    annotations: dict[str, Any] = {}
+    for klass in reversed(node_type.__mro__):
+        annotations.update(getattr(klass, "__annotations__", {}))
+
+    lines = ["def children(node):", "    res = []"]
+    for field in node_type.child_fields:
+        ann = annotations.get(field)
+        ann = ann if isinstance(ann, str) else ""
+        if ann.startswith("list[") and not any(
+            x in ann for x in ("tuple", "str", "ImportType")
+        ):
+            lines.append(f"    res.extend(node.{field})")
+        elif ann and "|" not in ann and not ann.startswith("list["):
+            lines.append(f"    res.append(node.{field})")
+        elif ann.endswith("| None") and "[" not in ann:
+            lines += [
+                f"    value = node.{field}",
+                "    if value is not None:",
+                "        res.append(value)",
+            ]
+        else:
+            lines.append(f"    _collect(node.{field}, res)")
+    lines.append("    return res")
+
+    namespace: dict[str, Any] = {"_collect": _collect}
+    exec("\n".join(lines), namespace)
+    fn: Callable[[Any], list[Node]] = namespace["children"]
+    _CHILDREN[node_type] = fn
+    return fn
+
+
+def _collect(value: Any, res: list[Node]) -> None:
+    """Collect the nodes held by a field of any shape."""
+    if isinstance(value, list):
+        for item in value:
+            if isinstance(item, tuple):
+                res.extend(x for x in item if isinstance(x, _NODE_TYPES))
+            elif isinstance(item, _NODE_TYPES):
+                res.append(item)
+    elif isinstance(value, _NODE_TYPES):
+        res.append(value)
+
+
+def walk(node: Node) -> Iterator[Node]:
+    r"""Iterate over a node and all of its descendants, in pre-order.
+
+    Examples:
+        ```python
+        from synt.visit import walk
+        e = id_("a").expr() + litint(1)
+        assert len(list(walk(e))) == 4 # BinaryOp, IdentifierExpr, Identifier, Literal
+        ```
+    """
+    stack: list[Node] = [node]
+    while stack:
+        curr = stack.pop()
+        yield curr
+        kids = children(curr)
+        kids.reverse()
+        stack.extend(kids)
+
+
+class _Leave:
+    """Marker placed on the traversal stack above a node whose children are being visited."""
+
+
+_LEAVE: Any = _Leave()
+
+
+class _Dispatcher:
+    """Shared per-class handler lookup of visitors and transformers."""
+
+    _dispatch_table: ClassVar[dict[type, tuple[_Handler | None, _Handler | None]]] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._dispatch_table = {}
+
+    @classmethod
+    def _handlers(cls, node_type: type) -> tuple[_Handler | None, _Handler | None]:
+        """Get the `visit_*` and `leave_*` handlers of a node class.
+
+        The most specific handler along the node class's MRO is used,
+        so e.g. `visit_Statement` handles every statement without a more specific handler.
+        The result is cached per visitor class.
+        """
+        try:
+            return cls._dispatch_table[node_type]
+        except KeyError:
+            pass
+        enter: _Handler | None = None
+        leave: _Handler | None = None
+        for klass in node_type.__mro__:
+            enter = enter or getattr(cls, f"visit_{klass.__name__}", None)
+            leave = leave or getattr(cls, f"leave_{klass.__name__}", None)
+        cls._dispatch_table[node_type] = (enter, leave)
+        return enter, leave
+
+
+class NodeVisitor(_Dispatcher):
+    r"""Base class of read-only tree traversals.
+
+    Define `visit_<ClassName>(self, node)` to handle a node before its children,
+    and `leave_<ClassName>(self, node)` to handle it after its children.
+    Returning `False` from a `visit_*` handler skips the node's children,
+    but its `leave_*` handler still runs.
+    Handlers of base classes, e.g. `visit_Expression` or `visit_Statement`,
+    apply to every subclass without a more specific handler.
+
+    Examples:
+        ```python
+        from synt.visit import NodeVisitor
+        class NameCollector(NodeVisitor):
+            def __init__(self):
+                self.names = []
+            def visit_Identifier(self, node):
+                self.names.append(node.raw)
+        collector = NameCollector()
+        collector.visit(id_("a").expr() + id_("b").expr().call(id_("c")))
+        assert collector.names == ["a", "b", "c"]
+        ```
+    """
+
+    def visit(self, node: Node) -> None:
+        """Traverse a node and all of its descendants.
+
+        Args:
+            node: Root of the traversal.
+        """
+        table, getters = self._dispatch_table, _CHILDREN
+        stack: list[Any] = [node]
+        pop, push, extend = stack.pop, stack.append, stack.extend
+        while stack:
+            curr = pop()
+            if curr is _LEAVE:
+                curr = pop()
+                leave = table[type(curr)][1]
+                leave(self, curr)  # type:ignore[misc]
+                continue
+
+            handlers = table.get(type(curr)) or self._handlers(type(curr))
+            enter, leave = handlers
+            if leave is not None:
+                push(curr)
+                push(_LEAVE)
+            if enter is not None and enter(self, curr) is False:
+                continue
+            try:
+                kids = getters[type(curr)](curr)
+            except KeyError:
+                kids = _children_getter(type(curr))(curr)
+            kids.reverse()
+            extend(kids)
+
+
+class NodeTransformer(_Dispatcher):
+    r"""Base class of tree rewrites.
+
+    Handlers are looked up like [`NodeVisitor`][synt.visit.NodeVisitor]'s.
+    The value returned by `leave_<ClassName>(self, node)` replaces the node in its parent:
+
+    - the node itself keeps it unchanged;
+    - another node replaces it;
+    - `None` removes it from a list, or clears an optional field;
+    - a list of nodes is spliced into the parent's list.
+
+    Replacements are not traversed again.
+    Nodes without a `leave_*` handler are kept unchanged.
+
+    Examples:
+        ```python
+        from synt.visit import NodeTransformer
+        class Rename(NodeTransformer):
+            def leave_Identifier(self, node):
+                return id_(node.raw.upper())
+        e = Rename().transform(id_("a").expr().call(id_("b")))
+        assert e.into_code() == "A(B)"
+        ```
+    """
+
+    changes: int
+    """Number of nodes replaced or removed by the last [`transform`][synt.visit.NodeTransformer.transform]."""
+
+    def transform(self, node: Node) -> Any:
+        """Rewrite a node and all of its descendants, bottom-up.
+
+        Args:
+            node: Root of the rewrite.
+
+        Returns:
+            The result of the root's `leave_*` handler, or the root itself.
+
+        Raises:
+            TypeError: If a replacement doesn't fit the parent's field,
+                e.g. a list replacing a node inside a tuple or a single-node field.
+        """
+        self.changes = 0
+        table, getters = self._dispatch_table, _CHILDREN
+        stack: list[Any] = [node]
+        results: list[Any] = []
+        pop, push, extend, emit = stack.pop, stack.append, stack.extend, results.append
+        while stack:
+            curr = pop()
+            if curr is _LEAVE:
+                curr = pop()
+                kids: list[Node] = pop()
+                n = len(kids)
+                new = results[-n:]
+                del results[-n:]
+                if any(map(is_not, new, kids)):
+                    _replace_children(curr, new)
+                leave = table[type(curr)][1]
+            else:
+                enter, leave = table.get(type(curr)) or self._handlers(type(curr))
+                if enter is not None and enter(self, curr) is False:
+                    kids = []
+                else:
+                    try:
+                        kids = getters[type(curr)](curr)
+                    except KeyError:
+                        kids = _children_getter(type(curr))(curr)
+                if kids:
+                    push(kids)
+                    push(curr)
+                    push(_LEAVE)
+                    kids.reverse()
+                    extend(kids)
+                    kids.reverse()
+                    continue
+
+            if leave is None:
+                emit(curr)
+            else:
+                res = leave(self, curr)
+                if res is not curr:
+                    self.changes += 1
+                emit(res)
+        return results[0]
+
+
+def _replace_children(node: Node, new: list[Any]) -> None:
+    """Write transformed children back into their parent, in `children` order."""
+    idx = 0
+    for field in type(node).child_fields:
+        value = getattr(node, field)
+        if value is None or isinstance(value, str):
+            continue
+        if isinstance(value, list):
+            out: list[Any] = []
+            for item in value:
+                if isinstance(item, tuple):
+                    parts = []
+                    for x in item:
+                        if isinstance(x, _NODE_TYPES):
+                            r = new[idx]
+                            idx += 1
+                            if not isinstance(r, _NODE_TYPES):
+                                raise TypeError(
+                                    f"Cannot replace a node inside `{type(node).__name__}.{field}` "
+                                    f"with {r!r}."
+                                )
+                            parts.append(r)
+                        else:
+                            parts.append(x)
+                    changed = any(a is not b for a, b in zip(parts, item, strict=True))
+                    out.append(tuple(parts) if changed else item)
+                elif isinstance(item, _NODE_TYPES):
+                    r = new[idx]
+                    idx += 1
+                    if isinstance(r, list):
+                        out.extend(r)
+                    elif r is not None:
+                        out.append(r)
+                else:
+                    out.append(item)
+            if len(out) != len(value) or any(
+                a is not b for a, b in zip(out, value, strict=True)
+            ):
+                setattr(node, field, out)
+        elif isinstance(value, _NODE_TYPES):
+            r = new[idx]
+            idx += 1
+            if isinstance(r, list):
+                raise TypeError(
+                    f"Cannot splice multiple nodes into `{type(node).__name__}.{field}`."
+                )
+            if r is not value:
+                setattr(node, field, r)
+
+
+class _Unshare(NodeTransformer):
+    """Replace every repeated occurrence of a node with a deep copy."""
+
+    seen: set[int]
+    repeated: set[int]
+
+    def __init__(self) -> None:
+        self.seen = set()
+        self.repeated = set()
+
+    def visit_IntoCode(self, node: IntoCode) -> bool:
+        if id(node) in self.seen:
+            self.repeated.add(id(node))
+            return False
+        self.seen.add(id(node))
+        return True
+
+    def leave_IntoCode(self, node: IntoCode) -> IntoCode:
+        # a subtree is left before any later occurrence of it is entered
+        if id(node) in self.repeated:
+            self.repeated.remove(id(node))
+            return deepcopy(node)
+        return node
+
+
+def unshare(node: Node) -> int:
+    r"""Make every node of a tree appear only once, copying repeated ones.
+
+    Builders happily reuse an expression in several places, e.g. a `self.data`
+    subscripted with different keys. Rewrites keyed by node identity need a tree
+    without such shared subtrees.
+
+    Args:
+        node: Root of the tree, rewritten in place.
+
+    Returns:
+        Number of copied subtrees.
+
+    Examples:
+        ```python
+        from synt.visit import unshare, walk
+        x = id_("x").expr()
+        e = x + x
+        assert unshare(e) == 1
+        assert e.left is x and e.right is not x and e.into_code() == "x + x"
+        ```
+    """
+    transformer = _Unshare()
+    transformer.transform(node)
+    return transformer.changes
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from synt.prelude import *
+
+
+def call(target, *args, **kwargs):
+    """Build a call of a name or an expression."""
+    target = id_(target).expr() if isinstance(target, str) else target
+    return target.call(*args, **kwargs)
+
+
+def execute(code, namespace=None):
+    """Run the code of a file, or a string of code, and return its namespace."""
+    namespace = {} if namespace is None else namespace
+    exec(code if isinstance(code, str) else code.into_str(), namespace)
+    return namespace
+
+
+def same_results(build_file, optimize, results, namespace=None):
+    """Check that optimizing a file doesn't change its results.
+
+    Args:
+        build_file: Function building a fresh copy of the file.
+        optimize: Function optimizing a file in place.
+        results: Function computing results from the namespace of the file.
+        namespace: Globals the file runs with, copied for each run.
+
+    Returns:
+        The optimized file, for further checks.
+    """
+    expected = results(execute(build_file(), dict(namespace or {})))
+    file = build_file()
+    optimize(file)
+    assert results(execute(file, dict(namespace or {}))) == expected
+    return file
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import pytest
+
+from synt.batch import batch_cache
+from synt.batch import batch_kernel
+from synt.prelude import *
+
+
+def test_batch_filter():
+    age, name = id_("age").expr(), id_("name").expr()
+    pred = age.ge(litint(18)).bool_and(name.attr("startswith").call(litstr("a")))
+
+    dict_rows = [
+        {"age": 30, "name": "ann"},
+        {"age": 3, "name": "al"},
+        {"age": 40, "name": "bo"},
+    ]
+    adults = batch_kernel(pred, {"age": "age", "name": "name"})
+    assert adults(dict_rows) == [dict_rows[0]]
+
+    tuple_rows = [(1, "ann", 30), (2, "al", 3)]
+    assert batch_kernel(pred, {"age": 2, "name": 1})(tuple_rows) == [tuple_rows[0]]
+
+
+def test_batch_map():
+    batch_cache.clear()
+    x, y = id_("x").expr(), id_("y").expr()
+    project = tup(x + y, id_("scale").expr() * x)
+    kernel = batch_kernel(project, ["x", "y"], mode="map", globals={"scale": 10})
+    assert kernel([(1, 2), (3, 4)]) == [(3, 10), (7, 30)]
+
+    other = batch_kernel(project, ["x", "y"], mode="map", globals={"scale": 2})
+    assert other([(1, 2)]) == [(3, 2)]
+    assert batch_cache.stats().hits == 1
+
+    # comprehension targets shadow fields, but not in the outermost iterable
+    shadow = list_comp((x * litint(2)).for_(id_("x")).in_(x))
+    assert batch_kernel(shadow, ["x"], mode="map")([([1, 2],)]) == [[2, 4]]
+
+    with pytest.raises(ValueError, match="mode"):
+        batch_kernel(x, ["x"], mode="reduce")  # type:ignore[arg-type]
+
+
+def test_batch_structure():
+    c, c2, t2, f2, f = (id_(n) for n in ("c", "c2", "t2", "f2", "f"))
+    inner = t2.expr().if_(c2).else_(f2).if_(c).else_(f)
+    outer = t2.expr().if_(c2).else_(f2.expr().if_(c).else_(f))
+    assert inner.into_code() == outer.into_code()
+    rows = [(False, True, 1, 3, 5)]
+    fields = ["c", "c2", "t2", "f2", "f"]
+    assert batch_kernel(outer, fields, mode="map")(rows) == [1]
+    assert batch_kernel(inner, fields, mode="map")(rows) == [5]
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import ast
+
+import pytest
+
+from synt.compiler import function_cache
+from synt.compiler import lower_expression
+from synt.expr.binary_op import BinaryOp
+from synt.expr.binary_op import BinaryOpType
+from synt.prelude import *
+
+
+def test_lower_expression():
+    a, b, c = id_("a").expr(), id_("b").expr(), id_("c").expr()
+    for e in [
+        BinaryOp(BinaryOpType.Sub, a, BinaryOp(BinaryOpType.Sub, b, c)),
+        BinaryOp(BinaryOpType.Pow, BinaryOp(BinaryOpType.Pow, a, b), c),
+        a.lt(b).lt(c),
+        a.bool_and(b).bool_or(c.not_()),
+        a.call(b.unpack(), c.unpack_kv(), x=litint(1))[slice_(litint(1), EMPTY), b],
+        list_comp(a.for_(id_("a"), id_("b")).in_(c).if_(a)),
+        fstring("x{{", fnode(a, ".2f", "r"), '\\n\\"'),
+    ]:
+        expected = ast.dump(ast.parse(e.into_code(), mode="eval").body)
+        assert ast.dump(lower_expression(e)) == expected
+
+    with pytest.raises(ValueError, match="no standalone value"):
+        lower_expression(EMPTY)
+
+
+def test_compile_function():
+    function_cache.clear()
+
+    def rule():
+        row = id_("row").expr()
+        return row[litstr("age")].ge(litint(18)).bool_and(
+            row[litstr("name")].in_(id_("allowed"))
+        )
+
+    f = rule().compile_function(args=[id_("row")], globals={"allowed": {"bob"}})
+    assert f({"age": 20, "name": "bob"})
+    assert not f({"age": 20, "name": "eve"})
+
+    g = rule().compile_function(args=[id_("row")], globals={"allowed": {"eve"}})
+    assert g({"age": 20, "name": "eve"})
+    assert g.__code__ is f.__code__
+    stats = function_cache.stats()
+    assert (stats.hits, stats.misses) == (1, 1)
+
+
+def test_compile_function_structure():
+    c, c2, t2, f2, f = (id_(n) for n in ("c", "c2", "t2", "f2", "f"))
+    args = [c, c2, t2, f2, f]
+    # both trees render as `t2 if c2 else f2 if c else f`
+    inner = t2.expr().if_(c2).else_(f2).if_(c).else_(f)
+    outer = t2.expr().if_(c2).else_(f2.expr().if_(c).else_(f))
+    assert inner.into_code() == outer.into_code()
+    assert outer.compile_function(args=args)(False, True, 1, 3, 5) == 1
+    assert inner.compile_function(args=args)(False, True, 1, 3, 5) == 5
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from synt.passes import ComprehensionRewrite
+from synt.passes import PassManager
+from synt.prelude import *
+
+from tests.helpers import call
+from tests.helpers import execute
+
+
+def add(method, item):
+    return id_("acc").expr().attr(method).call(item).stmt()
+
+
+def rewrite(*statements):
+    file = File(def_(id_("f"))(arg(id_("xs"))).block(*statements, return_(id_("acc"))))
+    PassManager(ComprehensionRewrite()).run(file)
+    return file.into_str().removeprefix("def f(xs):\n").removesuffix("\n    return acc")
+
+
+def test_comprehend_kinds():
+    acc, x, y = id_("acc"), id_("x"), id_("y")
+    assert (
+        rewrite(
+            acc.expr().assign(list_()),
+            for_(x).in_(id_("xs")).block(add("append", call("str", x))),
+        )
+        == "    acc = [str(x) for x in xs]"
+    )
+    assert (
+        rewrite(
+            acc.expr().assign(call("set")),
+            for_(x)
+            .in_(id_("xs"))
+            .block(
+                if_(x).block(
+                    if_(x.expr() > litint(1)).block(add("add", x.expr() % litint(3)))
+                ),
+            ),
+        )
+        == "    acc = {x % 3 for x in xs if x if x > 1}"
+    )
+    assert (
+        rewrite(
+            acc.expr().assign(dict_()),
+            for_(tup(x, y))
+            .in_(call("enumerate", id_("xs")))
+            .block(
+                acc.expr()[y].assign(x),
+            ),
+        )
+        == "    acc = {y: x for x, y in enumerate(xs)}"
+    )
+    # nested loops, with clauses needing parentheses
+    assert (
+        rewrite(
+            acc.expr().assign(list_()),
+            for_(x)
+            .in_(id_("xs"))
+            .block(
+                if_(x.expr().if_(y).else_(NONE)).block(
+                    for_(y).in_(x).block(add("append", tup(x, y))),
+                ),
+            ),
+        )
+        == "    acc = [(x, y) for x in xs if (x if y else None) for y in x]"
+    )
+
+
+def test_comprehend_kept():
+    acc, x, y = id_("acc"), id_("x"), id_("y")
+    kept = [
+        # the collection is read while it is filled
+        [
+            acc.expr().assign(list_()),
+            for_(x).in_(id_("xs")).block(add("append", call("len", acc))),
+        ],
+        # other statements, `else` branches and other methods
+        [
+            acc.expr().assign(list_()),
+            for_(x).in_(id_("xs")).block(call("print", x).stmt(), add("append", x)),
+        ],
+        [
+            acc.expr().assign(list_()),
+            for_(x).in_(id_("xs")).block(if_(x).block(add("append", x)).else_(BREAK)),
+        ],
+        [
+            acc.expr().assign(list_()),
+            for_(x).in_(id_("xs")).block(add("add", x)),
+        ],
+        [
+            acc.expr().assign(list_(litint(1))),
+            for_(x).in_(id_("xs")).block(add("append", x)),
+        ],
+        # or by a nested function
+        [
+            def_(id_("g"))(arg(x)).block(return_(call("len", acc))),
+            acc.expr().assign(list_()),
+            for_(x).in_(id_("xs")).block(add("append", call("g", x))),
+        ],
+        # the target is read after the loop
+        [
+            acc.expr().assign(list_()),
+            for_(x).in_(id_("xs")).block(add("append", x)),
+            call("print", x).stmt(),
+        ],
+        # keys and values with side effects, yields
+        [
+            acc.expr().assign(dict_()),
+            for_(x).in_(id_("xs")).block(acc.expr()[call("g", x)].assign(call("h", x))),
+        ],
+        [
+            acc.expr().assign(list_()),
+            for_(x).in_(id_("xs")).block(add("append", yield_(x))),
+        ],
+        # exceptions may be caught with the collection partially filled
+        [
+            try_(
+                acc.expr().assign(list_()),
+                for_(x).in_(id_("xs")).block(add("append", x)),
+            )
+            .except_(id_("ValueError"))
+            .block(PASS),
+        ],
+    ]
+    for statements in kept:
+        assert "for x in xs:" in rewrite(*statements), statements
+    # `set` may be rebound
+    file = File(
+        id_("set").expr().assign(id_("list")),
+        def_(id_("f"))(arg(id_("xs"))).block(
+            acc.expr().assign(call("set")),
+            for_(y).in_(id_("xs")).block(add("add", y)),
+            return_(acc),
+        ),
+    )
+    PassManager(ComprehensionRewrite()).run(file)
+    assert "for y in xs:" in file.into_str()
+
+
+def test_comprehend_semantics():
+    acc, x, y = id_("acc"), id_("x"), id_("y")
+    file = File(
+        def_(id_("f"))(arg(id_("xs"))).block(
+            acc.expr().assign(dict_()),
+            for_(x)
+            .in_(id_("xs"))
+            .block(
+                for_(y)
+                .in_(call("range", x))
+                .block(
+                    if_(y.expr() % litint(2)).block(
+                        acc.expr()[tup(x, y)].assign(x.expr() * y)
+                    ),
+                ),
+            ),
+            return_(acc),
+        )
+    )
+    PassManager(ComprehensionRewrite()).run(file)
+    assert "for " in file.into_str() and "for x in xs:" not in file.into_str()
+    namespace = execute(file.into_str())
+    expected = {(x, y): x * y for x in range(5) for y in range(x) if y % 2}
+    assert namespace["f"](range(5)) == expected
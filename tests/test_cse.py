@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from synt.passes import CommonSubexpressionElimination
+from synt.passes import PassManager
+from synt.prelude import *
+
+from tests.helpers import call
+from tests.helpers import execute
+
+
+def cse(*statements, **kwargs):
+    file = File(def_(id_("f"))(arg(id_("self"))).block(*statements))
+    PassManager(CommonSubexpressionElimination(**kwargs)).run(file)
+    return file.into_str().removeprefix("def f(self):\n")
+
+
+def item(key):
+    return id_("self").expr().attr("row").expr().attr("data").expr()[litstr(key)]
+
+
+def test_cse_chains():
+    assert cse(
+        id_("a").expr().assign(item("x") + item("x")),
+        if_(id_("a")).block(return_(item("y"))),
+        return_(item("y")),
+    ) == (
+        "    _cse_1 = self.row.data\n"
+        "    _cse_0 = _cse_1['x']\n"
+        "    a = _cse_0 + _cse_0\n"
+        "    if a:\n"
+        "        return _cse_1['y']\n"
+        "    return _cse_1['y']"
+    )
+    # the temporary is bound inline after side effects in the same statement
+    assert cse(call("g", call("h"), item("x"), item("x")).stmt()) == (
+        "    g(h(), (_cse_0 := self.row.data['x']), _cse_0)"
+    )
+    # conditional occurrences only read temporaries
+    c = id_("c").expr()
+    assert cse(return_(c.bool_and(item("x")).bool_or(item("x")))) == (
+        "    return c and self.row.data['x'] or self.row.data['x']"
+    )
+    assert cse(return_(item("x").bool_or(item("y")).bool_and(item("y")))) == (
+        "    _cse_0 = self.row.data\n"
+        "    return (_cse_0['x'] or _cse_0['y']) and _cse_0['y']"
+    )
+    assert cse(return_(item("x").bool_and(item("x")))) == (
+        "    _cse_0 = self.row.data['x']\n    return _cse_0 and _cse_0"
+    )
+    assert cse(return_(item("x") + item("x") + item("x")), min_uses=4).endswith(
+        "['x'] + self.row.data['x']"
+    )
+    with pytest.raises(ValueError, match="at least 2"):
+        CommonSubexpressionElimination(min_uses=1)
+
+
+def test_cse_invalidation():
+    a = id_("self").expr().attr("a").expr()
+    k = id_("k").expr()
+    for barrier in (
+        call("g").stmt(),
+        id_("self").expr().assign(litint(1)),
+        id_("self").expr().attr("a").expr().assign(litint(1)),
+        id_("x").expr()[litint(0)].assign(litint(1)),
+    ):
+        code = cse(id_("b").expr().assign(a[k]), barrier, return_(a[k]))
+        assert code.endswith("[k]"), code
+    # unrelated stores and pure calls keep the value
+    code = cse(
+        id_("b").expr().assign(a.attr("b")),
+        id_("self").expr().attr("c").expr().assign(call("len", id_("b"))),
+        return_(a.attr("b")),
+    )
+    assert code.startswith("    _cse_0 = self.a.b\n") and code.endswith("return _cse_0")
+    # loops rebinding a name don't reuse values computed before them
+    code = cse(
+        id_("b").expr().assign(a[k]),
+        for_(k).in_(id_("ks")).block(call("print", a[k]).stmt()),
+    )
+    assert "_cse" not in code
+
+
+def test_cse_semantics():
+    data = id_("self").expr().attr("data").expr()
+    file = File(
+        def_(id_("f"))(arg(id_("self"))).block(
+            id_("a").expr().assign(data[litstr("x")] * data[litstr("x")]),
+            data[litstr("x")].assign(data[litstr("y")] + data[litstr("x")]),
+            return_(tuple_(id_("a"), data[litstr("x")], data[litstr("x")])),
+        )
+    )
+    PassManager(CommonSubexpressionElimination()).run(file)
+    namespace = execute(file.into_str())
+    row = SimpleNamespace(data={"x": 3, "y": 4})
+    assert namespace["f"](row) == (9, 7, 7)
+    assert file.into_str().count("self.data") == 1
+
+
+def test_cse_statements():
+    a = id_("self").expr().attr("a").expr()
+    x = id_("x")
+    statements = [
+        PASS,
+        global_(x),
+        import_(id_("os")),
+        while_(id_("x")).block(call("print", a.attr("b")).stmt(), BREAK),
+        for_(x).in_(id_("xs")).block(CONTINUE),
+        try_(call("print", a.attr("b")).stmt())
+        .except_(id_("ValueError"))
+        .block(call("print", a.attr("b")).stmt())
+        .finally_(call("print", a.attr("b")).stmt()),
+        with_(call("open", id_("p"))).block(call("print", a.attr("b")).stmt()),
+    ]
+    for statement in statements:
+        code = cse(
+            id_("c").expr().assign(a.attr("b") + a.attr("b")),
+            statement,
+            return_(a.attr("b")),
+        )
+        assert code.startswith("    _cse_0 = self.a.b\n"), code
+    # values are reused after simple statements, but not after calls in blocks
+    assert cse(
+        id_("c").expr().assign(a.attr("b") + a.attr("b")), PASS, return_(a.attr("b"))
+    ).endswith("return _cse_0")
+    code = cse(
+        id_("c").expr().assign(a.attr("b") + a.attr("b")),
+        while_(x).block(call("g").stmt()),
+        return_(a.attr("b")),
+    )
+    assert code.endswith("return self.a.b")
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+from synt.passes import DeadCodeElimination
+from synt.passes import PassManager
+from synt.prelude import *
+from synt.stmt.keyword import KeywordStatement
+
+from tests.helpers import call
+from tests.helpers import execute
+
+
+def dce(*statements):
+    file = File(*statements)
+    PassManager(DeadCodeElimination()).run(file)
+    return file.into_str()
+
+
+def test_dce_unreachable():
+    x = id_("x")
+    assert dce(
+        def_(id_("f"))(arg(x)).block(
+            while_(x).block(CONTINUE, call("a").stmt()),
+            if_(x).block(return_(litint(1))).else_(raise_(id_("E"))),
+            call("b").stmt(),
+        )
+    ) == (
+        "def f(x):\n"
+        "    while x:\n"
+        "        continue\n"
+        "    if x:\n"
+        "        return 1\n"
+        "    else:\n"
+        "        raise E"
+    )
+    # a `while True` left by `break` does not end the block
+    assert dce(while_(TRUE).block(if_(x).block(BREAK)), call("a").stmt()) == (
+        "while True:\n    if x:\n        break\na()"
+    )
+    assert (
+        dce(while_(TRUE).block(call("a").stmt()), call("b").stmt())
+        == "while True:\n    a()"
+    )
+    assert (
+        dce(
+            match_(x)
+            .case_(litint(1))
+            .block(return_())
+            .case_(id_("_"))
+            .block(return_()),
+            call("a").stmt(),
+        )
+        == "match x:\n    case 1:\n        return\n    case _:\n        return"
+    )
+    assert dce(try_(call("a").stmt()).finally_(return_()), call("b").stmt()).endswith(
+        "return"
+    )
+
+
+def test_dce_constant_branches():
+    x = id_("x")
+    assert (
+        dce(if_(FALSE).block(call("a").stmt()).elif_(x).block(call("b").stmt()))
+        == "if x:\n    b()"
+    )
+    assert dce(
+        if_(x)
+        .block(call("a").stmt())
+        .elif_(litint(1))
+        .block(call("b").stmt())
+        .elif_(x)
+        .block(call("c").stmt())
+    ) == ("if x:\n    a()\nelse:\n    b()")
+    assert dce(if_(TRUE).block(call("a").stmt()).else_(call("b").stmt())) == "a()"
+    assert dce(if_(FALSE).block(call("a").stmt())) == ""
+    assert dce(while_(FALSE).block(call("a").stmt()).else_(call("b").stmt())) == "b()"
+    assert dce(for_(x).in_(tuple_()).block(call("a").stmt())) == ""
+    assert (
+        dce(
+            try_(PASS)
+            .except_(id_("E"))
+            .block(call("a").stmt())
+            .finally_(call("b").stmt())
+        )
+        == "b()"
+    )
+    assert (
+        dce(def_(id_("f"))().block(if_(FALSE).block(call("a").stmt())))
+        == "def f():\n    pass"
+    )
+
+
+def test_dce_dead_stores():
+    x, y, f = id_("x"), id_("y"), id_("f")
+    assert (
+        dce(
+            def_(f)().block(
+                x.expr().assign(litint(1)),
+                y.expr().assign(id_("g").expr().call()),
+                return_(),
+            )
+        )
+        == "def f():\n    g()\n    return"
+    )
+    assert (
+        dce(
+            def_(f)().block(
+                x.expr().assign(litint(1)), litint(1).stmt(), litstr("doc").stmt()
+            )
+        )
+        == "def f():\n    'doc'"
+    )
+    # module globals, captured locals and dynamic access are kept
+    assert dce(x.expr().assign(litint(1))) == "x = 1"
+    kept = (
+        def_(f)().block(
+            x.expr().assign(litint(1)),
+            def_(id_("g"))().block(return_(x)),
+            return_(id_("g")),
+        ),
+        def_(f)().block(
+            x.expr().assign(litint(1)), return_(id_("locals").expr().call())
+        ),
+    )
+    for fn in kept:
+        assert dce(fn).count("x = 1") == 1
+
+
+def test_dce_try():
+    s, x = id_("s"), id_("x")
+    file = File(
+        def_(id_("parse"))(arg(s)).block(
+            try_(
+                x.expr().assign(id_("int").expr().call(s)),
+                id_("y").expr().assign(litint(1)),
+                s.expr().attr("strip").call().stmt(),
+            )
+            .except_(id_("ValueError"))
+            .block(return_(litint(-1))),
+            try_(id_("z").expr().assign(tup(litint(1), litint(2))))
+            .except_()
+            .block(PASS),
+            return_(litint(0)),
+        )
+    )
+    PassManager(DeadCodeElimination()).run(file)
+    # values which may raise stay inside `try`,
+    # which is only removed once its body is left with `pass`
+    assert file.into_str() == (
+        "def parse(s):\n"
+        "    try:\n"
+        "        int(s)\n"
+        "        s.strip()\n"
+        "    except ValueError:\n"
+        "        return -1\n"
+        "    return 0"
+    )
+    namespace = execute(file.into_str())
+    assert namespace["parse"]("a") == -1
+
+
+def test_dce_generators():
+    x, log = id_("x"), call("log").stmt()
+    marker = "if False:\n        yield"
+    cases = [
+        # unreachable and constant-false code, which makes the function a generator
+        (return_(), x.expr().assign(yield_(litint(1))), log),
+        (if_(FALSE).block(yield_(litint(1)).stmt(), log),),
+        (if_(TRUE).block(log).else_(yield_from(x).stmt()),),
+        (while_(FALSE).block(yield_(x).stmt()),),
+        (for_(x).in_(tup()).block(yield_(x).stmt()),),
+        (try_(PASS).except_().block(yield_(x).stmt()),),
+    ]
+    for statements in cases:
+        file = File(def_(id_("g"))().block(*statements))
+        PassManager(DeadCodeElimination()).run(file)
+        code = file.into_str()
+        assert code.endswith(marker) and "1" not in code, code
+        namespace = execute(code, {"log": print})
+        assert list(namespace["g"]()) == []
+    # the marker is kept as is, and yields of nested functions don't count
+    file = File(
+        def_(id_("g"))().block(return_(), if_(FALSE).block(KeywordStatement("yield")))
+    )
+    assert PassManager(DeadCodeElimination()).run(file).changes == 0
+    file = File(def_(id_("g"))().block(if_(FALSE).block(yield_(x).stmt()), log))
+    PassManager(DeadCodeElimination()).run(file)
+    assert file.into_str() == "def g():\n    " + marker + "\n    log()"
+    file = File(
+        def_(id_("f"))().block(return_(), def_(id_("h"))().block(yield_(x).stmt()))
+    )
+    PassManager(DeadCodeElimination()).run(file)
+    assert file.into_str() == "def f():\n    return"
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from synt.passes import DebugStripping
+from synt.passes import PassManager
+from synt.prelude import *
+
+from tests.helpers import call
+
+
+def build_file():
+    x = id_("x")
+    return File(
+        assert_(call("ready")),
+        def_(id_("f"))(arg(x)).block(
+            assert_(x.expr().gt(litint(0)), litstr("positive")),
+            debug_(call("log", x).stmt(), assert_(call("valid", x))),
+            if_(x).block(assert_(x)).else_(call("g", x).stmt()),
+            if_(id_("__debug__")).block(call("trace", x).stmt(), debug_(PASS)),
+            if_(id_("__debug__")).block(PASS).else_(call("h").stmt()),
+            return_(x),
+        ),
+    )
+
+
+def test_debug_strip():
+    file = build_file()
+    before = file.into_str()
+    assert file.into_str(debug=False) == (
+        "def f(x):\n"
+        "    if x:\n"
+        "        pass\n"
+        "    else:\n"
+        "        g(x)\n"
+        "    h()\n"
+        "    return x"
+    )
+    # rendering without debug statements leaves the tree unchanged
+    assert file.into_str() == before
+
+    report = PassManager(DebugStripping()).run(file)
+    assert report.converged
+    assert "assert" not in file.into_str()
+
+
+def test_debug_guard():
+    file = build_file()
+    report = PassManager(DebugStripping(guard=True)).run(file)
+    assert report.converged
+    assert file.into_str() == (
+        "if __debug__:\n"
+        "    assert ready()\n"
+        "def f(x):\n"
+        "    if __debug__:\n"
+        "        assert x > 0, 'positive'\n"
+        "        log(x)\n"
+        "        assert valid(x)\n"
+        "    if x:\n"
+        "        if __debug__:\n"
+        "            assert x\n"
+        "    else:\n"
+        "        g(x)\n"
+        "    if __debug__:\n"
+        "        trace(x)\n"
+        "        pass\n"
+        "    if __debug__:\n"
+        "        pass\n"
+        "    else:\n"
+        "        h()\n"
+        "    return x"
+    )
+    # guarded statements are not guarded again
+    report = PassManager(DebugStripping(guard=True)).run(file)
+    assert report.passes["DebugStripping"].changes == 0
+    # and are removed like the others
+    assert file.into_str(debug=False) == build_file().into_str(debug=False)
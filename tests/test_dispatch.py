@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import pytest
+
+from synt.passes import DictDispatch
+from synt.passes import PassManager
+from synt.prelude import *
+
+from tests.helpers import call
+from tests.helpers import same_results
+
+
+def chain(arms, *fallback):
+    branch = None
+    for test, *body in arms:
+        branch = (
+            if_(test).block(*body)
+            if branch is None
+            else branch.elif_(test).block(*body)
+        )
+    return branch.else_(*fallback) if fallback else branch
+
+
+def dispatch(*statements, args=("op",), **kwargs):
+    file = File(def_(id_("f"))(*(arg(id_(a)) for a in args)).block(*statements))
+    PassManager(DictDispatch(**kwargs)).run(file)
+    return file.into_str()
+
+
+def test_dispatch_table():
+    op = id_("op")
+    arms = [
+        (op.expr().eq(litstr("a")), return_(litint(1))),
+        (litstr("b").eq(op), return_(tup(litint(2), NONE))),
+        (op.expr().in_(tup(litstr("c"), litstr("a"), litint(-1))), return_()),
+        (
+            op.expr().eq(litstr("d")).bool_or(op.expr().eq(litstr("b"))),
+            return_(litint(4)),
+        ),
+    ]
+    assert dispatch(chain(arms, return_(litstr("?")))) == (
+        "_DISPATCH = {'a': 1, 'b': (2, None), 'c': None, -1: None, 'd': 4}\n"
+        "def f(op):\n"
+        "    return _DISPATCH.get(op, '?')"
+    )
+    # `None` defaults, missing or non-literal `else` branches
+    assert dispatch(chain(arms, return_())).endswith("return _DISPATCH.get(op)")
+    assert dispatch(chain(arms), return_(litint(0))).endswith(
+        "    if op in _DISPATCH:\n        return _DISPATCH[op]\n    return 0"
+    )
+    assert dispatch(chain(arms, return_(call("g", op)))).endswith(
+        "    if op in _DISPATCH:\n"
+        "        return _DISPATCH[op]\n"
+        "    else:\n"
+        "        return g(op)"
+    )
+    # remaining arms follow the lookup
+    code = dispatch(chain([*arms, (id_("x"), return_(litint(5)))], return_(litint(6))))
+    assert code.endswith(
+        "    if op in _DISPATCH:\n"
+        "        return _DISPATCH[op]\n"
+        "    elif x:\n"
+        "        return 5\n"
+        "    else:\n"
+        "        return 6"
+    )
+
+
+def test_dispatch_helpers():
+    op, a, r = id_("op"), id_("a"), id_("r")
+    arms = [
+        (op.expr().eq(litint(i)), r.expr().assign(a.expr() + litint(i)), return_(r))
+        for i in range(3)
+    ]
+    arms.append((op.expr().eq(litint(3)), raise_(call("ValueError", op))))
+    code = dispatch(chain(arms, return_(NONE)), args=("a", "op"), min_arms=4)
+    assert code == (
+        "def _dispatch(a, op):\n"
+        "    r = a + 0\n"
+        "    return r\n"
+        "def _dispatch_1(a, op):\n"
+        "    r = a + 1\n"
+        "    return r\n"
+        "def _dispatch_2(a, op):\n"
+        "    r = a + 2\n"
+        "    return r\n"
+        "def _dispatch_3(a, op):\n"
+        "    raise ValueError(op)\n"
+        "_DISPATCH = {0: _dispatch, 1: _dispatch_1, 2: _dispatch_2, 3: _dispatch_3}\n"
+        "def f(a, op):\n"
+        "    if op in _DISPATCH:\n"
+        "        return _DISPATCH[op](a, op)\n"
+        "    else:\n"
+        "        return None"
+    )
+    # arms without `return` are called as statements, in methods too
+    self = id_("self")
+    arms = [
+        (op.expr().eq(litint(i)), self.expr().attr("log").call(litint(i)).stmt())
+        for i in range(4)
+    ]
+    file = File(
+        class_(id_("A")).block(
+            def_(id_("m"))(arg(self), arg(op)).block(chain(arms), return_(op)),
+        )
+    )
+    PassManager(DictDispatch(prefix="_on")).run(file)
+    assert file.into_str().endswith(
+        "_ON = {0: _on, 1: _on_1, 2: _on_2, 3: _on_3}\n"
+        "class A:\n"
+        "    def m(self, op):\n"
+        "        if op in _ON:\n"
+        "            _ON[op](self)\n"
+        "        return op"
+    )
+
+
+def test_dispatch_kept():
+    op, x = id_("op"), id_("x")
+
+    def arms(*body):
+        return [(op.expr().eq(litint(i)), *body) for i in range(4)]
+
+    kept = [
+        # short chains, other subjects and non-constant tests
+        chain(arms(return_(litint(1)))[:3]),
+        chain([*arms(return_(litint(1)))[:3], (x.expr().eq(litint(4)), return_(x))]),
+        chain([*arms(return_(litint(1)))[:3], (op.expr().eq(x), return_(x))]),
+        chain([*arms(return_(litint(1)))[:3], (op.expr().eq(list_()), return_(x))]),
+        chain(
+            [*arms(return_(litint(1)))[:3], (op.expr().in_(litstr("ab")), return_(x))]
+        ),
+        # arms reading or assigning other locals, or mixing returns
+        chain(arms(return_(x))),
+        chain(arms(x.expr().assign(litint(1)))),
+        chain([*arms(return_(op))[:3], (op.expr().eq(litint(4)), call("g").stmt())]),
+        # jumps, yields and frame-dependent builtins
+        chain(arms(BREAK)),
+        chain(arms(yield_(op).stmt(), return_(op))),
+        chain(arms(return_(call("locals")))),
+        chain(arms(global_(id_("y")), return_(op))),
+    ]
+    for branch in kept:
+        code = dispatch(x.expr().assign(litint(0)), branch, return_(x))
+        assert "_DISPATCH" not in code, code
+    # locals keep their values across loop iterations
+    loop = (
+        for_(x)
+        .in_(id_("xs"))
+        .block(chain(arms(id_("y").expr().assign(op), call("g").stmt())))
+    )
+    assert "_DISPATCH" not in dispatch(loop)
+    # module-level chains
+    file = File(chain(arms(call("g").stmt())))
+    PassManager(DictDispatch()).run(file)
+    assert "_DISPATCH" not in file.into_str()
+    with pytest.raises(ValueError, match="at least one"):
+        DictDispatch(min_arms=0)
+
+
+def test_dispatch_semantics():
+    op, a, out = id_("op"), id_("a"), id_("out")
+
+    def build():
+        arms = []
+        for i, name in enumerate(("add", "sub", "mul", "neg", "pos")):
+            arms.append(
+                (
+                    op.expr().eq(litstr(name)),
+                    out.expr().assign(list_()),
+                    out.expr()
+                    .attr("append")
+                    .call(call("str", a.expr() + litint(i)))
+                    .stmt(),
+                    return_(out),
+                )
+            )
+        arms.append((op.expr().in_(tup(litint(1), TRUE)), return_(litstr("one"))))
+        return File(
+            def_(id_("f"))(arg(a), arg(op)).block(
+                chain(arms, return_(tup(op, a))),
+            )
+        )
+
+    file = same_results(
+        build,
+        PassManager(DictDispatch()).run,
+        lambda ns: [
+            ns["f"](2, op) for op in ("add", "neg", "pos", "div", 1, 1.0, True, 2)
+        ],
+    )
+    assert "_DISPATCH" in file.into_str()
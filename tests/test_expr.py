@@ -161,6 +161,9 @@ def test_expr_comp():
         .if_((id_("x").expr() % litint(2)) == litint(0))
     )
     assert comp_expr.into_code() == "[x async for x in range(5) if x % 2 == 0]"
+    x, y = id_("x"), id_("y")
+    comp_expr = list_comp(x.expr().for_(x).in_(id_("xs")).for_(y).in_(x).if_(y))
+    assert comp_expr.into_code() == "[x for x in xs for y in x if y]"
 
 
 def test_expr_cond():
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import tracemalloc
+
+from synt.expr.binary_op import BinaryOp
+from synt.expr.binary_op import BinaryOpType
+from synt.passes import PassManager
+from synt.passes.fold import ConstantFolding
+from synt.prelude import *
+
+
+def fold(e, **kwargs):
+    file = File(id_("r").expr().assign(e))
+    PassManager(ConstantFolding(**kwargs)).run(file)
+    return file.into_str().removeprefix("r = ")
+
+
+def test_fold_operations():
+    x = id_("x").expr()
+    assert fold(litint(60) * litint(60) * litint(24)) == "86400"
+    assert fold(TRUE.not_()) == "False"
+    assert fold(litstr("a") + litstr("b")) == "'ab'"
+    assert fold(litint(1).lt(litint(2)).lt(litint(3))) == "True"
+    assert fold(litstr("a").in_(litstr("abc"))) == "True"
+    assert fold(x * (litint(2) + litint(3))) == "x * 5"
+    assert fold(-litint(1)) == "-1"
+    assert fold(litint(7) // litint(2) + litfloat(0.5)) == "3.5"
+    assert fold(TRUE.bool_and(x + litint(1)) * litint(2)) == "(x + 1) * 2"
+    assert fold(FALSE.bool_or(x.bool_or(TRUE))) == "x or True"
+    assert fold(x.if_(litint(1).gt(litint(2))).else_(x + litint(3))) == "x + 3"
+
+
+def test_fold_grouping():
+    x = id_("x").expr()
+    # operands are grouped the way the rendered code parses
+    right = BinaryOp(
+        BinaryOpType.Sub, x, BinaryOp(BinaryOpType.Sub, litint(1), litint(2))
+    )
+    assert fold(right) == "x - 1 - 2"
+    assert fold(BinaryOp(BinaryOpType.Sub, litint(5), right.right)) == "2"
+    assert fold(x.lt(litint(1).lt(litint(2)))) == "x < 1 < 2"
+    assert fold((litint(1) - litint(2)).pow(litint(2))) == "1"
+    assert fold(litint(-2).pow(litint(2))) == "-2 ** 2"
+    assert fold((litint(1) - litint(2)).wrapped().attr("real")) == "(-1).real"
+    assert fold((litint(6) * litint(6)).wrapped().attr("real")) == "(36).real"
+    assert fold(x.pow(litint(1) - litint(3))) == "x ** (-2)"
+    # and so are the operands of grouped operations
+    nested = BinaryOp(
+        BinaryOpType.Sub,
+        x,
+        BinaryOp(BinaryOpType.Sub, litint(8) - litint(2), id_("y").expr()),
+    )
+    assert fold(nested) == "x - 8 - 2 - y"
+    assert fold(x.lt(litint(1).lt(litint(2) + litint(3)).lt(x))) == "x < 1 < 5 < x"
+
+
+def test_fold_guards():
+    assert fold(litint(1) / litint(0)) == "1 / 0"
+    assert fold(litint(2).pow(litint(100_000))) == "2 ** 100000"
+    assert fold(litint(1) << litint(10_000)) == "1 << 10000"
+    assert fold(litstr("ab") * litint(10_000)) == "'ab' * 10000"
+    assert fold(litstr("ab") * litint(3), max_str_length=4) == "'ab' * 3"
+    assert fold(litstr("%.9000f") % litfloat(1.0)) == "'%.9000f' % 1.0"
+    assert fold(litstr("%3d%%") % litint(7)) == "'  7%'"
+    # formatting widths are refused before allocating the result
+    tracemalloc.start()
+    try:
+        assert fold(litstr("%100000000s") % litint(1)) == "'%100000000s' % 1"
+        assert tracemalloc.get_traced_memory()[1] < 10_000_000
+    finally:
+        tracemalloc.stop()
+    assert fold(litint(2).pow(litint(64)), max_int_bits=64) == "2 ** 64"
+    assert fold(litfloat(1e308) * litint(10)) == "1e+308 * 10"
+    assert fold(litint(1).is_(litint(1))) == "1 is 1"
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from synt.passes import FunctionInlining
+from synt.passes import PassManager
+from synt.prelude import *
+
+from tests.helpers import call
+from tests.helpers import same_results
+
+
+def helper(name, params, e):
+    return def_(id_(name))(*(arg(id_(p)) for p in params)).block(return_(e))
+
+
+def inline(*statements, **kwargs):
+    file = File(*statements)
+    PassManager(FunctionInlining(**kwargs)).run(file)
+    return file.into_str()
+
+
+def test_inline_calls():
+    a, b, x, y = id_("a"), id_("b"), id_("x"), id_("y")
+    helpers = [
+        helper("add", "ab", a.expr() + b.expr()),
+        helper("sq", "a", a.expr() * a.expr()),
+        helper("first", "ab", a),
+        helper("log", "a", call("print", a)),
+    ]
+    code = inline(
+        *helpers,
+        def_(id_("f"))(arg(x), arg(y)).block(
+            # literals and locals are substituted, pure arguments used once too
+            y.expr().assign(call("add", x, litint(1)) * call("sq", y)),
+            y.expr().assign(call("sq", call("add", x, y.expr().attr("z")))),
+            # impure or unused arguments are evaluated first, in order
+            call("log", call("first", call("g"), call("h"))).stmt(),
+            return_(call("add", x, b=y)),
+        ),
+        remove=True,
+    )
+    assert code == (
+        "def f(x, y):\n"
+        "    y = (x + 1) * (y * y)\n"
+        "    _a = x + y.z\n"
+        "    y = _a * _a\n"
+        "    _a_1 = g()\n"
+        "    _b = h()\n"
+        "    print(_a_1)\n"
+        "    return x + y"
+    )
+
+
+def test_inline_kept():
+    a, x = id_("a"), id_("x")
+    inc = helper("inc", "a", a.expr() + litint(1))
+
+    def caller(*statements):
+        return def_(id_("f"))(arg(x)).block(*statements)
+
+    kept = [
+        # calls needing temporaries after other evaluations, or outside statements
+        caller(return_(call("g") + call("inc", call("g")))),
+        caller(return_(list_comp(call("inc", call("g")).for_(x).in_(x)))),
+        # wrong arguments, other names and module-level calls
+        caller(return_(call("inc", x, x))),
+        caller(return_(call("inc", b=x))),
+        caller(id_("inc").expr().assign(x), return_(call("inc", x))),
+        call("inc", x).stmt(),
+    ]
+    for statement in kept:
+        assert "inc(" in inline(inc, statement), statement
+    # shadowed globals, recursion, generators, decorators and complex bodies
+    g = id_("g")
+    functions = [
+        helper("h", "a", g.expr().call(a)),
+        helper("h", "a", id_("h").expr().call(a)),
+        helper("h", "a", yield_(a)),
+        helper("h", "a", call("locals")),
+        helper("h", "a", lambda_(x).ret(a)),
+        def_(id_("h"))(arg(a)).decorator(g).block(return_(a)),
+        def_(id_("h"))(arg(a, default=litint(1))).block(return_(a)),
+        def_(id_("h"))(arg(a)).block(PASS, return_(a)),
+        helper("h", "a", sum((a.expr() for _ in range(40)), litint(0))),
+    ]
+    for fn in functions:
+        code = inline(fn, def_(id_("f"))(arg(g)).block(return_(call("h", g))))
+        assert "return h(g)" in code, code
+    # functions still read are kept
+    code = inline(inc, caller(return_(id_("inc"))), remove=True)
+    assert code.startswith("def inc(a):")
+
+
+def test_inline_semantics():
+    a, b, x, log = id_("a"), id_("b"), id_("x"), id_("log")
+
+    def build_file():
+        append = log.expr().attr("append")
+        return File(
+            log.expr().assign(list_()),
+            def_(id_("note"))(arg(a)).block(
+                return_(append.call(a).bool_or(a)),
+            ),
+            def_(id_("pair"))(arg(a), arg(b)).block(
+                return_(tup(b, a, b.expr() - a.expr())),
+            ),
+            def_(id_("f"))(arg(x)).block(
+                x.expr().assign(
+                    call("pair", call("note", x), call("note", x.expr() + litint(1)))[
+                        litint(2)
+                    ]
+                ),
+                return_(call("pair", x, litint(-2))),
+            ),
+        )
+
+    file = same_results(
+        build_file,
+        PassManager(FunctionInlining(remove=True)).run,
+        lambda ns: (ns["f"](3), ns["log"]),
+    )
+    assert "pair(" not in file.into_str()
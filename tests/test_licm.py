@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from synt.passes import LoopInvariantCodeMotion
+from synt.passes import PassManager
+from synt.prelude import *
+
+from tests.helpers import call
+from tests.helpers import execute
+
+
+def licm(*statements, args=("self", "xs")):
+    file = File(def_(id_("f"))(*(arg(id_(a)) for a in args)).block(*statements))
+    PassManager(LoopInvariantCodeMotion()).run(file)
+    return file.into_str().split("\n", 1)[1]
+
+
+def attr(name, *attrs):
+    e = id_(name).expr()
+    for a in attrs:
+        e = e.attr(a).expr()
+    return e
+
+
+def test_licm_hoist():
+    x, i = id_("x"), id_("i")
+    assert licm(
+        for_(x)
+        .in_(id_("xs"))
+        .block(
+            call(attr("self", "out", "append"), x.expr() + attr("self", "k")).stmt(),
+            for_(i)
+            .in_(call("range", call("len", attr("self", "rows"))))
+            .block(
+                call("print", i).stmt(),
+            ),
+        ),
+    ) == (
+        "    try:\n"
+        "        _licm_0 = self.out.append\n"
+        "        _licm_1 = self.k\n"
+        "        _licm_2 = range(len(self.rows))\n"
+        "    except Exception:\n"
+        "        for x in xs:\n"
+        "            self.out.append(x + self.k)\n"
+        "            for i in range(len(self.rows)):\n"
+        "                print(i)\n"
+        "    else:\n"
+        "        for x in xs:\n"
+        "            _licm_0(x + _licm_1)\n"
+        "            for i in _licm_2:\n"
+        "                print(i)"
+    )
+    # loops over non-empty displays always iterate
+    assert licm(
+        for_(x)
+        .in_(tuple_(litint(1), litint(2)))
+        .block(
+            call("print", attr("self", "k") + x).stmt(),
+        ),
+    ) == ("    _licm_0 = self.k\n    for x in (1, 2):\n        print(_licm_0 + x)")
+    assert licm(
+        i.expr().assign(litint(0)),
+        while_(i.expr().lt(call("len", id_("xs")))).block(
+            i.expr().assign(i.expr() + litint(1)),
+        ),
+    ) == ("    i = 0\n    _licm_0 = len(xs)\n    while i < _licm_0:\n        i = i + 1")
+
+
+def test_licm_variant():
+    x = id_("x")
+    kept = [
+        # rebound, mutated or reassigned attributes
+        [x.expr().assign(attr("self", "a")), id_("self").expr().assign(x)],
+        [x.expr().assign(attr("self", "a")), attr("self", "b").assign(x)],
+        [x.expr().assign(call("len", id_("xs"))), call(attr("xs", "pop")).stmt()],
+        [x.expr().assign(attr("self", "a")), call("g", id_("self")).stmt()],
+        [call(attr("self", "cb"), x).stmt(), attr("self", "cb").assign(NONE)],
+        # globals with impure calls, conditional and early-exit evaluation
+        [x.expr().assign(attr("cfg", "a")), call("g").stmt()],
+        [x.expr().assign(x.expr().bool_or(attr("self", "a")))],
+        [if_(x).block(BREAK), x.expr().assign(attr("self", "a"))],
+        # fresh mutable objects
+        [x.expr().assign(list_(attr("self", "a")))],
+    ]
+    for body in kept:
+        code = licm(for_(x).in_(id_("xs")).block(*body))
+        # the rewritten loop, after the original one if it is versioned
+        rewritten = code.split("    else:\n")[-1]
+        kept_code = next(
+            c for c in (s.into_code() for s in body) if not c.startswith("if")
+        )
+        assert kept_code in [line.strip() for line in rewritten.split("\n")], code
+    # methods of other objects don't change attributes of `self`
+    code = licm(
+        for_(x)
+        .in_(id_("xs"))
+        .block(call(attr("self", "log", "add"), x.expr() + attr("self", "a")).stmt())
+    )
+    assert "_licm_1 = self.a" in code, code
+    # values only used to compute others are fine, even with calls
+    code = licm(
+        for_(x)
+        .in_(id_("xs"))
+        .block(call("print", attr("self", "a") + call("len", x)).stmt())
+    )
+    assert code.startswith("    try:\n        _licm_0 = self.a\n")
+
+
+def test_licm_semantics():
+    x, out = id_("x"), id_("out")
+    file = File(
+        def_(id_("f"))(arg(id_("cfg")), arg(id_("xs"))).block(
+            out.expr().assign(list_()),
+            for_(x)
+            .in_(id_("xs"))
+            .block(
+                call(attr("out", "append"), x.expr() * attr("cfg", "scale")).stmt(),
+                if_(call("len", id_("out")).gt(litint(2))).block(BREAK),
+            ),
+            return_(out),
+        )
+    )
+    PassManager(LoopInvariantCodeMotion()).run(file)
+    assert "_licm_1 = cfg.scale" in file.into_str()
+    namespace = execute(file.into_str())
+
+    class Config:
+        scale = 10
+
+    assert namespace["f"](Config(), [1, 2, 3, 4]) == [10, 20, 30]
+
+
+def test_licm_zero_iterations():
+    r, out = id_("r"), id_("out")
+    file = File(
+        def_(id_("f"))(arg(id_("rows")), arg(id_("cfg"))).block(
+            out.expr().assign(list_()),
+            for_(r)
+            .in_(id_("rows"))
+            .block(
+                call(
+                    attr("out", "append"), r.expr() * id_("cfg").expr()[litstr("scale")]
+                ).stmt(),
+            ),
+            return_(out),
+        )
+    )
+    PassManager(LoopInvariantCodeMotion()).run(file)
+    assert "_licm_1 = cfg['scale']" in file.into_str()
+    namespace = execute(file.into_str())
+    # hoisted expressions that raise don't run ahead of an empty loop
+    assert namespace["f"]([], {}) == []
+    assert namespace["f"]([1, 2], {"scale": 3}) == [3, 6]
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from synt.passes import LambdaLifting
+from synt.passes import PassManager
+from synt.prelude import *
+
+from tests.helpers import call
+from tests.helpers import execute
+from tests.helpers import same_results
+
+
+def lift(*statements):
+    file = File(*statements)
+    PassManager(LambdaLifting()).run(file)
+    return file.into_str()
+
+
+def test_lift_lambdas():
+    x, xs, i, out = id_("x"), id_("xs"), id_("i"), id_("out")
+    key = lambda_(x).ret(call("abs", x))
+    code = lift(
+        for_(i).in_(xs).block(id_("sorted").expr().call(xs, key=key).stmt()),
+        def_(id_("f"))(arg(xs)).block(
+            out.expr().assign(list_()),
+            if_(xs).block(
+                for_(i)
+                .in_(xs)
+                .block(
+                    while_(i).block(
+                        out.expr()
+                        .attr("append")
+                        .call(lambda_(x).ret(tup(x, i, out, id_("g"))))
+                        .stmt(),
+                        i.expr().assign(i.expr() - litint(1)),
+                    ),
+                ),
+            ),
+            def_(id_("g"))().block(
+                for_(i).in_(xs).block(call("h", lambda_().ret(xs)).stmt()),
+            ),
+            return_(out),
+        ),
+    )
+    assert code == (
+        "def _lambda(x):\n"
+        "    return abs(x)\n"
+        "for i in xs:\n"
+        "    sorted(xs, key=_lambda)\n"
+        "def f(xs):\n"
+        "    out = []\n"
+        "    if xs:\n"
+        "        def _lambda_1(x):\n"
+        "            return (x, i, out, g)\n"
+        "        for i in xs:\n"
+        "            while i:\n"
+        "                out.append(_lambda_1)\n"
+        "                i = i - 1\n"
+        "    def g():\n"
+        "        def _lambda_2():\n"
+        "            return xs\n"
+        "        for i in xs:\n"
+        "            h(_lambda_2)\n"
+        "    return out"
+    )
+
+
+def test_lift_kept():
+    x, xs, i = id_("x"), id_("xs"), id_("i")
+
+    def loop(e):
+        return for_(i).in_(xs).block(call("h", e).stmt())
+
+    kept = [
+        # outside loops, in comprehensions and class bodies
+        def_(id_("f"))().block(call("h", lambda_(x).ret(x)).stmt()),
+        def_(id_("f"))().block(loop(list_comp(lambda_().ret(x).for_(x).in_(xs)))),
+        class_(id_("A")).block(loop(lambda_(x).ret(x))),
+        # yields and frame-dependent names
+        def_(id_("f"))().block(loop(lambda_().ret(yield_(x)))),
+        def_(id_("f"))().block(loop(lambda_().ret(call("super")))),
+    ]
+    for statement in kept:
+        assert "_lambda" not in lift(statement)
+    # nested lambdas are lifted with their parent
+    code = lift(loop(lambda_(x).ret(lambda_().ret(x))))
+    assert code == (
+        "def _lambda(x):\n    return lambda : x\nfor i in xs:\n    h(_lambda)"
+    )
+
+
+def test_lift_semantics():
+    i, x, fs, n = id_("i"), id_("x"), id_("fs"), id_("n")
+
+    def build_file():
+        # lambdas called in the loop see the current `i`, later calls the last one
+        append = fs.expr().attr("append")
+        return File(
+            def_(id_("run"))(arg(n)).block(
+                fs.expr().assign(list_()),
+                for_(i)
+                .in_(call("range", n))
+                .block(
+                    append.call(lambda_(x).ret(tup(x, i))).stmt(),
+                    append.call(fs.expr()[-litint(1)].call(litint(1))).stmt(),
+                ),
+                return_(fs),
+            )
+        )
+
+    file = same_results(
+        build_file,
+        PassManager(LambdaLifting()).run,
+        lambda ns: [v(0) if callable(v) else v for v in ns["run"](3)],
+    )
+    assert "lambda " not in file.into_str()
+
+
+def test_lift_private():
+    s, objs, out = id_("s"), id_("objs"), id_("out")
+    key = lambda_(s).ret(s.expr().attr("__v"))
+    file = File(
+        class_(id_("C")).block(
+            def_(id_("__init__"))(arg(id_("self")), arg(id_("v"))).block(
+                id_("self").expr().attr("__v").assign(id_("v")),
+            ),
+            def_(id_("order"))(arg(id_("self")), arg(objs)).block(
+                out.expr().assign(list_()),
+                for_(id_("k"))
+                .in_(call("range", litint(2)))
+                .block(
+                    out.expr()
+                    .attr("append")
+                    .call(id_("sorted").expr().call(objs, key=key))
+                    .stmt()
+                ),
+                return_(out),
+            ),
+        )
+    )
+    PassManager(LambdaLifting()).run(file)
+    # `s.__v` is mangled to `s._C__v` in the method, but not at module level
+    code = file.into_str()
+    assert code.startswith("class C:") and "        def _lambda(s):" in code, code
+    namespace = execute(code)
+    a, b = namespace["C"](2), namespace["C"](1)
+    assert a.order([a, b]) == [[b, a], [b, a]]
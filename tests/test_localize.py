@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+from synt.passes import GlobalLocalization
+from synt.passes import PassManager
+from synt.prelude import *
+
+from tests.helpers import call
+from tests.helpers import execute
+
+
+def loop(*statements):
+    return for_(id_("x")).in_(id_("xs")).block(*statements)
+
+
+def localize(*statements, defaults=False):
+    file = File(*statements)
+    PassManager(GlobalLocalization(defaults=defaults)).run(file)
+    return file.into_str()
+
+
+def test_localize_names():
+    x = id_("x").expr()
+    code = localize(
+        id_("scale").expr().assign(litint(2)),
+        def_(id_("f"))(arg(id_("xs"))).block(
+            litstr("Doc.").stmt(),
+            id_("n").expr().assign(call("len", id_("xs"))),
+            loop(
+                if_(call("isinstance", x, id_("int"))).block(
+                    call("print", x * id_("scale").expr(), id_("n")).stmt()
+                ),
+            ),
+        ),
+    )
+    assert code == (
+        "scale = 2\n"
+        "def f(xs):\n"
+        "    'Doc.'\n"
+        "    _isinstance = isinstance\n"
+        "    _int = int\n"
+        "    _print = print\n"
+        "    _scale = scale\n"
+        "    n = len(xs)\n"
+        "    for x in xs:\n"
+        "        if _isinstance(x, _int):\n"
+        "            _print(x * _scale, n)"
+    )
+    # reads outside loops go through the local too
+    code = localize(
+        def_(id_("f"))(arg(id_("xs"))).block(
+            while_(call("len", id_("xs"))).block(
+                id_("xs").expr().attr("pop").call().stmt()
+            ),
+            return_(call("len", id_("xs"))),
+        ),
+    )
+    assert code == (
+        "def f(xs):\n"
+        "    _len = len\n"
+        "    while _len(xs):\n"
+        "        xs.pop()\n"
+        "    return _len(xs)"
+    )
+
+
+def test_localize_kept():
+    x = id_("x").expr()
+    kept = [
+        # rebound by a function, declared global or nonlocal, deleted or local
+        (
+            "total",
+            id_("total").expr().assign(litint(0)),
+            def_(id_("g"))().block(
+                global_(id_("total")), id_("total").expr().assign(litint(1))
+            ),
+            def_(id_("f"))(arg(id_("xs"))).block(
+                loop(call("print", id_("total")).stmt())
+            ),
+        ),
+        (
+            "print",
+            def_(id_("f"))(arg(id_("xs"))).block(
+                global_(id_("print")), loop(call("print", x).stmt())
+            ),
+        ),
+        (
+            "helper",
+            id_("helper").expr().assign(NONE),
+            del_(id_("helper")),
+            def_(id_("f"))(arg(id_("xs"))).block(loop(call("helper", x).stmt())),
+        ),
+        (
+            "print",
+            def_(id_("f"))(arg(id_("xs")), arg(id_("print"))).block(
+                loop(call("print", x).stmt())
+            ),
+        ),
+        # undefined names, `super` and names only read outside loops
+        (
+            "missing",
+            def_(id_("f"))(arg(id_("xs"))).block(loop(call("missing", x).stmt())),
+        ),
+        (
+            "super",
+            def_(id_("f"))(arg(id_("xs"))).block(
+                loop(call("super").attr("f").call(x).stmt())
+            ),
+        ),
+        ("len", def_(id_("f"))(arg(id_("xs"))).block(return_(call("len", id_("xs"))))),
+        # lambdas and module-level loops
+        (
+            "len",
+            def_(id_("f"))(arg(id_("xs"))).block(
+                return_(lambda_(id_("x")).ret(call("len", x)))
+            ),
+        ),
+        ("print", loop(call("print", x).stmt())),
+    ]
+    for name, *statements in kept:
+        code = localize(*statements)
+        assert f"_{name}" not in code, code
+
+
+def test_localize_modules():
+    x = id_("x").expr()
+    sqrt = id_("math").expr().attr("sqrt")
+    code = localize(
+        import_(id_("math")),
+        def_(id_("f"))(arg(id_("xs"))).block(
+            loop(call("print", sqrt.call(x), id_("math").expr().attr("pi")).stmt()),
+        ),
+    )
+    assert code == (
+        "import math\n"
+        "def f(xs):\n"
+        "    _print = print\n"
+        "    _math_sqrt = math.sqrt\n"
+        "    _math_pi = math.pi\n"
+        "    for x in xs:\n"
+        "        _print(_math_sqrt(x), _math_pi)"
+    )
+    # assigned attributes may change
+    code = localize(
+        import_(id_("math")),
+        def_(id_("f"))(arg(id_("xs"))).block(
+            loop(id_("math").expr().attr("pi").assign(x)),
+        ),
+    )
+    assert "_math_pi" not in code
+
+
+def test_localize_defaults():
+    x = id_("x").expr()
+    code = localize(
+        def_(id_("helper"))(arg(id_("x"))).block(return_(x)),
+        def_(id_("f"))(vararg(id_("xs")), kwarg(id_("kw"))).block(
+            loop(call("helper", call("later", x)).stmt()),
+        ),
+        def_(id_("later"))(arg(id_("x"))).block(return_(x)),
+        class_(id_("A")).block(
+            id_("len").expr().assign(litint(1)),
+            def_(id_("m"))(arg(id_("self")), arg(id_("xs"))).block(
+                loop(call("print", call("len", x)).stmt()),
+            ),
+        ),
+        defaults=True,
+    )
+    assert code == (
+        "def helper(x):\n"
+        "    return x\n"
+        "def f(*xs, _helper = helper, **kw):\n"
+        "    _later = later\n"
+        "    for x in xs:\n"
+        "        _helper(_later(x))\n"
+        "def later(x):\n"
+        "    return x\n"
+        "class A:\n"
+        "    len = 1\n"
+        "    def m(self, xs, *, _print = print):\n"
+        "        _len = len\n"
+        "        for x in xs:\n"
+        "            _print(_len(x))"
+    )
+
+
+def test_localize_semantics():
+    x = id_("x").expr()
+    file = File(
+        import_(id_("math")),
+        def_(id_("f"))(arg(id_("xs"))).block(
+            id_("out").expr().assign(list_()),
+            loop(
+                id_("out")
+                .expr()
+                .attr("append")
+                .call(id_("math").expr().attr("floor").call(call("abs", x)))
+                .stmt()
+            ),
+            return_(
+                tuple_(
+                    id_("out"), list_comp(call("str", x).for_(id_("x")).in_(id_("xs")))
+                )
+            ),
+        ),
+    )
+    for defaults in (False, True):
+        PassManager(GlobalLocalization(defaults=defaults)).run(file)
+        namespace = execute(file.into_str())
+        assert namespace["f"]([-1.5, 2.5]) == ([1, 2], ["-1.5", "2.5"])
+    assert "_abs" in file.into_str() and "_str" in file.into_str()
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import pytest
+
+from synt.passes import MatchLowering
+from synt.passes import PassManager
+from synt.prelude import *
+
+from tests.helpers import same_results
+
+
+def cls(name):
+    return id_(name).expr().call()
+
+
+def build(*cases, subject=None):
+    m = match_(subject or id_("x"))
+    for pattern, guard, *body in cases:
+        case = m.case_(pattern)
+        if guard is not None:
+            case = case.if_(guard)
+        m = case.block(*body)
+    return m
+
+
+def lower(*cases, subject=None, **kwargs):
+    file = File(def_(id_("f"))(arg(id_("x"))).block(build(*cases, subject=subject)))
+    PassManager(MatchLowering(**kwargs)).run(file)
+    return file.into_str()
+
+
+def test_match_literals():
+    code = lower(
+        (litint(1), id_("flag"), return_(litint(1))),
+        (litint(2) | litint(-3), None, return_(litint(2))),
+        (litint(-3), None, return_(litint(3))),
+        (litstr("a"), None, return_(litint(4))),
+        (id_("y"), id_("y").expr() > litint(0), return_(id_("y"))),
+        subject=id_("x").expr() + litint(1),
+        min_cases=3,
+    )
+    assert code == (
+        "_MATCH = {1: 0, 2: 1, -3: 1, 'a': 2}\n"
+        "def f(x):\n"
+        "    _subject = x + 1\n"
+        "    try:\n"
+        "        _case = _MATCH.get(_subject, 3)\n"
+        "    except TypeError:\n"
+        "        _case = 3\n"
+        "    if _case < 2:\n"
+        "        if _case < 1:\n"
+        "            if flag:\n"
+        "                return 1\n"
+        "            else:\n"
+        "                _case = 3\n"
+        "        else:\n"
+        "            return 2\n"
+        "    elif _case < 3:\n"
+        "        return 4\n"
+        "    if _case == 3:\n"
+        "        match _subject:\n"
+        "            case y if y > 0:\n"
+        "                return y"
+    )
+    # literals repeated after a guarded case, `None`, `True` and `False` end the tables
+    code = lower(
+        (litint(1), id_("flag"), return_(litint(1))),
+        (litint(2), None, return_(litint(2))),
+        (litint(1), None, return_(litint(3))),
+        (NONE, None, return_(litint(4))),
+        min_cases=2,
+    )
+    assert "_MATCH = {1: 0, 2: 1}" in code
+    assert "case 1:" in code and "case None:" in code
+
+
+def test_match_classes():
+    code = lower(
+        (cls("bool"), None, return_(litint(0))),
+        (cls("int") | cls("float"), None, return_(litint(1))),
+        (cls("Exception"), None, return_(litint(2))),
+        (UNDERSCORE, None, return_(litint(3))),
+        min_cases=3,
+    )
+    assert code == (
+        "def _match_class(kind, classes):\n"
+        "    for i, cls in enumerate(classes):\n"
+        "        if issubclass(kind, cls):\n"
+        "            return i\n"
+        "    return len(classes)\n"
+        "_MATCH = {}\n"
+        "def f(x):\n"
+        "    _case = _MATCH.get(type(x))\n"
+        "    if _case is None:\n"
+        "        _case = _match_class(type(x), (bool, (int, float), Exception))\n"
+        "        _MATCH[type(x)] = _case\n"
+        "    if _case < 2:\n"
+        "        if _case < 1:\n"
+        "            return 0\n"
+        "        else:\n"
+        "            return 1\n"
+        "    elif _case < 3:\n"
+        "        return 2\n"
+        "    else:\n"
+        "        return 3"
+    )
+
+
+def test_match_kept():
+    point = id_("Point").expr()
+    kept = [
+        # too few cases, sub-patterns, guards and non-literal values
+        [(litint(i), None, PASS) for i in range(3)],
+        [(point.call(litint(i)), None, PASS) for i in range(4)],
+        [(cls("int"), id_("flag"), PASS) for _ in range(4)],
+        [(id_("Color").expr().attr(f"C{i}"), None, PASS) for i in range(4)],
+        [(TRUE, None, PASS), *((litint(i), None, PASS) for i in range(4))],
+    ]
+    for cases in kept:
+        assert "_MATCH" not in lower(*cases, min_cases=4)
+    # classes bound more than once, shadowed builtins and class bodies
+    cases = [(cls(name), None, PASS) for name in ("A", "B", "int", "str")]
+    for statements in (
+        [class_(id_("A")).block(PASS), id_("A").expr().assign(NONE)],
+        [id_("type").expr().assign(id_("len"))],
+    ):
+        file = File(
+            class_(id_("B")).block(PASS),
+            *statements,
+            def_(id_("f"))(arg(id_("x"))).block(build(*cases)),
+        )
+        PassManager(MatchLowering(min_cases=4)).run(file)
+        assert "_MATCH" not in file.into_str()
+    file = File(
+        class_(id_("C")).block(build(*((litint(i), None, PASS) for i in range(4))))
+    )
+    PassManager(MatchLowering(min_cases=4)).run(file)
+    assert "_MATCH" not in file.into_str()
+    with pytest.raises(ValueError, match="at least one"):
+        MatchLowering(min_cases=0)
+
+
+def test_match_semantics():
+    x, y = id_("x"), id_("y")
+
+    def build_file():
+        cases = [
+            (litint(i) | litint(i + 100), None, return_(litint(i))) for i in range(20)
+        ]
+        cases.insert(3, (litint(42), x.expr() > litint(41), return_(litstr("guard"))))
+        cases += [(cls(name), None, return_(litstr(name))) for name in ("bool", "int")]
+        cases += [(cls("str"), None, return_(litstr("str")))] * 8
+        cases.append((y, None, return_(tup(y, x))))
+        return File(def_(id_("f"))(arg(x)).block(build(*cases)))
+
+    # unhashable subjects fall through to the remaining cases
+    subjects = [0, 3, 42, 19, 119, 120, True, 1.0, 1.5, "a", b"a", None, 2**80, [1], {}]
+    file = same_results(
+        build_file,
+        PassManager(MatchLowering()).run,
+        lambda ns: [ns["f"](s) for s in subjects],
+    )
+    assert "match " not in file.into_str()
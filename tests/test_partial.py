@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from synt import partial_eval
+from synt.prelude import *
+
+from tests.helpers import call
+from tests.helpers import execute
+from tests.helpers import same_results
+
+
+def test_partial_eval():
+    flag, width, mode, fields = id_("flag"), id_("width"), id_("mode"), id_("fields")
+    f, row, out = id_("f"), id_("row"), id_("out")
+    file = File(
+        def_(id_("render"))(arg(row)).block(
+            out.expr().assign(list_()),
+            for_(f)
+            .in_(fields)
+            .block(out.expr().attr("append").call(row.expr()[f]).stmt()),
+            if_(flag.expr().not_())
+            .block(return_(out))
+            .elif_(width.expr().gt(litint(4)))
+            .block(call("pad", out, width.expr() * litint(2)).stmt())
+            .else_(call("trim", out).stmt()),
+            match_(mode)
+            .case_(litstr("csv"))
+            .block(return_(call("csv", out)))
+            .case_(litstr("json") | litstr("yaml"))
+            .block(return_(call("dump", out)))
+            .case_(UNDERSCORE)
+            .block(return_(out)),
+        ),
+    )
+    env = {
+        "flag": TRUE,
+        "width": litint(8),
+        "mode": litstr("yaml"),
+        "fields": tup(litstr("a"), litstr("b")),
+    }
+    assert partial_eval(file, env) is file
+    assert file.into_str() == (
+        "def render(row):\n"
+        "    out = []\n"
+        "    out.append(row['a'])\n"
+        "    out.append(row['b'])\n"
+        "    f = 'b'\n"
+        "    pad(out, 16)\n"
+        "    return dump(out)"
+    )
+
+    x = id_("x")
+    assert partial_eval(width.expr() * litint(2) + x, env).into_code() == "16 + x"
+    assert partial_eval(if_(flag).block(PASS), {"flag": FALSE}).into_code() == "pass"
+    block = partial_eval(if_(flag).block(call("a").stmt(), call("b").stmt()), env)
+    assert block.into_code() == "a()\nb()"
+
+
+def test_partial_eval_kept():
+    flag, x, n = id_("flag"), id_("x"), id_("n")
+    env = {"flag": TRUE, "n": -litint(1)}
+    kept = [
+        # names bound by the code, or in patterns
+        def_(id_("f"))(arg(flag)).block(return_(flag)),
+        class_(id_("A"))().block(flag.expr().assign(FALSE), return_(flag)),
+        def_(id_("f"))().block(global_(flag), flag.expr().assign(FALSE)),
+        match_(x).case_(id_("flag").expr().attr("a")).block(PASS),
+        # unknown tests, subjects and patterns
+        if_(x).block(return_(x)),
+        match_(litint(1)).case_(x).if_(x).block(PASS).case_(UNDERSCORE).block(PASS),
+    ]
+    for node in kept:
+        assert "True" not in partial_eval(node, env).into_code()
+
+    code = partial_eval(
+        match_(litint(1))
+        .case_(litint(0))
+        .block(return_(litint(0)))
+        .case_(TRUE)
+        .block(return_(litint(1)))
+        .case_(x)
+        .if_(x.expr().gt(n))
+        .block(return_(x))
+        .case_(litint(1))
+        .block(return_(litint(2)))
+        .case_(UNDERSCORE)
+        .block(return_(litint(3))),
+        env,
+    ).into_code()
+    # `True` is matched by identity, and cases after an unguarded match are dropped
+    assert code == (
+        "match 1:\n"
+        "    case x if x > (-1):\n"
+        "        return x\n"
+        "    case 1:\n"
+        "        return 2"
+    )
+
+
+def test_partial_eval_semantics():
+    flag, width, mode = id_("flag"), id_("width"), id_("mode")
+    i, k, acc = id_("i"), id_("k"), id_("acc")
+
+    def build_file():
+        return File(
+            def_(id_("run"))(arg(i)).block(
+                acc.expr().assign(litint(0)),
+                for_(k)
+                .in_(call("range", width))
+                .block(
+                    if_(flag.expr() & (k.expr() % litint(2)).eq(litint(0)))
+                    .block(acc.expr().assign(acc.expr() + k.expr() * i))
+                    .else_(acc.expr().assign(acc.expr() - litint(1))),
+                ),
+                match_(mode)
+                .case_(litint(0))
+                .block(return_(acc))
+                .case_(litint(1) | litint(2))
+                .block(return_(acc.expr() * mode))
+                .case_(UNDERSCORE)
+                .block(return_(-acc.expr())),
+            )
+        )
+
+    for values in ((True, 4, 0), (False, 3, 2), (True, 6, 7)):
+        env = dict(zip(("flag", "width", "mode"), values, strict=True))
+        file = same_results(
+            build_file,
+            lambda file, env=env: partial_eval(file, _env(env)),
+            lambda ns: [ns["run"](j) for j in range(5)],
+            env,
+        )
+        assert "mode" not in file.into_str()
+
+
+def _env(values):
+    return {
+        k: TRUE if v is True else FALSE if v is False else litint(v)
+        for k, v in values.items()
+    }
+
+
+def test_partial_eval_generators():
+    trace, mode, xs = id_("TRACE"), id_("MODE"), id_("xs")
+    env = {"TRACE": FALSE, "MODE": litint(1)}
+    marker = "    if False:\n        yield\n"
+    cases = [
+        (if_(trace).block(yield_(litstr("start")).stmt()), marker),
+        (match_(mode).case_(litint(0)).block(yield_from(xs).stmt()), marker),
+        (
+            match_(mode)
+            .case_(litint(1))
+            .block(call("log").stmt())
+            .case_(UNDERSCORE)
+            .block(yield_(litint(0)).stmt()),
+            "    log()\n" + marker,
+        ),
+    ]
+    for statement, body in cases:
+        file = File(def_(id_("g"))(arg(xs)).block(statement, return_()))
+        partial_eval(file, env)
+        # `g` stays a generator
+        assert file.into_str() == "def g(xs):\n" + body + "    return"
+        assert partial_eval(file, env).into_str() == file.into_str()
+        namespace = execute(file.into_str(), {"log": list})
+        assert list(namespace["g"]([1])) == []
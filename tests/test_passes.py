@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import pytest
+
+from synt.passes import AnalysisManager
+from synt.passes import ControlFlowAnalysis
+from synt.passes import Pass
+from synt.passes import PassManager
+from synt.passes import PurityAnalysis
+from synt.passes import ScopeAnalysis
+from synt.passes import TransformerPass
+from synt.prelude import *
+
+
+def test_scope_analysis():
+    x, y, f, g = id_("x"), id_("y"), id_("f"), id_("g")
+    file = File(
+        x.expr().assign(litint(1)),
+        def_(f)(arg(y)).block(
+            global_(x),
+            x.expr().assign(y.expr()),
+            def_(g)().block(return_(y.expr() + id_("len").expr().call(y))),
+            return_(g.expr().call()),
+        ),
+        list_comp(y.expr().for_(y).in_(x.expr())).stmt(),
+    )
+    scopes = AnalysisManager(file).get(ScopeAnalysis)
+    module = scopes.module
+    fn = scopes.scope(file.body.body[1])
+    inner = scopes.scope(file.body.body[1].body.body[2])
+    assert module.stores == {"x": 1, "f": 1}
+    assert fn.params == ["y"] and not fn.binds("x") and fn.binds("g")
+    assert fn.resolve("x") is module
+    assert inner.resolve("y") is fn and inner.resolve("len") is None
+    assert fn.captured == {"y"}
+    comp = module.children[1]
+    assert comp.stores == {"y": 1} and module.loads["x"] == 1
+    assert len(list(scopes)) == 4
+
+
+def test_control_flow_analysis():
+    dead = [id_("print").expr().call(litint(i)).stmt() for i in range(5)]
+    file = File(
+        def_(id_("f"))().block(
+            while_(TRUE).block(
+                if_(id_("a")).block(BREAK, dead[0]),
+                CONTINUE,
+                dead[1],
+            ),
+            try_(return_(litint(1)), dead[2]).finally_(PASS),
+            dead[3],
+        ),
+        while_(TRUE).block(try_(BREAK).finally_(PASS)),
+        alive := id_("print").expr().call().stmt(),
+        while_(TRUE).block(PASS),
+        dead[4],
+    )
+    flow = AnalysisManager(file).get(ControlFlowAnalysis)
+    assert [flow.is_reachable(s) for s in dead] == [False] * 5
+    fn = file.body.body[0]
+    assert flow.is_reachable(fn.body.body[1].final.body[0])
+    assert flow.is_reachable(alive)
+    graph = flow.graph(fn)
+    assert graph.entry in graph.reachable() and graph.exit in graph.reachable()
+
+
+def test_purity_analysis():
+    x = id_("x")
+    file = File(
+        def_(id_("sq"))(arg(x)).block(return_(x.expr() * x.expr())),
+        def_(id_("log"))(arg(x)).block(id_("print").expr().call(x).stmt()),
+        id_("len").expr().assign(id_("sq")),
+    )
+    purity = AnalysisManager(file).get(PurityAnalysis)
+    assert purity.pure_functions == {"sq"}
+    assert purity.is_pure(id_("sq").expr().call(x.expr()[litint(0)].attr("y")))
+    assert purity.is_pure(list_comp(x.expr().for_(x).in_(id_("abs").expr().call(x))))
+    assert not purity.is_pure(id_("log").expr().call(litint(1)))
+    assert not purity.is_pure(id_("len").expr().call(x))
+    assert not purity.is_pure(x.expr().named(litint(1)))
+
+
+class Halve(TransformerPass):
+    requires = (ScopeAnalysis,)
+    preserves = (ScopeAnalysis,)
+
+    def leave_Literal(self, node):
+        n = int(node.lit)
+        return litint(n // 2) if n > 1 else node
+
+
+class Double(TransformerPass):
+    requires = (ScopeAnalysis, PurityAnalysis)
+    after = ("Halve",)
+
+    def leave_Literal(self, node):
+        n = int(node.lit)
+        return litint(n * 2) if n == 1 else node
+
+
+def test_pass_manager():
+    file = File(id_("x").expr().assign(litint(8)))
+    pm = PassManager(Double(), Halve())
+    assert [p.name for p in pm.passes] == ["Halve", "Double"]
+    report = pm.run(file)
+    assert not report.converged and report.iterations == 8
+    assert file.into_str() in ("x = 1", "x = 2")
+    assert report.passes["Halve"].runs == 8 and report.passes["Double"].runs == 8
+    # scopes are preserved by `Halve` and recomputed after each `Double` that changes
+    assert report.analyses["ScopeAnalysis"].computations == 6
+    assert report.analyses["PurityAnalysis"].computations == 8
+    assert "Halve" in report.summary()
+
+    file = File(id_("x").expr().assign(litint(64)))
+    report = PassManager(Halve(), max_iterations=100).run(file)
+    assert report.converged and report.iterations == 7 and report.changes == 6
+
+    class Noop(Pass):
+        def run(self, file, analyses):
+            return 0
+
+    file = File(id_("x").expr().assign(litint(4)))
+    report = PassManager(Halve(), Noop()).run(file)
+    # `Noop` is skipped once nothing changed since it last ran
+    assert report.passes["Noop"].runs == 2 and report.passes["Halve"].runs == 3
+
+    report = PassManager(Halve(), budget=0).run(
+        File(id_("x").expr().assign(litint(64)))
+    )
+    assert report.iterations == 1 and not report.converged
+
+    class A(Noop):
+        after = ("B",)
+
+    class B(Noop):
+        after = ("A",)
+
+    with pytest.raises(ValueError, match="Cyclic"):
+        PassManager(A(), B())
+    with pytest.raises(ValueError, match="positive"):
+        PassManager(max_iterations=0)
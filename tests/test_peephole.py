@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import pytest
+
+from synt.passes import PassManager
+from synt.passes import PeepholeRewrite
+from synt.prelude import *
+
+from tests.helpers import call
+from tests.helpers import same_results
+
+
+def rewrite(*statements, args=(), rules=None):
+    params = [arg(id_(name), id_(ty)) for name, ty in args]
+    file = File(def_(id_("f"))(*params, arg(id_("y"))).block(*statements))
+    peephole = PeepholeRewrite(rules=rules)
+    PassManager(peephole).run(file)
+    return file.into_str().split("\n", 1)[1], peephole.counts
+
+
+def test_peephole_rules():
+    n, b, s, y = id_("n"), id_("b"), id_("s"), id_("y")
+    args = (("n", "int"), ("b", "bool"), ("s", "str"))
+    code, counts = rewrite(
+        return_(-n.expr().pow(litint(2))),
+        return_(litint(3).pow(n.expr().pow(litint(2)))),
+        return_(not_(n.expr().eq(litint(1)))),
+        return_(not_(y.expr().in_(s))),
+        return_(b.expr().eq(TRUE)),
+        return_(FALSE.is_(b).bool_and(y)),
+        return_(call("isinstance", y, id_("int")).is_not(FALSE)),
+        return_(s.expr().in_(list_(litstr("a"), litstr("b")))),
+        return_(y.expr().not_in(list_(litstr("a"), y))),
+        return_(y.expr().in_(list_(litint(1)))),
+        if_(litint(0).lt(call("len", s)).bool_or(y)).block(
+            return_(call("len", s).eq(litint(0)).attr("real"))
+        ),
+        args=args,
+    )
+    assert code == (
+        "    return - (n * n)\n"
+        "    return 3 ** (n * n)\n"
+        "    return n != 1\n"
+        "    return y not in s\n"
+        "    return b\n"
+        "    return not b and y\n"
+        "    return isinstance(y, int)\n"
+        "    return s in {'a', 'b'}\n"
+        "    return y not in ('a', y)\n"
+        "    return y in (1,)\n"
+        "    if s or y:\n"
+        "        return (not s).real"
+    )
+    assert counts == {
+        "square": 2,
+        "negated_compare": 2,
+        "bool_compare": 3,
+        "membership": 3,
+        "empty_len": 2,
+    }
+
+
+def test_peephole_kept():
+    n, f, s, y = id_("n"), id_("f"), id_("s"), id_("y")
+    args = (("n", "int"), ("f", "float"), ("s", "str"))
+    kept = [
+        # unknown, float or reassigned operands
+        return_(y.expr().pow(litint(2))),
+        return_(f.expr().pow(litint(2))),
+        return_(not_(y.expr().eq(litint(1)))),
+        return_(y.expr().eq(TRUE)),
+        return_(call("len", y).eq(litint(0))),
+        # non-bool results, chains and shadowed builtins
+        return_(call("len", s).gt(litint(0))),
+        return_(n.expr().lt(n).eq(TRUE)),
+    ]
+    for statement in kept:
+        code, counts = rewrite(statement, args=args)
+        assert not counts, code
+    code, counts = rewrite(
+        id_("len").expr().assign(y),
+        return_(call("len", s).eq(litint(0))),
+        args=args,
+    )
+    assert not counts, code
+    code, counts = rewrite(
+        n.expr().assign(y), return_(n.expr().pow(litint(2))), args=args
+    )
+    assert not counts, code
+    # disabled rules
+    code, counts = rewrite(
+        return_(n.expr().pow(litint(2))),
+        return_(n.expr().in_(list_(litint(1)))),
+        args=args,
+        rules=["membership"],
+    )
+    assert code == "    return n ** 2\n    return n in {1}"
+    assert counts == {"membership": 1}
+    with pytest.raises(ValueError, match="Unknown peephole rule"):
+        PeepholeRewrite(rules=["cube"])
+
+
+def test_peephole_semantics():
+    n, b, xs = id_("n"), id_("b"), id_("xs")
+
+    def build_file():
+        return File(
+            def_(id_("f"))(
+                arg(n, id_("int")), arg(b, id_("bool")), arg(xs, id_("list"))
+            ).block(
+                if_(call("len", xs).gt(litint(0))).block(
+                    xs.expr().attr("pop").call().stmt()
+                ),
+                return_(
+                    tup(
+                        n.expr().pow(litint(2)),
+                        not_(n.expr().eq(litint(2))),
+                        b.expr().eq(FALSE),
+                        n.expr().in_(list_(litint(1), TRUE, litstr("x"))),
+                        call("len", xs).eq(litint(0)),
+                        call("len", xs).ne(litint(0)),
+                    )
+                ),
+            )
+        )
+
+    same_results(
+        build_file,
+        PassManager(PeepholeRewrite()).run,
+        lambda ns: [
+            ns["f"](n, b, xs)
+            for n in (-3, 0, 1, 2)
+            for b in (True, False)
+            for xs in ([], [0])
+        ],
+    )
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from synt.passes import ConstantPooling
+from synt.passes import PassManager
+from synt.prelude import *
+
+from tests.helpers import call
+from tests.helpers import same_results
+
+
+def pool(*statements):
+    file = File(*statements)
+    PassManager(ConstantPooling(min_size=4)).run(file)
+    return file.into_str()
+
+
+def test_pool_containers():
+    k, x = id_("k"), id_("x")
+    names = list_(litstr("a"), litstr("b"), -litint(1))
+    config = dict_(kv(litstr("a"), litint(1)), kv(litstr("b"), tup(litint(2))))
+    code = pool(
+        from_(id_("__future__")).import_(id_("annotations")),
+        def_(id_("f"))(arg(k)).block(
+            for_(x).in_(names).block(call("g", x).stmt()),
+            return_(k.expr().in_(tup(litstr("a"), litstr("b"), -litint(1)))),
+        ),
+        def_(id_("g"))(arg(k)).block(
+            x.expr().assign(config[k]),
+            return_(config.attr("get").call(k)),
+        ),
+        list_comp(x.expr().for_(x).in_(set_(litint(1), litint(2), litint(3)))).stmt(),
+        call("sorted", set_(litint(1), litint(2), litint(3))).stmt(),
+    )
+    assert code == (
+        "from __future__ import annotations\n"
+        "_CONST_0 = ('a', 'b', - 1)\n"
+        "_CONST_1 = {'a': 1, 'b': (2,)}\n"
+        "_CONST_2 = frozenset({1, 2, 3})\n"
+        "def f(k):\n"
+        "    for x in _CONST_0:\n"
+        "        g(x)\n"
+        "    return k in _CONST_0\n"
+        "def g(k):\n"
+        "    x = _CONST_1[k]\n"
+        "    return _CONST_1.get(k)\n"
+        "[x for x in _CONST_2]\n"
+        "sorted(_CONST_2)"
+    )
+
+
+def test_pool_kept():
+    x = id_("x")
+    items = list_(litint(1), litint(2), litint(3))
+
+    def twice(e):
+        return pool(e.stmt(), e.stmt())
+
+    kept = [
+        # used once, too small, or not literals
+        pool(call("len", items).stmt()),
+        twice(call("len", list_(litint(1), litint(2)))),
+        twice(call("len", list_(litint(1), litint(2), x))),
+        twice(call("len", list_(list_(litint(1)), litint(2), litint(3)))),
+        # contexts where the container escapes, is mutated or converted differently
+        twice(call("g", items)),
+        twice(items + items),
+        twice(items[slice_(litint(1), litint(2))]),
+        twice(items.attr("append").call(litint(4))),
+        pool(*(items[litint(0)].assign(x) for _ in range(2))),
+        pool(
+            id_("len").expr().assign(x), *(call("len", items).stmt() for _ in range(2))
+        ),
+    ]
+    for code in kept:
+        assert "_CONST" not in code, code
+
+
+def test_pool_semantics():
+    k, x, out = id_("k"), id_("x"), id_("out")
+    table = dict_(*(kv(litstr(c), litint(i)) for i, c in enumerate("abcd")))
+    keys = list_(*(litstr(c) for c in "abcz"))
+
+    def build_file():
+        return File(
+            def_(id_("run"))().block(
+                out.expr().assign(list_()),
+                for_(k)
+                .in_(keys)
+                .block(
+                    out.expr().attr("append").call(table.attr("get").call(k)).stmt(),
+                    if_(k.expr().in_(table)).block(
+                        out.expr().attr("append").call(table[k]).stmt()
+                    ),
+                ),
+                out.expr().attr("append").call(call("sorted", keys)).stmt(),
+                out.expr()
+                .attr("append")
+                .call(keys.attr("index").call(litstr("z")))
+                .stmt(),
+                out.expr()
+                .attr("append")
+                .call(dict_comp(kv(x, x).for_(x).in_(table)))
+                .stmt(),
+                return_(out),
+            )
+        )
+
+    file = same_results(
+        build_file,
+        PassManager(ConstantPooling(min_size=4)).run,
+        lambda ns: (ns["run"](), ns["run"]()),
+    )
+    assert "_CONST_1" in file.into_str()
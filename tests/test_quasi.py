@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import ast
+
+import pytest
+import synt
+
+from synt.prelude import *
+from synt.quasi import Template
+from synt.quasi import template
+
+
+def test_quote_expr():
+    assert quote("{a} + {b} * 2", a=id_("x"), b=litint(3)).into_code() == "x + 3 * 2"
+    assert quote("({a} - {b}) - {a}", a=id_("x"), b=1).into_code() == "x - 1 - x"
+    assert quote("{a} - ({b} - {a})", a=id_("x"), b=1).into_code() == "x - (1 - x)"
+    assert quote("self._{name}", name="value").into_code() == "self._value"
+    assert quote("f'{{{x}!r:>{w}}}'", x=id_("y"), w=10).into_code() == 'f"{y!r:>10}"'
+
+
+def test_quote_grouping():
+    for source in (
+        "x = (k := 5)",
+        "(k := (j := 1))",
+        "f(x=(k := 5))",
+        "a if (b if c else d) else e",
+        "(a if b else c) if d else e",
+        "a if b else c if d else e",
+        "(a if b else c) if (k := 1) else (lambda: d)",
+    ):
+        code = quote(source).into_code()
+        assert ast.dump(ast.parse(code)) == ast.dump(ast.parse(source)), code
+
+
+def test_quote_stmt():
+    getter = synt.quote(
+        """
+        def get_{name}(self) -> int:
+            x = self._{name}
+            if x is None:
+                raise ValueError("missing {name}")
+            return x
+        """,
+        name="value",
+    )
+    assert (
+        getter.into_code()
+        == """def get_value(self) -> int:
+    x = self._value
+    if x is None:
+        raise ValueError('missing value')
+    return x"""
+    )
+
+    body = [id_("x").expr().assign(litint(1)), ret(id_("x"))]
+    assert quote("def f():\n    {body}", body=body).into_code() == (
+        "def f():\n    x = 1\n    return x"
+    )
+    assert isinstance(quote("a = 1\nb = 2"), Block)
+    assert quote("def f(a, *, b={b}): pass", b=1).into_code() == (
+        "def f(a, *, b = 1):\n    pass"
+    )
+
+
+def test_quote_cache():
+    assert template("{a} + 1") is template("{a} + 1")
+    assert isinstance(template("{a} + 1"), Template)
+    assert template("{a} + 1").placeholders == ("a",)
+
+
+def test_quote_errors():
+    with pytest.raises(ValueError, match="Invalid placeholder"):
+        template("{a.b}")
+    with pytest.raises(ValueError, match="Missing placeholder"):
+        quote("{a} + {b}", a=1)
+    with pytest.raises(ValueError, match="Unknown placeholder"):
+        quote("{a}", a=1, b=2)
+    with pytest.raises(ValueError, match="Unsupported statement"):
+        quote("x += 1")
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import pytest
+
+from synt.passes import PassManager
+from synt.passes import TreeShaking
+from synt.prelude import *
+
+from tests.helpers import call
+
+
+def fn(name, *body):
+    return def_(id_(name))().block(*(body or (PASS,)))
+
+
+def test_tree_shake():
+    x = id_("x")
+    file = File(
+        from_(id_("__future__")).import_(id_("annotations")),
+        from_(id_("typing")).import_(
+            id_("Any"), id_("cast"), id_("List").as_(id_("L"))
+        ),
+        import_(path(id_("os"), id_("path")), id_("sys")),
+        id_("__all__").expr().assign(list_(litstr("main"), litstr("unused"))),
+        id_("TABLE").expr().assign(dict_(kv(litint(1), id_("Base")))),
+        id_("STATE").expr().assign(call("load")),
+        class_(id_("Base"))().block(PASS),
+        class_(id_("Child"))(id_("Base")).block(PASS),
+        def_(id_("helper"))(arg(x, id_("Any"))).block(
+            return_(id_("os").expr().attr("path").attr("join").call(x))
+        ),
+        def_(id_("unused"))().decorator(id_("cast")).block(return_(id_("sys"))),
+        fn("pinned"),
+        def_(id_("main"))().block(return_(call("helper", id_("TABLE")))),
+        if_(id_("STATE")).block(call("unused_too").stmt()),
+        fn("unused_too"),
+    )
+    assert file.tree_shake(["main"], pinned=["pinned"]) == 6
+    assert file.into_str() == (
+        "from __future__ import annotations\n"
+        "from typing import Any\n"
+        "import os.path\n"
+        "__all__ = ['main']\n"
+        "TABLE = {1: Base}\n"
+        "STATE = load()\n"
+        "class Base:\n"
+        "    pass\n"
+        "def helper(x: Any):\n"
+        "    return os.path.join(x)\n"
+        "def pinned():\n"
+        "    pass\n"
+        "def main():\n"
+        "    return helper(TABLE)\n"
+        "if STATE:\n"
+        "    unused_too()\n"
+        "def unused_too():\n"
+        "    pass"
+    )
+    # the remaining file is closed under references
+    assert file.tree_shake(["main"], pinned=["pinned"]) == 0
+
+
+def test_tree_shake_kept():
+    file = File(
+        from_(id_("m")).import_("*"),
+        id_("a").expr().assign(litint(1)),
+        id_("a").expr().assign(id_("a").expr() + litint(1)),
+        tup(id_("b"), id_("c")).assign(tup(litint(1), litint(2))),
+        fn("__getattr__", return_(id_("c"))),
+        fn("main", return_(id_("a"))),
+    )
+    PassManager(TreeShaking(["main"])).run(file)
+    assert file.into_str() == (
+        "from m import *\n"
+        "a = 1\n"
+        "a = a + 1\n"
+        "b, c = (1, 2)\n"
+        "def __getattr__():\n"
+        "    return c\n"
+        "def main():\n"
+        "    return a"
+    )
+    with pytest.raises(ValueError, match="Unknown entry point"):
+        file.tree_shake(["mian"])
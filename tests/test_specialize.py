@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from synt import Specializer
+from synt.prelude import *
+
+
+def make_getter(index: int):
+    return def_(id_("get"))(arg(id_("row"))).block(
+        return_(id_("row").expr()[litint(index)])
+    )
+
+
+def test_specializer():
+    getters = Specializer(make_getter, maxsize=2)
+    assert getters(0)((1, 2, 3)) == 1
+    assert getters(0) is getters(0)
+    getters(1)
+    getters(2)  # evicts 0
+    stats = getters.stats()
+    assert (stats.hits, stats.misses, stats.evictions) == (2, 3, 1)
+
+    lfu = Specializer(make_getter, maxsize=2, policy="lfu")
+    first = lfu(0)
+    lfu(0)
+    lfu(1)
+    lfu(2)  # evicts 1
+    assert lfu(0) is first
+    assert lfu.stats().evictions == 1
+
+    # positional and keyword arguments never share a key
+    def make(*args, **kwargs):
+        return def_(id_("get"))().block(return_(litstr(repr((args, kwargs)))))
+
+    keyed = Specializer(make)
+    assert keyed((), (("a", 1),))() == "(((), (('a', 1),)), {})"
+    assert keyed(a=1)() == "((), {'a': 1})"
+
+    with pytest.raises(ValueError, match="eviction policy"):
+        Specializer(make_getter, policy="fifo")  # type:ignore[arg-type]
+
+
+def test_specializer_concurrent():
+    calls = []
+
+    def slow(index: int):
+        calls.append(index)
+        time.sleep(0.05)
+        return make_getter(index)
+
+    getters = Specializer(slow)
+    threads = [threading.Thread(target=getters, args=(0,)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert calls == [0]
+    assert getters.stats().hit_rate == 7 / 8
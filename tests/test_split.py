@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import pytest
+
+from synt.passes import FunctionSplitting
+from synt.passes import PassManager
+from synt.prelude import *
+
+from tests.helpers import call
+from tests.helpers import same_results
+
+
+def split(*statements, max_size=4, chunk_size=2):
+    file = File(*statements)
+    PassManager(FunctionSplitting(max_size=max_size, chunk_size=chunk_size)).run(file)
+    return file.into_str()
+
+
+def test_split_blocks():
+    i, x, y, xs = id_("i"), id_("x"), id_("y"), id_("xs")
+    code = split(
+        class_(id_("A"))().block(
+            def_(id_("f"))(arg(id_("self")), arg(xs)).block(
+                x.expr().assign(litint(0)),
+                for_(i)
+                .in_(xs)
+                .block(
+                    x.expr().assign(x.expr() + i),
+                    y.expr().assign(x.expr() * litint(2)),
+                    if_(y.expr().gt(litint(9))).block(BREAK),
+                    call("g", y).stmt(),
+                    call("g", x).stmt(),
+                ),
+                y.expr().assign(id_("self").expr().attr("z")),
+                call("g", x).stmt(),
+                return_(y),
+            ),
+        ),
+    )
+    assert code == (
+        "def _f_part(i, x):\n"
+        "    x = x + i\n"
+        "    y = x * 2\n"
+        "    return (x, y)\n"
+        "def _f_part_1(x, y):\n"
+        "    g(y)\n"
+        "    g(x)\n"
+        "def _f_part_2(self, x, xs):\n"
+        "    for i in xs:\n"
+        "        x, y = _f_part(i, x)\n"
+        "        if y > 9:\n"
+        "            break\n"
+        "        _f_part_1(x, y)\n"
+        "    y = self.z\n"
+        "    return (x, y)\n"
+        "class A:\n"
+        "    def f(self, xs):\n"
+        "        x = 0\n"
+        "        x, y = _f_part_2(self, x, xs)\n"
+        "        g(x)\n"
+        "        return y"
+    )
+
+
+def test_split_kept():
+    x, y, xs = id_("x"), id_("y"), id_("xs")
+
+    def fn(*statements, **kwargs):
+        return def_(id_("f"))(arg(xs), **kwargs).block(
+            *statements, *(call("g", xs).stmt() for _ in range(4))
+        )
+
+    kept = [
+        # parameters which may be unbound, and frame-dependent statements
+        fn(if_(xs).block(x.expr().assign(litint(1))), call("g", x).stmt()),
+        fn(call("g", call("locals")).stmt()),
+        fn(call("g", yield_(xs)).stmt()),
+        fn(global_(xs)),
+        fn(x.expr().assign(lambda_().ret(xs))),
+        fn(x.expr().assign(xs.expr().for_(y).in_(xs))),
+        # blocks where exceptions may be caught
+        def_(id_("f"))(arg(xs)).block(
+            try_(*(call("g", xs).stmt() for _ in range(6))).except_().block(PASS)
+        ),
+    ]
+    for statement in kept:
+        code = split(statement, max_size=4, chunk_size=4)
+        # only the trailing calls may be moved
+        helpers = code.split("def f(")[0].splitlines()
+        assert all(line == "    g(xs)" for line in helpers[1:]), code
+    # generators consumed by the call and closures reading no locals are moved
+    code = split(
+        fn(
+            x.expr().assign(call("sum", xs.expr().for_(y).in_(xs))),
+            y.expr().assign(lambda_(y).ret(y)),
+            return_(tup(x, y)),
+        ),
+        max_size=4,
+        chunk_size=4,
+    )
+    assert "_f_part(xs)" in code
+    with pytest.raises(ValueError, match="Chunk size"):
+        FunctionSplitting(max_size=4, chunk_size=8)
+
+
+def test_split_semantics():
+    i, n, a, b, c, out = id_("i"), id_("n"), id_("a"), id_("b"), id_("c"), id_("out")
+    append = out.expr().attr("append")
+
+    def build_file(delete):
+        statements = [out.expr().assign(list_()), a.expr().assign(litint(1))]
+        for k in range(40):
+            statements.append(b.expr().assign(a.expr() * litint(k % 7) + litint(k)))
+            statements.append(
+                if_(b.expr() % litint(3) == litint(0))
+                .block(c.expr().assign(b.expr() - a.expr()))
+                .else_(c.expr().assign(a.expr()))
+            )
+            statements.append(
+                for_(i)
+                .in_(call("range", n))
+                .block(
+                    a.expr().assign((a.expr() + c.expr() + i) % litint(1000)),
+                    if_(a.expr().gt(litint(900))).block(CONTINUE),
+                    append.call(tup(a, i)).stmt(),
+                )
+            )
+        if delete:
+            # the caller must see `c` unbound
+            statements.append(del_(c))
+            statements.extend(b.expr().assign(b.expr() + a.expr()) for _ in range(8))
+        statements.append(return_(tup(out, a, b, c)))
+        return File(def_(id_("run"))(arg(n)).block(*statements))
+
+    def results(ns):
+        try:
+            return ns["run"](5)
+        except UnboundLocalError as e:
+            return type(e)
+
+    for delete in (False, True):
+        file = same_results(
+            lambda delete=delete: build_file(delete),
+            PassManager(FunctionSplitting(max_size=16, chunk_size=8)).run,
+            results,
+        )
+        assert file.into_str().count("def ") > 10
@@ -13,6 +13,11 @@ def test_fn():
     va = kwarg(id_("foo")).ty(id_("tuple").expr()[id_("str"), id_("int")])
     assert va.into_code() == "**foo: tuple[str, int]"
 
+    f = def_(id_("f"))(id_("a"), kwonly(id_("b")), kwarg(id_("c"))).block(PASS)
+    assert f.into_code() == "def f(a, *, b, **c):\n    pass"
+    f = def_(id_("f"))(vararg(id_("a")), kwonly(id_("b")).default(NONE)).block(PASS)
+    assert f.into_code() == "def f(*a, b = None):\n    pass"
+
     func = (
         dec(id_("foo"))
         .async_def(id_("bar"))[id_("T")](
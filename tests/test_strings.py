@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from synt.passes import PassManager
+from synt.passes import StringBuilding
+from synt.prelude import *
+
+from tests.helpers import call
+from tests.helpers import same_results
+
+
+def build(*statements, args=("x", "y"), **kwargs):
+    file = File(def_(id_("f"))(*(arg(id_(a)) for a in args)).block(*statements))
+    PassManager(StringBuilding(**kwargs)).run(file)
+    return file.into_str()
+
+
+def test_strings_chains():
+    x, y = id_("x"), id_("y")
+    code = build(
+        return_(
+            litstr("x = ")
+            + call("str", x)
+            + litstr(', y = "{')
+            + call("repr", y)
+            + litstr("}'")
+            + call("format", x)
+            + call("ascii", x.expr() + y.expr())
+        )
+    )
+    assert code.endswith("""return f"x = {x!s}, y = \\"{{{y!r}}}'{x}{x + y!a}\"""")
+    # chains of unknown types are kept, unless assumed to be strings
+    kept = litstr("<") + x.expr() + litstr(">")
+    assert build(return_(kept)).endswith("return '<' + x + '>'")
+    assert build(return_(kept), assume_str=True).endswith('return f"<{x}>"')
+    assert build(return_(x.expr() + y.expr() + x.expr()), assume_str=True).endswith(
+        "return x + y + x"
+    )
+    # short chains, numbers and shadowed builtins
+    assert build(return_(litstr("a") + litstr("b"))).endswith("return 'a' + 'b'")
+    assert build(return_(litint(1) + litstr("a") + litstr("b"))).endswith(
+        "return 1 + 'a' + 'b'"
+    )
+    code = build(
+        id_("str").expr().assign(id_("bytes")),
+        return_(litstr("a") + call("str", x) + litstr("b")),
+    )
+    assert code.endswith("return 'a' + str(x) + 'b'")
+    # `s = s + t` extends `s` in place
+    s = id_("s")
+    code = build(s.expr().assign(s.expr() + litstr("a") + call("str", x)), return_(s))
+    assert "s = s + 'a' + str(x)" in code
+
+
+def test_strings_format_nodes():
+    x = id_("x")
+    code = build(
+        return_(
+            fstring(
+                "a",
+                fnode(litstr("b{")),
+                fnode(fstring("c", fnode(x))),
+                fnode(litstr("d"), "<4"),
+                fnode(fstring("e"), conversion="r"),
+                "",
+                fnode(x),
+            )
+        )
+    )
+    assert code.endswith('return f"ab{{c{x}{\'d\':<4}{f"e"!r}{x}"')
+
+
+def test_strings_join():
+    acc, x, xs = id_("acc"), id_("x"), id_("xs")
+
+    def loop(*body, init="", **kwargs):
+        return build(
+            acc.expr().assign(litstr(init)),
+            for_(x).in_(xs).block(*body),
+            return_(acc),
+            args=("xs",),
+            **kwargs,
+        )
+
+    append = acc.expr().assign(acc.expr() + call("str", x))
+    assert loop(append).endswith(
+        "    acc = ''.join([str(x) for x in xs])\n    return acc"
+    )
+    code = loop(
+        if_(x).block(
+            for_(id_("c")).in_(x).block(acc.expr().assign(acc.expr() + id_("c"))),
+        ),
+        init="[",
+        assume_str=True,
+    )
+    assert "acc = '[' + ''.join([c for x in xs if x for c in x])" in code
+    # loops doing anything else, reading the accumulator or leaking their targets
+    kept = [
+        loop(append, call("g").stmt()),
+        loop(acc.expr().assign(acc.expr() + x.expr())),
+        loop(acc.expr().assign(acc.expr() + call("str", acc))),
+        loop(if_(x).block(append).else_(BREAK)),
+    ]
+    for code in kept:
+        assert "join" not in code, code
+    code = build(
+        acc.expr().assign(litstr("")),
+        for_(x).in_(xs).block(append),
+        return_(acc.expr() + x.expr()),
+        args=("xs",),
+    )
+    assert "join" not in code
+
+
+def test_strings_semantics():
+    acc, x, xs = id_("acc"), id_("x"), id_("xs")
+
+    def build_file():
+        return File(
+            def_(id_("f"))(arg(xs)).block(
+                acc.expr().assign(litstr("'{")),
+                for_(x)
+                .in_(xs)
+                .block(
+                    acc.expr().assign(
+                        acc.expr()
+                        + litstr('"')
+                        + call("repr", x)
+                        + litstr("\\}")
+                        + call("format", x)
+                    )
+                ),
+                return_(
+                    acc.expr() + litstr("\n") + call("ascii", xs) + call("str", xs)
+                ),
+            )
+        )
+
+    file = same_results(
+        build_file,
+        PassManager(StringBuilding()).run,
+        lambda ns: ns["f"]([1, "é", None, 2.5]),
+    )
+    assert "join" in file.into_str()
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import pytest
+
+from synt.passes import LoopUnrolling
+from synt.passes import PassManager
+from synt.prelude import *
+
+from tests.helpers import call
+from tests.helpers import same_results
+
+
+def unroll(*statements, function=True, **kwargs):
+    if function:
+        statements = (def_(id_("f"))(arg(id_("k"))).block(*statements),)
+    file = File(*statements)
+    PassManager(LoopUnrolling(**kwargs)).run(file)
+    code = file.into_str()
+    return code.removeprefix("def f(k):\n") if function else code
+
+
+def test_unroll_substitute():
+    i = id_("i")
+    assert unroll(
+        for_(i)
+        .in_(call("range", litint(3)))
+        .block(call("print", i.expr() * id_("k")).stmt()),
+        return_(i),
+    ) == (
+        "    print(0 * k)\n    print(1 * k)\n    print(2 * k)\n    i = 2\n    return i"
+    )
+    assert unroll(
+        for_(i)
+        .in_(call("range", litint(-3), litint(0), litint(2)))
+        .block(call("print", i.expr().attr("real") + i.expr() * id_("k")).stmt())
+        .else_(call("print", i).stmt()),
+    ) == (
+        "    print((-3).real + (-3) * k)\n"
+        "    print((-1).real + (-1) * k)\n"
+        "    i = -1\n"
+        "    print(i)"
+    )
+    # nested loops unroll inside out
+    j = id_("j")
+    code = unroll(
+        for_(i)
+        .in_(list_(litstr("a"), litstr("b")))
+        .block(
+            for_(j)
+            .in_(call("range", litint(2)))
+            .block(
+                call("print", i, j).stmt(),
+            ),
+        ),
+    )
+    assert code.split("\n")[:4] == [
+        "    print('a', 0)",
+        "    print('a', 1)",
+        "    j = 1",
+        "    print('b', 0)",
+    ]
+
+
+def test_unroll_assign():
+    i, k, v = id_("i"), id_("k"), id_("v")
+    # module level, captured or rebound targets are assigned before each copy
+    assert unroll(
+        for_(i).in_(tup(litint(1), litint(2))).block(call("print", i).stmt()),
+        function=False,
+    ) == ("i = 1\nprint(i)\ni = 2\nprint(i)")
+    assert unroll(
+        for_(i)
+        .in_(tup(litint(1), litint(2)))
+        .block(call("print", lambda_(id_("x")).ret(i)).stmt()),
+    ).startswith("    i = 1\n    print(lambda x: i)\n    i = 2\n")
+    assert unroll(
+        for_(i).in_(tup(litint(1))).block(i.expr().assign(i.expr() + litint(1))),
+    ) == ("    i = 1\n    i = i + 1")
+    assert unroll(
+        for_(tup(k, v))
+        .in_(tup(tup(litstr("a"), litint(1)), tup(litstr("b"), litint(2))))
+        .block(call("print", k, v).stmt()),
+    ) == ("    k, v = ('a', 1)\n    print(k, v)\n    k, v = ('b', 2)\n    print(k, v)")
+    # empty sequences only run the `else` branch
+    assert unroll(
+        for_(i).in_(tup()).block(call("print", i).stmt()).else_(return_(litint(0))),
+    ) == ("    return 0")
+
+
+def test_unroll_kept():
+    i = id_("i")
+    kept = [
+        # jumps of the loop
+        for_(i).in_(tup(litint(1), litint(2))).block(if_(i).block(BREAK)),
+        for_(i).in_(tup(litint(1), litint(2))).block(if_(i).block(CONTINUE)),
+        # long or non-constant sequences
+        for_(i).in_(call("range", litint(100))).block(call("print", i).stmt()),
+        for_(i).in_(call("range", id_("k"))).block(call("print", i).stmt()),
+        for_(i).in_(tup(call("g"), litint(1))).block(call("print", i).stmt()),
+        for_(i).in_(list_(list_(), litint(1))).block(call("print", i).stmt()),
+        for_(i).in_(id_("k")).block(call("print", i).stmt()),
+    ]
+    for loop in kept:
+        assert unroll(loop).startswith("    for i in "), loop.into_code()
+    # jumps of nested loops are fine
+    code = unroll(
+        for_(i)
+        .in_(tup(litint(1)))
+        .block(
+            for_(id_("j")).in_(id_("k")).block(BREAK),
+        ),
+    )
+    assert code == "    for j in k:\n        break\n    i = 1"
+    # `range` may be rebound
+    code = unroll(
+        id_("range").expr().assign(id_("list")),
+        for_(i).in_(call("range", litint(2))).block(call("print", i).stmt()),
+        function=False,
+    )
+    assert "for i in range(2):" in code
+    assert unroll(
+        for_(i).in_(call("range", litint(4))).block(call("print", i).stmt()),
+        max_statements=3,
+    ).startswith("    for i in ")
+    with pytest.raises(ValueError, match="negative"):
+        LoopUnrolling(max_length=-1)
+
+
+def test_unroll_semantics():
+    i, j, out = id_("i"), id_("j"), id_("out")
+
+    def build():
+        return File(
+            def_(id_("f"))(arg(id_("k"))).block(
+                out.expr().assign(list_()),
+                for_(i)
+                .in_(call("range", litint(1), litint(4)))
+                .block(
+                    for_(j)
+                    .in_(tup(litstr("a"), litstr("b")))
+                    .block(
+                        out.expr()
+                        .attr("append")
+                        .call(j.expr() * i.expr() + id_("k"))
+                        .stmt(),
+                    ),
+                    out.expr().attr("append").call(call("str", i)).stmt(),
+                ),
+                return_(tup(out, i, j)),
+            )
+        )
+
+    file = same_results(
+        build, PassManager(LoopUnrolling()).run, lambda ns: ns["f"]("!")
+    )
+    assert "for " not in file.into_str()
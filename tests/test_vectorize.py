@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import pytest
+
+from synt.prelude import *
+
+
+np = pytest.importorskip("numpy")
+
+
+def test_numpy_kernel():
+    price, qty, cat = id_("price").expr(), id_("qty").expr(), id_("cat").expr()
+    rule = (
+        (price * qty)
+        .if_(qty.gt(litint(0)).bool_and(cat.in_(list_(litint(1), litint(2)))))
+        .else_(id_("abs").expr().call(price).neg())
+    )
+    columns = [id_("price"), id_("qty"), id_("cat")]
+    kernel = rule.to_numpy_kernel(columns=columns)
+    assert kernel is rule.to_numpy_kernel(columns=columns)
+
+    rng = np.random.default_rng(0)
+    p, q, c = rng.random(100), rng.integers(-5, 5, 100), rng.integers(0, 4, 100)
+    f = rule.compile_function(args=columns)
+    expected = [f(*row) for row in zip(p.tolist(), q.tolist(), c.tolist(), strict=True)]
+    assert np.allclose(kernel(p, q, c), expected)
+
+    chain = litint(1).lt(price).le(litint(3)).to_numpy_kernel(columns=[id_("price")])
+    assert chain([0, 2, 3, 4]).tolist() == [False, True, True, False]
+
+
+def test_numpy_kernel_errors():
+    price = id_("price").expr()
+    with pytest.raises(ValueError, match="Unknown column"):
+        id_("other").expr().to_numpy_kernel(columns=[id_("price")])
+    with pytest.raises(ValueError, match="Attribute has no NumPy equivalent"):
+        price.attr("x").to_numpy_kernel(columns=[id_("price")])
+    with pytest.raises(ValueError, match="not a NumPy ufunc"):
+        id_("print").expr().call(price).to_numpy_kernel(columns=[id_("price")])
+    # ufuncs take their outputs as extra arguments
+    for call in (
+        id_("abs").expr().call(price, price),
+        id_("np").expr().attr("add").call(price, price, price),
+        id_("round").expr().call(price, litint(1), price),
+        id_("max").expr().call(price),
+    ):
+        with pytest.raises(ValueError, match=r"argument|single iterable"):
+            call.to_numpy_kernel(columns=[id_("price")])
+
+
+def test_numpy_kernel_calls():
+    a, b, c = id_("a"), id_("b"), id_("c")
+    columns = [a, b, c]
+    values = [np.array([1, 5, 3]), np.array([4, 2, 6]), np.array([2, 3, 1])]
+    smallest = id_("min").expr().call(a, b, c).to_numpy_kernel(columns=columns)
+    assert smallest(*values).tolist() == [1, 2, 1]
+    assert values[2].tolist() == [2, 3, 1]
+    largest = (
+        id_("max").expr().call(a, b, c, litint(4)).to_numpy_kernel(columns=columns)
+    )
+    assert largest(*values).tolist() == [4, 5, 6]
+    rounded = id_("round").expr().call(a.expr() / litint(3), litint(1))
+    assert rounded.to_numpy_kernel(columns=columns)(*values).tolist() == [0.3, 1.7, 1.0]
+
+
+def test_numpy_kernel_structure():
+    c, c2, t2, f2, f = (id_(n) for n in ("c", "c2", "t2", "f2", "f"))
+    inner = t2.expr().if_(c2).else_(f2).if_(c).else_(f)
+    outer = t2.expr().if_(c2).else_(f2.expr().if_(c).else_(f))
+    assert inner.into_code() == outer.into_code()
+    columns = [c, c2, t2, f2, f]
+    values = (np.array([False]), np.array([True]), [1], [3], [5])
+    assert outer.to_numpy_kernel(columns=columns)(*values).tolist() == [1]
+    assert inner.to_numpy_kernel(columns=columns)(*values).tolist() == [5]
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import pytest
+
+from synt.code import IntoCode
+from synt.expr.binary_op import BinaryOp
+from synt.expr.binary_op import BinaryOpType
+from synt.prelude import *
+from synt.visit import NodeTransformer
+from synt.visit import NodeVisitor
+from synt.visit import children
+from synt.visit import unshare
+from synt.visit import walk
+
+
+def _subclasses(cls):
+    for sub in cls.__subclasses__():
+        yield sub
+        yield from _subclasses(sub)
+
+
+def test_child_fields_schema():
+    for cls in [*_subclasses(IntoCode), File]:
+        annotations = {}
+        for klass in cls.__mro__:
+            annotations.update(getattr(klass, "__annotations__", {}))
+        for field in cls.child_fields:
+            assert field in annotations, f"{cls.__name__}.{field}"
+
+
+def test_visitor():
+    class Collector(NodeVisitor):
+        def __init__(self):
+            self.events = []
+
+        def visit_Identifier(self, node):
+            self.events.append(node.raw)
+
+        def visit_Closure(self, node):
+            return False
+
+        def leave_Statement(self, node):
+            self.events.append(type(node).__name__)
+
+    tree = File(
+        if_(id_("a").expr()).block(
+            id_("b").expr().assign(lambda_(id_("c")).ret(id_("c")))
+        ),
+        ret(id_("d")),
+    )
+    c = Collector()
+    c.visit(tree)
+    assert c.events == [
+        "a",
+        "b",
+        "Assignment",
+        "Block",
+        "Branch",
+        "d",
+        "Return",
+        "Block",
+    ]
+    assert [type(x).__name__ for x in children(tree.body.body[0])] == [
+        "IdentifierExpr",
+        "Block",
+    ]
+
+
+def test_transformer():
+    class Rewrite(NodeTransformer):
+        def leave_Literal(self, node):
+            return litint(int(node.lit) * 10)
+
+        def leave_ExprStatement(self, node):
+            return None
+
+        def leave_Return(self, node):
+            return [id_("x").expr().assign(node.expression), ret(id_("x"))]
+
+    tree = File(
+        id_("print").expr().call(litint(1)).stmt(),
+        ret(id_("a").expr() + litint(2)),
+    )
+    t = Rewrite()
+    assert t.transform(tree) is tree
+    assert tree.into_str() == "x = a + 20\nreturn x"
+    assert t.changes == 4
+
+    class Bad(NodeTransformer):
+        def leave_Literal(self, node):
+            return [node, node]
+
+    with pytest.raises(TypeError, match="Cannot splice"):
+        Bad().transform(id_("a").expr() + litint(1))
+
+
+def test_deep_tree():
+    e = id_("x").expr()
+    for i in range(50_000):
+        e = BinaryOp(BinaryOpType.Add, e, litint(i))
+    assert sum(1 for _ in walk(e)) == 100_002
+
+
+def test_unshare():
+    x = id_("x").expr()
+    e = x.attr("a").expr() + x.attr("b").expr()
+    assert unshare(e) == 1
+    assert e.left.target is x and e.right.target is not x
+    assert e.into_code() == "x.a + x.b"
+    assert unshare(e) == 0